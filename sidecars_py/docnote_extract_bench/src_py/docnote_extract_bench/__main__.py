@@ -0,0 +1,214 @@
+"""Runs the full ``gather`` pipeline against a synthetic package and
+reports throughput and peak memory as JSON. For example:
+
+``uv run python -m docnote_extract_bench --module-count 500 \\
+--output baseline.json``
+
+and then, after making changes:
+
+``uv run python -m docnote_extract_bench --module-count 500 \\
+--baseline baseline.json``
+
+which exits with a nonzero status if throughput regressed (or peak
+memory increased) by more than the tolerance.
+
+Note that peak RSS is process-wide, so it always reflects the most
+expensive repetition (and includes generating the package). Run a
+separate process per configuration if you want to compare them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from dataclasses import fields
+from importlib.metadata import PackageNotFoundError
+from importlib.metadata import version as get_distribution_version
+from pathlib import Path
+from typing import Any
+
+from docnote_extract import gather
+
+from docnote_extract_bench.synth import SynthSpec
+from docnote_extract_bench.synth import write_synthetic_package
+
+# Higher is better for these; lower is better for everything else we
+# compare.
+_THROUGHPUT_METRICS = ('modules_per_second', 'summaries_per_second')
+_MEMORY_METRICS = ('peak_rss_bytes',)
+
+
+def run_benchmark(
+        spec: SynthSpec,
+        *,
+        repeat: int = 3,
+        jobs: int | None = None
+        ) -> dict[str, Any]:
+    """Generates the synthetic package for ``spec`` and gathers it
+    ``repeat`` times, returning a JSON-compatible dict of results. The
+    throughput numbers are from the fastest repetition.
+    """
+    with tempfile.TemporaryDirectory() as tempdir:
+        synth_pkg = write_synthetic_package(spec, Path(tempdir))
+        sys.path.insert(0, tempdir)
+        try:
+            runs: list[dict[str, Any]] = []
+            for _ in range(repeat):
+                wall_start = time.perf_counter()
+                cpu_start = time.process_time()
+                docnotes = gather(
+                    [synth_pkg.pkg_name],
+                    nostub_firstparty_modules=(
+                        synth_pkg.nostub_firstparty_modules),
+                    nostub_packages=synth_pkg.nostub_packages,
+                    jobs=jobs,
+                    collect_stats=True)
+                wall_seconds = time.perf_counter() - wall_start
+                cpu_seconds = time.process_time() - cpu_start
+
+                stats = docnotes.stats
+                if stats is None:
+                    raise RuntimeError('Gather returned no stats!')
+
+                summary_count = sum(stats.summary_counts.values())
+                module_count = stats.summary_counts.get('ModuleSummary', 0)
+                runs.append({
+                    'wall_seconds': wall_seconds,
+                    'cpu_seconds': cpu_seconds,
+                    'module_count': module_count,
+                    'summary_count': summary_count,
+                    'modules_per_second': module_count / wall_seconds,
+                    'summaries_per_second': summary_count / wall_seconds,
+                    'stats': stats.as_dict()})
+                # Don't keep the docnotes alive into the next repetition
+                del docnotes, stats
+
+        finally:
+            sys.path.remove(tempdir)
+            for module_name in list(sys.modules):
+                if module_name.partition('.')[0] in {
+                    synth_pkg.pkg_name, spec.thirdparty_pkg_name
+                }:
+                    del sys.modules[module_name]
+
+    fastest = min(runs, key=lambda run: run['wall_seconds'])
+    return {
+        'spec': asdict(spec),
+        'jobs': jobs,
+        'environment': {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'docnote_extract': _get_version('docnote_extract'),
+            'docnote': _get_version('docnote')},
+        'modules_per_second': fastest['modules_per_second'],
+        'summaries_per_second': fastest['summaries_per_second'],
+        'peak_rss_bytes': _get_peak_rss_bytes(),
+        'runs': runs}
+
+
+def compare_to_baseline(
+        results: dict[str, Any],
+        baseline: dict[str, Any],
+        *,
+        tolerance: float
+        ) -> list[str]:
+    """Compares the results to a baseline, returning a list of
+    human-readable regressions (which is empty if there were none).
+    """
+    regressions: list[str] = []
+    if results['spec'] != baseline['spec']:
+        regressions.append('Spec differs from baseline; not comparable!')
+        return regressions
+
+    for metric in _THROUGHPUT_METRICS:
+        ratio = results[metric] / baseline[metric]
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f'{metric}: {results[metric]:.1f} vs baseline '
+                + f'{baseline[metric]:.1f} ({ratio:.1%})')
+
+    for metric in _MEMORY_METRICS:
+        ratio = results[metric] / baseline[metric]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f'{metric}: {results[metric]} vs baseline '
+                + f'{baseline[metric]} ({ratio:.1%})')
+
+    return regressions
+
+
+def _get_peak_rss_bytes() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB; macos reports bytes. Of course.
+    if sys.platform == 'darwin':
+        return max_rss
+    return max_rss * 1024
+
+
+def _get_version(distribution: str) -> str | None:
+    try:
+        return get_distribution_version(distribution)
+    except PackageNotFoundError:
+        return None
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m docnote_extract_bench',
+        description='Benchmark docnote_extract against a synthetic package.')
+
+    defaults = SynthSpec()
+    for spec_field in fields(SynthSpec):
+        default = getattr(defaults, spec_field.name)
+        flag = '--' + spec_field.name.replace('_', '-')
+        if isinstance(default, bool):
+            parser.add_argument(
+                flag, action=argparse.BooleanOptionalAction, default=default)
+        else:
+            parser.add_argument(flag, type=type(default), default=default)
+
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument(
+        '--output', type=Path, default=None,
+        help='Write the results here (in addition to stdout).')
+    parser.add_argument(
+        '--baseline', type=Path, default=None,
+        help='Compare the results against a previous output file.')
+    parser.add_argument(
+        '--tolerance', type=float, default=.1,
+        help='Allowed relative regression when comparing to a baseline.')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _make_parser().parse_args(argv)
+    spec = SynthSpec(**{
+        spec_field.name: getattr(args, spec_field.name)
+        for spec_field in fields(SynthSpec)})
+
+    results = run_benchmark(spec, repeat=args.repeat, jobs=args.jobs)
+    rendered = json.dumps(results, indent=2)
+    print(rendered)
+    if args.output is not None:
+        args.output.write_text(rendered)
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(
+            results, baseline, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
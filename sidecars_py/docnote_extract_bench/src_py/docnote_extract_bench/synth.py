@@ -0,0 +1,265 @@
+"""Generates synthetic firstparty packages for benchmarking. Everything
+here is deterministic for a given ``SynthSpec`` (including its seed),
+so that results are comparable between commits.
+
+The generated code is deliberately boring, but it tries to exercise
+all of the expensive parts of extraction: thirdparty imports (which
+get stubbed), firstparty imports (which get tracked), classes with
+stubbed thirdparty bases, methods with overloads, and
+``Annotated``/``Note`` params.
+"""
+from __future__ import annotations
+
+import random
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class SynthSpec:
+    """The knobs for a synthetic package. The total module count
+    includes the root package and any intermediate subpackages.
+    """
+    pkg_name: str = 'docnote_extract_bench_synth'
+    module_count: int = 50
+    # A depth of 1 puts every module directly within the root package
+    nesting_depth: int = 3
+    classes_per_module: int = 5
+    methods_per_class: int = 5
+    # Zero disables overloads. Otherwise, every other method gets this
+    # many overloads.
+    overloads_per_method: int = 0
+    # The fraction (0-1) of params that are ``Annotated`` with a ``Note``
+    note_density: float = 0.5
+    # How many distinct thirdparty packages each module imports from
+    thirdparty_fanout: int = 3
+    # How many (earlier) firstparty modules each module imports from
+    firstparty_fanout: int = 2
+    # The fraction (0-1) of modules passed as ``nostub_firstparty_modules``
+    nostub_fraction: float = 0.0
+    # If true, the thirdparty packages are also generated (as a single
+    # real package), and passed as ``nostub_packages``. Otherwise, they
+    # don't exist at all, and will always be stubbed.
+    nostub_thirdparty: bool = False
+    seed: int = 42
+
+    @property
+    def thirdparty_pkg_name(self) -> str:
+        return f'{self.pkg_name}_thirdparty'
+
+
+@dataclass(slots=True, frozen=True)
+class SynthPackage:
+    """The result of ``write_synthetic_package``, with the options
+    that should be passed to ``gather`` for it.
+    """
+    root_dir: Path
+    pkg_name: str
+    module_names: tuple[str, ...]
+    nostub_firstparty_modules: frozenset[str]
+    nostub_packages: frozenset[str]
+
+
+def write_synthetic_package(spec: SynthSpec, root_dir: Path) -> SynthPackage:
+    """Writes the synthetic package described by ``spec`` into
+    ``root_dir``, which should then be added to ``sys.path``.
+    """
+    if spec.module_count < 1 or spec.nesting_depth < 1:
+        raise ValueError(
+            'Module count and nesting depth must be positive!', spec)
+
+    # This is a seeded RNG used purely to get deterministic (but varied)
+    # package layouts; it has nothing to do with cryptography.
+    rng = random.Random(spec.seed)  # noqa: S311
+    module_names = _plan_module_names(spec)
+    packages = {
+        module_name.rpartition('.')[0] for module_name in module_names}
+    packages.discard('')
+
+    thirdparty_modules = [
+        f'{spec.thirdparty_pkg_name}.dep{index}'
+        for index in range(max(spec.thirdparty_fanout * 2, 1))]
+    if spec.nostub_thirdparty:
+        _write_thirdparty_package(spec, root_dir, thirdparty_modules)
+
+    for index, module_name in enumerate(module_names):
+        if module_name in packages or module_name == spec.pkg_name:
+            path = root_dir.joinpath(*module_name.split('.'), '__init__.py')
+        else:
+            *parents, leaf = module_name.split('.')
+            path = root_dir.joinpath(*parents, f'{leaf}.py')
+
+        # Only importing from earlier modules avoids import cycles, and
+        # excluding parents avoids importing a package from within its own
+        # ``__init__``
+        firstparty_candidates = [
+            earlier for earlier in module_names[:index]
+            if not module_name.startswith(f'{earlier}.')]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_render_module(
+            spec,
+            rng,
+            thirdparty_modules=rng.sample(
+                thirdparty_modules,
+                min(spec.thirdparty_fanout, len(thirdparty_modules))),
+            firstparty_modules=rng.sample(
+                firstparty_candidates,
+                min(spec.firstparty_fanout, len(firstparty_candidates)))))
+
+    nostub_count = round(len(module_names) * spec.nostub_fraction)
+    return SynthPackage(
+        root_dir=root_dir,
+        pkg_name=spec.pkg_name,
+        module_names=tuple(module_names),
+        nostub_firstparty_modules=frozenset(
+            rng.sample(module_names, nostub_count)),
+        nostub_packages=(
+            frozenset({spec.thirdparty_pkg_name})
+            if spec.nostub_thirdparty else frozenset()))
+
+
+def _plan_module_names(spec: SynthSpec) -> list[str]:
+    """Spreads the modules across the nesting levels round-robin, so
+    that every level (up to the nesting depth) is populated. Every
+    module above the maximum depth is a package.
+    """
+    module_names = [spec.pkg_name]
+    packages_by_depth: list[list[str]] = [[spec.pkg_name]]
+    for index in range(1, spec.module_count):
+        depth = index % spec.nesting_depth or spec.nesting_depth
+        # The previous level might not exist yet if the module count is
+        # smaller than the nesting depth
+        depth = min(depth, len(packages_by_depth))
+        parents = packages_by_depth[depth - 1]
+        parent = parents[index % len(parents)]
+        module_name = f'{parent}.mod{index}'
+        module_names.append(module_name)
+
+        if depth < spec.nesting_depth:
+            if len(packages_by_depth) <= depth:
+                packages_by_depth.append([])
+            packages_by_depth[depth].append(module_name)
+
+    return module_names
+
+
+def _write_thirdparty_package(
+        spec: SynthSpec,
+        root_dir: Path,
+        thirdparty_modules: list[str]):
+    pkg_dir = root_dir / spec.thirdparty_pkg_name
+    pkg_dir.mkdir(parents=True, exist_ok=True)
+    (pkg_dir / '__init__.py').write_text('')
+    for thirdparty_module in thirdparty_modules:
+        _, _, leaf = thirdparty_module.rpartition('.')
+        (pkg_dir / f'{leaf}.py').write_text(textwrap.dedent('''\
+            class Base:
+                """A thirdparty base class."""
+
+            class Thing:
+                """A thirdparty value type."""
+
+            def helper(value):
+                return value
+            '''))
+
+
+def _render_module(
+        spec: SynthSpec,
+        rng: random.Random,
+        *,
+        thirdparty_modules: list[str],
+        firstparty_modules: list[str]
+        ) -> str:
+    lines = [
+        '"""A synthetic module for benchmarking docnote_extract."""',
+        'from __future__ import annotations',
+        '',
+        'from typing import Annotated',
+        'from typing import overload',
+        '',
+        'from docnote import Note',
+        '']
+
+    thirdparty_aliases: list[str] = []
+    for index, thirdparty_module in enumerate(thirdparty_modules):
+        alias = f'_tp{index}'
+        lines.append(f'import {thirdparty_module} as {alias}')
+        thirdparty_aliases.append(alias)
+
+    firstparty_names: list[str] = []
+    for index, firstparty_module in enumerate(firstparty_modules):
+        alias = f'FpClass{index}'
+        if spec.classes_per_module:
+            lines.append(f'from {firstparty_module} import Class0 as {alias}')
+            firstparty_names.append(alias)
+        else:
+            lines.append(f'import {firstparty_module}')
+
+    lines.extend(['', ''])
+    type_names = ['int', 'str', *firstparty_names]
+    type_names.extend(f'{alias}.Thing' for alias in thirdparty_aliases)
+
+    for class_index in range(spec.classes_per_module):
+        if thirdparty_aliases and class_index % 2:
+            base = f'({rng.choice(thirdparty_aliases)}.Base)'
+        else:
+            base = ''
+
+        lines.append(f'class Class{class_index}{base}:')
+        lines.append(f'    """Synthetic class number {class_index}."""')
+        lines.append(f'    attr: {rng.choice(type_names)}')
+        lines.append('')
+        for method_index in range(spec.methods_per_class):
+            lines.extend(_render_method(
+                spec, rng, method_index, type_names))
+
+        lines.extend(['', ''])
+
+    lines.append('def module_func(value: int) -> int:')
+    lines.append('    """A synthetic module-level function."""')
+    lines.append('    return value')
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def _render_method(
+        spec: SynthSpec,
+        rng: random.Random,
+        method_index: int,
+        type_names: list[str]
+        ) -> list[str]:
+    lines: list[str] = []
+    name = f'method{method_index}'
+    overload_count = (
+        spec.overloads_per_method if method_index % 2 else 0)
+
+    for overload_index in range(overload_count):
+        params = _render_param(spec, rng, 'value', type_names)
+        lines.append('    @overload')
+        lines.append(
+            f'    def {name}(self, {params}, *, flag{overload_index}: bool)'
+            + f' -> {rng.choice(type_names)}: ...')
+
+    params = ', '.join(
+        _render_param(spec, rng, f'param{param_index}', type_names)
+        for param_index in range(rng.randint(1, 4)))
+    lines.append(f'    def {name}(self, {params}, **kwargs) -> None:')
+    lines.append(f'        """Synthetic method number {method_index}."""')
+    lines.append('        return None')
+    lines.append('')
+    return lines
+
+
+def _render_param(
+        spec: SynthSpec,
+        rng: random.Random,
+        name: str,
+        type_names: list[str]
+        ) -> str:
+    type_name = rng.choice(type_names)
+    if rng.random() < spec.note_density:
+        return (
+            f"{name}: Annotated[{type_name}, Note('The {name} param.')]")
+    return f'{name}: {type_name}'
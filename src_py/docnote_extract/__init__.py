@@ -4,9 +4,12 @@ from docnote import MarkupLang
 __all__ = [
     'KNOWN_MARKUP_LANGS',
     'Docnotes',
+    'ExtractionOptions',
     'SummaryMetadata',
     'SummaryTreeNode',
     'gather',
+    'iter_gather',
+    'watch_gather',
 ]
 
 KNOWN_MARKUP_LANGS: set[str | MarkupLang] = set(MarkupLang)
@@ -14,6 +17,9 @@ KNOWN_MARKUP_LANGS: set[str | MarkupLang] = set(MarkupLang)
 # Note that all other imports need to come after that, in order to avoid
 # circular dependencies. These are all re-exports!
 from docnote_extract._gathering import Docnotes
+from docnote_extract._gathering import ExtractionOptions
 from docnote_extract._gathering import gather
+from docnote_extract._gathering import iter_gather
 from docnote_extract._module_tree import SummaryTreeNode
 from docnote_extract._summarization import SummaryMetadata
+from docnote_extract._watching import watch_gather
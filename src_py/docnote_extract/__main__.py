@@ -0,0 +1,76 @@
+"""The command-line interface, available via
+``python -m docnote_extract``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from collections.abc import Sequence
+
+from docnote_extract._watching import watch_gather
+from docnote_extract.forkserver import serve
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m docnote_extract')
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Log at INFO level (instead of WARNING).')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    forkserver_parser = subparsers.add_parser(
+        'forkserver',
+        help='Run a fork server for ``gather_via_forkserver`` requests.')
+    forkserver_parser.add_argument(
+        'socket_path',
+        help='The path of the unix socket to listen on.')
+    forkserver_parser.add_argument(
+        '--preload',
+        action='append',
+        default=[],
+        metavar='PACKAGE',
+        help='A package to import before serving requests. Repeatable.')
+
+    watch_parser = subparsers.add_parser(
+        'watch',
+        help='Gather the passed packages, and then re-gather them whenever '
+            + 'their source changes, printing one JSON line per update.')
+    watch_parser.add_argument(
+        'firstparty_pkg_names',
+        nargs='+',
+        metavar='PACKAGE',
+        help='The firstparty packages to gather.')
+    watch_parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=0.5,
+        help='Seconds to wait between checks for changes.')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == 'forkserver':
+        try:
+            serve(args.socket_path, preload_packages=args.preload)
+        except KeyboardInterrupt:
+            pass
+
+    elif args.command == 'watch':
+        try:
+            for update in watch_gather(
+                args.firstparty_pkg_names,
+                poll_interval=args.poll_interval
+            ):
+                print(
+                    json.dumps({
+                        'changed_modules': sorted(update.changed_modules)}),
+                    flush=True)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+"""This contains the persistent, on-disk, per-module cache used by
+``gather(..., cache_dir=...)``.
+
+Each module is cached under a fingerprint made up of:
+++  the module's own source (and, with ``prefer_stub_files``, the
+    source of its ``.pyi`` stub file)
+++  the sources of all of its parent packages. The effective config of a
+    module depends upon the explicit configs of its parents, and those
+    are fully determined by their source code
+++  the sources of any firstparty modules it imports (and their parents,
+    since importing a submodule also executes its parent packages)
+++  the options passed to ``gather`` that affect summarization, the
+    special reftype markers in effect after exploration, and the
+    versions of python, ``docnote``, and ``docnote_extract``
+
+Cache entries contain both the explicit config of the module and its
+(normalized, summarized, and per-module-filtered) ``ModuleSummary``.
+They're kept pickled until they're needed, since unpickling them might
+require importing firstparty modules, which must never happen while the
+import hook is installed.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from collections.abc import Collection
+from collections.abc import Iterable
+from collections.abc import Mapping
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError
+from importlib.metadata import version as get_distribution_version
+from importlib.util import resolve_name
+from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING
+from typing import Any
+
+from docnote_extract._static import get_stub_source
+
+if TYPE_CHECKING:
+    from docnote_extract._extraction import _ExtractionFinderLoader
+
+CACHE_FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class CachedModule:
+    """A single cache entry. Both of these are pickles (see
+    ``docnote_extract._serialization``), and need to be unpickled
+    outside of the extraction session.
+    """
+    # A pickled ``{module_name: explicit_config}`` dict, for consistency with
+    # the parallel gathering config payloads
+    config_payload: bytes
+    summary_payload: bytes
+
+
+@dataclass(slots=True, frozen=True)
+class ExtractionCache:
+    """An on-disk cache of module summaries for a particular set of
+    ``gather`` options.
+    """
+    cache_dir: Path
+    options_fingerprint: str
+
+    @classmethod
+    def from_gather_options(
+            cls,
+            cache_dir: str | os.PathLike[str],
+            **gather_options: Any
+            ) -> ExtractionCache:
+        """Creates a cache for the passed gather options, which must
+        all have stable reprs. Any callables (for example, the
+        ``summary_metadata_factory``) are fingerprinted by their
+        qualified name.
+        """
+        hasher = hashlib.sha256()
+        for key, value in sorted(gather_options.items()):
+            hasher.update(f'{key}={_stable_repr(value)}\n'.encode())
+
+        _update_with_environment(hasher)
+        hasher.update(f'\n{CACHE_FORMAT_VERSION}'.encode())
+        return cls(
+            cache_dir=Path(cache_dir),
+            options_fingerprint=hasher.hexdigest())
+
+    def fingerprint_modules(
+            self,
+            floader: _ExtractionFinderLoader,
+            firstparty_names: Collection[str]
+            ) -> dict[str, str]:
+        """Calculates the fingerprints for all of the passed firstparty
+        modules. This must be called within an active extraction
+        session, after exploration (so that the raw modules and the
+        final special reftype markers are available).
+
+        Modules whose fingerprint can't be calculated (for example,
+        because their source isn't available) are omitted from the
+        result, and will always be extracted.
+        """
+        session_hasher = hashlib.sha256(self.options_fingerprint.encode())
+        for marker_repr in sorted(
+            f'{crossref!r}={marker!r}'
+            for crossref, marker in floader.special_reftype_markers.items()
+        ):
+            session_hasher.update(marker_repr.encode())
+        return fingerprint_module_sources(
+            {
+                module_name: floader.module_stash_nostub_raw[module_name]
+                for module_name in firstparty_names},
+            salt=session_hasher.hexdigest(),
+            include_stub_files=floader.prefer_stub_files)
+
+    def load(self, module_name: str, fingerprint: str) -> CachedModule | None:
+        """Returns the cache entry for the passed module, if one exists
+        for the passed fingerprint. Otherwise, returns None.
+        """
+        entry_path = self._get_entry_path(module_name, fingerprint)
+        try:
+            data = entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning(
+                'Failed to read cache entry for %s; ignoring.', module_name,
+                exc_info=True)
+            return None
+
+        try:
+            # Note: the entry itself is just a tuple of bytes, so this is
+            # safe to do with the import hook installed.
+            config_payload, summary_payload = pickle.loads(data)  # noqa: S301
+        except Exception:
+            logger.warning(
+                'Corrupt cache entry for %s; ignoring.', module_name,
+                exc_info=True)
+            return None
+
+        logger.debug('Cache hit for %s', module_name)
+        return CachedModule(
+            config_payload=config_payload,
+            summary_payload=summary_payload)
+
+    def store(
+            self,
+            module_name: str,
+            fingerprint: str,
+            entry: CachedModule
+            ) -> None:
+        """Stores the passed entry, removing any stale entries for the
+        same module. Note that the write is atomic; concurrent gathers
+        sharing a cache directory won't ever see partial entries.
+        """
+        entry_path = self._get_entry_path(module_name, fingerprint)
+        module_dir = entry_path.parent
+        module_dir.mkdir(parents=True, exist_ok=True)
+
+        data = pickle.dumps(
+            (entry.config_payload, entry.summary_payload),
+            protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tempfile_path = tempfile.mkstemp(dir=module_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tempfile_obj:
+                tempfile_obj.write(data)
+            os.replace(tempfile_path, entry_path)
+        except BaseException:
+            Path(tempfile_path).unlink(missing_ok=True)
+            raise
+
+        for stale_path in module_dir.glob('*.pickle'):
+            if stale_path != entry_path:
+                stale_path.unlink(missing_ok=True)
+
+    def _get_entry_path(self, module_name: str, fingerprint: str) -> Path:
+        return (
+            self.cache_dir
+            / f'v{CACHE_FORMAT_VERSION}'
+            / module_name
+            / f'{fingerprint}.pickle')
+
+
+def fingerprint_module_sources(
+        modules: Mapping[str, ModuleType],
+        *,
+        salt: str,
+        include_stub_files: bool = False
+        ) -> dict[str, str]:
+    """Fingerprints the passed (raw) modules by their own source, plus
+    the sources of their parent packages and the firstparty modules
+    they import. All of the passed modules are considered firstparty.
+    If ``include_stub_files`` is true, the sources of any ``.pyi`` stub
+    files next to the modules are included as well.
+
+    Modules whose fingerprint can't be calculated (because their source
+    -- or that of any of their dependencies -- isn't available) are
+    omitted from the result.
+    """
+    source_hashes: dict[str, str] = {}
+    imports: dict[str, frozenset[str]] = {}
+    for module_name, raw_module in modules.items():
+        source = get_module_source(raw_module)
+        stub_source = (
+            get_stub_source(raw_module) if include_stub_files else None)
+        if source is None and stub_source is None:
+            continue
+
+        # Without a stub, this is exactly the hash of the module source
+        source_hasher = hashlib.sha256((source or '').encode())
+        if stub_source is not None:
+            source_hasher.update(b'\0pyi\0')
+            source_hasher.update(stub_source.encode())
+        source_hashes[module_name] = source_hasher.hexdigest()
+
+        module_imports: set[str] = set()
+        for module_source in (source, stub_source):
+            if module_source is not None:
+                module_imports.update(find_firstparty_imports(
+                    module_source,
+                    module_name=module_name,
+                    package=getattr(raw_module, '__package__', None),
+                    firstparty_names=modules.keys()))
+        imports[module_name] = frozenset(module_imports)
+
+    fingerprints: dict[str, str] = {}
+    for module_name, source_hash in source_hashes.items():
+        dependencies = set(imports[module_name])
+        dependencies.update(
+            parent for parent in _iter_parent_names(module_name)
+            if parent in modules)
+
+        if not dependencies.issubset(source_hashes):
+            logger.debug(
+                'Missing source for dependency of %s; will not cache.',
+                module_name)
+            continue
+
+        hasher = hashlib.sha256(salt.encode())
+        hasher.update(f'{module_name}={source_hash}\n'.encode())
+        for dependency in sorted(dependencies):
+            hasher.update(
+                f'{dependency}={source_hashes[dependency]}\n'.encode())
+        fingerprints[module_name] = hasher.hexdigest()
+
+    return fingerprints
+
+
+def get_module_source(module: ModuleType) -> str | None:
+    """Gets the source code for the passed (raw) module via its loader.
+    Unlike ``inspect.getsource``, this also works for empty modules.
+    Returns None if the source isn't available.
+    """
+    spec = getattr(module, '__spec__', None)
+    get_source = getattr(getattr(spec, 'loader', None), 'get_source', None)
+    if get_source is None:
+        return None
+
+    try:
+        return get_source(module.__name__)
+    except ImportError:
+        return None
+
+
+def find_firstparty_imports(
+        source: str,
+        *,
+        module_name: str,
+        package: str | None,
+        firstparty_names: Collection[str]
+        ) -> frozenset[str]:
+    """Statically finds all of the firstparty modules imported by the
+    passed module source, including relative imports, imports within
+    functions, and imports behind ``if typing.TYPE_CHECKING`` guards.
+    Because importing a submodule executes all of its parent packages,
+    those are included as well.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        logger.warning(
+            'Failed to parse source for %s; ignoring its imports.',
+            module_name)
+        return frozenset()
+
+    imported_names: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported_names.update(alias.name for alias in node.names)
+
+        elif isinstance(node, ast.ImportFrom):
+            base_name = _resolve_import_from(
+                node, module_name=module_name, package=package)
+            if base_name is None:
+                continue
+
+            imported_names.add(base_name)
+            # We can't know whether these are submodules or attributes, but
+            # we filter by the firstparty names anyways.
+            imported_names.update(
+                f'{base_name}.{alias.name}'
+                for alias in node.names if alias.name != '*')
+
+    firstparty_imports: set[str] = set()
+    for imported_name in imported_names:
+        for candidate in (imported_name, *_iter_parent_names(imported_name)):
+            if candidate in firstparty_names:
+                firstparty_imports.add(candidate)
+
+    firstparty_imports.discard(module_name)
+    return frozenset(firstparty_imports)
+
+
+def _resolve_import_from(
+        node: ast.ImportFrom,
+        *,
+        module_name: str,
+        package: str | None
+        ) -> str | None:
+    """Returns the absolute name of the module a ``from ... import``
+    statement imports from, or None if it can't be resolved.
+    """
+    if not node.level:
+        return node.module
+
+    relative_name = '.' * node.level + (node.module or '')
+    try:
+        return resolve_name(relative_name, package)
+    except (ImportError, ValueError):
+        logger.warning(
+            'Failed to resolve relative import %s within %s',
+            relative_name, module_name)
+        return None
+
+
+def _update_with_environment(hasher: hashlib._Hash) -> None:
+    """Adds the versions of python, ``docnote``, and
+    ``docnote_extract`` to the passed hasher.
+    """
+    for distribution in ('docnote', 'docnote_extract'):
+        try:
+            distribution_version = get_distribution_version(distribution)
+        except PackageNotFoundError:
+            distribution_version = 'unknown'
+        hasher.update(f'{distribution}=={distribution_version}\n'.encode())
+
+    hasher.update(sys.version.encode())
+
+
+def _iter_parent_names(module_name: str) -> Iterable[str]:
+    """For ``foo.bar.baz``, yields ``foo.bar`` and then ``foo``."""
+    parent_name, _, _ = module_name.rpartition('.')
+    while parent_name:
+        yield parent_name
+        parent_name, _, _ = parent_name.rpartition('.')
+
+
+def _stable_repr(value: Any) -> str:
+    """Reprs are generally deterministic for the values we care about,
+    but collections like sets and frozensets have arbitrary ordering,
+    and callables might include memory addresses.
+    """
+    if isinstance(value, (set, frozenset)):
+        return repr(sorted(_stable_repr(member) for member in value))
+    elif isinstance(value, dict):
+        return repr(sorted(
+            (_stable_repr(key), _stable_repr(member))
+            for key, member in value.items()))
+    elif callable(value) and hasattr(value, '__qualname__'):
+        module_name = getattr(value, '__module__', None)
+        return f'{module_name}.{value.__qualname__}'
+    else:
+        return repr(value)
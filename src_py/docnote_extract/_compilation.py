@@ -0,0 +1,566 @@
+"""This contains the compiled-code cache used when re-execing
+firstparty modules during extraction.
+
+Every firstparty module is exec'd at least twice: once during
+exploration (via the normal import system, which has its own bytecode
+cache), and then again from source during extraction (plus once more
+during preparation, for nostub firstparty modules). Rather than
+recompiling the source for each of those, we compile it once per
+session, and (if ``gather`` was passed a ``cache_dir``) persist the
+resulting code object to disk via ``marshal``.
+
+Code objects are keyed on the module's source and filename. Since
+marshal data is only valid for a single python version, the on-disk
+entries are additionally partitioned by the interpreter's cache tag,
+and verified against the bytecode magic number when loaded.
+
+This also contains the (opt-in) AST preprocessing for the extraction
+exec; see ``preprocess_module_ast``, as well as the additional
+preprocessing for ``.pyi`` stub files; see ``complete_stub_overloads``.
+"""
+from __future__ import annotations
+import __future__
+
+import ast
+import hashlib
+import inspect
+import logging
+import marshal
+import os
+import sys
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from importlib.util import MAGIC_NUMBER
+from pathlib import Path
+from types import CodeType
+from types import ModuleType
+from typing import TypeGuard
+
+# Historically, we re-exec'd modules by passing their source string
+# directly to ``exec``, which compiles it with the future flags of the
+# calling code -- and the extraction module has always used postponed
+# annotation evaluation. Downstream code relies upon that, so we need to
+# preserve it explicitly.
+_COMPILE_FLAGS = __future__.annotations.compiler_flag
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CodeCache:
+    """Compiles module sources into code objects, memoizing them for
+    the lifetime of the cache, and optionally persisting them within
+    ``cache_dir``.
+    """
+    cache_dir: Path | None = None
+
+    _code_by_key: dict[tuple[str, str], CodeType] = field(
+        default_factory=dict, repr=False)
+
+    def get_module_code(
+            self,
+            module: ModuleType,
+            *,
+            preprocess: bool = False
+            ) -> CodeType:
+        """Gets a code object for the passed (raw) module's source,
+        compiling it if necessary. The code object's filename is the
+        module's actual file, so tracebacks (and ``inspect`` calls on
+        its members) work as expected. If ``preprocess`` is true, the
+        source is first transformed by ``preprocess_module_ast``.
+
+        Raises whatever ``inspect.getsource`` raises if the module
+        source isn't available.
+        """
+        return self._get_code(
+            module.__name__,
+            _get_module_source(module),
+            getattr(module, '__file__', None) or '<string>',
+            variant='preprocessed' if preprocess else 'raw')
+
+    def get_stub_code(
+            self,
+            module_name: str,
+            source: str,
+            filename: str
+            ) -> CodeType:
+        """Gets a code object for the passed ``.pyi`` stub file
+        source, compiling it if necessary. Stubs are always preprocessed
+        (see ``preprocess_module_ast``), after first completing their
+        overloads (see ``complete_stub_overloads``).
+        """
+        return self._get_code(module_name, source, filename, variant='stub')
+
+    def _get_code(
+            self,
+            module_name: str,
+            source: str,
+            filename: str,
+            *,
+            variant: str
+            ) -> CodeType:
+        hasher = hashlib.sha256(filename.encode())
+        hasher.update(b'\0')
+        hasher.update(source.encode())
+        key = hasher.hexdigest()
+
+        code = self._code_by_key.get((variant, key))
+        if code is None:
+            entry_path = self._get_entry_path(module_name, variant, key)
+            code = self._load(module_name, entry_path)
+            if code is None:
+                compilable: ast.Module | str
+                if variant == 'stub':
+                    compilable = preprocess_module_ast(
+                        complete_stub_overloads(ast.parse(source, filename)))
+                elif variant == 'preprocessed':
+                    compilable = preprocess_module_ast(
+                        ast.parse(source, filename))
+                else:
+                    compilable = source
+
+                code = compile(
+                    compilable,
+                    filename,
+                    'exec',
+                    flags=_COMPILE_FLAGS,
+                    dont_inherit=True)
+                self._store(module_name, entry_path, code)
+
+            self._code_by_key[(variant, key)] = code
+
+        return code
+
+    def _get_entry_path(
+            self,
+            module_name: str,
+            variant: str,
+            key: str
+            ) -> Path | None:
+        if self.cache_dir is None:
+            return None
+
+        return (
+            self.cache_dir
+            / sys.implementation.cache_tag
+            / module_name
+            / variant
+            / f'{key}.marshal')
+
+    def _load(
+            self,
+            module_name: str,
+            entry_path: Path | None
+            ) -> CodeType | None:
+        data = self._read_entry(module_name, entry_path)
+        if data is None:
+            return None
+        if not data.startswith(MAGIC_NUMBER):
+            logger.debug('Stale code cache entry for %s', module_name)
+            return None
+
+        try:
+            # Note: entries are only ever written by ``_store``, into our
+            # own cache directory, and are verified against the current
+            # bytecode magic number, so this is no less safe than the
+            # import system loading from ``__pycache__``.
+            code = marshal.loads(data[len(MAGIC_NUMBER):])  # noqa: S302
+        except (EOFError, ValueError, TypeError):
+            logger.warning(
+                'Corrupt code cache entry for %s; ignoring.', module_name,
+                exc_info=True)
+            return None
+
+        if isinstance(code, CodeType):
+            logger.debug('Code cache hit for %s', module_name)
+            return code
+
+        return None
+
+    def _read_entry(
+            self,
+            module_name: str,
+            entry_path: Path | None
+            ) -> bytes | None:
+        if entry_path is None:
+            return None
+
+        try:
+            return entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning(
+                'Failed to read code cache entry for %s; ignoring.',
+                module_name, exc_info=True)
+            return None
+
+    def _store(
+            self,
+            module_name: str,
+            entry_path: Path | None,
+            code: CodeType
+            ) -> None:
+        """Stores the code object, removing any stale entries for the
+        same module (and variant). As with the summary cache, the write
+        is atomic. Failures are logged, but otherwise ignored; the cache
+        is purely an optimization.
+        """
+        if entry_path is None:
+            return
+
+        module_dir = entry_path.parent
+        try:
+            module_dir.mkdir(parents=True, exist_ok=True)
+            fd, tempfile_path = tempfile.mkstemp(
+                dir=module_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as tempfile_obj:
+                    tempfile_obj.write(MAGIC_NUMBER)
+                    tempfile_obj.write(marshal.dumps(code))
+                os.replace(tempfile_path, entry_path)
+            except BaseException:
+                Path(tempfile_path).unlink(missing_ok=True)
+                raise
+
+            for stale_path in module_dir.glob('*.marshal'):
+                if stale_path != entry_path:
+                    stale_path.unlink(missing_ok=True)
+
+        except OSError:
+            logger.warning(
+                'Failed to store code cache entry for %s.', module_name,
+                exc_info=True)
+
+
+def _get_module_source(module: ModuleType) -> str:
+    """Gets the module source via ``inspect.getsource``, with one
+    exception: empty modules imported from zip archives (for example,
+    an empty ``__init__.py`` within a wheel). ``linecache`` pads empty
+    source files with a newline, but not empty sources retrieved from
+    the module's loader, so ``inspect`` refuses them.
+    """
+    try:
+        return inspect.getsource(module)
+    except OSError:
+        spec = getattr(module, '__spec__', None)
+        get_source = getattr(
+            getattr(spec, 'loader', None), 'get_source', None)
+        if get_source is not None and get_source(module.__name__) == '':
+            return ''
+        raise
+
+
+def preprocess_module_ast(tree: ast.Module) -> ast.Module:
+    """Transforms the passed module AST (in place) for extraction:
+    ++  any ``TYPE_CHECKING`` (or ``<anything>.TYPE_CHECKING``)
+        within the test of an ``if`` statement or expression is replaced
+        by a constant ``True``. This lets us skip setting
+        ``typing.TYPE_CHECKING`` globally for the duration of the exec.
+    ++  function bodies are replaced by ``...``, keeping their
+        docstrings, decorators, defaults, and annotations. Generators
+        keep a ``yield``, so that they're still classified as such.
+
+    Stripping function bodies is only safe for functions that don't get
+    called while the module is being exec'd. We can't know that for
+    certain, so we err on the side of caution, and keep the bodies of
+    any functions whose names are referenced anywhere outside of a
+    function body (for example, as a decorator, or by a module-level
+    call), as well as those of all dunder methods (since things like
+    ``__init_subclass__`` or ``__set_name__`` get called implicitly).
+    Since kept bodies also run at import time, the same applies to any
+    functions referenced within them, and so on.
+    """
+    _ExtractionTransformer(_collect_import_time_names(tree)).visit(tree)
+    return ast.fix_missing_locations(tree)
+
+
+def complete_stub_overloads(tree: ast.Module) -> ast.Module:
+    """Transforms the passed ``.pyi`` stub file AST (in place) by
+    adding an implementation after every run of ``@overload``-decorated
+    functions that lacks one, as is normal within stubs. Otherwise, the
+    name would end up bound to ``typing``'s overload dummy, instead of
+    something that ``typing.get_overloads`` can find the overloads for.
+
+    The implementation has the same name, the docstring of the first
+    overload, and all of the decorators of the last overload (other
+    than the ``overload`` itself, so that, for example, staticmethods
+    remain staticmethods).
+    """
+    _StubOverloadCompleter().visit(tree)
+    return ast.fix_missing_locations(tree)
+
+
+type _FuncDef = ast.FunctionDef | ast.AsyncFunctionDef
+
+
+def _collect_import_time_names(tree: ast.Module) -> set[str]:
+    """Collects the names that might be looked up at import time,
+    expanding them to a fixed point: whenever a function is kept, then
+    all of the names within its body might also be looked up at import
+    time (for example, a decorator calling a helper function).
+    """
+    collector = _ImportTimeNameCollector()
+    collector.visit(tree)
+    names = collector.names
+
+    pending = [
+        node for node in ast.walk(tree)
+        if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef)]
+    while True:
+        kept: list[_FuncDef] = []
+        remaining: list[_FuncDef] = []
+        for node in pending:
+            if _is_body_kept(node.name, names):
+                kept.append(node)
+            else:
+                remaining.append(node)
+
+        if not kept:
+            return names
+
+        for node in kept:
+            for stmt in node.body:
+                names.update(_iter_referenced_names(stmt))
+        pending = remaining
+
+
+def _is_body_kept(name: str, import_time_names: set[str]) -> bool:
+    return (
+        name in import_time_names
+        or (name.startswith('__') and name.endswith('__')))
+
+
+def _iter_referenced_names(node: ast.AST) -> Iterator[str]:
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            yield child.id
+        elif isinstance(child, ast.Attribute):
+            yield child.attr
+
+
+class _ImportTimeNameCollector(ast.NodeVisitor):
+    """Collects all of the names (and attribute names) that are
+    referenced outside of function bodies -- ie, all of the names that
+    might be looked up while the module itself is being exec'd.
+    """
+
+    def __init__(self):
+        self.names: set[str] = set()
+
+    def visit_Name(self, node: ast.Name):
+        self.names.add(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self.names.add(node.attr)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self._visit_signature(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        self._visit_signature(node)
+
+    def visit_Lambda(self, node: ast.Lambda):
+        self.visit(node.args)
+
+    def _visit_signature(self, node: _FuncDef):
+        # These are all evaluated when the function is defined
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+
+
+class _StubOverloadCompleter(ast.NodeVisitor):
+
+    def visit_Module(self, node: ast.Module):
+        node.body = self._complete_body(node.body)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        node.body = self._complete_body(node.body)
+        self.generic_visit(node)
+
+    def visit_If(self, node: ast.If):
+        node.body = self._complete_body(node.body)
+        node.orelse = self._complete_body(node.orelse)
+        self.generic_visit(node)
+
+    def _complete_body(self, body: list[ast.stmt]) -> list[ast.stmt]:
+        completed: list[ast.stmt] = []
+        for index, stmt in enumerate(body):
+            completed.append(stmt)
+            if not _is_overload(stmt):
+                continue
+
+            # Either another overload, or the implementation
+            next_stmt = body[index + 1] if index + 1 < len(body) else None
+            if (
+                isinstance(next_stmt, ast.FunctionDef | ast.AsyncFunctionDef)
+                and next_stmt.name == stmt.name
+            ):
+                continue
+
+            first_overload = stmt
+            for previous_stmt in reversed(body[:index]):
+                if not (
+                    _is_overload(previous_stmt)
+                    and previous_stmt.name == stmt.name
+                ):
+                    break
+                first_overload = previous_stmt
+
+            completed.append(_make_overload_implementation(
+                first_overload, stmt))
+
+        return completed
+
+
+def _is_overload(stmt: ast.stmt) -> TypeGuard[_FuncDef]:
+    return isinstance(stmt, ast.FunctionDef | ast.AsyncFunctionDef) and any(
+        _is_overload_decorator(decorator) for decorator in stmt.decorator_list)
+
+
+def _is_overload_decorator(decorator: ast.expr) -> bool:
+    return (
+        (isinstance(decorator, ast.Name) and decorator.id == 'overload')
+        or (
+            isinstance(decorator, ast.Attribute)
+            and decorator.attr == 'overload'))
+
+
+def _make_overload_implementation(
+        first_overload: _FuncDef,
+        last_overload: _FuncDef
+        ) -> ast.stmt:
+    body: list[ast.stmt] = []
+    first_stmt = first_overload.body[0]
+    if (
+        isinstance(first_stmt, ast.Expr)
+        and isinstance(first_stmt.value, ast.Constant)
+        and isinstance(first_stmt.value.value, str)
+    ):
+        body.append(first_stmt)
+    body.append(ast.Expr(ast.Constant(...)))
+
+    implementation_type = type(last_overload)
+    implementation = implementation_type(
+        name=last_overload.name,
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[],
+            vararg=ast.arg('args'),
+            kwonlyargs=[],
+            kw_defaults=[],
+            kwarg=ast.arg('kwargs'),
+            defaults=[]),
+        body=body,
+        decorator_list=[
+            decorator for decorator in last_overload.decorator_list
+            if not _is_overload_decorator(decorator)],
+        returns=None,
+        type_params=[])
+    return ast.copy_location(implementation, last_overload)
+
+
+class _TypeCheckingFolder(ast.NodeTransformer):
+
+    def visit_If(self, node: ast.If) -> ast.If:
+        node.test = _fold_type_checking(node.test)
+        self.generic_visit(node)
+        return node
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.IfExp:
+        node.test = _fold_type_checking(node.test)
+        self.generic_visit(node)
+        return node
+
+
+class _ExtractionTransformer(_TypeCheckingFolder):
+
+    def __init__(self, import_time_names: set[str]):
+        self.import_time_names = import_time_names
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        return self._visit_funcdef(node)
+
+    def visit_AsyncFunctionDef(
+            self,
+            node: ast.AsyncFunctionDef
+            ) -> ast.AsyncFunctionDef:
+        return self._visit_funcdef(node)
+
+    def _visit_funcdef[F: _FuncDef](self, node: F) -> F:
+        if _is_body_kept(node.name, self.import_time_names):
+            # Anything nested within the function might also get called at
+            # import time (by the function itself), so we can't strip any
+            # of it; we only fold.
+            return _TypeCheckingFolder().visit(node)
+
+        # Still need to fold any TYPE_CHECKING in the decorators, etc
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+
+        stripped_body: list[ast.stmt] = []
+        first_stmt = node.body[0]
+        if (
+            isinstance(first_stmt, ast.Expr)
+            and isinstance(first_stmt.value, ast.Constant)
+            and isinstance(first_stmt.value.value, str)
+        ):
+            stripped_body.append(first_stmt)
+
+        stripped_body.append(ast.copy_location(
+            ast.Expr(ast.Constant(...)), first_stmt))
+        if _is_generator_body(node.body):
+            stripped_body.append(ast.copy_location(
+                ast.Expr(ast.Yield()), first_stmt))
+
+        node.body = stripped_body
+        return node
+
+
+def _fold_type_checking(test: ast.expr) -> ast.expr:
+    if (
+        (isinstance(test, ast.Name) and test.id == 'TYPE_CHECKING')
+        or (
+            isinstance(test, ast.Attribute)
+            and test.attr == 'TYPE_CHECKING')
+    ):
+        return ast.copy_location(ast.Constant(True), test)
+
+    for field_name, value in ast.iter_fields(test):
+        if isinstance(value, ast.expr):
+            setattr(test, field_name, _fold_type_checking(value))
+        elif isinstance(value, list):
+            setattr(test, field_name, [
+                _fold_type_checking(item) if isinstance(item, ast.expr)
+                else item
+                for item in value])
+
+    return test
+
+
+def _is_generator_body(body: list[ast.stmt]) -> bool:
+    """Checks for any yields directly within the passed function
+    body (ie, not within a nested scope).
+    """
+    to_check: list[ast.AST] = list(body)
+    while to_check:
+        node = to_check.pop()
+        if isinstance(node, ast.Yield | ast.YieldFrom):
+            return True
+        if not isinstance(
+            node,
+            ast.FunctionDef | ast.AsyncFunctionDef | ast.Lambda | ast.ClassDef
+        ):
+            to_check.extend(ast.iter_child_nodes(node))
+
+    return False
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import builtins
 import inspect
+import itertools
 import logging
 import sys
 import typing
 from collections import defaultdict
+from collections.abc import Generator
 from collections.abc import Sequence
 from contextlib import contextmanager
 from contextvars import ContextVar
@@ -17,6 +20,8 @@ from importlib import import_module
 from importlib import reload as reload_module
 from importlib.abc import Loader
 from importlib.machinery import ModuleSpec
+from importlib.util import resolve_name
+from pathlib import Path
 from types import ModuleType
 from typing import Annotated
 from typing import Any
@@ -27,13 +32,34 @@ from typing import cast
 from docnote import Note
 from docnote import ReftypeMarker
 
+from docnote_extract._compilation import CodeCache
 from docnote_extract._module_tree import ModuleTreeNode
+from docnote_extract._static import StaticExtractionOptions
+from docnote_extract._static import exec_static
+from docnote_extract._static import find_stub_file
+from docnote_extract._static import get_stub_source
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import make_crossreffed
 from docnote_extract.crossrefs import make_metaclass_crossreffed
+from docnote_extract.discovery import ScanDiscovery
 from docnote_extract.discovery import discover_all_modules
 from docnote_extract.discovery import find_special_reftypes
+from docnote_extract.import_graph import ImportEdge
+from docnote_extract.import_graph import ImportGraph
+from docnote_extract.import_graph import ImportStrategy
+from docnote_extract.import_graph import _get_active_import_graph
+from docnote_extract.memory import _get_active_memory_report
+from docnote_extract.memory import _record_retained_bytes
+from docnote_extract.memory import _take_memory_checkpoint
+from docnote_extract.stats import GatherPhase
+from docnote_extract.stats import _count_static_module
+from docnote_extract.stats import _get_active_stats
+from docnote_extract.stats import _record_phase
 from docnote_extract.summaries import Singleton
+from docnote_extract.telemetry import _count_tracking_getattr
+from docnote_extract.telemetry import _record_instant
+from docnote_extract.telemetry import _record_stubbed_name
+from docnote_extract.telemetry import _trace_span
 
 type TrackingRegistry = dict[int, tuple[str, str] | None]
 UNPURGEABLE_MODULES: Annotated[
@@ -105,6 +131,22 @@ class _ExtractionFinderLoader(Loader):
         default_factory=frozenset)
     # Note: root package, not individual modules
     nostub_packages: frozenset[str] = field(default_factory=frozenset)
+    # See ``docnote_extract._compilation.preprocess_module_ast``
+    preprocess_source: bool = False
+    # See ``docnote_extract._static``
+    static_extraction: bool = False
+    prefer_stub_files: bool = False
+    # Paths to zip archives (typically wheels) containing firstparty
+    # packages. These are added to the front of sys.path for the duration
+    # of the extraction session, and imported from via ``zipimport``.
+    firstparty_wheels: tuple[str, ...] = ()
+    # If None, modules are discovered by recursive import; see
+    # ``docnote_extract.discovery.ScanDiscovery``
+    discovery: ScanDiscovery | None = None
+    # Only used with ``discovery``
+    discovery_cache_path: Path | None = field(default=None, repr=False)
+    # See ``docnote_extract.discovery.find_special_reftypes``
+    special_reftype_cache_path: Path | None = field(default=None, repr=False)
 
     module_stash_prehook: dict[str, ModuleType] = field(
         default_factory=dict, repr=False)
@@ -129,13 +171,43 @@ class _ExtractionFinderLoader(Loader):
         default_factory=dict, repr=False)
     # This is used for marking things dirty.
     inspected_modules: set[str] = field(default_factory=set, repr=False)
+    # Used for all of the re-execs of firstparty modules
+    code_cache: CodeCache = field(default_factory=CodeCache, repr=False)
+    # The firstparty wheels that weren't already on sys.path, and therefore
+    # need to be removed from it after the extraction session.
+    added_wheel_paths: list[str] = field(default_factory=list, repr=False)
 
     def discover_and_extract(self) -> dict[str, ModulePostExtraction]:
+        with self.extraction_session() as firstparty_names:
+            retval: dict[str, ModulePostExtraction] = {}
+            for module_name in firstparty_names:
+                retval[module_name] = self.extract_firstparty(module_name)
+
+            # Note that uninstall will handle final cleanup
+            logger.info('Extraction completed successfully.')
+            return retval
+
+    @contextmanager
+    def extraction_session(self) -> Generator[frozenset[str], None, None]:
+        """Installs the import hook and runs the exploration and
+        preparation phases, then yields the names of all discovered
+        firstparty modules, with the extraction phase active. Within the
+        ``with`` block, you can call ``extract_firstparty`` on any of
+        them. Exiting the block uninstalls the import hook and restores
+        the prehook modules.
+
+        This is the building block for ``discover_and_extract``; it's
+        separate so that callers can control what happens with each
+        module (and when) during the extraction phase.
+        """
         ctx_token = _EXTRACTION_PHASE.set(_ExtractionPhase.HOOKED)
         try:
             logger.info('Stashing prehook modules and installing import hook.')
-            self._stash_prehook_modules()
-            self.install()
+            with _record_phase(GatherPhase.STASH_PREHOOK):
+                self._add_wheels_to_sys_path()
+                self._stash_prehook_modules()
+                self.install()
+            _take_memory_checkpoint(_ExtractionPhase.HOOKED.value)
 
             # We're relying upon the full exploration here to import all
             # possible modules needed for extraction. Then we stash the raw
@@ -143,15 +215,21 @@ class _ExtractionFinderLoader(Loader):
             # move on to the next phase, where we use the raw modules.
             logger.info('Starting exploration phase.')
             _EXTRACTION_PHASE.set(_ExtractionPhase.EXPLORATION)
-            firstparty_modules = discover_all_modules(self.firstparty_packages)
-            self.special_reftype_markers.update(
-                find_special_reftypes(firstparty_modules.values()))
-            firstparty_names = frozenset(firstparty_modules)
-            self._stash_firstparty_or_nostub_raw()
-            # We need to clean up everything here because we'll be
-            # transitioning into tracked modules instead of the raw ones
-            logger.info('Exploration done; cleaning up sys.modules.')
-            self.cleanup_sys(self._get_all_dirty_modules())
+            with _record_phase(GatherPhase.EXPLORATION):
+                firstparty_modules = discover_all_modules(
+                    self.firstparty_packages,
+                    scan=self.discovery,
+                    scan_cache_path=self.discovery_cache_path)
+                self.special_reftype_markers.update(find_special_reftypes(
+                    firstparty_modules.values(),
+                    cache_path=self.special_reftype_cache_path))
+                firstparty_names = frozenset(firstparty_modules)
+                self._stash_firstparty_or_nostub_raw()
+                # We need to clean up everything here because we'll be
+                # transitioning into tracked modules instead of the raw ones
+                logger.info('Exploration done; cleaning up sys.modules.')
+                self.cleanup_sys(self._get_all_dirty_modules())
+            _take_memory_checkpoint(_ExtractionPhase.EXPLORATION.value)
 
             # We want to preemptively create tracking or stub versions of all
             # first-party modules; this ensures we have the cleanest,
@@ -161,12 +239,14 @@ class _ExtractionFinderLoader(Loader):
             # reliability.
             logger.info('Starting preparation phase.')
             _EXTRACTION_PHASE.set(_ExtractionPhase.PREPARATION)
-            self._prepare_firstparty_stubs_or_tracking(firstparty_names)
+            with _record_phase(GatherPhase.PREPARATION):
+                self._prepare_firstparty_stubs_or_tracking(firstparty_names)
 
-            # Clean everything one more time in case there were weird import
-            # deps in the firstparty nostub modules
-            logger.info('Preparation done; cleaning up sys.modules.')
-            self.cleanup_sys(self._get_all_dirty_modules())
+                # Clean everything one more time in case there were weird
+                # import deps in the firstparty nostub modules
+                logger.info('Preparation done; cleaning up sys.modules.')
+                self.cleanup_sys(self._get_all_dirty_modules())
+            _take_memory_checkpoint(_ExtractionPhase.PREPARATION.value)
 
             logger.info('Starting extraction phase.')
             _EXTRACTION_PHASE.set(_ExtractionPhase.EXTRACTION)
@@ -175,22 +255,80 @@ class _ExtractionFinderLoader(Loader):
             # module, we can prepopulate once, instead of needing to do it for
             # every module.
             self._prepopulate_sys(firstparty_names)
-            retval: dict[str, ModulePostExtraction] = {}
-            for module_name in firstparty_names:
-                retval[module_name] = self.extract_firstparty(module_name)
+            yield firstparty_names
 
-            # Note that uninstall will handle final cleanup
-            logger.info('Extraction completed successfully.')
-            return retval
+        finally:
+            # Normally this is the extraction phase, but if something went
+            # wrong, it's whichever phase we were in at the time
+            _take_memory_checkpoint(_EXTRACTION_PHASE.get().value)
+            if _get_active_memory_report() is not None:
+                self._record_stash_retained_bytes()
+
+            with _record_phase(GatherPhase.TEARDOWN):
+                try:
+                    logger.info(
+                        'Uninstalling import hook and restoring prehook '
+                        + 'modules.')
+                    self.uninstall()
+                finally:
+                    _EXTRACTION_PHASE.reset(ctx_token)
+                    self._unstash_prehook_modules()
+                    self._remove_wheels_from_sys_path()
+            _take_memory_checkpoint('teardown')
+
+            stats = _get_active_stats()
+            if stats is not None:
+                stats.stubbed_module_count = len(self.module_stash_stubbed)
+                stats.tracked_module_count = len(self.module_stash_tracked)
+
+    @contextmanager
+    def suspended_session(
+            self,
+            firstparty_names: frozenset[str]
+            ) -> Generator[None, None, None]:
+        """Temporarily suspends an active ``extraction_session``. Within
+        the ``with`` block, the import hook is uninstalled and the
+        prehook modules are restored, exactly as they would be after the
+        session had ended, so arbitrary code (including summarization)
+        can run there with a normal import system. Exiting the block
+        re-installs the import hook and re-prepopulates ``sys.modules``,
+        after which ``extract_firstparty`` can be used again.
+
+        Note that any non-stdlib modules imported during the suspension
+        are stashed away (and later restored) along with the other
+        prehook modules.
+        """
+        logger.debug('Suspending extraction session.')
+        self.uninstall()
+        self._unstash_prehook_modules()
+        try:
+            yield
 
         finally:
-            try:
-                logger.info(
-                    'Uninstalling import hook and restoring prehook modules.')
-                self.uninstall()
-            finally:
-                _EXTRACTION_PHASE.reset(ctx_token)
-                self._unstash_prehook_modules()
+            logger.debug('Resuming extraction session.')
+            self._stash_prehook_modules()
+            self.install()
+            self._prepopulate_sys(firstparty_names)
+
+    def _record_stash_retained_bytes(self) -> None:
+        """Records the bytes retained by each of the module stashes
+        into the active memory report. Note that this only measures the
+        module namespaces (and whatever they reference); references to
+        other modules aren't followed.
+        """
+        stashes = {
+            'module_stash_stubbed': self.module_stash_stubbed,
+            'module_stash_tracked': self.module_stash_tracked,
+            'module_stash_nostub_raw': self.module_stash_nostub_raw}
+        all_stashed_modules = [
+            *self.module_stash_prehook.values(),
+            *itertools.chain.from_iterable(
+                stash.values() for stash in stashes.values())]
+        for stash_name, stash in stashes.items():
+            _record_retained_bytes(
+                stash_name,
+                [vars(module) for module in stash.values()],
+                boundary_modules=all_stashed_modules)
 
     def _stash_firstparty_or_nostub_raw(self):
         """This checks sys.modules for any firstparty or nostub modules,
@@ -218,7 +356,13 @@ class _ExtractionFinderLoader(Loader):
         import_tracking_registry: TrackingRegistry = {}
         inspect_ctx_token = _MODULE_TO_INSPECT.set(module_name)
         try:
-            with _activatate_tracking_registry(import_tracking_registry):
+            with (
+                _record_phase(GatherPhase.EXTRACTION, module_name),
+                _activatate_tracking_registry(import_tracking_registry),
+                _record_import_edges(module_name),
+                _trace_span(
+                    'extraction', 'extract_firstparty', module=module_name),
+            ):
                 # HERE BE DRAGONS.
                 # Whatever you do, do **NOT** import the module here. The
                 # import system will overwrite our prepared submodule attrs
@@ -239,24 +383,15 @@ class _ExtractionFinderLoader(Loader):
                 nostub_module_spec = getattr(nostub_module, '__spec__', None)
                 _clone_spec_attrs(nostub_module_spec, spec)
 
-                module_source = inspect.getsource(nostub_module)
                 extracted_module = cast(
                     ModulePostExtraction,
                     _clone_import_attrs(
                         self.module_stash_nostub_raw[module_name],
                         spec))
-
-                logger.info(
-                    'Re-execing module for inspection: %s', module_name)
-
-                # This allows us to also get references hidden behind circular
-                # imports
-                typing.TYPE_CHECKING = True
-                try:
-                    exec(module_source, extracted_module.__dict__)  # noqa: S102
-                finally:
-                    typing.TYPE_CHECKING = False
-                    self.inspected_modules.add(module_name)
+                if self._exec_static(nostub_module, extracted_module):
+                    _count_static_module()
+                else:
+                    self._exec_for_inspection(nostub_module, extracted_module)
 
             extracted_module._docnote_extract_import_tracking_registry = (
                 import_tracking_registry)
@@ -264,6 +399,86 @@ class _ExtractionFinderLoader(Loader):
         finally:
             _MODULE_TO_INSPECT.reset(inspect_ctx_token)
 
+    def _exec_static(
+            self,
+            nostub_module: ModuleType,
+            extracted_module: ModuleType
+            ) -> bool:
+        """Attempts to statically extract the module (see
+        ``docnote_extract._static``) from its ``.pyi`` stub file (if
+        ``prefer_stub_files`` is set and it has one) or its own source
+        (if ``static_extraction`` is set), returning True if successful.
+        If not, the ``extracted_module`` is left untouched.
+        """
+        static_options = StaticExtractionOptions(
+            firstparty_module_names=self.module_stash_nostub_raw.keys(),
+            nostub_firstparty_modules=self.nostub_firstparty_modules,
+            nostub_packages=self.nostub_packages,
+            passthrough_packages=NOHOOK_PACKAGES,
+            special_reftype_markers=self.special_reftype_markers)
+        module_name = extracted_module.__name__
+
+        if self.prefer_stub_files:
+            stub_source = get_stub_source(nostub_module)
+            if stub_source is not None:
+                logger.info('Using stub file for module: %s', module_name)
+                stub_filename = str(find_stub_file(nostub_module))
+                if exec_static(
+                    extracted_module,
+                    stub_source,
+                    get_code=partial(
+                        self.code_cache.get_stub_code,
+                        module_name,
+                        stub_source,
+                        stub_filename),
+                    options=static_options
+                ):
+                    return True
+
+        if self.static_extraction:
+            try:
+                source = inspect.getsource(nostub_module)
+            except (OSError, TypeError):
+                logger.info(
+                    'Source unavailable for static extraction of %s.',
+                    module_name)
+                return False
+
+            return exec_static(
+                extracted_module,
+                source,
+                get_code=partial(
+                    self.code_cache.get_module_code,
+                    nostub_module,
+                    preprocess=True),
+                options=static_options)
+
+        return False
+
+    def _exec_for_inspection(
+            self,
+            nostub_module: ModuleType,
+            extracted_module: ModuleType
+            ) -> None:
+        """Re-execs the module's code within the namespace of the
+        ``extracted_module``, with the import hook active.
+        """
+        module_name = extracted_module.__name__
+        module_code = self.code_cache.get_module_code(
+            nostub_module, preprocess=self.preprocess_source)
+        logger.info('Re-execing module for inspection: %s', module_name)
+
+        # This allows us to also get references hidden behind circular
+        # imports. Preprocessed sources have already had their TYPE_CHECKING
+        # guards folded, so they don't need the (global!) flag to be set.
+        if not self.preprocess_source:
+            typing.TYPE_CHECKING = True
+        try:
+            exec(module_code, extracted_module.__dict__)  # noqa: S102
+        finally:
+            typing.TYPE_CHECKING = False
+            self.inspected_modules.add(module_name)
+
     def install(self) -> None:
         """Installs the loader in sys.meta_path and then gets everything
         ready for discovery.
@@ -408,6 +623,38 @@ class _ExtractionFinderLoader(Loader):
             logger.info('Restoring prehook module %s', name)
             sys.modules[name] = module
 
+    def _add_wheels_to_sys_path(self):
+        """Adds the ``firstparty_wheels`` to the front of sys.path, so
+        that the firstparty packages within them are imported during
+        exploration (via ``zipimport``), instead of any installed
+        versions. From there on out, their sources are retrieved via
+        their loaders (by ``inspect.getsource``, the code cache, etc),
+        just like any other module, so nothing else needs to know that
+        they came from an archive.
+        """
+        self.added_wheel_paths.extend(
+            wheel_path for wheel_path in self.firstparty_wheels
+            if wheel_path not in sys.path)
+        if self.added_wheel_paths:
+            logger.info(
+                'Adding firstparty wheels to sys.path: %s',
+                self.added_wheel_paths)
+            sys.path[0:0] = self.added_wheel_paths
+
+    def _remove_wheels_from_sys_path(self):
+        for wheel_path in self.added_wheel_paths:
+            if wheel_path in sys.path:
+                sys.path.remove(wheel_path)
+            # Otherwise, the zipimporter (and its cached table of contents)
+            # would stick around after the session, and would be reused --
+            # even if the wheel was rebuilt in the meantime -- next time.
+            importer = sys.path_importer_cache.pop(wheel_path, None)
+            invalidate_caches = getattr(importer, 'invalidate_caches', None)
+            if invalidate_caches is not None:
+                invalidate_caches()
+
+        self.added_wheel_paths.clear()
+
     def _prepare_firstparty_stubs_or_tracking(
             self,
             firstparty_names: frozenset[str]):
@@ -490,12 +737,16 @@ class _ExtractionFinderLoader(Loader):
         # every submodule.
         if base_package in sys.stdlib_module_names:
             logger.debug('Bypassing wrapping for stdlib module %s.', fullname)
+            _record_instant(
+                'hook', 'find_spec', fullname=fullname, decision='stdlib')
             return None
         if base_package in NOHOOK_PACKAGES:
             logger.debug(
                 'Bypassing tracker wrapping for %s via hard-coded third party '
                 + 'nohook package %s',
                 fullname, base_package)
+            _record_instant(
+                'hook', 'find_spec', fullname=fullname, decision='nohook')
             return None
 
         # Thirdparty packages not marked with nostub will ALWAYS return a
@@ -520,6 +771,8 @@ class _ExtractionFinderLoader(Loader):
             # system that this has submodules. For stubs, we can't actually
             # know this, so we just always set it.
             spec.submodule_search_locations = []
+            _record_instant(
+                'hook', 'find_spec', fullname=fullname, decision='stub')
             return spec
 
         # All of the rest of our behavior depends upon our current
@@ -531,6 +784,10 @@ class _ExtractionFinderLoader(Loader):
                 # to the rest of the finder/loaders. This is then stashed
                 # before re-cleaning sys.modules, so that we can harvest the
                 # raw specs for delegated loading.
+                _record_instant(
+                    'hook', 'find_spec',
+                    fullname=fullname,
+                    decision='exploration')
                 return None
 
             elif (
@@ -546,6 +803,10 @@ class _ExtractionFinderLoader(Loader):
                     + 'neither hooked nor tracked. You may encounter import '
                     + 'errors. This is almost certainly a bug.',
                     fullname, phase)
+                _record_instant(
+                    'hook', 'find_spec',
+                    fullname=fullname,
+                    decision='invalid_phase')
                 return None
 
     def _get_delegated_spec(
@@ -595,6 +856,10 @@ class _ExtractionFinderLoader(Loader):
         raw_module_spec = getattr(raw_module, '__spec__', None)
         _clone_spec_attrs(raw_module_spec, spec)
 
+        _record_instant(
+            'hook', 'find_spec',
+            fullname=fullname,
+            decision=stub_strategy.value)
         return spec
 
     def create_module(self, spec: ModuleSpec) -> None | ModuleType:
@@ -628,6 +893,10 @@ class _ExtractionFinderLoader(Loader):
                 logger.debug(
                     'Using cached stub module for %s', loader_state.fullname)
                 loader_state.from_stash = True
+                _record_instant(
+                    'hook', 'stash_hit',
+                    fullname=loader_state.fullname,
+                    stash='stubbed')
                 return self.module_stash_stubbed[loader_state.fullname]
 
             else:
@@ -653,6 +922,10 @@ class _ExtractionFinderLoader(Loader):
                         'Using cached tracking module for %s',
                         loader_state.fullname)
                     loader_state.from_stash = True
+                    _record_instant(
+                        'hook', 'stash_hit',
+                        fullname=loader_state.fullname,
+                        stash='tracked')
                     return self.module_stash_tracked[loader_state.fullname]
 
                 # This can happen either during preparation (for firstparty
@@ -753,8 +1026,11 @@ class _ExtractionFinderLoader(Loader):
             module.__getattr__ = partial(
                 _stubbed_getattr,
                 module_name=module.__name__,
+                module_dict=module.__dict__,
                 special_reftype_markers=self.special_reftype_markers)
             self.module_stash_stubbed[loader_state.fullname] = module
+            _record_instant(
+                'hook', 'create_stub', fullname=loader_state.fullname)
 
         elif isinstance(loader_state, _DelegatedLoaderState):
             real_module = loader_state.delegated_module
@@ -769,9 +1045,15 @@ class _ExtractionFinderLoader(Loader):
                 # only do this once, eagerly (during the preparation phase),
                 # so that we're not constantly recreating tracking modules.
                 if loader_state.is_firstparty:
-                    module_source = inspect.getsource(real_module)
-                    delegated_module = _clone_import_attrs(real_module, spec)
-                    exec(module_source, delegated_module.__dict__)  # noqa: S102
+                    with _trace_span(
+                        'hook', 'exec_tracked', fullname=loader_state.fullname
+                    ):
+                        module_code = self.code_cache.get_module_code(
+                            real_module)
+                        delegated_module = _clone_import_attrs(
+                            real_module, spec)
+                        exec(  # noqa: S102
+                            module_code, delegated_module.__dict__)
 
                 # Thirdparty tracking can just reuse the real module directly
                 # for its attr lookups, because thirdparty stub state never
@@ -785,6 +1067,10 @@ class _ExtractionFinderLoader(Loader):
                     src_module=delegated_module)
                 module._docnote_extract_src_module = delegated_module
                 self.module_stash_tracked[loader_state.fullname] = module
+                _record_instant(
+                    'hook', 'create_tracking',
+                    fullname=loader_state.fullname,
+                    is_firstparty=loader_state.is_firstparty)
 
             # See note in extract_firstparty for the reasoning here.
             elif loader_state.stub_strategy is _StubStrategy.INSPECT:
@@ -931,6 +1217,104 @@ def _activatate_tracking_registry(registry: TrackingRegistry):
         _ACTIVE_TRACKING_REGISTRY.reset(ctx_token)
 
 
+@contextmanager
+def _record_import_edges(
+        inspected_module: str
+        ) -> Generator[None, None, None]:
+    """If there's an active import graph, this records every import
+    executed within the ``with`` block into it.
+
+    Note that we can't do this from within ``find_spec``: by the time
+    we re-exec the firstparty modules, all of their imports are already
+    in ``sys.modules`` (that's the whole point of the preparation
+    phase), so the import system never even asks us about them. Instead,
+    we (temporarily, and globally -- just like ``TYPE_CHECKING``) wrap
+    ``__import__``, which sees every single import statement.
+    """
+    import_graph = _get_active_import_graph()
+    if import_graph is None:
+        yield
+        return
+
+    real_import = builtins.__import__
+
+    def recording_import(
+            name: str,
+            globals: dict[str, Any] | None = None,  # noqa: A002
+            locals: dict[str, Any] | None = None,  # noqa: A002
+            fromlist: Sequence[str] = (),
+            level: int = 0
+            ) -> ModuleType:
+        imported_module = real_import(name, globals, locals, fromlist, level)
+        # Direct ``__import__`` calls might not pass globals, in which case
+        # we can't know who the importer was (or resolve relative imports)
+        if globals is not None:
+            _add_import_edges(
+                import_graph,
+                inspected_module=inspected_module,
+                importer_globals=globals,
+                name=name,
+                fromlist=fromlist,
+                level=level)
+        return imported_module
+
+    builtins.__import__ = recording_import
+    try:
+        yield
+    finally:
+        builtins.__import__ = real_import
+
+
+def _add_import_edges(
+        import_graph: ImportGraph,
+        *,
+        inspected_module: str,
+        importer_globals: dict[str, Any],
+        name: str,
+        fromlist: Sequence[str] | None,
+        level: int
+        ) -> None:
+    """Adds the edges for a single (successful) ``__import__`` call.
+    Note that any names in the fromlist that are submodules are also
+    imports in their own right, so they get their own edges.
+    """
+    importer = importer_globals.get('__name__')
+    if importer is None:
+        return
+
+    if level > 0:
+        imported = resolve_name(
+            '.' * level + name, importer_globals.get('__package__'))
+    else:
+        imported = name
+
+    imported_names = [imported]
+    for from_name in fromlist or ():
+        submodule_name = f'{imported}.{from_name}'
+        if from_name != '*' and submodule_name in sys.modules:
+            imported_names.append(submodule_name)
+
+    for imported_name in imported_names:
+        import_graph.edges.add(ImportEdge(
+            importer=importer,
+            imported=imported_name,
+            stub_strategy=_get_import_strategy(sys.modules.get(imported_name)),
+            inspected_module=inspected_module))
+
+
+def _get_import_strategy(module: ModuleType | None) -> ImportStrategy:
+    # Note: we need to bypass getattr here, since stubs will happily return
+    # a stub for literally any attribute
+    stub_strategy = getattr(module, '__dict__', {}).get(
+        MODULE_ATTRNAME_STUBSTRATEGY)
+    if stub_strategy is _StubStrategy.STUB:
+        return ImportStrategy.STUB
+    elif stub_strategy is _StubStrategy.TRACK:
+        return ImportStrategy.TRACK
+    else:
+        return ImportStrategy.UNHOOKED
+
+
 @dataclass(slots=True, kw_only=True)
 class _ExtractionLoaderState:
     """
@@ -976,6 +1360,7 @@ def _wrapped_tracking_getattr(
         'Detected attribute access at wrapped tracking module %s:%s; '
         + 'delegating to %s (id=%s)',
         module_name, name, src_module, id(src_module))
+    _count_tracking_getattr(module_name)
     registry = _ACTIVE_TRACKING_REGISTRY.get(None)
     src_object = getattr(src_module, name)
     obj_id = id(src_object)
@@ -1008,6 +1393,7 @@ def _stubbed_getattr(
         name: str,
         *,
         module_name: str,
+        module_dict: dict[str, Any],
         special_reftype_markers: dict[Crossref, ReftypeMarker]):
     """Okay, yes, we could create our own module type. Alternatively,
     we could just inject a module.__getattr__!
@@ -1015,6 +1401,11 @@ def _stubbed_getattr(
     This replaces every attribute access (regardless of whether or not
     it exists on the true source module; we're relying upon type
     checkers to ensure that) with a reftype.
+
+    During the extraction phase, the reftype is also cached within the
+    module dict, so that subsequent accesses bypass ``__getattr__``
+    entirely. We can't do this any earlier, because the special reftype
+    markers aren't final until after exploration.
     """
     # Note that with firstparty packages, we inject the real __all__ from
     # the nostub module, so this condition should never be hit.
@@ -1027,16 +1418,17 @@ def _stubbed_getattr(
             module_name)
         return []
 
+    _record_stubbed_name(module_name, name)
     to_reference = Crossref(module_name=module_name, toplevel_name=name)
 
     special_reftype = special_reftype_markers.get(to_reference)
     if special_reftype is None:
         logger.debug('Returning normal reftype for %s', to_reference)
-        return make_crossreffed(module=module_name, name=name)
+        retval = make_crossreffed(module=module_name, name=name)
 
     elif special_reftype is ReftypeMarker.METACLASS:
         logger.debug('Returning metaclass reftype for %s.', to_reference)
-        return make_metaclass_crossreffed(module=module_name, name=name)
+        retval = make_metaclass_crossreffed(module=module_name, name=name)
 
     else:
         # This is just blocked on having a decorator flavor added to
@@ -1045,6 +1437,17 @@ def _stubbed_getattr(
         raise NotImplementedError(
             'Other special metaclass reftypes not yet supported.')
 
+    # Dunders are excluded because the import system (and various
+    # introspection tools) probe for them with hasattr, and we don't want
+    # those to become sticky.
+    if (
+        _EXTRACTION_PHASE.get(None) is _ExtractionPhase.EXTRACTION
+        and not (name.startswith('__') and name.endswith('__'))
+    ):
+        module_dict[name] = retval
+
+    return retval
+
 
 def is_wrapped_tracking_module(
         module: ModuleType
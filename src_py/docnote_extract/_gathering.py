@@ -1,31 +1,164 @@
 from __future__ import annotations
 
+import itertools
+import logging
+import os
 import sys
 from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from contextlib import ExitStack
 from dataclasses import dataclass
+from dataclasses import replace as dc_replace
+from functools import partial
+from pathlib import Path
 from typing import Annotated
+from typing import Any
+from typing import Literal
 from typing import overload
 
+from docnote import DocnoteConfig
 from docnote import Note
+from docnote import ReftypeMarker
 
-from docnote_extract._extraction import ReftypeMarker
+from docnote_extract._caching import CachedModule
+from docnote_extract._caching import ExtractionCache
+from docnote_extract._compilation import CodeCache
+from docnote_extract._extraction import ModulePostExtraction
 from docnote_extract._extraction import _ExtractionFinderLoader
+from docnote_extract._isolation import can_use_subinterpreters
+from docnote_extract._isolation import can_use_subprocesses
+from docnote_extract._isolation import gather_in_subinterpreters
+from docnote_extract._isolation import gather_in_subprocess
 from docnote_extract._module_tree import ConfiguredModuleTreeNode
 from docnote_extract._module_tree import SummaryTreeNode
+from docnote_extract._parallelism import ForkedExtraction
+from docnote_extract._parallelism import ModuleSummarizer
+from docnote_extract._parallelism import can_fork
+from docnote_extract._parallelism import extract_and_summarize_forked
+from docnote_extract._serialization import dumps
+from docnote_extract._serialization import loads
 from docnote_extract._summarization import SummaryMetadata
 from docnote_extract._summarization import summarize_module
+from docnote_extract._utils import get_explicit_config
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import GetattrTraversal
+from docnote_extract.discovery import ScanDiscovery
 from docnote_extract.exceptions import NotFirstpartyPackage
 from docnote_extract.exceptions import UnknownCrossrefTarget
 from docnote_extract.filtering import filter_canonical_ownership
 from docnote_extract.filtering import filter_module_summaries
 from docnote_extract.filtering import filter_private_summaries
+from docnote_extract.filtering import is_module_included
+from docnote_extract.import_graph import ImportGraph
+from docnote_extract.import_graph import _activate_import_graph
+from docnote_extract.memory import MemoryReport
+from docnote_extract.memory import _activate_memory_report
+from docnote_extract.memory import _record_retained_bytes
+from docnote_extract.memory import _take_memory_checkpoint
 from docnote_extract.normalization import normalize_module_dict
+from docnote_extract.profiling import SummaryProfile
+from docnote_extract.profiling import _activate_profile
+from docnote_extract.stats import GatherPhase
+from docnote_extract.stats import GatherStats
+from docnote_extract.stats import _activate_stats
+from docnote_extract.stats import _get_active_stats
+from docnote_extract.stats import _record_phase
 from docnote_extract.summaries import ModuleSummary
 from docnote_extract.summaries import SummaryBase
 from docnote_extract.summaries import SummaryMetadataFactoryProtocol
 from docnote_extract.summaries import SummaryMetadataProtocol
+from docnote_extract.telemetry import ExtractionTrace
+from docnote_extract.telemetry import _activate_trace
+
+logger = logging.getLogger(__name__)
+
+# The number of modules that ``iter_gather`` extracts before suspending the
+# extraction session to summarize (and yield) them. Every suspension stashes
+# and restores the whole of ``sys.modules``, so doing it once per module
+# would make streaming much slower than ``gather``.
+_ITER_GATHER_BATCH_SIZE = 32
+
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class ExtractionOptions:
+    """Groups the options for ``gather``, ``iter_gather``, and
+    ``watch_gather`` that control how firstparty modules are discovered
+    and extracted (as opposed to what gets extracted, or what happens
+    with the results). Pass an instance as ``extraction_options``.
+    """
+    preprocess_source: Annotated[
+        bool,
+        Note('''Set this to ``True`` to transform the source of each
+            firstparty module before execing it for extraction:
+            ``if TYPE_CHECKING:`` guards are folded to ``True``
+            (instead of setting ``typing.TYPE_CHECKING`` for the
+            whole process), and function bodies are replaced by
+            ``...``, which makes extraction faster and lighter.
+
+            Functions whose names are referenced anywhere outside of
+            a function body (for example, decorators and factories
+            used at module level), as well as all dunder methods,
+            keep their bodies. However, if your modules call their
+            own functions at import time in some other, more
+            indirect way, this can change the extracted values.''')] = False
+    static_extraction: Annotated[
+        bool,
+        Note('''Set this to ``True`` to statically extract firstparty
+            modules that consist purely of declarations (imports,
+            dataclasses, protocols, enums, typed constants, etc).
+            Instead of execing them under the import hook, these are
+            checked for import-time side effects via their AST, and
+            then exec'd with stripped function bodies and all of
+            their (non-stdlib) imports bound directly to reftypes.
+            Any module that might run firstparty code at import time
+            (for example, via a module-level call to a firstparty
+            function or a firstparty decorator) falls back to the
+            normal extraction.
+
+            Note that the imports of statically-extracted modules
+            bypass the import hook, so they aren't included in the
+            ``collect_import_graph`` or ``collect_trace`` results.
+            ''')] = False
+    prefer_stub_files: Annotated[
+        bool,
+        Note('''Set this to ``True`` to extract firstparty modules
+            that have a ``.pyi`` stub file next to them (for
+            example, ``foo.pyi`` next to ``foo.py``, or next to a
+            compiled ``foo.cpython-313-darwin.so``) from their stub
+            file instead of their implementation. This works the
+            same way as ``static_extraction``, including the
+            fallback to the normal extraction (of the
+            implementation) for stubs that can't be statically
+            extracted, and lets you document extension modules.
+            Overloads without an implementation (as is normal
+            within stubs) are supported.''')] = False
+    firstparty_wheels: Annotated[
+        Sequence[str | os.PathLike[str]] | None,
+        Note('''Paths to wheels (or any other zip archives) that
+            contain the firstparty packages. If passed, the
+            firstparty packages are imported directly from the
+            archives (via ``zipimport``, without extracting them to
+            disk), ahead of any installed versions, so they don't
+            need to be installed within the docs virtualenv.
+            Thirdparty packages are stubbed exactly as normal.
+
+            Only pure-python packages at the root of the archive are
+            supported; any compiled extension modules within them
+            can't be imported. Also note that any firstparty
+            packages that were already imported before calling
+            ``gather`` take precedence over the archives. Not supported
+            by ``watch_gather``.''')] = None
+    discovery: Annotated[
+        ScanDiscovery | None,
+        Note('''By default, firstparty modules are discovered by
+            importing every package and recursively asking it for
+            its submodules. Pass a ``ScanDiscovery`` to instead scan
+            the firstparty source directories up front, which
+            supports excluding modules (by glob) and, optionally,
+            namespace packages. With ``cache_dir``, the scan results
+            are also cached until any of the scanned directories
+            change.''')] = None
 
 
 @overload
@@ -59,7 +192,120 @@ def gather[T: SummaryMetadataProtocol](
                     module origin. This can create a large number of false
                     positives in ``metadata.to_document`` values, but can be
                     helpful in recovering module-level constants.''')
-            ] = True
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None,
+        jobs: Annotated[
+                int | None,
+                Note('''Set this to an integer greater than 1 to split the
+                    extraction and summarization of firstparty modules across
+                    that many forked worker processes. Exploration and
+                    preparation still happen (once) within the current
+                    process; the workers inherit their results.
+
+                    This requires ``os.fork``; on platforms without it, this
+                    falls back to serial gathering (with a warning). It also
+                    requires all summary metadata (including that of a custom
+                    ``summary_metadata_factory``), as well as any values
+                    collected from the code itself (for example, parameter
+                    defaults), to be picklable.''')
+            ] = None,
+        isolation: Annotated[
+                Literal['subinterpreter', 'subprocess'] | None,
+                Note('''Set this to run the whole gather somewhere other
+                    than the current interpreter, which then never has its
+                    own modules stashed (or otherwise touched) by the
+                    extraction. Only the finished summaries are sent back,
+                    so this has the same pickling requirements as ``jobs``;
+                    additionally, all of the other gather options (for
+                    example, a custom ``summary_metadata_factory``) must be
+                    picklable.
+
+                    With ``'subinterpreter'``, the firstparty packages are
+                    split between up to ``jobs`` subinterpreters (one, by
+                    default), which run in parallel. Each firstparty package
+                    is gathered as a whole within a single subinterpreter,
+                    so gathering a single package always uses exactly one
+                    subinterpreter, regardless of ``jobs``. Note that any
+                    ``nostub_packages`` with extension modules must support
+                    subinterpreters. This requires python 3.13 or later.
+
+                    With ``'subprocess'``, the gather runs in a fresh python
+                    process (which itself respects ``jobs``). This is slower
+                    to start, but a module that crashes the interpreter
+                    won't take down the current process. This requires a
+                    posix platform.
+
+                    If the requested isolation isn't supported, this falls
+                    back to normal gathering (with a warning).''')
+            ] = None,
+        cache_dir: Annotated[
+                str | os.PathLike[str] | None,
+                Note('''Set this to a directory path to enable a persistent
+                    cache of module summaries. On subsequent gathers, only
+                    modules whose source (or the source of any of their
+                    parent packages or firstparty imports) has changed will
+                    be extracted and summarized; everything else will be
+                    loaded from the cache. The gather options and the
+                    ``docnote``/``docnote_extract`` versions are also part of
+                    the cache key.
+
+                    As with ``jobs``, this requires summaries to be
+                    picklable. Modules whose summaries can't be pickled are
+                    simply not cached.
+
+                    The compiled code of firstparty modules is also cached
+                    here (for the current python version), which speeds up
+                    the extraction of any modules that did change, as are
+                    the special reftypes declared via
+                    ``DocnoteConfig.mark_special_reftype``.''')
+            ] = None,
+        collect_stats: Annotated[
+                bool,
+                Note('''Set this to ``True`` to collect per-phase wall and CPU
+                    times, per-module extraction and summarization times, and
+                    various counters (stubbed and tracked modules, reftypes
+                    created, and summaries by kind). These will be available
+                    on ``Docnotes.stats``. See ``docnote_extract.stats`` for
+                    details.''')
+            ] = False,
+        collect_import_graph: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record every import executed
+                    while extracting the firstparty modules, along with how
+                    the import hook handled it. This will be available on
+                    ``Docnotes.import_graph``. See
+                    ``docnote_extract.import_graph`` for details.''')
+            ] = False,
+        collect_trace: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record structured telemetry
+                    from the import hook (spec decisions, stub and tracking
+                    module creation, stash hits, module exec durations, and
+                    stub attribute access counts). This will be available on
+                    ``Docnotes.trace``, and can be exported for Perfetto. See
+                    ``docnote_extract.telemetry`` for details.''')
+            ] = False,
+        collect_summary_profile: Annotated[
+                bool,
+                Note('''Set this to ``True`` to profile the summarization of
+                    every individual module, namespace member, and signature,
+                    recording both inclusive and exclusive times. This will
+                    be available on ``Docnotes.summary_profile``. See
+                    ``docnote_extract.profiling`` for details.''')
+            ] = False,
+        collect_memory: Annotated[
+                bool,
+                Note('''Set this to ``True`` to trace memory allocations via
+                    ``tracemalloc``, taking snapshots at every phase boundary
+                    and measuring the memory retained by the module stashes
+                    and summaries. This will be available on
+                    ``Docnotes.memory``. **This is slow!** See
+                    ``docnote_extract.memory`` for details.''')
+            ] = False
         ) -> Docnotes[T]: ...
 @overload
 def gather(
@@ -92,9 +338,122 @@ def gather(
                     module origin. This can create a large number of false
                     positives in ``metadata.to_document`` values, but can be
                     helpful in recovering module-level constants.''')
-            ] = True
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None,
+        jobs: Annotated[
+                int | None,
+                Note('''Set this to an integer greater than 1 to split the
+                    extraction and summarization of firstparty modules across
+                    that many forked worker processes. Exploration and
+                    preparation still happen (once) within the current
+                    process; the workers inherit their results.
+
+                    This requires ``os.fork``; on platforms without it, this
+                    falls back to serial gathering (with a warning). It also
+                    requires all summary metadata (including that of a custom
+                    ``summary_metadata_factory``), as well as any values
+                    collected from the code itself (for example, parameter
+                    defaults), to be picklable.''')
+            ] = None,
+        isolation: Annotated[
+                Literal['subinterpreter', 'subprocess'] | None,
+                Note('''Set this to run the whole gather somewhere other
+                    than the current interpreter, which then never has its
+                    own modules stashed (or otherwise touched) by the
+                    extraction. Only the finished summaries are sent back,
+                    so this has the same pickling requirements as ``jobs``;
+                    additionally, all of the other gather options (for
+                    example, a custom ``summary_metadata_factory``) must be
+                    picklable.
+
+                    With ``'subinterpreter'``, the firstparty packages are
+                    split between up to ``jobs`` subinterpreters (one, by
+                    default), which run in parallel. Each firstparty package
+                    is gathered as a whole within a single subinterpreter,
+                    so gathering a single package always uses exactly one
+                    subinterpreter, regardless of ``jobs``. Note that any
+                    ``nostub_packages`` with extension modules must support
+                    subinterpreters. This requires python 3.13 or later.
+
+                    With ``'subprocess'``, the gather runs in a fresh python
+                    process (which itself respects ``jobs``). This is slower
+                    to start, but a module that crashes the interpreter
+                    won't take down the current process. This requires a
+                    posix platform.
+
+                    If the requested isolation isn't supported, this falls
+                    back to normal gathering (with a warning).''')
+            ] = None,
+        cache_dir: Annotated[
+                str | os.PathLike[str] | None,
+                Note('''Set this to a directory path to enable a persistent
+                    cache of module summaries. On subsequent gathers, only
+                    modules whose source (or the source of any of their
+                    parent packages or firstparty imports) has changed will
+                    be extracted and summarized; everything else will be
+                    loaded from the cache. The gather options and the
+                    ``docnote``/``docnote_extract`` versions are also part of
+                    the cache key.
+
+                    As with ``jobs``, this requires summaries to be
+                    picklable. Modules whose summaries can't be pickled are
+                    simply not cached.
+
+                    The compiled code of firstparty modules is also cached
+                    here (for the current python version), which speeds up
+                    the extraction of any modules that did change, as are
+                    the special reftypes declared via
+                    ``DocnoteConfig.mark_special_reftype``.''')
+            ] = None,
+        collect_stats: Annotated[
+                bool,
+                Note('''Set this to ``True`` to collect per-phase wall and CPU
+                    times, per-module extraction and summarization times, and
+                    various counters (stubbed and tracked modules, reftypes
+                    created, and summaries by kind). These will be available
+                    on ``Docnotes.stats``. See ``docnote_extract.stats`` for
+                    details.''')
+            ] = False,
+        collect_import_graph: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record every import executed
+                    while extracting the firstparty modules, along with how
+                    the import hook handled it. This will be available on
+                    ``Docnotes.import_graph``. See
+                    ``docnote_extract.import_graph`` for details.''')
+            ] = False,
+        collect_trace: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record structured telemetry
+                    from the import hook (spec decisions, stub and tracking
+                    module creation, stash hits, module exec durations, and
+                    stub attribute access counts). This will be available on
+                    ``Docnotes.trace``, and can be exported for Perfetto. See
+                    ``docnote_extract.telemetry`` for details.''')
+            ] = False,
+        collect_summary_profile: Annotated[
+                bool,
+                Note('''Set this to ``True`` to profile the summarization of
+                    every individual module, namespace member, and signature,
+                    recording both inclusive and exclusive times. This will
+                    be available on ``Docnotes.summary_profile``. See
+                    ``docnote_extract.profiling`` for details.''')
+            ] = False,
+        collect_memory: Annotated[
+                bool,
+                Note('''Set this to ``True`` to trace memory allocations via
+                    ``tracemalloc``, taking snapshots at every phase boundary
+                    and measuring the memory retained by the module stashes
+                    and summaries. This will be available on
+                    ``Docnotes.memory``. **This is slow!** See
+                    ``docnote_extract.memory`` for details.''')
+            ] = False
         ) -> Docnotes[SummaryMetadata]: ...
-def gather[T: SummaryMetadataProtocol](
+def gather[T: SummaryMetadataProtocol](  # noqa: PLR0913
         firstparty_pkg_names: Iterable[str],
         *,
         summary_metadata_factory:
@@ -125,7 +484,120 @@ def gather[T: SummaryMetadataProtocol](
                     module origin. This can create a large number of false
                     positives in ``metadata.to_document`` values, but can be
                     helpful in recovering module-level constants.''')
-            ] = True
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None,
+        jobs: Annotated[
+                int | None,
+                Note('''Set this to an integer greater than 1 to split the
+                    extraction and summarization of firstparty modules across
+                    that many forked worker processes. Exploration and
+                    preparation still happen (once) within the current
+                    process; the workers inherit their results.
+
+                    This requires ``os.fork``; on platforms without it, this
+                    falls back to serial gathering (with a warning). It also
+                    requires all summary metadata (including that of a custom
+                    ``summary_metadata_factory``), as well as any values
+                    collected from the code itself (for example, parameter
+                    defaults), to be picklable.''')
+            ] = None,
+        isolation: Annotated[
+                Literal['subinterpreter', 'subprocess'] | None,
+                Note('''Set this to run the whole gather somewhere other
+                    than the current interpreter, which then never has its
+                    own modules stashed (or otherwise touched) by the
+                    extraction. Only the finished summaries are sent back,
+                    so this has the same pickling requirements as ``jobs``;
+                    additionally, all of the other gather options (for
+                    example, a custom ``summary_metadata_factory``) must be
+                    picklable.
+
+                    With ``'subinterpreter'``, the firstparty packages are
+                    split between up to ``jobs`` subinterpreters (one, by
+                    default), which run in parallel. Each firstparty package
+                    is gathered as a whole within a single subinterpreter,
+                    so gathering a single package always uses exactly one
+                    subinterpreter, regardless of ``jobs``. Note that any
+                    ``nostub_packages`` with extension modules must support
+                    subinterpreters. This requires python 3.13 or later.
+
+                    With ``'subprocess'``, the gather runs in a fresh python
+                    process (which itself respects ``jobs``). This is slower
+                    to start, but a module that crashes the interpreter
+                    won't take down the current process. This requires a
+                    posix platform.
+
+                    If the requested isolation isn't supported, this falls
+                    back to normal gathering (with a warning).''')
+            ] = None,
+        cache_dir: Annotated[
+                str | os.PathLike[str] | None,
+                Note('''Set this to a directory path to enable a persistent
+                    cache of module summaries. On subsequent gathers, only
+                    modules whose source (or the source of any of their
+                    parent packages or firstparty imports) has changed will
+                    be extracted and summarized; everything else will be
+                    loaded from the cache. The gather options and the
+                    ``docnote``/``docnote_extract`` versions are also part of
+                    the cache key.
+
+                    As with ``jobs``, this requires summaries to be
+                    picklable. Modules whose summaries can't be pickled are
+                    simply not cached.
+
+                    The compiled code of firstparty modules is also cached
+                    here (for the current python version), which speeds up
+                    the extraction of any modules that did change, as are
+                    the special reftypes declared via
+                    ``DocnoteConfig.mark_special_reftype``.''')
+            ] = None,
+        collect_stats: Annotated[
+                bool,
+                Note('''Set this to ``True`` to collect per-phase wall and CPU
+                    times, per-module extraction and summarization times, and
+                    various counters (stubbed and tracked modules, reftypes
+                    created, and summaries by kind). These will be available
+                    on ``Docnotes.stats``. See ``docnote_extract.stats`` for
+                    details.''')
+            ] = False,
+        collect_import_graph: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record every import executed
+                    while extracting the firstparty modules, along with how
+                    the import hook handled it. This will be available on
+                    ``Docnotes.import_graph``. See
+                    ``docnote_extract.import_graph`` for details.''')
+            ] = False,
+        collect_trace: Annotated[
+                bool,
+                Note('''Set this to ``True`` to record structured telemetry
+                    from the import hook (spec decisions, stub and tracking
+                    module creation, stash hits, module exec durations, and
+                    stub attribute access counts). This will be available on
+                    ``Docnotes.trace``, and can be exported for Perfetto. See
+                    ``docnote_extract.telemetry`` for details.''')
+            ] = False,
+        collect_summary_profile: Annotated[
+                bool,
+                Note('''Set this to ``True`` to profile the summarization of
+                    every individual module, namespace member, and signature,
+                    recording both inclusive and exclusive times. This will
+                    be available on ``Docnotes.summary_profile``. See
+                    ``docnote_extract.profiling`` for details.''')
+            ] = False,
+        collect_memory: Annotated[
+                bool,
+                Note('''Set this to ``True`` to trace memory allocations via
+                    ``tracemalloc``, taking snapshots at every phase boundary
+                    and measuring the memory retained by the module stashes
+                    and summaries. This will be available on
+                    ``Docnotes.memory``. **This is slow!** See
+                    ``docnote_extract.memory`` for details.''')
+            ] = False
         ) -> Docnotes[T]:
     """Uses an import hook to discover all firstparty modules within the
     specified toplevel firstparty package names and then extracts
@@ -172,7 +644,331 @@ def gather[T: SummaryMetadataProtocol](
     to force a particular import to be a metaclass- or
     decorator-compatible stub).
     """
-    floader_options = {}
+    if extraction_options is None:
+        extraction_options = ExtractionOptions()
+    floader_options = _get_floader_options(
+        special_reftype_markers=special_reftype_markers,
+        nostub_firstparty_modules=nostub_firstparty_modules,
+        nostub_packages=nostub_packages,
+        extraction_options=extraction_options)
+
+    if isolation is not None:
+        # The floader options have already been converted to picklable
+        # collections (including the resolved wheel paths), so we pass
+        # those along instead of the originals.
+        gather_kwargs: dict[str, Any] = {
+            'special_reftype_markers':
+                floader_options.get('special_reftype_markers'),
+            'nostub_firstparty_modules':
+                floader_options.get('nostub_firstparty_modules'),
+            'nostub_packages': floader_options.get('nostub_packages'),
+            'remove_unknown_origins': remove_unknown_origins,
+            'extraction_options': dc_replace(
+                extraction_options,
+                firstparty_wheels=floader_options.get('firstparty_wheels')),
+            'cache_dir': cache_dir,
+            'collect_stats': collect_stats,
+            'collect_import_graph': collect_import_graph,
+            'collect_trace': collect_trace,
+            'collect_summary_profile': collect_summary_profile,
+            'collect_memory': collect_memory}
+        if summary_metadata_factory is not None:
+            gather_kwargs['summary_metadata_factory'] = (
+                summary_metadata_factory)
+
+        isolated_docnotes = _gather_isolated(
+            isolation,
+            frozenset(firstparty_pkg_names),
+            jobs=jobs,
+            gather_kwargs=gather_kwargs)
+        if isolated_docnotes is not None:
+            return isolated_docnotes
+
+    summarize = _get_summarizer(
+        summary_metadata_factory=summary_metadata_factory,
+        remove_unknown_origins=remove_unknown_origins)
+
+    if jobs is not None and jobs > 1 and not can_fork():
+        logger.warning(
+            'Parallel gathering requires ``os.fork``, which is unavailable '
+            + 'on this platform. Falling back to serial gathering.')
+        jobs = None
+
+    if cache_dir is None:
+        cache = None
+        code_cache = CodeCache()
+    else:
+        cache = ExtractionCache.from_gather_options(
+            cache_dir,
+            nostub_firstparty_modules=floader_options.get(
+                'nostub_firstparty_modules'),
+            nostub_packages=floader_options.get('nostub_packages'),
+            preprocess_source=extraction_options.preprocess_source,
+            static_extraction=extraction_options.static_extraction,
+            prefer_stub_files=extraction_options.prefer_stub_files,
+            summary_metadata_factory=summary_metadata_factory,
+            remove_unknown_origins=remove_unknown_origins)
+        code_cache = CodeCache(cache_dir=Path(cache_dir) / 'code')
+        floader_options['discovery_cache_path'] = (
+            Path(cache_dir) / 'discovery.json')
+        floader_options['special_reftype_cache_path'] = (
+            Path(cache_dir) / 'special_reftypes.json')
+
+    stats = GatherStats() if collect_stats else None
+    import_graph = ImportGraph() if collect_import_graph else None
+    trace = ExtractionTrace() if collect_trace else None
+    summary_profile = SummaryProfile() if collect_summary_profile else None
+    memory_report = MemoryReport() if collect_memory else None
+    with ExitStack() as exit_stack:
+        _activate_reports(
+            exit_stack,
+            stats=stats,
+            import_graph=import_graph,
+            trace=trace,
+            summary_profile=summary_profile,
+            memory_report=memory_report)
+
+        firstpary_pkgs = frozenset(firstparty_pkg_names)
+        floader = _ExtractionFinderLoader(
+            firstpary_pkgs, code_cache=code_cache, **floader_options)
+        configured_trees, summary_lookup = _gather_module_summaries(
+            floader,
+            summarize=summarize,
+            jobs=jobs,
+            cache=cache)
+        _take_memory_checkpoint('summarization')
+
+        summaries = _build_summary_trees(configured_trees, summary_lookup)
+        _take_memory_checkpoint('filtering')
+        if memory_report is not None:
+            _record_retained_bytes('summaries', summary_lookup.values())
+            _record_retained_bytes(
+                'crossref_namespaces',
+                [
+                    summary.metadata.crossref_namespace
+                    for module_summary in summary_lookup.values()
+                    for summary in module_summary.flatten()
+                    if hasattr(summary.metadata, 'crossref_namespace')])
+
+    if stats is not None:
+        _count_summaries(stats, summary_lookup.values())
+
+    return Docnotes(
+        summaries,
+        stats=stats,
+        import_graph=import_graph,
+        trace=trace,
+        summary_profile=summary_profile,
+        memory=memory_report)
+
+
+@overload
+def iter_gather[T: SummaryMetadataProtocol](
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory: SummaryMetadataFactoryProtocol[T],
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None
+        ) -> Iterator[tuple[str, ModuleSummary[T]]]: ...
+@overload
+def iter_gather(
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory: None = None,
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None
+        ) -> Iterator[tuple[str, ModuleSummary[SummaryMetadata]]]: ...
+def iter_gather[T: SummaryMetadataProtocol](
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory:
+            SummaryMetadataFactoryProtocol[T] | None = None,
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.''')
+            ] = None
+        ) -> Iterator[tuple[str, ModuleSummary[T]]]:
+    """A streaming version of ``gather``. Instead of building the
+    complete ``Docnotes`` collection, this yields a
+    ``(module_fullname, module_summary)`` tuple for each firstparty
+    module as soon as it has been extracted and summarized. The
+    summaries are already fully filtered, including the module-level
+    ``to_document`` that ``gather`` assigns via the module tree.
+
+    Modules are extracted in small batches (currently, of 32 modules),
+    which are then summarized and yielded together. All intermediate
+    objects (the extracted module, the normalized objects, etc) are
+    released as soon as each module has been summarized, so memory use
+    stays roughly constant, regardless of the size of the firstparty
+    packages.
+
+    Modules are yielded in depth-first order, with parent packages
+    always before their children, but otherwise in no particular order.
+    If you need the tree structure (or crossref resolution), use
+    ``gather`` instead.
+
+    Note that the import hook is installed for the whole lifetime of
+    the generator. It's temporarily suspended (and the prehook modules
+    restored) while summarizing each batch and while the generator is
+    suspended at a ``yield``, so your own code sees a normal import
+    system between iterations. However, you should still always exhaust
+    or ``close()`` the generator (or use it within a ``with
+    contextlib.closing(...)`` block) to make sure the extraction
+    session is cleaned up promptly.
+
+    Also note that, since the module tree needs to be configured before
+    any module can be summarized, the explicit module configs are taken
+    from the modules as executed during the exploration phase, and not
+    from the extracted modules. In practice, these are always the same,
+    unless the config itself depends upon a stubbed thirdparty import.
+
+    See ``gather`` for details on the parameters (and the inherent
+    dangers of extracting arbitrary code).
+    """
+    floader_options = _get_floader_options(
+        special_reftype_markers=special_reftype_markers,
+        nostub_firstparty_modules=nostub_firstparty_modules,
+        nostub_packages=nostub_packages,
+        extraction_options=extraction_options or ExtractionOptions())
+    summarize = _get_summarizer(
+        summary_metadata_factory=summary_metadata_factory,
+        remove_unknown_origins=remove_unknown_origins)
+
+    floader = _ExtractionFinderLoader(
+        frozenset(firstparty_pkg_names), **floader_options)
+    with floader.extraction_session() as firstparty_names:
+        configured_trees = ConfiguredModuleTreeNode.from_explicit_configs({
+            module_name: get_explicit_config(
+                floader.module_stash_nostub_raw[module_name])
+            for module_name in firstparty_names})
+
+        module_trees = [
+            (configured_tree_node.fullname, configured_tree)
+            for configured_tree in configured_trees.values()
+            for configured_tree_node in configured_tree.flatten()]
+        for batch in itertools.batched(module_trees, _ITER_GATHER_BATCH_SIZE):
+            extraction = {
+                module_name: floader.extract_firstparty(module_name)
+                for module_name, _ in batch}
+
+            with floader.suspended_session(firstparty_names):
+                batch_summaries: list[tuple[str, ModuleSummary]] = []
+                for module_name, configured_tree in batch:
+                    # Popping drops our reference, so that the extracted
+                    # module can be GC'd as soon as it's been summarized.
+                    module_summary = summarize(
+                        extraction.pop(module_name), configured_tree)
+                    module_summary.metadata.to_document = is_module_included(
+                        configured_tree, module_name)
+                    batch_summaries.append((module_name, module_summary))
+
+                yield from batch_summaries
+
+
+def _get_floader_options(
+        *,
+        special_reftype_markers: dict[Crossref, ReftypeMarker] | None,
+        nostub_firstparty_modules: Iterable[str] | None,
+        nostub_packages: Iterable[str] | None,
+        extraction_options: ExtractionOptions
+        ) -> dict[str, Any]:
+    floader_options: dict[str, Any] = {
+        'preprocess_source': extraction_options.preprocess_source,
+        'static_extraction': extraction_options.static_extraction,
+        'prefer_stub_files': extraction_options.prefer_stub_files}
+    if extraction_options.discovery is not None:
+        floader_options['discovery'] = extraction_options.discovery
+    if extraction_options.firstparty_wheels is not None:
+        floader_options['firstparty_wheels'] = _resolve_wheel_paths(
+            extraction_options.firstparty_wheels)
     if nostub_firstparty_modules is not None:
         floader_options['nostub_firstparty_modules'] = frozenset(
             nostub_firstparty_modules)
@@ -181,42 +977,325 @@ def gather[T: SummaryMetadataProtocol](
     if special_reftype_markers is not None:
         floader_options['special_reftype_markers'] = special_reftype_markers
 
+    return floader_options
+
+
+def _gather_isolated(
+        isolation: Literal['subinterpreter', 'subprocess'],
+        firstparty_pkgs: frozenset[str],
+        *,
+        jobs: int | None,
+        gather_kwargs: dict[str, Any]
+        ) -> Docnotes | None:
+    """Runs the gather with the requested isolation, or returns None
+    (with a warning) if that isn't supported here.
+    """
+    if isolation == 'subinterpreter' and can_use_subinterpreters():
+        return gather_in_subinterpreters(
+            firstparty_pkgs,
+            jobs=jobs or 1,
+            gather_kwargs=gather_kwargs)
+
+    elif isolation == 'subprocess' and can_use_subprocesses():
+        return gather_in_subprocess(
+            firstparty_pkgs,
+            gather_kwargs={**gather_kwargs, 'jobs': jobs})
+
+    logger.warning(
+        'Isolation %r is unsupported by the current platform or python '
+        + 'version. Falling back to normal gathering.', isolation)
+    return None
+
+
+def _activate_reports(
+        exit_stack: ExitStack,
+        *,
+        stats: GatherStats | None,
+        import_graph: ImportGraph | None,
+        trace: ExtractionTrace | None,
+        summary_profile: SummaryProfile | None,
+        memory_report: MemoryReport | None
+        ) -> None:
+    """Activates all of the passed reports for the remainder of the
+    ``exit_stack``, skipping the ones that aren't being collected.
+    """
+    if stats is not None:
+        exit_stack.enter_context(_activate_stats(stats))
+    if import_graph is not None:
+        exit_stack.enter_context(_activate_import_graph(import_graph))
+    if trace is not None:
+        exit_stack.enter_context(_activate_trace(trace))
+    if summary_profile is not None:
+        exit_stack.enter_context(_activate_profile(summary_profile))
+    if memory_report is not None:
+        exit_stack.enter_context(_activate_memory_report(memory_report))
+
+
+def _count_summaries[T: SummaryMetadataProtocol](
+        stats: GatherStats,
+        module_summaries: Iterable[ModuleSummary[T]]
+        ) -> None:
+    """Tallies up the final summaries by their type, recording the
+    counts on the passed stats.
+    """
+    for module_summary in module_summaries:
+        for summary in module_summary.flatten():
+            kind = type(summary).__name__
+            stats.summary_counts[kind] = stats.summary_counts.get(kind, 0) + 1
+
+
+def _resolve_wheel_paths(
+        firstparty_wheels: Iterable[str | os.PathLike[str]]
+        ) -> tuple[str, ...]:
+    """Converts the passed wheel paths into absolute path strings,
+    since that's what goes onto sys.path. We check for their existence
+    up front; otherwise, missing wheels would silently be skipped by the
+    import system, resulting in confusing import errors.
+    """
+    wheel_paths: list[str] = []
+    for firstparty_wheel in firstparty_wheels:
+        wheel_path = Path(firstparty_wheel).resolve()
+        if not wheel_path.is_file():
+            raise FileNotFoundError(
+                'Firstparty wheel not found', firstparty_wheel)
+
+        wheel_paths.append(str(wheel_path))
+
+    return tuple(wheel_paths)
+
+
+def _get_summarizer(
+        *,
+        summary_metadata_factory: SummaryMetadataFactoryProtocol | None,
+        remove_unknown_origins: bool
+        ) -> ModuleSummarizer:
     if summary_metadata_factory is None:
         factory_kwarg = {}
     else:
         factory_kwarg = {'summary_metadata_factory': summary_metadata_factory}
 
-    firstpary_pkgs = frozenset(firstparty_pkg_names)
-    floader = _ExtractionFinderLoader(firstpary_pkgs, **floader_options)
-    extraction = floader.discover_and_extract()
-    configured_trees = ConfiguredModuleTreeNode.from_extraction(extraction)
+    return partial(
+        _summarize_module_extraction,
+        remove_unknown_origins=remove_unknown_origins,
+        **factory_kwarg)
 
-    summaries: dict[str, SummaryTreeNode] = {}
-    for pkg_name, configured_tree in configured_trees.items():
-        summary_lookup: dict[str, ModuleSummary] = {}
 
+def _gather_module_summaries(
+        floader: _ExtractionFinderLoader,
+        *,
+        summarize: ModuleSummarizer,
+        jobs: int | None,
+        cache: ExtractionCache | None
+        ) -> tuple[
+            dict[str, ConfiguredModuleTreeNode],
+            dict[str, ModuleSummary]]:
+    """Runs the whole extraction session, returning the configured
+    module trees and a lookup of ``{module_name: module_summary}`` for
+    every firstparty module. Depending on the passed options, the
+    summaries might have been extracted and summarized in the current
+    process, by forked workers, or loaded from the cache.
+    """
+    fingerprints: dict[str, str] = {}
+    cached_modules: dict[str, CachedModule] = {}
+    forked_extraction: ForkedExtraction | None = None
+    extraction: dict[str, ModulePostExtraction] = {}
+    with floader.extraction_session() as firstparty_names:
+        if cache is not None:
+            fingerprints, cached_modules = _find_cached_modules(
+                cache, floader, firstparty_names)
+
+        modules_to_extract = firstparty_names - cached_modules.keys()
+        if modules_to_extract and jobs is not None and jobs > 1:
+            forked_extraction = extract_and_summarize_forked(
+                floader,
+                modules_to_extract,
+                jobs=jobs,
+                summarize=summarize,
+                extra_config_payloads=[
+                    cached_module.config_payload
+                    for cached_module in cached_modules.values()])
+        elif modules_to_extract:
+            extraction = _extract_serial(floader, modules_to_extract)
+
+    # Note that everything from here on out needs to wait until after the
+    # session has closed, since unpickling might need to import (real)
+    # firstparty modules.
+    explicit_configs: dict[str, DocnoteConfig | None] = {}
+    summary_lookup: dict[str, ModuleSummary] = {}
+    with _record_phase(GatherPhase.CACHE):
+        for module_name, cached_module in cached_modules.items():
+            explicit_configs.update(loads(cached_module.config_payload))
+            summary_lookup[module_name] = loads(cached_module.summary_payload)
+
+    summary_payloads: dict[str, bytes] = {}
+    if forked_extraction is not None:
+        forked_configs, forked_summaries = forked_extraction.load()
+        explicit_configs.update(forked_configs)
+        summary_lookup.update(forked_summaries)
+        summary_payloads.update(forked_extraction.summary_payloads)
+
+    for module_name, module in extraction.items():
+        explicit_configs[module_name] = get_explicit_config(module)
+
+    configured_trees = ConfiguredModuleTreeNode.from_explicit_configs(
+        explicit_configs)
+    summary_lookup.update(
+        _summarize_serial(extraction, configured_trees, summarize))
+
+    if cache is not None:
+        stats = _get_active_stats()
+        if stats is not None:
+            stats.cached_module_count = len(cached_modules)
+
+        _store_cached_summaries(
+            cache,
+            {
+                module_name: fingerprints[module_name]
+                for module_name in firstparty_names - cached_modules.keys()
+                if module_name in fingerprints},
+            explicit_configs=explicit_configs,
+            summary_lookup=summary_lookup,
+            summary_payloads=summary_payloads)
+
+    return configured_trees, summary_lookup
+
+
+def _find_cached_modules(
+        cache: ExtractionCache,
+        floader: _ExtractionFinderLoader,
+        firstparty_names: frozenset[str]
+        ) -> tuple[dict[str, str], dict[str, CachedModule]]:
+    """Fingerprints all of the firstparty modules, and then loads
+    every one of them that has a matching cache entry. Returns the
+    fingerprints and the cached modules, both keyed by module name.
+    """
+    cached_modules: dict[str, CachedModule] = {}
+    with _record_phase(GatherPhase.CACHE):
+        fingerprints = cache.fingerprint_modules(floader, firstparty_names)
+        for module_name, fingerprint in fingerprints.items():
+            cached_module = cache.load(module_name, fingerprint)
+            if cached_module is not None:
+                cached_modules[module_name] = cached_module
+
+    logger.info(
+        'Found cached summaries for %s of %s modules.',
+        len(cached_modules), len(firstparty_names))
+    return fingerprints, cached_modules
+
+
+def _extract_serial(
+        floader: _ExtractionFinderLoader,
+        module_names: Iterable[str]
+        ) -> dict[str, ModulePostExtraction]:
+    """Extracts the passed modules one at a time, within the current
+    process. Must be called from within an active extraction session.
+    """
+    extraction: dict[str, ModulePostExtraction] = {}
+    for module_name in module_names:
+        extraction[module_name] = floader.extract_firstparty(module_name)
+
+    logger.info('Extraction completed successfully.')
+    return extraction
+
+
+def _summarize_serial(
+        extraction: dict[str, ModulePostExtraction],
+        configured_trees: dict[str, ConfiguredModuleTreeNode],
+        summarize: ModuleSummarizer
+        ) -> dict[str, ModuleSummary]:
+    """Summarizes all of the passed (serially-extracted) modules.
+    This must wait until after the extraction session has closed.
+    """
+    summary_lookup: dict[str, ModuleSummary] = {}
+    if not extraction:
+        return summary_lookup
+
+    for configured_tree in configured_trees.values():
         for configured_tree_node in configured_tree.flatten():
-            module_extraction = extraction[configured_tree_node.fullname]
-            normalized_objs = normalize_module_dict(
-                module_extraction,
-                configured_tree)
-            module_summary = summarize_module(
-                module_extraction,
-                normalized_objs,
-                configured_tree,
-                **factory_kwarg)
-            filter_canonical_ownership(
-                module_summary, remove_unknown_origins=remove_unknown_origins)
-            filter_private_summaries(module_summary)
-            summary_lookup[configured_tree_node.fullname] = module_summary
+            module_extraction = extraction.get(configured_tree_node.fullname)
+            if module_extraction is not None:
+                summary_lookup[configured_tree_node.fullname] = summarize(
+                    module_extraction, configured_tree)
+
+    return summary_lookup
 
+
+def _store_cached_summaries(
+        cache: ExtractionCache,
+        fingerprints: dict[str, str],
+        *,
+        explicit_configs: dict[str, DocnoteConfig | None],
+        summary_lookup: dict[str, ModuleSummary],
+        summary_payloads: dict[str, bytes]
+        ) -> None:
+    """Stores the summaries of all of the modules in ``fingerprints``
+    in the cache. Modules whose summaries are already pickled (because
+    they came from forked workers) reuse the existing payloads.
+    """
+    with _record_phase(GatherPhase.CACHE):
+        for module_name, fingerprint in fingerprints.items():
+            try:
+                summary_payload = summary_payloads.get(module_name)
+                if summary_payload is None:
+                    summary_payload = dumps(summary_lookup[module_name])
+
+                cache.store(module_name, fingerprint, CachedModule(
+                    config_payload=dumps(
+                        {module_name: explicit_configs[module_name]}),
+                    summary_payload=summary_payload))
+            except Exception:
+                logger.warning(
+                    'Failed to cache summary for %s. Is it picklable?',
+                    module_name, exc_info=True)
+
+
+def _build_summary_trees[T: SummaryMetadataProtocol](
+        configured_trees: dict[str, ConfiguredModuleTreeNode],
+        summary_lookup: dict[str, ModuleSummary[T]]
+        ) -> dict[str, SummaryTreeNode[T]]:
+    """Assembles the summary tree for each of the configured trees,
+    and then applies module-level filtering to it.
+    """
+    summaries: dict[str, SummaryTreeNode[T]] = {}
+    for pkg_name, configured_tree in configured_trees.items():
         summaries[pkg_name] = summary_tree = \
             SummaryTreeNode.from_configured_module_tree(
                 configured_tree,
                 summary_lookup)
-        filter_module_summaries(summary_tree, configured_tree)
+        with _record_phase(GatherPhase.FILTERING):
+            filter_module_summaries(summary_tree, configured_tree)
+
+    return summaries
+
 
-    return Docnotes(summaries)
+def _summarize_module_extraction[T: SummaryMetadataProtocol](
+        module_extraction: ModulePostExtraction,
+        configured_tree: ConfiguredModuleTreeNode,
+        *,
+        remove_unknown_origins: bool,
+        summary_metadata_factory:
+            SummaryMetadataFactoryProtocol[T] = SummaryMetadata.factory
+        ) -> ModuleSummary[T]:
+    """Normalizes, summarizes, and filters a single extracted module.
+    The ``configured_tree`` must be the root node for the module's
+    package.
+    """
+    module_name = module_extraction.__name__
+    with _record_phase(GatherPhase.NORMALIZATION, module_name):
+        normalized_objs = normalize_module_dict(
+            module_extraction,
+            configured_tree)
+    with _record_phase(GatherPhase.SUMMARIZATION, module_name):
+        module_summary = summarize_module(
+            module_extraction,
+            normalized_objs,
+            configured_tree,
+            summary_metadata_factory)
+    with _record_phase(GatherPhase.FILTERING, module_name):
+        filter_canonical_ownership(
+            module_summary, remove_unknown_origins=remove_unknown_origins)
+        filter_private_summaries(module_summary)
+    return module_summary
 
 
 @dataclass(slots=True, frozen=True)
@@ -224,6 +1303,31 @@ class Docnotes[T: SummaryMetadataProtocol]:
     """
     """
     summaries: dict[str, SummaryTreeNode[T]]
+    stats: Annotated[
+            GatherStats | None,
+            Note('''This is only populated when gathering with
+                ``collect_stats=True``.''')
+        ] = None
+    import_graph: Annotated[
+            ImportGraph | None,
+            Note('''This is only populated when gathering with
+                ``collect_import_graph=True``.''')
+        ] = None
+    trace: Annotated[
+            ExtractionTrace | None,
+            Note('''This is only populated when gathering with
+                ``collect_trace=True``.''')
+        ] = None
+    summary_profile: Annotated[
+            SummaryProfile | None,
+            Note('''This is only populated when gathering with
+                ``collect_summary_profile=True``.''')
+        ] = None
+    memory: Annotated[
+            MemoryReport | None,
+            Note('''This is only populated when gathering with
+                ``collect_memory=True``.''')
+        ] = None
 
     def is_firstparty(self, crossref: Crossref) -> bool:
         """Returns True if the passed crossref is firstparty (and
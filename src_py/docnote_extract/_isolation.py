@@ -0,0 +1,356 @@
+"""This contains the machinery behind ``gather(..., isolation=...)``.
+Normally, the whole extraction session runs within the current
+interpreter, which means installing an import hook, stashing (and
+later restoring) most of ``sys.modules``, flipping
+``typing.TYPE_CHECKING``, and so on. With isolation, the entire gather
+instead runs somewhere else, and only the (pickled) summaries are sent
+back to the current interpreter.
+
+Subinterpreter isolation runs the gather within one or more
+subinterpreters, each of which has its own ``sys.modules``,
+``sys.meta_path``, and GIL. The firstparty packages are split between
+them: the effective config of any given module only ever depends upon
+the explicit configs of its own package, so (unlike forked workers)
+each subinterpreter can run the complete gather for its share of the
+packages, without needing to coordinate with any of the others.
+
+There's no public API for subinterpreters before python 3.14, so we use
+the (private, but reasonably stable) ``_interpreters`` module, which
+exists from 3.13 onwards. The worker threads block on
+``_interpreters.exec``, and the workers report back over a pipe, using
+the same messages as forked workers.
+
+Subprocess isolation instead runs the gather within a single, freshly
+launched python process. That's slower to start than a subinterpreter,
+but it works on older python versions, and a module that crashes the
+interpreter outright only takes down the worker. The gather options are
+sent over the worker's stdin, and the results come back over its
+stdout (again, using the same messages as forked workers). Anything the
+firstparty code itself prints to stdout is redirected to stderr, so
+that it can't corrupt the results.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import sys
+import traceback
+from collections.abc import Collection
+from multiprocessing.connection import Connection
+from threading import Thread
+from typing import IO
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Protocol
+from typing import Self
+from typing import cast
+
+from docnote_extract._parallelism import _collect_payloads
+from docnote_extract._parallelism import _MessageKind
+from docnote_extract._parallelism import partition_module_names
+from docnote_extract._serialization import dumps
+from docnote_extract._serialization import loads
+
+if TYPE_CHECKING:
+    from docnote_extract._gathering import Docnotes
+    from docnote_extract._module_tree import SummaryTreeNode
+    from docnote_extract.import_graph import ImportGraph
+    from docnote_extract.memory import MemoryReport
+    from docnote_extract.profiling import SummaryProfile
+    from docnote_extract.stats import GatherStats
+    from docnote_extract.telemetry import ExtractionTrace
+
+try:
+    import _interpreters  # type: ignore
+except ImportError:
+    _interpreters = None
+
+
+# This is what each subinterpreter runs. Subinterpreters get a fresh
+# ``sys.path`` (based on the interpreter config, not on the current
+# ``sys.path``), so we need to copy ours over before we can import
+# anything. Paths can't contain null bytes, so they're a safe separator.
+_SUBINTERPRETER_SCRIPT = '''\
+import sys
+sys.path[:] = _docnote_extract_sys_path.split('\\0')
+from docnote_extract._isolation import _run_subinterpreter_worker
+_run_subinterpreter_worker(_docnote_extract_fd, _docnote_extract_payload)
+'''
+# Similarly, for subprocesses, we pass the current ``sys.path`` as the
+# script arguments.
+_SUBPROCESS_SCRIPT = '''\
+import sys
+sys.path[:] = sys.argv[1:]
+from docnote_extract._isolation import _run_subprocess_worker
+_run_subprocess_worker()
+'''
+
+logger = logging.getLogger(__name__)
+
+
+class _Mergeable(Protocol):
+
+    def merge(self, other: Self) -> None: ...
+
+
+def can_use_subinterpreters() -> bool:
+    """Returns True if the current interpreter supports subinterpreter
+    isolation (which requires python 3.13+).
+    """
+    return _interpreters is not None
+
+
+def can_use_subprocesses() -> bool:
+    """Returns True if the current platform supports subprocess
+    isolation. We communicate with the worker via raw file descriptors,
+    which (like ``os.fork``) requires a posix platform.
+    """
+    return os.name == 'posix'
+
+
+def gather_in_subinterpreters(
+        firstparty_pkg_names: Collection[str],
+        *,
+        jobs: int,
+        gather_kwargs: dict[str, Any]
+        ) -> Docnotes:
+    """Splits the passed firstparty packages between (at most)
+    ``jobs`` subinterpreters, and calls ``gather`` for each share within
+    its subinterpreter, passing it the ``gather_kwargs`` (which must
+    therefore be picklable). Returns the combined ``Docnotes`` of all
+    of the workers.
+
+    Raises ``ExtractionWorkerError`` if any of the workers fails. Note
+    that subinterpreters can't be interrupted, so we always need to
+    wait for all of the remaining workers to finish before raising.
+    """
+    if _interpreters is None:
+        raise RuntimeError(
+            'Subinterpreter isolation requires ``_interpreters``!')
+
+    sys_path = '\0'.join(sys.path)
+    workers: dict[Connection, int] = {}
+    threads: list[Thread] = []
+    try:
+        for share in partition_module_names(firstparty_pkg_names, jobs):
+            interp_id = _interpreters.create('isolated')
+            read_fd, write_fd = os.pipe()
+            workers[Connection(read_fd, writable=False)] = interp_id
+            thread = Thread(
+                target=_exec_subinterpreter_worker,
+                args=(
+                    interp_id,
+                    write_fd,
+                    sys_path,
+                    dumps((share, gather_kwargs))),
+                name=f'docnote_extract-subinterpreter-{interp_id}',
+                daemon=True)
+            threads.append(thread)
+            thread.start()
+            logger.info(
+                'Started extraction subinterpreter %s for %s packages.',
+                interp_id, len(share))
+
+        payloads = _collect_payloads(workers, _MessageKind.SUMMARIES)
+
+    finally:
+        for thread in threads:
+            thread.join()
+        for conn, interp_id in workers.items():
+            conn.close()
+            _interpreters.destroy(interp_id)
+
+    return _load_worker_payloads(payloads)
+
+
+def gather_in_subprocess(
+        firstparty_pkg_names: Collection[str],
+        *,
+        gather_kwargs: dict[str, Any]
+        ) -> Docnotes:
+    """Calls ``gather`` for the passed firstparty packages within a
+    fresh python subprocess, passing it the ``gather_kwargs`` (which
+    must therefore be picklable). Returns the worker's ``Docnotes``.
+
+    Raises ``ExtractionWorkerError`` if the worker fails (including if
+    it crashes without being able to report why).
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        # The argv is entirely internal: our own interpreter, a constant
+        # script, and our own sys.path. No user input ends up in it (the
+        # gather kwargs are sent over stdin instead).
+        process = subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                # Isolated mode, so that the worker isn't affected by any
+                # python environment variables, user site-packages, etc;
+                # we give it our sys.path explicitly.
+                '-I',
+                '-c',
+                _SUBPROCESS_SCRIPT,
+                *sys.path],
+            stdin=subprocess.PIPE,
+            stdout=write_fd)
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+
+    logger.info('Started extraction subprocess %s.', process.pid)
+    conn = Connection(read_fd, writable=False)
+    succeeded = False
+    try:
+        stdin = cast(IO[bytes], process.stdin)
+        try:
+            stdin.write(dumps((tuple(firstparty_pkg_names), gather_kwargs)))
+            stdin.close()
+        except BrokenPipeError:
+            # The worker died before reading its options. There's nothing
+            # to do here; collecting its payloads will raise.
+            pass
+
+        payloads = _collect_payloads(
+            {conn: process.pid}, _MessageKind.SUMMARIES)
+        succeeded = True
+
+    finally:
+        conn.close()
+        if not succeeded:
+            process.kill()
+        process.wait()
+
+    return _load_worker_payloads(payloads)
+
+
+def _load_worker_payloads(
+        payloads: list[bytes]
+        ) -> Docnotes:
+    """Unpickles the ``Docnotes`` sent by isolated workers, combining
+    them into a single ``Docnotes``.
+    """
+    # See note in ``_gather_and_report``
+    from docnote_extract._gathering import Docnotes  # noqa: PLC0415
+
+    summaries: dict[str, SummaryTreeNode] = {}
+    stats: GatherStats | None = None
+    import_graph: ImportGraph | None = None
+    trace: ExtractionTrace | None = None
+    summary_profile: SummaryProfile | None = None
+    memory: MemoryReport | None = None
+    for payload in payloads:
+        worker_docnotes: Docnotes = loads(payload)
+        summaries.update(worker_docnotes.summaries)
+        stats = _merge_optional(stats, worker_docnotes.stats)
+        import_graph = _merge_optional(
+            import_graph, worker_docnotes.import_graph)
+        trace = _merge_optional(trace, worker_docnotes.trace)
+        summary_profile = _merge_optional(
+            summary_profile, worker_docnotes.summary_profile)
+        memory = _merge_optional(memory, worker_docnotes.memory)
+
+    return Docnotes(
+        summaries,
+        stats=stats,
+        import_graph=import_graph,
+        trace=trace,
+        summary_profile=summary_profile,
+        memory=memory)
+
+
+def _merge_optional[M: _Mergeable](
+        combined: M | None,
+        other: M | None
+        ) -> M | None:
+    """Merges ``other`` into ``combined`` (if both exist), returning
+    the result.
+    """
+    if other is None:
+        return combined
+    if combined is None:
+        return other
+
+    combined.merge(other)
+    return combined
+
+
+def _exec_subinterpreter_worker(
+        interp_id: int,
+        write_fd: int,
+        sys_path: str,
+        payload: bytes
+        ) -> None:
+    """This is the target for the worker threads. It blocks until the
+    subinterpreter finishes, and then closes the write end of the pipe
+    -- which we own, regardless of what happens within the
+    subinterpreter, so that the parent always gets an EOF.
+    """
+    try:
+        excinfo = _interpreters.exec(  # type: ignore
+            interp_id,
+            _SUBINTERPRETER_SCRIPT,
+            {
+                '_docnote_extract_sys_path': sys_path,
+                '_docnote_extract_fd': write_fd,
+                '_docnote_extract_payload': payload})
+        # This only happens if the worker itself couldn't be imported; once
+        # it's running, it reports its own errors.
+        if excinfo is not None:
+            logger.error(
+                'Extraction subinterpreter %s failed:\n%s',
+                interp_id, getattr(excinfo, 'errdisplay', excinfo))
+    finally:
+        os.close(write_fd)
+
+
+def _run_subinterpreter_worker(fd: int, payload: bytes) -> None:
+    """This is the entrypoint within the subinterpreters. Since file
+    descriptors are shared by the whole process, we send from a
+    duplicate of the pipe, and leave the original for the worker
+    thread to close.
+    """
+    conn = Connection(os.dup(fd), readable=False)
+    try:
+        _gather_and_report(conn, payload)
+    finally:
+        conn.close()
+
+
+def _run_subprocess_worker() -> None:
+    """This is the entrypoint within subprocess workers. The options
+    are read from stdin, and the results are sent over the original
+    stdout, which we then point at stderr for the duration of the
+    gather.
+    """
+    conn = Connection(os.dup(sys.stdout.fileno()), readable=False)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        _gather_and_report(conn, sys.stdin.buffer.read())
+    finally:
+        conn.close()
+
+
+def _gather_and_report(conn: Connection, payload: bytes) -> None:
+    """Runs the gather described by the passed payload, sending the
+    results (or the error) over ``conn``.
+    """
+    # This would be circular at the module level, but by the time we're
+    # running within a worker, we're free to import it.
+    from docnote_extract._gathering import gather  # noqa: PLC0415
+
+    try:
+        firstparty_pkg_names, gather_kwargs = loads(payload)
+        docnotes = gather(firstparty_pkg_names, **gather_kwargs)
+        conn.send((_MessageKind.SUMMARIES, None))
+        conn.send_bytes(dumps(docnotes))
+
+    except BaseException:
+        logger.exception('Isolated extraction worker failed')
+        try:
+            conn.send((_MessageKind.ERROR, None))
+            conn.send_bytes(traceback.format_exc().encode())
+        except Exception:
+            logger.exception('Failed to report worker error to parent.')
@@ -3,6 +3,7 @@ from __future__ import annotations
 import typing
 from collections.abc import Collection
 from collections.abc import Iterator
+from collections.abc import Mapping
 from dataclasses import KW_ONLY
 from dataclasses import dataclass
 from dataclasses import field
@@ -14,6 +15,7 @@ from docnote import DocnoteConfig
 from docnote import Note
 
 from docnote_extract._utils import coerce_config
+from docnote_extract._utils import get_explicit_config
 from docnote_extract._utils import validate_config
 from docnote_extract.summaries import ModuleSummary
 from docnote_extract.summaries import SummaryMetadataProtocol
@@ -144,31 +146,48 @@ class ConfiguredModuleTreeNode(ModuleTreeNode):
         a new ``ModuleTreeNode`` for each of the firstparty modules
         contained in the extraction.
         """
-        max_depth = max(module_name.count('.') for module_name in extraction)
+        return cls.from_explicit_configs({
+            module_name: get_explicit_config(module)
+            for module_name, module in extraction.items()})
+
+    @classmethod
+    def from_explicit_configs(
+            cls,
+            explicit_configs: Mapping[str, DocnoteConfig | None]
+            ) -> dict[str, ConfiguredModuleTreeNode]:
+        """Same as ``from_extraction``, but starting from a dict of
+        ``{module_fullname: explicit_module_config}`` instead of the
+        extracted modules themselves. This is useful when the extracted
+        modules aren't available in the current process (for example,
+        when they were extracted by a forked worker).
+        """
+        max_depth = max(
+            module_name.count('.') for module_name in explicit_configs)
         # We're going to sort all of the modules based on how deep their
         # names are. We can then use this to make sure that the parent is
         # fully defined before continuing on to the children, making it easier
         # to construct the effective config.
-        depth_stack: list[dict[str, ModulePostExtraction]] = [
+        depth_stack: list[dict[str, DocnoteConfig | None]] = [
             {} for _ in range(max_depth + 1)]
-        for module_name, module in extraction.items():
-            depth_stack[module_name.count('.')][module_name] = module
+        for module_name, explicit_config in explicit_configs.items():
+            depth_stack[module_name.count('.')][module_name] = explicit_config
 
         roots_by_pkg: dict[str, ConfiguredModuleTreeNode] = {}
-        for package_name, root_module in depth_stack[0].items():
+        for package_name, root_config in depth_stack[0].items():
             roots_by_pkg[package_name] = cls(
                 fullname=package_name,
                 relname=package_name,
-                effective_config=coerce_config(root_module))
+                effective_config=coerce_config(root_config))
 
         for submodule_depth in depth_stack[1:]:
-            for submodule_name, submodule in submodule_depth.items():
+            for submodule_name, submodule_config in submodule_depth.items():
                 root_pkg_name, *_, relname = submodule_name.split('.')
                 parent_module_name, _, _ = submodule_name.rpartition('.')
                 root_node = roots_by_pkg[root_pkg_name]
                 parent_node = root_node.find(parent_module_name)
                 parent_cfg = parent_node.effective_config.get_stackables()
-                cfg = coerce_config(submodule, parent_stackables=parent_cfg)
+                cfg = coerce_config(
+                    submodule_config, parent_stackables=parent_cfg)
                 parent_node.children[relname] = cls(
                     submodule_name,
                     relname,
@@ -0,0 +1,444 @@
+"""This contains the machinery behind ``gather(..., jobs=N)``. The
+exploration and preparation phases are still run (exactly once) in the
+current process. Then, from within the extraction phase, we fork worker
+processes, which inherit all of the prepared module stashes via
+copy-on-write, and split the firstparty modules between them.
+
+The workers can't finish everything on their own, though: the effective
+config for any given module depends upon the explicit configs of all of
+its parents, which might have been extracted by a different worker.
+Therefore, each worker runs in two rounds:
+++  extract its share of the modules, and send the explicit module
+    configs back to the parent
+++  receive **all** of the explicit configs from the parent, build the
+    configured module trees, and then normalize, summarize, and filter
+    its share of the modules, sending the finished summaries back to
+    the parent
+
+The parent never unpickles any configs, summaries, or worker reports
+(stats, traces, etc) until after the extraction session has ended (and
+the import hook has been uninstalled); it just relays the raw config
+payloads between workers.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import signal
+import traceback
+from collections.abc import Callable
+from collections.abc import Collection
+from collections.abc import Sequence
+from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
+from multiprocessing.connection import Connection
+from multiprocessing.connection import Pipe
+from multiprocessing.connection import wait as wait_for_connections
+from typing import NoReturn
+from typing import cast
+
+from docnote import DocnoteConfig
+
+from docnote_extract._extraction import ModulePostExtraction
+from docnote_extract._extraction import _ExtractionFinderLoader
+from docnote_extract._module_tree import ConfiguredModuleTreeNode
+from docnote_extract._serialization import dumps
+from docnote_extract._serialization import loads
+from docnote_extract._utils import get_explicit_config
+from docnote_extract.exceptions import ExtractionWorkerError
+from docnote_extract.import_graph import _ACTIVE_IMPORT_GRAPH
+from docnote_extract.import_graph import ImportGraph
+from docnote_extract.import_graph import _get_active_import_graph
+from docnote_extract.memory import _ACTIVE_MEMORY_REPORT
+from docnote_extract.memory import MemoryReport
+from docnote_extract.memory import _get_active_memory_report
+from docnote_extract.profiling import _ACTIVE_PROFILE
+from docnote_extract.profiling import SummaryProfile
+from docnote_extract.profiling import _get_active_profile
+from docnote_extract.stats import _ACTIVE_STATS
+from docnote_extract.stats import GatherStats
+from docnote_extract.stats import _get_active_stats
+from docnote_extract.summaries import ModuleSummary
+from docnote_extract.telemetry import _ACTIVE_TRACE
+from docnote_extract.telemetry import ExtractionTrace
+from docnote_extract.telemetry import _get_active_trace
+
+type ModuleSummarizer = Callable[
+    [ModulePostExtraction, ConfiguredModuleTreeNode], ModuleSummary]
+
+logger = logging.getLogger(__name__)
+
+
+class _MessageKind(Enum):
+    CONFIGS = 'configs'
+    SUMMARIES = 'summaries'
+    ERROR = 'error'
+
+
+def can_fork() -> bool:
+    """Returns True if the current platform supports ``os.fork``
+    (which, notably, windows does not).
+    """
+    return hasattr(os, 'fork')
+
+
+def partition_module_names(
+        module_names: Collection[str],
+        jobs: int
+        ) -> list[tuple[str, ...]]:
+    """Splits the passed module names into (at most) ``jobs`` non-empty
+    shares. We deal them out round-robin from a sorted list, which
+    keeps the shares deterministic, and tends to spread the modules of
+    any one (sub)package across all of the workers.
+    """
+    if jobs < 1:
+        raise ValueError('Jobs must be a positive integer!', jobs)
+
+    shares: list[list[str]] = [[] for _ in range(jobs)]
+    for index, module_name in enumerate(sorted(module_names)):
+        shares[index % jobs].append(module_name)
+
+    return [tuple(share) for share in shares if share]
+
+
+@dataclass(slots=True, frozen=True)
+class ForkedExtraction:
+    """The raw results of ``extract_and_summarize_forked``. These are
+    kept pickled until ``load`` is called, which must happen **after**
+    the extraction session has ended.
+    """
+    # Each of these is a pickled ``{module_name: explicit_config}`` dict
+    config_payloads: tuple[bytes, ...]
+    # These are pickled individually, keyed by module name
+    summary_payloads: dict[str, bytes]
+    # Each of these is a pickled ``_WorkerReports``. These can contain
+    # arbitrary objects (for example, call traversal arguments within
+    # the crossrefs of a summary profile), so -- just like the summaries
+    # -- they can't be unpickled while the import hook is installed.
+    report_payloads: tuple[bytes, ...]
+
+    def load(self) -> tuple[
+            dict[str, DocnoteConfig | None],
+            dict[str, ModuleSummary]]:
+        """Unpickles the results, returning the explicit configs and
+        summaries for all of the modules, keyed by module name. The
+        worker reports are merged into the active (parent) reports.
+        """
+        for payload in self.report_payloads:
+            worker_reports: _WorkerReports = loads(payload)
+            worker_reports.merge_into_active()
+
+        explicit_configs: dict[str, DocnoteConfig | None] = {}
+        for payload in self.config_payloads:
+            explicit_configs.update(loads(payload))
+
+        summaries: dict[str, ModuleSummary] = {
+            module_name: loads(payload)
+            for module_name, payload in self.summary_payloads.items()}
+
+        return explicit_configs, summaries
+
+
+@dataclass(slots=True)
+class _WorkerReports:
+    """The stats, import graph, trace, summary profile, and memory
+    report collected within a single worker (each of which is None if
+    the parent isn't collecting it). Workers inherit the parent's
+    instances as part of the fork, but they need to send back only the
+    work done within the worker itself.
+    """
+    stats: GatherStats | None = None
+    import_graph: ImportGraph | None = None
+    trace: ExtractionTrace | None = None
+    profile: SummaryProfile | None = None
+    memory: MemoryReport | None = None
+
+    @classmethod
+    def activate(cls) -> _WorkerReports:
+        """Replaces every active (inherited) report with a fresh one,
+        returning the fresh ones. Call this only within the worker.
+        """
+        reports = cls()
+        if _get_active_stats() is not None:
+            reports.stats = GatherStats()
+            _ACTIVE_STATS.set(reports.stats)
+        if _get_active_import_graph() is not None:
+            reports.import_graph = ImportGraph()
+            _ACTIVE_IMPORT_GRAPH.set(reports.import_graph)
+        if _get_active_trace() is not None:
+            reports.trace = ExtractionTrace()
+            _ACTIVE_TRACE.set(reports.trace)
+        if _get_active_profile() is not None:
+            reports.profile = SummaryProfile()
+            _ACTIVE_PROFILE.set(reports.profile)
+        # Note that tracemalloc itself stays active across the fork.
+        if _get_active_memory_report() is not None:
+            reports.memory = MemoryReport()
+            _ACTIVE_MEMORY_REPORT.set(reports.memory)
+
+        return reports
+
+    def merge_into_active(self) -> None:
+        """Merges the worker's reports into the (parent's) active
+        ones. Call this only within the parent.
+        """
+        stats = _get_active_stats()
+        if stats is not None and self.stats is not None:
+            stats.merge(self.stats)
+        import_graph = _get_active_import_graph()
+        if import_graph is not None and self.import_graph is not None:
+            import_graph.merge(self.import_graph)
+        trace = _get_active_trace()
+        if trace is not None and self.trace is not None:
+            trace.merge(self.trace)
+        profile = _get_active_profile()
+        if profile is not None and self.profile is not None:
+            profile.merge(self.profile)
+        memory = _get_active_memory_report()
+        if memory is not None and self.memory is not None:
+            memory.merge(self.memory)
+
+
+def extract_and_summarize_forked(
+        floader: _ExtractionFinderLoader,
+        module_names: Collection[str],
+        *,
+        jobs: int,
+        summarize: ModuleSummarizer,
+        extra_config_payloads: Sequence[bytes] = ()
+        ) -> ForkedExtraction:
+    """Forks up to ``jobs`` workers to extract and summarize the passed
+    modules. This must be called from within an active
+    ``floader.extraction_session()``.
+
+    If some of the firstparty modules aren't being extracted (for
+    example, because their summaries were cached), their explicit
+    configs must be passed as ``extra_config_payloads``, each of which
+    is a pickled ``{module_name: explicit_config}`` dict.
+    """
+    if not can_fork():
+        raise RuntimeError('Forked extraction requires ``os.fork``!')
+
+    workers: dict[Connection, int] = {}
+    succeeded = False
+    try:
+        for share in partition_module_names(module_names, jobs):
+            _fork_worker(workers, floader, share, summarize)
+
+        config_payloads = _collect_payloads(workers, _MessageKind.CONFIGS)
+        config_payloads.extend(extra_config_payloads)
+        for conn in workers:
+            conn.send(len(config_payloads))
+            for payload in config_payloads:
+                conn.send_bytes(payload)
+
+        summary_payloads: dict[str, bytes] = {}
+        report_payloads: list[bytes] = []
+        for payload in _collect_payloads(workers, _MessageKind.SUMMARIES):
+            # This is just a plain dict of bytes (plus the bytes of the
+            # separately-pickled worker reports), so it's safe to unpickle
+            # while the import hook is still installed.
+            worker_summary_payloads, worker_report_payload = pickle.loads(  # noqa: S301
+                payload)
+            summary_payloads.update(worker_summary_payloads)
+            report_payloads.append(worker_report_payload)
+
+        succeeded = True
+        return ForkedExtraction(
+            config_payloads=tuple(config_payloads),
+            summary_payloads=summary_payloads,
+            report_payloads=tuple(report_payloads))
+
+    finally:
+        _reap_workers(workers, kill=not succeeded)
+
+
+def _fork_worker(
+        workers: dict[Connection, int],
+        floader: _ExtractionFinderLoader,
+        share: tuple[str, ...],
+        summarize: ModuleSummarizer
+        ) -> None:
+    """Forks a single worker for the passed share of the modules,
+    adding its connection (and pid) to ``workers``.
+    """
+    parent_conn, child_conn = Pipe()
+    pid = os.fork()
+    if pid == 0:
+        # We don't want the workers to keep open any of the pipes to
+        # their siblings; otherwise, they won't get EOFs.
+        parent_conn.close()
+        for sibling_conn in workers:
+            sibling_conn.close()
+        _run_worker(child_conn, floader, share, summarize)
+
+    child_conn.close()
+    workers[parent_conn] = pid
+    logger.info(
+        'Forked extraction worker %s for %s modules.', pid, len(share))
+
+
+def _reap_workers(workers: dict[Connection, int], *, kill: bool) -> None:
+    """Closes the connections to all of the workers and waits for
+    them to exit, first killing them if ``kill`` is set.
+    """
+    for conn, pid in workers.items():
+        conn.close()
+        if kill:
+            # The workers might be blocked waiting on us, so we can't
+            # simply wait for them to finish.
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        os.waitpid(pid, 0)
+
+
+def _collect_payloads(
+        workers: dict[Connection, int],
+        expected_kind: _MessageKind
+        ) -> list[bytes]:
+    """Waits for exactly one message from every worker, returning their
+    (still-pickled) payloads. Raises ``ExtractionWorkerError`` if any of
+    the workers reports an error, or dies without reporting anything.
+    """
+    payloads: list[bytes] = []
+    pending = list(workers)
+    while pending:
+        for ready in wait_for_connections(pending):
+            conn = cast(Connection, ready)
+            pending.remove(conn)
+            try:
+                kind, module_name = conn.recv()
+                payload = conn.recv_bytes()
+            except EOFError as exc:
+                raise ExtractionWorkerError(
+                    'Extraction worker exited unexpectedly!',
+                    workers[conn]) from exc
+
+            if kind is _MessageKind.ERROR:
+                raise ExtractionWorkerError(
+                    'Extraction worker failed!',
+                    module_name,
+                    payload.decode())
+            elif kind is not expected_kind:
+                raise ExtractionWorkerError(
+                    'Extraction worker sent unexpected message!', kind)
+
+            payloads.append(payload)
+
+    return payloads
+
+
+def _run_worker(
+        conn: Connection,
+        floader: _ExtractionFinderLoader,
+        module_names: tuple[str, ...],
+        summarize: ModuleSummarizer
+        ) -> NoReturn:
+    """This is the entrypoint for the forked workers. It never
+    returns; the worker always exits via ``os._exit``, so that we never
+    accidentally run any of the parent's cleanup code (or atexit
+    handlers, or...).
+    """
+    worker = _Worker(
+        conn=conn,
+        floader=floader,
+        module_names=module_names,
+        summarize=summarize,
+        reports=_WorkerReports.activate())
+    exit_code = 1
+    try:
+        worker.run()
+        exit_code = 0
+
+    except BaseException:
+        logger.exception(
+            'Extraction worker failed (while processing module %s)',
+            worker.current_module)
+        try:
+            conn.send((_MessageKind.ERROR, worker.current_module))
+            conn.send_bytes(traceback.format_exc().encode())
+        except Exception:
+            logger.exception('Failed to report worker error to parent.')
+
+    finally:
+        conn.close()
+        os._exit(exit_code)
+
+
+@dataclass(slots=True)
+class _Worker:
+    """The actual work done by the forked workers, split into its two
+    rounds (see module docstring).
+    """
+    conn: Connection
+    floader: _ExtractionFinderLoader
+    module_names: tuple[str, ...]
+    summarize: ModuleSummarizer
+    reports: _WorkerReports
+    # Which module we're currently working on, for error reporting
+    current_module: str | None = None
+    extraction: dict[str, ModulePostExtraction] = field(default_factory=dict)
+
+    def run(self) -> None:
+        self._extract()
+        configured_trees = self._exchange_configs()
+        summary_payloads = self._summarize(configured_trees)
+
+        self.conn.send((_MessageKind.SUMMARIES, None))
+        self.conn.send_bytes(pickle.dumps(
+            (summary_payloads, dumps(self.reports)),
+            protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _extract(self) -> None:
+        for module_name in self.module_names:
+            self.current_module = module_name
+            self.extraction[module_name] = self.floader.extract_firstparty(
+                module_name)
+
+        self.current_module = None
+
+    def _exchange_configs(self) -> dict[str, ConfiguredModuleTreeNode]:
+        """Sends the explicit configs of our share of the modules to
+        the parent, receives everyone's configs back, and builds the
+        configured module trees from them.
+        """
+        explicit_configs = {
+            module_name: get_explicit_config(module)
+            for module_name, module in self.extraction.items()}
+        self.conn.send((_MessageKind.CONFIGS, None))
+        self.conn.send_bytes(dumps(explicit_configs))
+
+        all_config_payloads = [
+            self.conn.recv_bytes() for _ in range(self.conn.recv())]
+
+        # Serial gathering summarizes after the import hook has been torn
+        # down, so we do the same (within the worker only, of course) to make
+        # sure the results are identical. This also needs to happen before
+        # unpickling anything; see note in ``loads``.
+        self.floader.uninstall()
+        self.floader._unstash_prehook_modules()
+
+        all_explicit_configs: dict[str, DocnoteConfig | None] = {}
+        for payload in all_config_payloads:
+            all_explicit_configs.update(loads(payload))
+
+        return ConfiguredModuleTreeNode.from_explicit_configs(
+            all_explicit_configs)
+
+    def _summarize(
+            self,
+            configured_trees: dict[str, ConfiguredModuleTreeNode]
+            ) -> dict[str, bytes]:
+        summary_payloads: dict[str, bytes] = {}
+        for module_name in self.module_names:
+            self.current_module = module_name
+            pkg_name, _, _ = module_name.partition('.')
+            summary_payloads[module_name] = dumps(self.summarize(
+                self.extraction[module_name], configured_trees[pkg_name]))
+
+        self.current_module = None
+        return summary_payloads
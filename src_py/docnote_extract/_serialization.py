@@ -0,0 +1,68 @@
+"""Pickling helpers for moving extraction results between processes.
+These are almost exactly plain pickles, except that we need to teach
+pickle how to deal with reftypes: they're dynamically-created classes,
+so pickle's normal strategy for classes (import them by name) can't
+possibly work for them.
+"""
+from __future__ import annotations
+
+import io
+import pickle
+from typing import Any
+
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import CrossrefMetaclass
+from docnote_extract.crossrefs import CrossrefMetaclassMetaclass
+from docnote_extract.crossrefs import _make_crossreffed_from_metadata
+from docnote_extract.crossrefs import make_metaclass_crossreffed
+
+
+def dumps(obj: Any) -> bytes:
+    """Pickles the passed object, converting any reftypes within it
+    into a form that can be reconstituted by ``loads``.
+    """
+    buffer = io.BytesIO()
+    _ReftypeAwarePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+def loads(data: bytes) -> Any:
+    """The inverse of ``dumps``. Note that reftypes are recreated via
+    the normal (interned) reftype machinery, so within the same process,
+    you'll get back the same reftype class if it's still alive, and an
+    equivalent one otherwise.
+
+    Also note that unpickling anything that references a firstparty
+    object (for example, an enum member used as a parameter default)
+    will import the firstparty module by name. You probably don't want
+    to do that while an import hook is installed.
+    """
+    return pickle.loads(data)  # noqa: S301
+
+
+def _load_metaclass_crossreffed(metadata: Crossref) -> type:
+    if metadata.module_name is None or metadata.toplevel_name is None:
+        raise ValueError(
+            'Metaclass reftypes must have a module and toplevel name!',
+            metadata)
+
+    return make_metaclass_crossreffed(
+        module=metadata.module_name,
+        name=metadata.toplevel_name)
+
+
+class _ReftypeAwarePickler(pickle.Pickler):
+
+    def reducer_override(self, obj: Any) -> Any:
+        # Note: we can't use is_crossreffed here, because the hasattr would
+        # hit CrossrefMetaclass.__getattr__ for the ``CrossrefMixin`` base
+        # class itself, which doesn't have any metadata.
+        if isinstance(obj, type):
+            metadata = vars(obj).get('_docnote_extract_metadata')
+            if isinstance(metadata, Crossref):
+                if isinstance(obj, CrossrefMetaclass):
+                    return (_make_crossreffed_from_metadata, (metadata,))
+                elif issubclass(obj, CrossrefMetaclassMetaclass):
+                    return (_load_metaclass_crossreffed, (metadata,))
+
+        return NotImplemented
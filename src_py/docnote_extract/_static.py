@@ -0,0 +1,565 @@
+"""This contains the (opt-in) static extraction backend, used for
+``ExtractionOptions(static_extraction=True)``.
+
+Many firstparty modules are pure declarations: dataclasses, protocols,
+enums, typed constants, and so on. For these, the full extraction exec
+is mostly wasted effort. Instead, we first check the module's AST for
+anything that might run firstparty code (or anything else with side
+effects) at import time. If the module passes, then rather than execing
+it under the import hook, we exec a stripped version of it (see
+``preprocess_module_ast``) with a private ``__import__``, which binds
+its imports directly to reftypes -- without ever importing the
+firstparty or thirdparty modules, and therefore without ever touching
+``sys.modules`` or the import hook. Annotations then resolve to
+crossrefs through the module's own import statements, exactly as they
+do for stubbed imports during a normal extraction.
+
+The result is a normal ``ModulePostExtraction``, so static modules are
+normalized and summarized by the exact same code as exec'd ones.
+Modules that fail the purity check (or that fail to exec statically)
+simply fall back to the normal extraction.
+
+The same mechanism is used for
+``ExtractionOptions(prefer_stub_files=True)``, except that the ``.pyi``
+stub file next to the module is extracted instead of the module's own
+source. This also works for extension modules (which have no python
+source at all).
+
+A module passes the purity check if its toplevel statements (and the
+bodies of its classes) consist only of:
+++  docstrings, imports (but not star imports), and ``pass``
+++  assignments, annotated assignments, augmented assignments (to
+    names), and ``type`` aliases
+++  ``if`` statements (for example, ``if TYPE_CHECKING:``)
+++  class and function definitions
+
+where every expression evaluated at import time (values, defaults,
+bases, decorators, and ``if`` tests) only calls reftypes (ie, anything
+imported from a stubbed module), ``docnote`` or ``docnote_extract``,
+a handful of declarative stdlib modules (``_PURE_STDLIB_MODULES``), or
+a handful of builtins (``_PURE_BUILTINS``). Additionally, the module
+must not import anything from a nostub module, and its classes must
+not define any dunders that get called implicitly at import time
+(``_IMPORT_TIME_DUNDERS``).
+"""
+from __future__ import annotations
+
+import ast
+import builtins
+import logging
+import sys
+from collections.abc import Callable
+from collections.abc import Mapping
+from collections.abc import Sequence
+from collections.abc import Set
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from importlib.util import resolve_name
+from pathlib import Path
+from types import CodeType
+from types import ModuleType
+from typing import Any
+
+from docnote import ReftypeMarker
+
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import make_crossreffed
+from docnote_extract.crossrefs import make_metaclass_crossreffed
+
+_PURE_STDLIB_MODULES = frozenset({
+    'abc',
+    'collections.abc',
+    'dataclasses',
+    'enum',
+    'functools',
+    'types',
+    'typing',
+})
+_PURE_BUILTINS = frozenset({
+    'classmethod',
+    'dict',
+    'frozenset',
+    'list',
+    'object',
+    'property',
+    'set',
+    'staticmethod',
+    'tuple',
+})
+# Unlike other dunders, these are called just by defining (or
+# subclassing, or parameterizing) the class, so they'd run firstparty
+# code at import time.
+_IMPORT_TIME_DUNDERS = frozenset({
+    '__class_getitem__',
+    '__init_subclass__',
+    '__mro_entries__',
+    '__prepare__',
+    '__set_name__',
+})
+_PROPERTY_DECORATOR_ATTRS = frozenset({'deleter', 'getter', 'setter'})
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class StaticExtractionOptions:
+    """Everything ``exec_static`` needs to know about the extraction
+    as a whole (as opposed to the individual module being extracted).
+    """
+    # Note that this may include nostub packages; static modules can't
+    # import from them anyways
+    firstparty_module_names: Set[str]
+    nostub_firstparty_modules: Set[str]
+    nostub_packages: Set[str]
+    passthrough_packages: Set[str]
+    special_reftype_markers: Mapping[Crossref, ReftypeMarker]
+
+
+def find_impurity(
+        tree: ast.Module,
+        *,
+        module_name: str,
+        package_name: str | None,
+        nostub_firstparty_modules: Set[str],
+        nostub_packages: Set[str]
+        ) -> str | None:
+    """Checks the passed module AST for anything that prevents static
+    extraction. Returns a description of the first problem found, or
+    None if the module can be statically extracted.
+    """
+    checker = _PurityChecker(
+        module_name=module_name,
+        package_name=package_name,
+        nostub_firstparty_modules=nostub_firstparty_modules,
+        nostub_packages=nostub_packages)
+    try:
+        checker.check_body(tree.body, local_names=set())
+    except _ImpureModule as exc:
+        return str(exc)
+
+    return None
+
+
+def find_stub_file(module: ModuleType) -> Path | None:
+    """Finds the ``.pyi`` stub file next to the passed (raw) module's
+    file, if any. For example, this would be ``foo.pyi`` for
+    ``foo.py``, ``__init__.pyi`` for a ``__init__.py``, or ``foo.pyi``
+    for an extension module like ``foo.cpython-313-darwin.so``.
+    """
+    module_file = getattr(module, '__file__', None)
+    if module_file is None:
+        return None
+
+    module_path = Path(module_file)
+    stem, _, _ = module_path.name.partition('.')
+    stub_path = module_path.with_name(f'{stem}.pyi')
+    if stub_path.is_file():
+        return stub_path
+
+    return None
+
+
+def get_stub_source(module: ModuleType) -> str | None:
+    """Reads the ``.pyi`` stub file next to the passed (raw) module.
+    Returns None if there isn't one, or if it can't be read.
+    """
+    stub_path = find_stub_file(module)
+    if stub_path is None:
+        return None
+
+    try:
+        return stub_path.read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        logger.warning(
+            'Failed to read stub file %s; ignoring.', stub_path,
+            exc_info=True)
+        return None
+
+
+def exec_static(
+        extracted_module: ModuleType,
+        source: str,
+        *,
+        get_code: Callable[[], CodeType],
+        options: StaticExtractionOptions
+        ) -> bool:
+    """Attempts to statically extract the passed source into the
+    (freshly cloned) ``extracted_module``. ``get_code`` must return the
+    preprocessed code object for the source.
+
+    Returns True if successful. Otherwise, returns False, and leaves the
+    ``extracted_module`` untouched, so that the caller can fall back to
+    a normal extraction.
+    """
+    module_name = extracted_module.__name__
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        logger.info(
+            'Failed to parse source for static extraction of %s.',
+            module_name, exc_info=True)
+        return False
+
+    impurity = find_impurity(
+        tree,
+        module_name=module_name,
+        package_name=getattr(extracted_module, '__package__', None),
+        nostub_firstparty_modules=options.nostub_firstparty_modules,
+        nostub_packages=options.nostub_packages)
+    if impurity is not None:
+        logger.info(
+            'Module %s cannot be statically extracted: %s',
+            module_name, impurity)
+        return False
+
+    importer = _StaticImporter(
+        firstparty_module_names=options.firstparty_module_names,
+        passthrough_packages=options.passthrough_packages,
+        special_reftype_markers=options.special_reftype_markers)
+    module_dict = extracted_module.__dict__
+    original_dict = dict(module_dict)
+    module_dict['__builtins__'] = {
+        **builtins.__dict__, '__import__': importer}
+
+    logger.info('Statically extracting module: %s', module_name)
+    try:
+        exec(get_code(), module_dict)  # noqa: S102
+    except Exception:
+        logger.info(
+            'Static extraction failed for %s; falling back to exec.',
+            module_name, exc_info=True)
+        module_dict.clear()
+        module_dict.update(original_dict)
+        return False
+
+    return True
+
+
+class _ImpureModule(Exception):
+    """Raised internally by the purity checker to bail out early."""
+
+
+@dataclass(slots=True)
+class _PurityChecker:
+    module_name: str
+    package_name: str | None
+    nostub_firstparty_modules: Set[str]
+    nostub_packages: Set[str]
+
+    # Maps each name bound by an import to the fully-qualified name it
+    # was imported as (for example, ``'typing.TypeVar'`` or ``'foo'``).
+    # Names that are (also) bound by anything else are removed.
+    imported_names: dict[str, str] = field(default_factory=dict)
+
+    def check_body(
+            self,
+            body: Sequence[ast.stmt],
+            *,
+            local_names: set[str],
+            in_class: bool = False
+            ) -> None:
+        """Checks every statement in the body. ``local_names`` contains
+        the names bound by anything other than an import within the
+        current scope; it's mutated as we go.
+        """
+        for stmt in body:
+            self._check_stmt(stmt, local_names=local_names, in_class=in_class)
+
+    def _check_stmt(  # noqa: C901, PLR0912
+            self,
+            stmt: ast.stmt,
+            *,
+            local_names: set[str],
+            in_class: bool
+            ) -> None:
+        if isinstance(stmt, ast.Pass):
+            return
+
+        elif isinstance(stmt, ast.Expr):
+            if not isinstance(stmt.value, ast.Constant):
+                raise _ImpureModule(
+                    f'Expression statement on line {stmt.lineno}')
+
+        elif isinstance(stmt, ast.Import):
+            for alias in stmt.names:
+                self._check_import_target(alias.name, stmt)
+                if alias.asname is None:
+                    bound_name, _, _ = alias.name.partition('.')
+                    self._bind_import(bound_name, bound_name, local_names)
+                else:
+                    self._bind_import(alias.asname, alias.name, local_names)
+
+        elif isinstance(stmt, ast.ImportFrom):
+            from_module = self._resolve_import_from(stmt)
+            self._check_import_target(from_module, stmt)
+            for alias in stmt.names:
+                if alias.name == '*':
+                    raise _ImpureModule(f'Star import on line {stmt.lineno}')
+
+                # This might be a submodule, so we need to check it as well
+                self._check_import_target(
+                    f'{from_module}.{alias.name}', stmt)
+                self._bind_import(
+                    alias.asname or alias.name,
+                    f'{from_module}.{alias.name}',
+                    local_names)
+
+        elif isinstance(stmt, ast.Assign):
+            self._check_expr(stmt.value, local_names)
+            for target in stmt.targets:
+                self._bind_targets(target, local_names)
+
+        elif isinstance(stmt, ast.AnnAssign):
+            if stmt.value is not None:
+                self._check_expr(stmt.value, local_names)
+            self._bind_targets(stmt.target, local_names)
+
+        elif isinstance(stmt, ast.AugAssign):
+            self._check_expr(stmt.value, local_names)
+            self._bind_targets(stmt.target, local_names)
+
+        elif isinstance(stmt, ast.TypeAlias):
+            # Lazily evaluated, so there's nothing to check
+            self._bind_targets(stmt.name, local_names)
+
+        elif isinstance(stmt, ast.If):
+            self._check_expr(stmt.test, local_names)
+            self.check_body(
+                stmt.body, local_names=local_names, in_class=in_class)
+            self.check_body(
+                stmt.orelse, local_names=local_names, in_class=in_class)
+
+        elif isinstance(stmt, ast.ClassDef):
+            self._check_classdef(stmt, local_names)
+
+        elif isinstance(stmt, ast.FunctionDef | ast.AsyncFunctionDef):
+            if in_class and stmt.name in _IMPORT_TIME_DUNDERS:
+                raise _ImpureModule(
+                    f'Import-time dunder {stmt.name} on line {stmt.lineno}')
+
+            for decorator in stmt.decorator_list:
+                self._check_decorator(decorator, local_names)
+            # Note that annotations are never evaluated at definition time,
+            # since extraction always uses postponed annotation evaluation.
+            for default in (*stmt.args.defaults, *stmt.args.kw_defaults):
+                if default is not None:
+                    self._check_expr(default, local_names)
+            local_names.add(stmt.name)
+
+        else:
+            raise _ImpureModule(
+                f'{type(stmt).__name__} statement on line {stmt.lineno}')
+
+    def _check_classdef(
+            self,
+            stmt: ast.ClassDef,
+            local_names: set[str]
+            ) -> None:
+        for decorator in stmt.decorator_list:
+            self._check_decorator(decorator, local_names)
+        for base in stmt.bases:
+            self._check_expr(base, local_names)
+        for keyword in stmt.keywords:
+            self._check_expr(keyword.value, local_names)
+            if keyword.arg == 'metaclass':
+                self._check_callee(keyword.value, local_names)
+
+        # Class bodies are their own scope, but they can still see (and
+        # shadow) the enclosing names.
+        self.check_body(
+            stmt.body, local_names=set(local_names), in_class=True)
+        local_names.add(stmt.name)
+
+    def _check_decorator(
+            self,
+            decorator: ast.expr,
+            local_names: set[str]
+            ) -> None:
+        self._check_expr(decorator, local_names)
+        # ``@<property>.setter`` (etc) are always fine, even though the
+        # property itself is local
+        if not (
+            isinstance(decorator, ast.Attribute)
+            and decorator.attr in _PROPERTY_DECORATOR_ATTRS
+        ):
+            self._check_callee(decorator, local_names)
+
+    def _check_expr(self, expr: ast.expr, local_names: set[str]) -> None:
+        for node in ast.walk(expr):
+            if isinstance(node, ast.Call):
+                self._check_callee(node.func, local_names)
+            elif isinstance(
+                node, ast.Await | ast.Yield | ast.YieldFrom | ast.NamedExpr
+            ):
+                raise _ImpureModule(
+                    f'{type(node).__name__} expression on line {node.lineno}')
+
+    def _check_callee(self, callee: ast.expr, local_names: set[str]) -> None:
+        """Checks that calling the passed expression at import time
+        can't run any firstparty code. This doesn't check any calls
+        within the callee expression itself; that's up to the caller.
+        """
+        if isinstance(callee, ast.Call):
+            # Whatever an allowed callable returns is also allowed
+            return
+
+        attr_names: list[str] = []
+        root = callee
+        while isinstance(root, ast.Attribute):
+            attr_names.append(root.attr)
+            root = root.value
+
+        if not isinstance(root, ast.Name) or root.id in local_names:
+            raise _ImpureModule(
+                f'Call to local object on line {callee.lineno}')
+
+        imported_name = self.imported_names.get(root.id)
+        if imported_name is None:
+            if root.id in _PURE_BUILTINS and not attr_names:
+                return
+            raise _ImpureModule(
+                f'Call to {root.id} on line {callee.lineno}')
+
+        qualname_parts = [imported_name, *reversed(attr_names)]
+        qualname = '.'.join(qualname_parts)
+        base_package, _, _ = qualname.partition('.')
+        # Anything not in the stdlib is either a reftype, or comes from
+        # docnote or docnote_extract, both of which are fine to call.
+        if base_package not in sys.stdlib_module_names:
+            return
+
+        module_name, _, _ = qualname.rpartition('.')
+        while module_name:
+            if module_name in _PURE_STDLIB_MODULES:
+                return
+            module_name, _, _ = module_name.rpartition('.')
+
+        raise _ImpureModule(f'Call to {qualname} on line {callee.lineno}')
+
+    def _resolve_import_from(self, stmt: ast.ImportFrom) -> str:
+        if not stmt.level:
+            return stmt.module or ''
+
+        if not self.package_name:
+            raise _ImpureModule(
+                f'Relative import outside of package on line {stmt.lineno}')
+        return resolve_name(
+            '.' * stmt.level + (stmt.module or ''), self.package_name)
+
+    def _check_import_target(self, target: str, stmt: ast.stmt) -> None:
+        base_package, _, _ = target.partition('.')
+        if (
+            target in self.nostub_firstparty_modules
+            or base_package in self.nostub_packages
+        ):
+            raise _ImpureModule(
+                f'Import from nostub module {target} on line {stmt.lineno}')
+
+    def _bind_import(
+            self,
+            name: str,
+            imported_name: str,
+            local_names: set[str]
+            ) -> None:
+        if name in local_names:
+            raise _ImpureModule(f'Name {name} bound by import and locally')
+        self.imported_names[name] = imported_name
+
+    def _bind_targets(self, target: ast.expr, local_names: set[str]) -> None:
+        if isinstance(target, ast.Name):
+            self.imported_names.pop(target.id, None)
+            local_names.add(target.id)
+        elif isinstance(target, ast.Tuple | ast.List):
+            for element in target.elts:
+                self._bind_targets(element, local_names)
+        else:
+            raise _ImpureModule(
+                f'Assignment to {type(target).__name__} on line '
+                + f'{target.lineno}')
+
+
+@dataclass(slots=True)
+class _StaticImporter:
+    """Used as ``__import__`` for statically-extracted modules.
+    Imports of stdlib modules (and ``passthrough_packages``) are
+    delegated to the normal import system; everything else is bound to
+    stub modules, whose attributes are reftypes (or, for known
+    submodules, more stub modules).
+
+    Unlike the stub modules created by the import hook, these are never
+    added to ``sys.modules``.
+    """
+    firstparty_module_names: Set[str]
+    passthrough_packages: Set[str]
+    special_reftype_markers: Mapping[Crossref, ReftypeMarker]
+
+    # Submodules that have been explicitly imported by the module
+    imported_module_names: set[str] = field(default_factory=set)
+    stub_modules: dict[str, ModuleType] = field(default_factory=dict)
+
+    def __call__(
+            self,
+            name: str,
+            globals: Mapping[str, Any] | None = None,  # noqa: A002
+            locals: Mapping[str, Any] | None = None,  # noqa: A002
+            fromlist: Sequence[str] | None = (),
+            level: int = 0
+            ) -> ModuleType:
+        if level:
+            package_name = (globals or {}).get('__package__')
+            if not package_name:
+                raise ImportError(
+                    'Relative import outside of package', name)
+            fullname = resolve_name('.' * level + name, package_name)
+        else:
+            fullname = name
+
+        base_package, _, _ = fullname.partition('.')
+        if (
+            base_package in sys.stdlib_module_names
+            or base_package in self.passthrough_packages
+        ):
+            return builtins.__import__(fullname, globals, locals, fromlist)
+
+        name_parts = fullname.split('.')
+        for depth in range(1, len(name_parts) + 1):
+            self.imported_module_names.add('.'.join(name_parts[:depth]))
+
+        if fromlist:
+            return self._get_stub_module(fullname)
+        else:
+            return self._get_stub_module(base_package)
+
+    def _get_stub_module(self, module_name: str) -> ModuleType:
+        stub_module = self.stub_modules.get(module_name)
+        if stub_module is None:
+            stub_module = self.stub_modules[module_name] = ModuleType(
+                module_name)
+            stub_module.__getattr__ = partial(  # type: ignore
+                self._stub_getattr, module_name=module_name)
+
+        return stub_module
+
+    def _stub_getattr(self, name: str, *, module_name: str) -> Any:
+        # The import system (and various introspection tools) probe for
+        # these with hasattr, so they must be missing.
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+
+        fullname = f'{module_name}.{name}'
+        if (
+            fullname in self.firstparty_module_names
+            or fullname in self.imported_module_names
+        ):
+            return self._get_stub_module(fullname)
+
+        special_reftype = self.special_reftype_markers.get(
+            Crossref(module_name=module_name, toplevel_name=name))
+        if special_reftype is None:
+            return make_crossreffed(module=module_name, name=name)
+        elif special_reftype is ReftypeMarker.METACLASS:
+            return make_metaclass_crossreffed(module=module_name, name=name)
+        else:
+            raise NotImplementedError(
+                'Other special metaclass reftypes not yet supported.')
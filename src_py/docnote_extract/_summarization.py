@@ -3,7 +3,9 @@ from __future__ import annotations
 import inspect
 import itertools
 import logging
+from collections import ChainMap
 from collections.abc import Callable
+from collections.abc import Iterator
 from collections.abc import Mapping
 from dataclasses import dataclass
 from dataclasses import field
@@ -15,7 +17,6 @@ from typing import Protocol
 from typing import TypeVar
 from typing import cast
 from typing import get_overloads
-from typing import get_type_hints
 
 from docnote import DOCNOTE_CONFIG_ATTR
 from docnote import DocnoteConfig
@@ -24,6 +25,8 @@ from docnote import Note
 
 from docnote_extract._extraction import ModulePostExtraction
 from docnote_extract._module_tree import ConfiguredModuleTreeNode
+from docnote_extract._type_hints import get_type_hints_cached
+from docnote_extract._type_hints import type_hint_cache
 from docnote_extract._utils import extract_docstring
 from docnote_extract._utils import textify_notes
 from docnote_extract.crossrefs import Crossref
@@ -41,6 +44,7 @@ from docnote_extract.normalization import TypeSpec
 from docnote_extract.normalization import extend_typevars
 from docnote_extract.normalization import normalize_annotation
 from docnote_extract.normalization import normalize_namespace_item
+from docnote_extract.profiling import _profile_summary
 from docnote_extract.summaries import CallableColor
 from docnote_extract.summaries import CallableSummary
 from docnote_extract.summaries import ClassSummary
@@ -87,7 +91,7 @@ class _SummaryFactoryProtocol[T: SummaryBase](Protocol):
     def __call__(
             self,
             name_in_parent: str,
-            parent_crossref_namespace: dict[str, Crossref],
+            parent_crossref_namespace: ChainMap[str, Crossref],
             obj: NormalizedObj,
             classification: ObjClassification,
             *,
@@ -109,7 +113,7 @@ class SummaryMetadata(SummaryMetadataProtocol):
     canonical_module: str | None
     to_document: bool
     disowned: bool
-    crossref_namespace: dict[str, Crossref] = field(repr=False)
+    crossref_namespace: Mapping[str, Crossref] = field(repr=False)
 
     @classmethod
     def factory(
@@ -128,6 +132,31 @@ class SummaryMetadata(SummaryMetadataProtocol):
         return self.to_document and not self.disowned
 
 
+class _CrossrefNamespaceView(Mapping[str, Crossref]):
+    """A read-only view onto a (chained) crossref namespace, which is
+    what we expose as ``metadata.crossref_namespace``. We can't use a
+    ``MappingProxyType`` for this, because summaries need to be
+    picklable (for caching and for forked workers).
+    """
+    __slots__ = ('_namespace',)
+    _namespace: ChainMap[str, Crossref]
+
+    def __init__(self, namespace: ChainMap[str, Crossref]):
+        self._namespace = namespace
+
+    def __getitem__(self, key: str) -> Crossref:
+        return self._namespace[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._namespace)
+
+    def __len__(self) -> int:
+        return len(self._namespace)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._namespace!r})'
+
+
 def summarize_module[T: SummaryMetadataProtocol](
         module: ModulePostExtraction,
         normalized_objs: Annotated[
@@ -144,25 +173,29 @@ def summarize_module[T: SummaryMetadataProtocol](
     module_crossref = Crossref(
         module_name=module.__name__,
         toplevel_name=None)
-    namespace: dict[str, Crossref] = {}
+    namespace: ChainMap[str, Crossref] = ChainMap()
     module_name = module.__name__
 
     typevars: set[TypeVarSummary[T]] = set()
     module_members: set[NamespaceMemberSummary[T]] = set()
-    for name, normalized_obj in normalized_objs.items():
-        member_summary = _summarize_namespace_member(
-            module_name,
-            module.__dict__,
-            module_crossref,
-            namespace,
-            name,
-            normalized_obj,
-            summary_metadata_factory,
-            in_class=False)
-        if isinstance(member_summary, TypeVarSummary):
-            typevars.add(member_summary)
-        elif member_summary is not None:
-            module_members.add(member_summary)
+    with (
+        type_hint_cache(module.__dict__),
+        _profile_summary(module_crossref, ModuleSummary.__name__),
+    ):
+        for name, normalized_obj in normalized_objs.items():
+            member_summary = _summarize_namespace_member(
+                module_name,
+                module.__dict__,
+                module_crossref,
+                namespace,
+                name,
+                normalized_obj,
+                summary_metadata_factory,
+                in_class=False)
+            if isinstance(member_summary, TypeVarSummary):
+                typevars.add(member_summary)
+            elif member_summary is not None:
+                module_members.add(member_summary)
 
     config = module_tree.find(module.__name__).effective_config
     metadata = summary_metadata_factory(
@@ -172,7 +205,7 @@ def summarize_module[T: SummaryMetadataProtocol](
         annotateds=(),
         metadata=config.metadata or {})
     metadata.extracted_inclusion = config.include_in_docs
-    metadata.crossref_namespace = namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(namespace)
     metadata.canonical_module = module.__name__
 
     if (raw_dunder_all := getattr(module, '__all__', None)) is not None:
@@ -196,7 +229,7 @@ def summarize_module[T: SummaryMetadataProtocol](
 @_summary_factory(CrossrefSummary)
 def create_crossref_summary(
         name_in_parent: str,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         obj: NormalizedObj,
         classification: ObjClassification,
         *,
@@ -225,7 +258,8 @@ def create_crossref_summary(
         metadata=obj.effective_config.metadata or {})
     metadata.extracted_inclusion = \
         obj.effective_config.include_in_docs
-    metadata.crossref_namespace = parent_crossref_namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(
+        parent_crossref_namespace)
     metadata.canonical_module = (
         obj.canonical_module if obj.canonical_module is not Singleton.UNKNOWN
         else None)
@@ -245,7 +279,7 @@ def create_crossref_summary(
 @_summary_factory(VariableSummary)
 def create_variable_summary(
         name_in_parent: str,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         obj: NormalizedObj,
         classification: ObjClassification,
         *,
@@ -269,7 +303,8 @@ def create_variable_summary(
         metadata=obj.effective_config.metadata or {})
     metadata.extracted_inclusion = \
         obj.effective_config.include_in_docs
-    metadata.crossref_namespace = parent_crossref_namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(
+        parent_crossref_namespace)
     metadata.canonical_module = (
         obj.canonical_module if obj.canonical_module is not Singleton.UNKNOWN
         else None)
@@ -326,7 +361,7 @@ def create_variable_summary(
 @_summary_factory(TypeVarSummary)
 def create_typevar_summary(
         name_in_parent: str,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         obj: NormalizedObj,
         classification: ObjClassification,
         *,
@@ -351,7 +386,8 @@ def create_typevar_summary(
         metadata=obj.effective_config.metadata or {})
     metadata.extracted_inclusion = \
         obj.effective_config.include_in_docs
-    metadata.crossref_namespace = parent_crossref_namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(
+        parent_crossref_namespace)
     metadata.canonical_module = (
         obj.canonical_module if obj.canonical_module is not Singleton.UNKNOWN
         else None)
@@ -388,7 +424,7 @@ def _summarize_namespace_member[T: SummaryMetadataProtocol](  # noqa: PLR0913
         module_name: str | Literal[Singleton.UNKNOWN] | None,
         module_globals: dict[str, Any],
         parent_crossref: Crossref | None,
-        parent_namespace: dict[str, Crossref],
+        parent_namespace: ChainMap[str, Crossref],
         attr_name: str,
         normalized_obj: NormalizedObj,
         summary_metadata_factory: SummaryMetadataFactoryProtocol[T],
@@ -443,14 +479,15 @@ def _summarize_namespace_member[T: SummaryMetadataProtocol](  # noqa: PLR0913
         | TypeVarSummary
     ):
         factory = _summary_factories[summary_class]
-        return factory(
-            attr_name,
-            parent_namespace,
-            normalized_obj,
-            classification,
-            summary_metadata_factory=summary_metadata_factory,
-            module_globals=module_globals,
-            in_class=in_class)
+        with _profile_summary(crossref, summary_class.__name__):
+            return factory(
+                attr_name,
+                parent_namespace,
+                normalized_obj,
+                classification,
+                summary_metadata_factory=summary_metadata_factory,
+                module_globals=module_globals,
+                in_class=in_class)
 
 
 def _create_substitute_crossref_summary[T: SummaryMetadataProtocol](
@@ -497,7 +534,7 @@ def _create_substitute_crossref_summary[T: SummaryMetadataProtocol](
 @_summary_factory(ClassSummary)
 def create_class_summary(
         name_in_parent: str,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         obj: NormalizedObj,
         classification: ObjClassification,
         *,
@@ -510,8 +547,7 @@ def create_class_summary(
     crossref = parent_crossref_namespace.get(name_in_parent)
     logger.debug(
         'Creating class summary for %s (%s)', name_in_parent, crossref)
-    annotations = get_type_hints(
-        src_obj, globalns=module_globals, include_extras=True)
+    annotations = get_type_hints_cached(src_obj, module_globals)
     # Note that, especially in classes, it's extremely common to have
     # annotations that don't appear in the dict (eg dataclass fields).
     # But we don't want to clobber defined values, so we first extract
@@ -536,7 +572,13 @@ def create_class_summary(
             config,
             parent_typevars=obj.typevars)
 
-    namespace = {**parent_crossref_namespace}
+    # Note: this is a view onto the parent namespace, not a copy, so the
+    # parent is shared by every class within it instead of being
+    # duplicated for each one. It also means that the class namespace
+    # includes any parent members defined after the class, just like at
+    # runtime. (It's only exposed via a read-only view, so summary
+    # consumers can't write through it into the parent.)
+    namespace = parent_crossref_namespace.new_child()
     members: dict[
             str,
             ClassSummary | VariableSummary | CallableSummary | CrossrefSummary
@@ -580,7 +622,7 @@ def create_class_summary(
         metadata=config.metadata or {})
     metadata.extracted_inclusion = \
         obj.effective_config.include_in_docs
-    metadata.crossref_namespace = namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(namespace)
     metadata.canonical_module = (
         obj.canonical_module if obj.canonical_module is not Singleton.UNKNOWN
         else None)
@@ -616,7 +658,7 @@ def create_class_summary(
 @_summary_factory(CallableSummary)
 def create_callable_summary(  # noqa: C901, PLR0912
         name_in_parent: str,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         obj: NormalizedObj,
         classification: ObjClassification,
         *,
@@ -703,16 +745,19 @@ def create_callable_summary(  # noqa: C901, PLR0912
                 namespace_expansion[namespace_expansion_key] = \
                     signature_crossref
 
-            signature = _make_signature(
-                parent_crossref_namespace,
-                overload_,
-                canonical_module,
-                signature_crossref,
-                signature_config=overload_config,
-                parent_effective_config=obj.effective_config,
-                parent_typevars=obj.typevars,
-                module_globals=module_globals,
-                summary_metadata_factory=summary_metadata_factory)
+            with _profile_summary(
+                signature_crossref, SignatureSummary.__name__
+            ):
+                signature = _make_signature(
+                    parent_crossref_namespace,
+                    overload_,
+                    canonical_module,
+                    signature_crossref,
+                    signature_config=overload_config,
+                    parent_effective_config=obj.effective_config,
+                    parent_typevars=obj.typevars,
+                    module_globals=module_globals,
+                    summary_metadata_factory=summary_metadata_factory)
             if signature is None:
                 namespace_expansion.pop(namespace_expansion_key, None)
             else:
@@ -726,16 +771,17 @@ def create_callable_summary(  # noqa: C901, PLR0912
             crossref / SignatureTraversal(None)
             if crossref is not None
             else None)
-        signature = _make_signature(
-            parent_crossref_namespace,
-            src_obj,
-            canonical_module,
-            signature_crossref,
-            signature_config=implementation_config,
-            parent_effective_config=obj.effective_config,
-            parent_typevars=obj.typevars,
-            module_globals=module_globals,
-            summary_metadata_factory=summary_metadata_factory)
+        with _profile_summary(signature_crossref, SignatureSummary.__name__):
+            signature = _make_signature(
+                parent_crossref_namespace,
+                src_obj,
+                canonical_module,
+                signature_crossref,
+                signature_config=implementation_config,
+                parent_effective_config=obj.effective_config,
+                parent_typevars=obj.typevars,
+                module_globals=module_globals,
+                summary_metadata_factory=summary_metadata_factory)
 
         # None signatures happen very occasionally for ex C extensions
         if signature is not None:
@@ -755,8 +801,8 @@ def create_callable_summary(  # noqa: C901, PLR0912
         metadata=obj.effective_config.metadata or {})
     metadata.extracted_inclusion = \
         obj.effective_config.include_in_docs
-    metadata.crossref_namespace = {
-        **parent_crossref_namespace, **namespace_expansion}
+    metadata.crossref_namespace = _CrossrefNamespaceView(
+        parent_crossref_namespace.new_child(namespace_expansion))
     metadata.canonical_module = canonical_module
 
     return CallableSummary(
@@ -777,7 +823,7 @@ def create_callable_summary(  # noqa: C901, PLR0912
 
 
 def _make_signature(  # noqa: PLR0913, PLR0915
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         src_obj: Callable,
         canonical_module: str | None,
         signature_crossref: Crossref | None,
@@ -797,8 +843,7 @@ def _make_signature(  # noqa: PLR0913, PLR0915
     """
     params: list[ParamSummary] = []
     try:
-        annotations = get_type_hints(
-            src_obj, globalns=module_globals, include_extras=True)
+        annotations = get_type_hints_cached(src_obj, module_globals)
     except TypeError:
         logger.debug(
             'Failed to get type hints for %s for signature analysis. This is '
@@ -819,8 +864,8 @@ def _make_signature(  # noqa: PLR0913, PLR0915
     # and for the signature itself. Literally the same object, not
     # copies thereof. This ensures that all of the params are added,
     # so that params can reference each other.
-    signature_namespace: dict[str, Crossref] = {
-        **parent_crossref_namespace}
+    signature_namespace = parent_crossref_namespace.new_child()
+    signature_namespace_view = _CrossrefNamespaceView(signature_namespace)
     signature_typevars = extend_typevars(
         parent_crossref=signature_crossref,
         parent_typevars=parent_typevars,
@@ -865,7 +910,7 @@ def _make_signature(  # noqa: PLR0913, PLR0915
             metadata=effective_config.metadata or {})
         param_metadata.extracted_inclusion = \
             effective_config.include_in_docs
-        param_metadata.crossref_namespace = signature_namespace
+        param_metadata.crossref_namespace = signature_namespace_view
         param_metadata.canonical_module = canonical_module
 
         params.append(ParamSummary(
@@ -903,7 +948,7 @@ def _make_signature(  # noqa: PLR0913, PLR0915
         metadata=retval_effective_config.metadata or {})
     retval_metadata.extracted_inclusion = \
         retval_effective_config.include_in_docs
-    retval_metadata.crossref_namespace = signature_namespace
+    retval_metadata.crossref_namespace = signature_namespace_view
     retval_metadata.canonical_module = canonical_module
 
     signature_metadata = summary_metadata_factory(
@@ -914,7 +959,7 @@ def _make_signature(  # noqa: PLR0913, PLR0915
         metadata=signature_config.metadata or {})
     signature_metadata.extracted_inclusion = \
         signature_config.include_in_docs
-    signature_metadata.crossref_namespace = signature_namespace
+    signature_metadata.crossref_namespace = signature_namespace_view
     signature_metadata.canonical_module = canonical_module
 
     typevars = getattr(src_obj, '__type_params__', ())
@@ -952,7 +997,7 @@ def _make_signature(  # noqa: PLR0913, PLR0915
 def _make_typevar_summary_direct(
         src_obj: TypeVar,
         parent_crossref: Crossref | None,
-        parent_crossref_namespace: dict[str, Crossref],
+        parent_crossref_namespace: ChainMap[str, Crossref],
         parent_canonical_module: str | Literal[Singleton.UNKNOWN] | None,
         parent_typevars: Mapping[TypeVar, Crossref],
         *,
@@ -976,7 +1021,8 @@ def _make_typevar_summary_direct(
         annotateds=(),
         metadata={})
     metadata.extracted_inclusion = None
-    metadata.crossref_namespace = parent_crossref_namespace
+    metadata.crossref_namespace = _CrossrefNamespaceView(
+        parent_crossref_namespace)
     metadata.canonical_module = (
         parent_canonical_module
         if parent_canonical_module is not Singleton.UNKNOWN
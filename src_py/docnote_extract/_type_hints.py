@@ -0,0 +1,120 @@
+"""This contains a memoizing replacement for ``typing.get_type_hints``,
+used during summarization.
+
+For classes, ``get_type_hints`` walks the entire MRO and re-evaluates
+the annotations of every base, so a deep firstparty hierarchy ends up
+evaluating the annotations of its bases once per subclass. Instead, we
+resolve each class' own annotations exactly once, and then compose the
+hints for subclasses from the (cached) hints of their bases.
+
+The cache is activated (via a context variable, just like stats) for
+the summarization of a single module, and is bound to that module's
+globals. That's the only namespace any of the hints are resolved
+against, so nothing can leak between modules -- or between the
+exploration and extraction versions of the same module, which have
+distinct globals, despite containing classes with the same names.
+"""
+from __future__ import annotations
+
+import inspect
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from types import SimpleNamespace
+from typing import Any
+from typing import ForwardRef
+from typing import get_type_hints
+
+_ACTIVE_HINT_CACHE: ContextVar[_TypeHintCache] = ContextVar(
+    '_ACTIVE_HINT_CACHE')
+
+
+@dataclass(slots=True)
+class _TypeHintCache:
+    globalns: dict[str, Any]
+    # These are both keyed by id, so we keep the objects themselves alive
+    # (and check them) to make sure that the ids don't get reused.
+    own_class_hints: dict[int, tuple[type, dict[str, Any]]] = field(
+        default_factory=dict)
+    callable_hints: dict[int, tuple[Any, dict[str, Any]]] = field(
+        default_factory=dict)
+
+
+@contextmanager
+def type_hint_cache(
+        globalns: dict[str, Any]
+        ) -> Generator[None, None, None]:
+    """Within the context, ``get_type_hints_cached`` calls with the
+    passed globals are memoized.
+    """
+    ctx_token = _ACTIVE_HINT_CACHE.set(_TypeHintCache(globalns=globalns))
+    try:
+        yield
+    finally:
+        _ACTIVE_HINT_CACHE.reset(ctx_token)
+
+
+def get_type_hints_cached(
+        obj: Any,
+        globalns: dict[str, Any]
+        ) -> dict[str, Any]:
+    """A drop-in replacement for
+    ``get_type_hints(obj, globalns=globalns, include_extras=True)``.
+    The returned dict is always a fresh copy, so it can be freely
+    modified by the caller.
+    """
+    cache = _ACTIVE_HINT_CACHE.get(None)
+    if cache is None or cache.globalns is not globalns:
+        return get_type_hints(obj, globalns=globalns, include_extras=True)
+
+    if isinstance(obj, type):
+        hints: dict[str, Any] = {}
+        for base in reversed(obj.__mro__):
+            hints.update(_get_own_class_hints(cache, base))
+        return hints
+
+    cached = cache.callable_hints.get(id(obj))
+    if cached is None or cached[0] is not obj:
+        cached = cache.callable_hints[id(obj)] = (
+            obj,
+            get_type_hints(obj, globalns=globalns, include_extras=True))
+
+    return {**cached[1]}
+
+
+def _get_own_class_hints(
+        cache: _TypeHintCache,
+        cls: type
+        ) -> dict[str, Any]:
+    """Resolves the annotations defined directly on ``cls`` (ie, not
+    on any of its bases), exactly as ``get_type_hints`` would when
+    walking the MRO of a subclass.
+    """
+    cached = cache.own_class_hints.get(id(cls))
+    if cached is not None and cached[0] is cls:
+        return cached[1]
+
+    # We can't ask ``get_type_hints`` to evaluate a single class without
+    # its bases, so instead we give it a stand-in object with just the
+    # class' own annotations, and the same locals and type params it would
+    # have used for the class. The only other difference is that it
+    # evaluates string annotations as non-class forward refs, which would
+    # reject (for example) ``ClassVar``, so we wrap those ourselves.
+    annotations = {
+        name: (
+            ForwardRef(value, is_argument=False, is_class=True)
+            if isinstance(value, str) else value)
+        for name, value in inspect.get_annotations(cls).items()}
+    stand_in = SimpleNamespace(
+        __annotations__=annotations,
+        __type_params__=getattr(cls, '__type_params__', ()))
+    own_hints = get_type_hints(
+        stand_in,
+        globalns=cache.globalns,
+        localns=dict(vars(cls)),
+        include_extras=True)
+
+    cache.own_class_hints[id(cls)] = (cls, own_hints)
+    return own_hints
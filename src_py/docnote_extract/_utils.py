@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import inspect
-import typing
 from collections.abc import Sequence
+from types import ModuleType
 from typing import Any
 from typing import Literal
 
@@ -15,9 +15,6 @@ from docnote_extract import KNOWN_MARKUP_LANGS
 from docnote_extract.exceptions import InvalidConfig
 from docnote_extract.summaries import DocText
 
-if typing.TYPE_CHECKING:
-    from docnote_extract._extraction import ModulePostExtraction
-
 
 def validate_config(config: DocnoteConfig, hint: Any) -> Literal[True]:
     """Performs any config enforcement (currently, just the
@@ -35,27 +32,39 @@ def validate_config(config: DocnoteConfig, hint: Any) -> Literal[True]:
     return True
 
 
+def get_explicit_config(module: ModuleType) -> DocnoteConfig | None:
+    """Checks for an explicit config defined on the module itself,
+    returning it if found, and None otherwise. Raises ``TypeError`` if
+    the module defines something other than a ``DocnoteConfig``.
+    """
+    explicit_config = getattr(module, DOCNOTE_CONFIG_ATTR_FOR_MODULES, None)
+    if (
+        explicit_config is not None
+        and not isinstance(explicit_config, DocnoteConfig)
+    ):
+        raise TypeError(
+            f'``<module>.{DOCNOTE_CONFIG_ATTR_FOR_MODULES}`` must always '
+            + 'be a ``DocnoteConfig`` instance!', module, explicit_config)
+
+    return explicit_config
+
+
 def coerce_config(
-        module: ModulePostExtraction,
+        explicit_config: DocnoteConfig | None,
         *,
         parent_stackables: DocnoteConfigParams | None = None
         ) -> DocnoteConfig:
-    """Given a module-post-extraction, checks for an explicit config
-    defined on the module itself. If found, returns it. If not found,
-    creates an empty one.
+    """Given the explicit config for a module (see
+    ``get_explicit_config``), combines it with any stackable values
+    from the parent module. If the module had no explicit config, this
+    creates an empty one (aside from the inherited stackables).
     """
-    explicit_config = getattr(module, DOCNOTE_CONFIG_ATTR_FOR_MODULES, None)
     if parent_stackables is None:
         parent_stackables = {}
 
     if explicit_config is None:
         return DocnoteConfig(**parent_stackables)
 
-    elif not isinstance(explicit_config, DocnoteConfig):
-        raise TypeError(
-            f'``<module>.{DOCNOTE_CONFIG_ATTR_FOR_MODULES}`` must always '
-            + 'be a ``DocnoteConfig`` instance!', module, explicit_config)
-
     # Note: the intermediate step is required to OVERWRITE the values. If we
     # just did these directly within ``DocnoteConfig``, python would complain
     # about getting multiple values for the same keyword arg.
@@ -0,0 +1,468 @@
+"""This contains ``watch_gather``, which keeps an extraction session
+warm between gathers. After the initial gather, it polls the source
+files of all of the firstparty modules, and when any of them change,
+re-extracts (and re-summarizes) only the changed modules, plus any
+firstparty modules that depend upon them. The dependencies are the
+same as the ones the persistent cache uses (see
+``docnote_extract._caching``): a module's firstparty imports, plus its
+parent packages (since the explicit configs of the parents determine
+the effective config of the module).
+
+Some changes can't be handled incrementally, because the exploration
+phase would have had different results. Specifically: adding, removing,
+or renaming modules, and changing any ``nostub_firstparty_modules``
+(which delegate to their explored versions). Those restart the whole
+session, which costs as much as a normal ``gather``.
+
+We deliberately poll file mtimes instead of relying upon any
+platform-specific filesystem notifications, so that we can stick to the
+stdlib.
+"""
+from __future__ import annotations
+
+import linecache
+import logging
+import os
+import pkgutil
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from types import ModuleType
+from typing import Annotated
+from typing import overload
+
+from docnote import DocnoteConfig
+from docnote import Note
+from docnote import ReftypeMarker
+
+from docnote_extract._caching import _iter_parent_names
+from docnote_extract._caching import find_firstparty_imports
+from docnote_extract._caching import get_module_source
+from docnote_extract._extraction import ModulePostExtraction
+from docnote_extract._extraction import _ExtractionFinderLoader
+from docnote_extract._gathering import Docnotes
+from docnote_extract._gathering import ExtractionOptions
+from docnote_extract._gathering import _build_summary_trees
+from docnote_extract._gathering import _get_floader_options
+from docnote_extract._gathering import _get_summarizer
+from docnote_extract._module_tree import ConfiguredModuleTreeNode
+from docnote_extract._summarization import SummaryMetadata
+from docnote_extract._utils import get_explicit_config
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.summaries import ModuleSummary
+from docnote_extract.summaries import SummaryMetadataFactoryProtocol
+from docnote_extract.summaries import SummaryMetadataProtocol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class WatchUpdate[T: SummaryMetadataProtocol]:
+    """Yielded by ``watch_gather`` after the initial gather, and then
+    again after every change.
+    """
+    docnotes: Docnotes[T]
+    changed_modules: Annotated[
+            frozenset[str],
+            Note('''The names of all of the modules that were (re-)extracted
+                for this update. For the initial update (and after any
+                restart of the extraction session), this includes every
+                firstparty module.''')]
+
+
+@overload
+def watch_gather[T: SummaryMetadataProtocol](
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory: SummaryMetadataFactoryProtocol[T],
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.
+                    Note that ``firstparty_wheels`` isn't supported, since
+                    watching relies upon polling the module source files.''')
+            ] = None,
+        poll_interval: Annotated[
+                float,
+                Note('''The number of seconds to wait between checks of the
+                    firstparty source files.''')
+            ] = 0.5
+        ) -> Iterator[WatchUpdate[T]]: ...
+@overload
+def watch_gather(
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory: None = None,
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.
+                    Note that ``firstparty_wheels`` isn't supported, since
+                    watching relies upon polling the module source files.''')
+            ] = None,
+        poll_interval: Annotated[
+                float,
+                Note('''The number of seconds to wait between checks of the
+                    firstparty source files.''')
+            ] = 0.5
+        ) -> Iterator[WatchUpdate[SummaryMetadata]]: ...
+def watch_gather[T: SummaryMetadataProtocol](  # noqa: PLR0913
+        firstparty_pkg_names: Iterable[str],
+        *,
+        summary_metadata_factory:
+            SummaryMetadataFactoryProtocol[T] | None = None,
+        special_reftype_markers: Annotated[
+                dict[Crossref, ReftypeMarker] | None,
+                Note('''If you use metaclasses or decorators from third-party
+                    packages, you'll need to add them here for them to be
+                    correctly interpreted by the import stubbing mechanism.''')
+            ] = None,
+        nostub_firstparty_modules: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to only an individual module,
+                    not an entire package, and can only be used for firstparty
+                    modules (ie, ``firstparty_pkg_names`` and their children).
+                    ''')
+            ] = None,
+        nostub_packages: Annotated[
+                Iterable[str] | None,
+                Note('''Note that this applies to an entire package and not
+                    just an individual module, but it can be used for
+                    thirdparty dependencies.''')
+            ] = None,
+        remove_unknown_origins: Annotated[
+                bool,
+                Note('''Set this to ``False`` if you'd like to preserve
+                    module namespace members with an unknown canonical
+                    module origin. This can create a large number of false
+                    positives in ``metadata.to_document`` values, but can be
+                    helpful in recovering module-level constants.''')
+            ] = True,
+        extraction_options: Annotated[
+                ExtractionOptions | None,
+                Note('''Options that control how the firstparty modules are
+                    discovered and extracted; see ``ExtractionOptions``.
+                    Note that ``firstparty_wheels`` isn't supported, since
+                    watching relies upon polling the module source files.''')
+            ] = None,
+        poll_interval: Annotated[
+                float,
+                Note('''The number of seconds to wait between checks of the
+                    firstparty source files.''')
+            ] = 0.5
+        ) -> Iterator[WatchUpdate[T]]:
+    """A long-running version of ``gather``, intended for things like
+    docs preview servers. This first yields a ``WatchUpdate`` with the
+    complete ``Docnotes`` (exactly like ``gather`` would return), and
+    then blocks until any firstparty source file changes, after which it
+    yields another ``WatchUpdate`` with the updated ``Docnotes``. This
+    repeats indefinitely; to stop watching, simply ``close()`` the
+    generator (or stop iterating over it within a ``with
+    contextlib.closing(...)`` block).
+
+    Only the changed modules (and the modules that depend upon them)
+    are re-extracted and re-summarized; everything else is reused from
+    the previous update. Note that this means the summaries of
+    unchanged modules are shared between the ``Docnotes`` of different
+    updates.
+
+    As with ``iter_gather``, the import hook is installed for the whole
+    lifetime of the generator, but it's suspended (and the prehook
+    modules restored) while summarizing, while waiting for changes, and
+    while the generator is suspended at a ``yield``. Also note that
+    changes to ``DocnoteConfig.mark_special_reftype`` declarations are
+    only picked up after a restart of the extraction session (see
+    below).
+
+    See ``gather`` for details on the parameters (and the inherent
+    dangers of extracting arbitrary code).
+    """
+    if extraction_options is None:
+        extraction_options = ExtractionOptions()
+    # Watching relies upon polling the module source files, which doesn't
+    # work for modules within wheels.
+    if extraction_options.firstparty_wheels is not None:
+        raise ValueError(
+            'watch_gather does not support firstparty_wheels',
+            extraction_options.firstparty_wheels)
+
+    floader_options = _get_floader_options(
+        special_reftype_markers=special_reftype_markers,
+        nostub_firstparty_modules=nostub_firstparty_modules,
+        nostub_packages=nostub_packages,
+        extraction_options=extraction_options)
+    summarize = _get_summarizer(
+        summary_metadata_factory=summary_metadata_factory,
+        remove_unknown_origins=remove_unknown_origins)
+    firstparty_pkgs = frozenset(firstparty_pkg_names)
+
+    while True:
+        floader = _ExtractionFinderLoader(firstparty_pkgs, **floader_options)
+        with floader.extraction_session() as firstparty_names:
+            watcher = _SourceWatcher.from_raw_modules(
+                {
+                    module_name: floader.module_stash_nostub_raw[module_name]
+                    for module_name in firstparty_names},
+                restart_modules=floader.nostub_firstparty_modules)
+            explicit_configs: dict[str, DocnoteConfig | None] = {}
+            summary_lookup: dict[str, ModuleSummary[T]] = {}
+            changed_modules: frozenset[str] | None = firstparty_names
+
+            while changed_modules is not None:
+                extraction: dict[str, ModulePostExtraction] = {}
+                for module_name in changed_modules:
+                    extraction[module_name] = module_extraction = \
+                        floader.extract_firstparty(module_name)
+                    explicit_configs[module_name] = get_explicit_config(
+                        module_extraction)
+
+                with floader.suspended_session(firstparty_names):
+                    configured_trees = \
+                        ConfiguredModuleTreeNode.from_explicit_configs(
+                            explicit_configs)
+                    for module_name, module_extraction in extraction.items():
+                        pkg_name, _, _ = module_name.partition('.')
+                        summary_lookup[module_name] = summarize(
+                            module_extraction, configured_trees[pkg_name])
+                    # Let the extracted modules get GC'd while we wait
+                    del extraction
+
+                    yield WatchUpdate(
+                        Docnotes(_build_summary_trees(
+                            configured_trees, summary_lookup)),
+                        changed_modules=changed_modules)
+                    changed_modules = watcher.wait_for_changes(poll_interval)
+
+        logger.info('Restarting extraction session.')
+
+
+@dataclass(slots=True)
+class _SourceWatcher:
+    """Tracks the source files of all of the firstparty modules (and
+    the directories of all of the firstparty packages), so that we can
+    poll them for changes.
+    """
+    source_paths: dict[str, Path]
+    dependencies: dict[str, frozenset[str]]
+    restart_modules: frozenset[str]
+    # These are both keyed by path, and hold ``st_mtime_ns``
+    source_mtimes: dict[Path, int] = field(default_factory=dict)
+    package_dir_mtimes: dict[Path, int] = field(default_factory=dict)
+    # For every package dir, the (name, ispkg) of all of its submodules
+    package_dir_contents: dict[Path, frozenset[tuple[str, bool]]] = field(
+        default_factory=dict)
+
+    @classmethod
+    def from_raw_modules(
+            cls,
+            raw_modules: Mapping[str, ModuleType],
+            *,
+            restart_modules: frozenset[str] = frozenset()
+            ) -> _SourceWatcher:
+        """Creates a watcher for the passed (raw) firstparty modules.
+        Changes to any of the ``restart_modules`` are treated the same
+        as structural changes.
+        """
+        source_paths: dict[str, Path] = {}
+        dependencies: dict[str, frozenset[str]] = {}
+        package_dirs: set[Path] = set()
+        for module_name, raw_module in raw_modules.items():
+            module_file = getattr(raw_module, '__file__', None)
+            if module_file is not None:
+                source_paths[module_name] = Path(module_file)
+
+            package_dirs.update(
+                Path(path) for path in getattr(raw_module, '__path__', ()))
+            dependencies[module_name] = _get_dependencies(
+                module_name,
+                get_module_source(raw_module),
+                package=getattr(raw_module, '__package__', None),
+                firstparty_names=raw_modules.keys())
+
+        watcher = cls(
+            source_paths=source_paths,
+            dependencies=dependencies,
+            restart_modules=restart_modules)
+        for source_path in source_paths.values():
+            watcher.source_mtimes[source_path] = _get_mtime(source_path)
+        for package_dir in package_dirs:
+            watcher.package_dir_mtimes[package_dir] = _get_mtime(package_dir)
+            watcher.package_dir_contents[package_dir] = _list_package_dir(
+                package_dir)
+
+        return watcher
+
+    def wait_for_changes(self, poll_interval: float) -> frozenset[str] | None:
+        """Blocks until ``poll`` returns something other than an empty
+        set, and then returns it.
+        """
+        while True:
+            changed_modules = self.poll()
+            if changed_modules is None or changed_modules:
+                return changed_modules
+
+            time.sleep(poll_interval)
+
+    def poll(self) -> frozenset[str] | None:
+        """Checks for changes since the last poll. Returns the names of
+        all of the modules that need to be re-extracted (the changed
+        modules, plus all of the modules that depend upon them), or None
+        if the extraction session needs to be restarted.
+        """
+        if self._package_dirs_changed():
+            return None
+
+        changed_modules: set[str] = set()
+        for module_name, source_path in self.source_paths.items():
+            try:
+                mtime = _get_mtime(source_path)
+            except FileNotFoundError:
+                logger.info('Source file %s removed.', source_path)
+                return None
+
+            if mtime != self.source_mtimes[source_path]:
+                self.source_mtimes[source_path] = mtime
+                changed_modules.add(module_name)
+
+        if not changed_modules:
+            return frozenset()
+        if not changed_modules.isdisjoint(self.restart_modules):
+            logger.info('Nostub firstparty module changed.')
+            return None
+
+        for module_name in changed_modules:
+            source_path = self.source_paths[module_name]
+            # Both inspect and the code cache get module sources via
+            # linecache, which won't notice the changes on its own.
+            linecache.checkcache(str(source_path))
+            package_name = (
+                module_name
+                if source_path.stem == '__init__'
+                else module_name.rpartition('.')[0])
+            self.dependencies[module_name] = _get_dependencies(
+                module_name,
+                ''.join(linecache.getlines(str(source_path))),
+                package=package_name,
+                firstparty_names=self.dependencies.keys())
+
+        logger.info('Source changed for modules: %s', sorted(changed_modules))
+        return frozenset(
+            module_name
+            for module_name, dependencies in self.dependencies.items()
+            if module_name in changed_modules
+            or not dependencies.isdisjoint(changed_modules))
+
+    def _package_dirs_changed(self) -> bool:
+        """Checks whether any modules were added to, removed from, or
+        renamed within any of the package directories since the last
+        poll (or if a package directory was removed entirely).
+        """
+        for package_dir, prev_mtime in self.package_dir_mtimes.items():
+            try:
+                mtime = _get_mtime(package_dir)
+            except FileNotFoundError:
+                logger.info('Package directory %s removed.', package_dir)
+                return True
+
+            if mtime != prev_mtime:
+                self.package_dir_mtimes[package_dir] = mtime
+                # Note that lots of editors save files by writing to a
+                # tempfile and then renaming it, which changes the mtime of
+                # the directory, even though the modules remain the same.
+                if (
+                    _list_package_dir(package_dir)
+                    != self.package_dir_contents[package_dir]
+                ):
+                    logger.info('Modules changed within %s.', package_dir)
+                    return True
+
+        return False
+
+
+def _get_dependencies(
+        module_name: str,
+        source: str | None,
+        *,
+        package: str | None,
+        firstparty_names: Iterable[str]
+        ) -> frozenset[str]:
+    firstparty_names = frozenset(firstparty_names)
+    dependencies = {
+        parent for parent in _iter_parent_names(module_name)
+        if parent in firstparty_names}
+    if source is not None:
+        dependencies.update(find_firstparty_imports(
+            source,
+            module_name=module_name,
+            package=package,
+            firstparty_names=firstparty_names))
+
+    return frozenset(dependencies)
+
+
+def _get_mtime(path: Path) -> int:
+    return os.stat(path).st_mtime_ns
+
+
+def _list_package_dir(package_dir: Path) -> frozenset[tuple[str, bool]]:
+    return frozenset(
+        (module_info.name, module_info.ispkg)
+        for module_info in pkgutil.iter_modules([str(package_dir)]))
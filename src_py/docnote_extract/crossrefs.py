@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import Hashable
 from collections.abc import Mapping
 from dataclasses import dataclass
+from dataclasses import field
 from enum import Enum
 from types import ModuleType
 from typing import Annotated
@@ -12,9 +14,24 @@ from typing import TypeAliasType
 from typing import TypeGuard
 from typing import TypeVar
 from typing import overload
+from weakref import WeakValueDictionary
 
 from docnote import Note
 
+from docnote_extract.stats import _count_crossreffed_class
+
+# Keyed by ``(module_name, toplevel_name, strict_traversal_keys)``; see
+# ``_get_strict_key``
+_CROSSREF_INTERNS: WeakValueDictionary[
+        tuple[str | None, str | None, tuple[Hashable, ...]],
+        Crossref
+    ] = WeakValueDictionary()
+# Keyed by ``_get_strict_key(metadata)``
+_CROSSREFFED_CACHE: WeakValueDictionary[Hashable, type[CrossrefMixin]] = \
+    WeakValueDictionary()
+_METACLASS_CROSSREFFED_CACHE: WeakValueDictionary[Crossref, type] = \
+    WeakValueDictionary()
+
 
 class SyntacticTraversalType(Enum):
     TYPEVAR = 'typevar'
@@ -43,6 +60,12 @@ class CallTraversal:
     args: tuple[Any, ...]
     kwargs: dict[str, Any]
 
+    def __hash__(self) -> int:
+        # The autogenerated hash would fail on the kwargs dict, so we
+        # freeze it instead. Note that this will still raise TypeError if
+        # any of the args or kwarg values are themselves unhashable.
+        return hash((self.args, frozenset(self.kwargs.items())))
+
 
 @dataclass(slots=True, frozen=True)
 class GetitemTraversal:
@@ -79,9 +102,21 @@ type CrossrefTraversal = (
     | ParamTraversal)
 
 
-@dataclass(slots=True, frozen=True, kw_only=True)
+@dataclass(
+    slots=True, frozen=True, kw_only=True, init=False, weakref_slot=True)
 class Crossref:
     """A reference to something defined and/or documented elsewhere.
+
+    Crossrefs are interned: as long as an identical crossref is still
+    alive, constructing a new one returns the existing instance instead.
+    This lets us cache the hash (crossrefs are used as dict keys all over
+    the place) and keeps the ``crossref_namespace`` dicts from filling up
+    with duplicates. Interning is type-strict (see ``_get_strict_key``),
+    so, for example, a call traversal with ``True`` as an argument never
+    returns a crossref whose argument is ``1``, even though the two
+    compare equal. The exception is crossrefs with unhashable traversals
+    (for example, calls with list arguments), which are always distinct
+    instances.
     """
     module_name: Annotated[
         str | None,
@@ -104,7 +139,112 @@ class Crossref:
                 modules and their toplevel objects.''')
         ] = ()
 
+    # None if the traversals are unhashable (in which case we also aren't
+    # interned)
+    _hash: int | None = field(init=False, repr=False, compare=False)
+    # Lazily created by ``__truediv__``, and keyed by the (strict) keys of
+    # the traversals. Note that this keeps the children alive for as long
+    # as the parent is.
+    _children: dict[Hashable, Crossref] | None = field(
+        init=False, repr=False, compare=False)
+
+    def __new__(
+            cls,
+            *,
+            module_name: str | None,
+            toplevel_name: str | None,
+            traversals: tuple[CrossrefTraversal, ...] = ()
+            ) -> Crossref:
+        key = (module_name, toplevel_name, traversals)
+        try:
+            key_hash = hash(key)
+            intern_key = (
+                module_name,
+                toplevel_name,
+                tuple(_get_strict_key(traversal) for traversal in traversals))
+        except TypeError:
+            return cls._create(key, key_hash=None)
+
+        interned = _CROSSREF_INTERNS.get(intern_key)
+        if interned is None:
+            interned = cls._create(key, key_hash=key_hash)
+            _CROSSREF_INTERNS[intern_key] = interned
+
+        return interned
+
+    @classmethod
+    def _create(
+            cls,
+            key: tuple[str | None, str | None, tuple[CrossrefTraversal, ...]],
+            *,
+            key_hash: int | None
+            ) -> Crossref:
+        # Note: since we're frozen, we have to bypass our own setattr here
+        crossref = object.__new__(cls)
+        module_name, toplevel_name, traversals = key
+        object.__setattr__(crossref, 'module_name', module_name)
+        object.__setattr__(crossref, 'toplevel_name', toplevel_name)
+        object.__setattr__(crossref, 'traversals', traversals)
+        object.__setattr__(crossref, '_hash', key_hash)
+        object.__setattr__(crossref, '_children', None)
+        return crossref
+
+    def __reduce__(self):
+        # The default (slots) pickling would call ``__new__`` without any
+        # args, and would also pickle the cached hash and children, which
+        # we don't want. This way, unpickling goes through interning.
+        return (
+            _unpickle_crossref,
+            (self.module_name, self.toplevel_name, self.traversals))
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Crossref):
+            return NotImplemented
+
+        # Differing hashes are a quick way to rule things out, but we can't
+        # use identity alone to decide inequality, since unhashable
+        # crossrefs aren't interned.
+        if (
+            self._hash is not None
+            and other._hash is not None
+            and self._hash != other._hash
+        ):
+            return False
+
+        return (
+            self.module_name == other.module_name
+            and self.toplevel_name == other.toplevel_name
+            and self.traversals == other.traversals)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            # This will raise the appropriate TypeError for us
+            return hash(
+                (self.module_name, self.toplevel_name, self.traversals))
+
+        return self._hash
+
     def __truediv__(self, traversal: CrossrefTraversal) -> Crossref:
+        children = self._children
+        if children is None:
+            children = {}
+            object.__setattr__(self, '_children', children)
+
+        try:
+            traversal_key = _get_strict_key(traversal)
+            child = children.get(traversal_key)
+        except TypeError:
+            # Unhashable traversal; no way to cache it.
+            return self._make_child(traversal)
+
+        if child is None:
+            child = children[traversal_key] = self._make_child(traversal)
+
+        return child
+
+    def _make_child(self, traversal: CrossrefTraversal) -> Crossref:
         # Getattr traversals on a MODULE must result in setting the toplevel
         # name instead of appending a traversal.
         if (
@@ -187,6 +327,52 @@ class Crossref:
                 + 'information!', obj)
 
 
+def _get_strict_key(value: Any) -> Hashable:
+    """Returns a cache key for the passed crossref, traversal, or
+    traversal value, which -- unlike the value itself -- only compares
+    equal to the keys of values of the exact same types, recursively.
+    Otherwise, since ``True == 1 == 1.0`` (with equal hashes), caches
+    keyed on the value would return results created for a different
+    value than the one asked for. Raises ``TypeError`` for unhashable
+    values, just like ``hash``.
+    """
+    if isinstance(value, Crossref):
+        return (
+            Crossref,
+            value.module_name,
+            value.toplevel_name,
+            tuple(
+                _get_strict_key(traversal)
+                for traversal in value.traversals))
+    if isinstance(value, CallTraversal):
+        return (
+            CallTraversal,
+            _get_strict_key(value.args),
+            frozenset(
+                (name, _get_strict_key(kwarg))
+                for name, kwarg in value.kwargs.items()))
+    if isinstance(value, GetitemTraversal):
+        return (GetitemTraversal, _get_strict_key(value.key))
+    if isinstance(value, tuple | frozenset):
+        return (
+            type(value),
+            type(value)(_get_strict_key(member) for member in value))
+
+    hash(value)
+    return (type(value), value)
+
+
+def _unpickle_crossref(
+        module_name: str | None,
+        toplevel_name: str | None,
+        traversals: tuple[CrossrefTraversal, ...]
+        ) -> Crossref:
+    return Crossref(
+        module_name=module_name,
+        toplevel_name=toplevel_name,
+        traversals=traversals)
+
+
 class Crossreffed(Protocol):
     _docnote_extract_metadata: Crossref
 
@@ -364,13 +550,18 @@ def make_metaclass_crossreffed(
     attribute on the created metaclass.
     """
     metadata = Crossref(module_name=module, toplevel_name=name)
-    return type(
-        'CrossrefMetaclassMetaclass',
-        (CrossrefMetaclassMetaclass,),
-        # We'll strip this out in just a second, but we need it to assign the
-        # metadata for the _docnote_extract_metaclass attribute on the final
-        # class object
-        {'_docnote_extract_metadata': metadata})
+    _count_crossreffed_class(('metaclass', metadata))
+    retval = _METACLASS_CROSSREFFED_CACHE.get(metadata)
+    if retval is None:
+        retval = _METACLASS_CROSSREFFED_CACHE[metadata] = type(
+            'CrossrefMetaclassMetaclass',
+            (CrossrefMetaclassMetaclass,),
+            # We'll strip this out in just a second, but we need it to assign
+            # the metadata for the _docnote_extract_metaclass attribute on the
+            # final class object
+            {'_docnote_extract_metadata': metadata})
+
+    return retval
 
 
 @overload
@@ -404,10 +595,46 @@ def make_crossreffed(
         raise TypeError(
             'Invalid make_crossreffed call signature! (type checker failure?)')
 
+    return _make_crossreffed_from_metadata(new_metadata)
+
+
+def _make_crossreffed_from_metadata(metadata: Crossref) -> type[CrossrefMixin]:
+    """Gets the actual reftype class for an already-constructed
+    crossref. This is also used to reconstitute reftypes when
+    unpickling them.
+
+    Reftypes are interned: as long as a reftype for an identical
+    crossref is still alive, we return it instead of creating a new
+    class. This is safe because reftypes are effectively immutable (the
+    metaclass swallows all setattrs), and makes a big difference in both
+    time and memory for modules that repeatedly reference the same
+    thirdparty objects. Like crossref interning, this is type-strict, so
+    ``Foo(1)`` and ``Foo(True)`` get separate reftypes, each of which
+    carries its own exact metadata -- even though their crossrefs
+    compare equal.
+    """
+    try:
+        cache_key = _get_strict_key(metadata)
+        retval = _CROSSREFFED_CACHE.get(cache_key)
+    except TypeError:
+        # Unhashable traversals (for example, calls with list arguments)
+        # can't be interned, so these always get a fresh class.
+        _count_crossreffed_class()
+        return _create_crossreffed(metadata)
+
+    _count_crossreffed_class(('crossreffed', cache_key))
+    if retval is None:
+        retval = _CROSSREFFED_CACHE[cache_key] = _create_crossreffed(
+            metadata)
+
+    return retval
+
+
+def _create_crossreffed(metadata: Crossref) -> type[CrossrefMixin]:
     # This is separate purely so we can isolate the type: ignore
     retval = CrossrefMetaclass(
         'Crossreffed',
         (CrossrefMixin,),
-        {'_docnote_extract_metadata': new_metadata},
+        {'_docnote_extract_metadata': metadata},
         __docnote_extract_traversal__=True)
     return retval  # type: ignore
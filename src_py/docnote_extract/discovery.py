@@ -1,34 +1,132 @@
 """This module is responsible for the code that explores firstparty
 packages to recursively find all their modules.
+
+By default, this is done by importing every package and asking its
+finder for its submodules, one level at a time. Alternatively (see
+``ScanDiscovery``), the firstparty source directories -- or, for
+packages imported from zip archives like wheels, the archive contents
+-- can be scanned up front, and the resulting module names imported in
+order.
 """
 from __future__ import annotations
 
+import ast
+import hashlib
 import inspect
+import json
 import logging
+import os
+import tempfile
+import zipfile
 from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from fnmatch import fnmatchcase
 from importlib import import_module
+from importlib.machinery import PathFinder
+from pathlib import Path
 from pkgutil import iter_modules
 from types import ModuleType
+from typing import Any
 from typing import cast
 
 from docnote import DOCNOTE_CONFIG_ATTR
 from docnote import DocnoteConfig
 from docnote import ReftypeMarker
 
+from docnote_extract._caching import _update_with_environment
+from docnote_extract._caching import fingerprint_module_sources
+from docnote_extract._caching import get_module_source
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import GetattrTraversal
 from docnote_extract.crossrefs import is_crossreffed
 
+# Bump these whenever the format of the respective cache changes
+SCAN_CACHE_FORMAT_VERSION = 1
+SPECIAL_REFTYPE_CACHE_FORMAT_VERSION = 2
+# Bare decorator names (and dotted paths) that can't possibly attach a
+# docnote config, and which are common enough to be worth skipping during
+# the special reftype prescan. Note that any decorator **call** is always
+# treated as a candidate.
+_INERT_DECORATORS = frozenset({
+    'abstractmethod', 'abc.abstractmethod',
+    'cache', 'functools.cache',
+    'cached_property', 'functools.cached_property',
+    'classmethod',
+    'contextmanager', 'contextlib.contextmanager',
+    'asynccontextmanager', 'contextlib.asynccontextmanager',
+    'dataclass', 'dataclasses.dataclass',
+    'final', 'typing.final',
+    'overload', 'typing.overload',
+    'override', 'typing.override',
+    'property',
+    'runtime_checkable', 'typing.runtime_checkable',
+    'staticmethod',
+    'total_ordering', 'functools.total_ordering',
+    'unique', 'enum.unique',})
+# Attribute decorators with these final names are inert regardless of what
+# they're attached to (ie, ``@some_property.setter``)
+_INERT_DECORATOR_ATTRS = frozenset({'setter', 'getter', 'deleter'})
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
+class ScanDiscovery:
+    """Discovers firstparty modules by scanning their source directories
+    (via ``os.scandir``) instead of importing each package to find its
+    submodules. The full list of module names is known before anything
+    is imported, which also means that it doesn't depend upon import
+    order.
+
+    Only modules within ordinary directories or zip archives (for
+    example, wheels) on ``sys.path`` can be discovered this way;
+    packages with other custom finders will be missing their
+    submodules.
+    """
+    # Glob patterns (as per ``fnmatch``) matched against the full module
+    # name, for example ``'mypkg.tests'`` or ``'mypkg.*._vendored'``.
+    # Excluding a package also excludes all of its submodules; note that the
+    # root packages themselves can't be excluded.
+    exclude: frozenset[str] = frozenset()
+    # If true, subdirectories without an ``__init__`` are treated as
+    # namespace packages, as long as they (recursively) contain at least one
+    # module.
+    namespace_packages: bool = False
+
+
 def discover_all_modules(
-        root_packages: Iterable[str]
+        root_packages: Iterable[str],
+        *,
+        scan: ScanDiscovery | None = None,
+        scan_cache_path: Path | None = None
         ) -> dict[str, ModuleType]:
     """Recursively imports all of the modules under the passed
     ``root_packages``. Returns the loaded modules.
+
+    If ``scan`` is passed, the modules are found via
+    ``scan_firstparty_modules`` instead of ``eager_import_submodules``.
     """
     retval = {}
+    if scan is not None:
+        module_names = scan_firstparty_modules(
+            root_packages,
+            exclude=scan.exclude,
+            namespace_packages=scan.namespace_packages,
+            cache_path=scan_cache_path)
+        # Sorting guarantees that packages are imported before their
+        # submodules, since every package name is a prefix of its children
+        for module_name in sorted(module_names):
+            try:
+                retval[module_name] = import_module(module_name)
+            except ModuleNotFoundError:
+                logger.exception(
+                    'Failed to import scanned module %s; skipping',
+                    module_name)
+
+        return retval
+
     for root_package in root_packages:
         root_module = retval[root_package] = import_module(root_package)
         eager_import_submodules(root_module, loaded_modules=retval)
@@ -36,6 +134,389 @@ def discover_all_modules(
     return retval
 
 
+def scan_firstparty_modules(
+        root_packages: Iterable[str],
+        *,
+        exclude: Iterable[str] = (),
+        namespace_packages: bool = False,
+        cache_path: Path | None = None
+        ) -> frozenset[str]:
+    """Walks the source directories of the passed ``root_packages``
+    (once, via ``os.scandir``), returning the full names of all of
+    their modules, including the root packages themselves. Nothing is
+    imported; the root packages are located via the path-based finder.
+    See ``ScanDiscovery`` for details on ``exclude`` and
+    ``namespace_packages``.
+
+    If ``cache_path`` is passed, the result is cached there, along with
+    the mtimes of every scanned directory (or zip archive). Since
+    adding, removing, or renaming a file updates the mtime of its
+    directory, the cached result is reused as long as none of them have
+    changed.
+    """
+    exclude = frozenset(exclude)
+    package_dirs = {
+        root_package: _locate_package_dirs(root_package)
+        for root_package in sorted(set(root_packages))}
+    cache_key = repr((
+        SCAN_CACHE_FORMAT_VERSION,
+        package_dirs,
+        sorted(exclude),
+        namespace_packages))
+
+    if cache_path is not None:
+        cached_module_names = _load_scan_cache(cache_path, cache_key)
+        if cached_module_names is not None:
+            return cached_module_names
+
+    module_names: set[str] = set()
+    dir_mtimes: dict[str, int] = {}
+    for root_package, root_dirs in package_dirs.items():
+        module_names.add(root_package)
+        module_names.update(_scan_package_dirs(
+            root_package,
+            root_dirs,
+            exclude=exclude,
+            namespace_packages=namespace_packages,
+            dir_mtimes=dir_mtimes))
+
+    if cache_path is not None:
+        _store_scan_cache(cache_path, cache_key, module_names, dir_mtimes)
+
+    return frozenset(module_names)
+
+
+def _locate_package_dirs(package_name: str) -> list[str]:
+    """Finds the source directories of the passed package, without
+    importing it (or any of its parents). Raises ``ModuleNotFoundError``
+    if it isn't a package on ``sys.path``.
+    """
+    search_locations: list[str] | None = None
+    name_parts = package_name.split('.')
+    for index in range(len(name_parts)):
+        partial_name = '.'.join(name_parts[:index + 1])
+        # Note that this bypasses sys.meta_path entirely -- including our
+        # own import hook
+        spec = PathFinder.find_spec(partial_name, search_locations)
+        if spec is None or spec.submodule_search_locations is None:
+            raise ModuleNotFoundError(
+                f'Firstparty package {partial_name} not found on sys.path',
+                name=partial_name)
+
+        search_locations = list(spec.submodule_search_locations)
+
+    # Split always returns at least one part, so this is never actually empty
+    return search_locations or []
+
+
+def _scan_package_dirs(
+        package_name: str,
+        package_dirs: Iterable[str],
+        *,
+        exclude: frozenset[str],
+        namespace_packages: bool,
+        dir_mtimes: dict[str, int]
+        ) -> set[str]:
+    """Scans the passed package directories, returning the full names
+    of all of the submodules within them (recursively). The mtime of
+    every scanned directory is added to ``dir_mtimes``. Package
+    directories within zip archives are listed from the archive's
+    table of contents, and the mtime of the archive is recorded
+    instead.
+
+    This mirrors the precedence of the path-based finder: a regular
+    package shadows a module of the same name, which in turn shadows a
+    namespace package. Namespace portions are merged across all of the
+    package's directories.
+    """
+    contents = _PackageDirContents.from_package_dirs(
+        package_name,
+        package_dirs,
+        namespace_packages=namespace_packages,
+        dir_mtimes=dir_mtimes)
+    regular_packages = contents.regular_packages
+    plain_modules = contents.plain_modules
+
+    submodule_names: set[str] = set()
+    for name_rel, subpackage_dir in regular_packages.items():
+        subpackage_name = f'{package_name}.{name_rel}'
+        if _is_excluded(subpackage_name, exclude):
+            continue
+
+        submodule_names.add(subpackage_name)
+        submodule_names.update(_scan_package_dirs(
+            subpackage_name,
+            [subpackage_dir],
+            exclude=exclude,
+            namespace_packages=namespace_packages,
+            dir_mtimes=dir_mtimes))
+
+    for name_rel in plain_modules - regular_packages.keys():
+        submodule_name = f'{package_name}.{name_rel}'
+        if not _is_excluded(submodule_name, exclude):
+            submodule_names.add(submodule_name)
+
+    for name_rel, subpackage_dirs in contents.iter_namespace_dirs():
+        subpackage_name = f'{package_name}.{name_rel}'
+        if _is_excluded(subpackage_name, exclude):
+            continue
+
+        namespace_submodule_names = _scan_package_dirs(
+            subpackage_name,
+            subpackage_dirs,
+            exclude=exclude,
+            namespace_packages=namespace_packages,
+            dir_mtimes=dir_mtimes)
+        # Otherwise, every single data directory (not to mention things
+        # like ``__pycache__``) would become a namespace package
+        if namespace_submodule_names:
+            submodule_names.add(subpackage_name)
+            submodule_names.update(namespace_submodule_names)
+
+    return submodule_names
+
+
+@dataclass(slots=True)
+class _PackageDirContents:
+    """Collects the (classified) entries of all of the directories of
+    a single package, for ``_scan_package_dirs``.
+    """
+    regular_packages: dict[str, str] = field(default_factory=dict)
+    namespace_dirs: dict[str, list[str]] = field(default_factory=dict)
+    plain_modules: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_package_dirs(
+            cls,
+            package_name: str,
+            package_dirs: Iterable[str],
+            *,
+            namespace_packages: bool,
+            dir_mtimes: dict[str, int]
+            ) -> _PackageDirContents:
+        """Lists and classifies the entries of all of the passed
+        package directories, adding their mtimes to ``dir_mtimes``.
+        Directories that can't be listed are skipped (with a warning).
+        """
+        contents = cls()
+        for package_dir in package_dirs:
+            try:
+                dir_entries = _list_package_dir(package_dir, dir_mtimes)
+                for entry_name, entry_path, entry_is_dir in dir_entries:
+                    contents.add_entry(
+                        entry_name,
+                        entry_path,
+                        entry_is_dir,
+                        namespace_packages=namespace_packages)
+
+            except (OSError, zipfile.BadZipFile):
+                logger.warning(
+                    'Failed to scan %s for submodules of %s; skipping',
+                    package_dir, package_name, exc_info=True)
+
+        return contents
+
+    def add_entry(
+            self,
+            entry_name: str,
+            entry_path: str,
+            entry_is_dir: bool,
+            *,
+            namespace_packages: bool
+            ) -> None:
+        """Classifies a single directory entry as a regular package,
+        namespace package portion, or plain module, ignoring anything
+        that can't be imported as a submodule.
+        """
+        if entry_is_dir:
+            if not entry_name.isidentifier():
+                return
+            if _has_init(entry_path):
+                self.regular_packages.setdefault(entry_name, entry_path)
+            elif namespace_packages:
+                self.namespace_dirs.setdefault(
+                    entry_name, []).append(entry_path)
+
+        else:
+            module_name = inspect.getmodulename(entry_name)
+            if (
+                module_name is not None
+                and module_name != '__init__'
+                and module_name.isidentifier()
+            ):
+                self.plain_modules.add(module_name)
+
+    def iter_namespace_dirs(self) -> Iterator[tuple[str, list[str]]]:
+        """Iterates over the namespace package portions that aren't
+        shadowed by a regular package or plain module of the same name.
+        """
+        for name_rel, subpackage_dirs in self.namespace_dirs.items():
+            if (
+                name_rel not in self.regular_packages
+                and name_rel not in self.plain_modules
+            ):
+                yield name_rel, subpackage_dirs
+
+
+def _list_package_dir(
+        package_dir: str,
+        dir_mtimes: dict[str, int] | None = None
+        ) -> list[tuple[str, str, bool]]:
+    """Lists the ``(name, path, is_dir)`` of every entry within the
+    passed package directory, which can be either an ordinary directory
+    or a directory within a zip archive. If ``dir_mtimes`` is passed,
+    the mtime of the directory (or archive) is added to it.
+    """
+    archive_location = _find_archive(package_dir)
+    if archive_location is None:
+        if dir_mtimes is not None:
+            dir_mtimes[package_dir] = os.stat(package_dir).st_mtime_ns
+        with os.scandir(package_dir) as dir_entries:
+            return [
+                (dir_entry.name, dir_entry.path, dir_entry.is_dir())
+                for dir_entry in dir_entries]
+
+    archive_path, prefix = archive_location
+    if dir_mtimes is not None:
+        dir_mtimes[archive_path] = os.stat(archive_path).st_mtime_ns
+    # Zip archives don't necessarily have explicit entries for their
+    # directories, so we need to infer them from the member names.
+    entries: dict[str, bool] = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for member_name in archive.namelist():
+            if member_name.startswith(prefix):
+                entry_name, separator, _ = member_name[
+                    len(prefix):].partition('/')
+                if entry_name:
+                    entries[entry_name] = (
+                        entries.get(entry_name, False) or bool(separator))
+
+    return [
+        (entry_name, os.path.join(package_dir, entry_name), entry_is_dir)
+        for entry_name, entry_is_dir in entries.items()]
+
+
+def _find_archive(package_dir: str) -> tuple[str, str] | None:
+    """If the passed package directory is within a zip archive (as
+    is the case for packages imported via ``zipimport``), returns the
+    path to the archive, and the prefix of the directory's members
+    within it. Otherwise, returns None.
+    """
+    package_path = Path(package_dir)
+    for parent_path in package_path.parents:
+        if parent_path.is_dir():
+            return None
+        if parent_path.is_file():
+            if not zipfile.is_zipfile(parent_path):
+                return None
+
+            return (
+                str(parent_path),
+                f'{package_path.relative_to(parent_path).as_posix()}/')
+
+    return None
+
+
+def _has_init(package_dir: str) -> bool:
+    try:
+        return any(
+            inspect.getmodulename(entry_name) == '__init__'
+            for entry_name, _, entry_is_dir in _list_package_dir(package_dir)
+            if not entry_is_dir)
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def _is_excluded(module_name: str, exclude: frozenset[str]) -> bool:
+    return any(fnmatchcase(module_name, pattern) for pattern in exclude)
+
+
+def _load_scan_cache(
+        cache_path: Path,
+        cache_key: str
+        ) -> frozenset[str] | None:
+    """Loads the cached module names, as long as the cache matches the
+    passed key and none of the scanned directories have changed since
+    it was stored. Otherwise, returns None.
+    """
+    cached = _load_json_cache(cache_path, 'module scan')
+    if cached is None or cached.get('key') != cache_key:
+        logger.debug('Module scan cache miss')
+        return None
+
+    for scanned_dir, mtime_ns in cached['dir_mtimes'].items():
+        try:
+            if os.stat(scanned_dir).st_mtime_ns != mtime_ns:
+                logger.debug('Module scan cache stale: %s', scanned_dir)
+                return None
+        except OSError:
+            return None
+
+    logger.debug('Module scan cache hit')
+    return frozenset(cached['module_names'])
+
+
+def _store_scan_cache(
+        cache_path: Path,
+        cache_key: str,
+        module_names: Iterable[str],
+        dir_mtimes: dict[str, int]
+        ) -> None:
+    _store_json_cache(
+        cache_path,
+        {
+            'key': cache_key,
+            'module_names': sorted(module_names),
+            'dir_mtimes': dir_mtimes},
+        'module scan')
+
+
+def _load_json_cache(
+        cache_path: Path,
+        description: str
+        ) -> dict[str, Any] | None:
+    """Loads a JSON cache file, returning None if it doesn't exist or
+    can't be read.
+    """
+    try:
+        cached = json.loads(cache_path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning(
+            'Failed to read %s cache; ignoring.', description, exc_info=True)
+        return None
+
+    if not isinstance(cached, dict):
+        return None
+    return cached
+
+
+def _store_json_cache(
+        cache_path: Path,
+        data: dict[str, Any],
+        description: str
+        ) -> None:
+    """Atomically stores a JSON cache file. As with the other caches,
+    failures are logged, but otherwise ignored.
+    """
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tempfile_path = tempfile.mkstemp(
+            dir=cache_path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tempfile_obj:
+                json.dump(data, tempfile_obj)
+            os.replace(tempfile_path, cache_path)
+        except BaseException:
+            Path(tempfile_path).unlink(missing_ok=True)
+            raise
+
+    except OSError:
+        logger.warning(
+            'Failed to store %s cache.', description, exc_info=True)
+
+
 def eager_import_submodules(
         module: ModuleType,
         *,
@@ -108,30 +589,291 @@ def eager_import_submodules(
 
 
 def find_special_reftypes(
-        modules: Iterable[ModuleType]
+        modules: Iterable[ModuleType],
+        *,
+        prescan: bool = True,
+        cache_path: Path | None = None
         ) -> dict[Crossref, ReftypeMarker]:
-    """Exhaustively inspects modules (via getattr traversals) for any
-    marked special reftypes.
+    """Inspects modules (via getattr traversals) for any marked special
+    reftypes.
+
+    Special reftypes are always classes or functions with an attached
+    docnote config, and configs can only be attached to them by calling
+    something: either as a decorator, or directly (for example,
+    ``Meta = docnote(config)(_Meta)``). If ``prescan`` is true, we use
+    that to our advantage: the module source is parsed first, and only
+    the toplevel objects with (potentially docnote) decorators, or that
+    are assigned to from a call, are inspected. Modules without any are
+    skipped entirely, and modules where we can't tell which objects a
+    call might mark (for example, a bare call statement) are inspected
+    exhaustively.
 
-    Note that this relies upon the fact that special reftypes **must**
-    be declared via decorator (since that's the only way to attach
-    configs to classes and functions, which are the only things that
-    can become special reftypes).
+    If ``cache_path`` is passed, the results for each module are cached
+    there, keyed by the module's source (along with that of its parents
+    and firstparty imports, since a decorator config might be defined
+    elsewhere). All of the passed modules are considered firstparty.
     """
+    modules_by_name = {module.__name__: module for module in modules}
+    fingerprints: dict[str, str] = {}
+    cached_entries: dict[str, Any] = {}
+    if cache_path is not None:
+        salt_hasher = hashlib.sha256(
+            f'{SPECIAL_REFTYPE_CACHE_FORMAT_VERSION}\n{prescan}\n'.encode())
+        _update_with_environment(salt_hasher)
+        fingerprints = fingerprint_module_sources(
+            modules_by_name, salt=salt_hasher.hexdigest())
+        cached = _load_json_cache(cache_path, 'special reftype')
+        if cached is not None:
+            cached_entries = cached.get('modules', {})
+
+    retval: dict[Crossref, ReftypeMarker] = {}
+    entries_to_store: dict[str, Any] = {}
+    for module_name, module in modules_by_name.items():
+        fingerprint = fingerprints.get(module_name)
+        cached_entry = cached_entries.get(module_name)
+        if (
+            fingerprint is not None
+            and cached_entry is not None
+            and cached_entry['fingerprint'] == fingerprint
+        ):
+            logger.debug('Special reftype cache hit for %s', module_name)
+            module_markers = _decode_special_reftypes(
+                module_name, cached_entry['markers'])
+        else:
+            module_markers = _find_module_special_reftypes(
+                module, prescan=prescan)
+
+        retval.update(module_markers)
+        if fingerprint is not None:
+            entries_to_store[module_name] = {
+                'fingerprint': fingerprint,
+                'markers': _encode_special_reftypes(module_markers)}
+
+    if cache_path is not None and entries_to_store != cached_entries:
+        _store_json_cache(
+            cache_path, {'modules': entries_to_store}, 'special reftype')
+
+    return retval
+
+
+def _find_module_special_reftypes(
+        module: ModuleType,
+        *,
+        prescan: bool
+        ) -> dict[Crossref, ReftypeMarker]:
+    module_name = module.__name__
+    # Note: we compare by object identity and not by name, so that we still
+    # find special reftypes under any aliases they might have within the
+    # module
+    candidate_ids: set[int] | None = None
+    if prescan:
+        source = get_module_source(module)
+        if source is not None:
+            candidate_names = _prescan_special_reftype_candidates(source)
+            if candidate_names is not None:
+                candidate_ids = {
+                    id(module.__dict__[name]) for name in candidate_names
+                    if name in module.__dict__}
+
     retval: dict[Crossref, ReftypeMarker] = {}
-    for module in modules:
-        module_name = module.__name__
-        for name, obj in module.__dict__.items():
-            toplevel_crossref = Crossref(
-                module_name=module_name,
-                toplevel_name=name,
-                traversals=())
-            _find_special_reftypes_recursive(
-                module_name, obj, toplevel_crossref, retval)
+    for name, obj in module.__dict__.items():
+        if candidate_ids is not None and id(obj) not in candidate_ids:
+            continue
+
+        toplevel_crossref = Crossref(
+            module_name=module_name,
+            toplevel_name=name,
+            traversals=())
+        _find_special_reftypes_recursive(
+            module_name, obj, toplevel_crossref, retval)
 
     return retval
 
 
+def _prescan_special_reftype_candidates(source: str) -> set[str] | None:
+    """Statically finds the names of all toplevel classes and functions
+    that have (or contain a class or function that has) a non-inert
+    decorator, as well as all toplevel names that are assigned to from
+    a call. Returns None if the whole module needs to be inspected,
+    because we can't statically determine where a decorated object
+    will end up (for example, if the source can't be parsed, if there
+    are decorated classes within function bodies, or if there are
+    calls whose results aren't assigned to a name).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    prescanner = _SpecialReftypePrescanner()
+    prescanner.visit(tree)
+    if prescanner.inspect_everything:
+        return None
+    return prescanner.candidate_names
+
+
+class _SpecialReftypePrescanner(ast.NodeVisitor):
+
+    def __init__(self):
+        self.candidate_names: set[str] = set()
+        self.inspect_everything = False
+        self._toplevel_name: str | None = None
+        self._function_depth = 0
+        self._loop_depth = 0
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self._visit_def(node, is_function=False)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self._visit_def(node, is_function=True)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        self._visit_def(node, is_function=True)
+
+    def visit_For(self, node: ast.For):
+        self._visit_loop(node)
+
+    def visit_AsyncFor(self, node: ast.AsyncFor):
+        self._visit_loop(node)
+
+    def visit_While(self, node: ast.While):
+        self._visit_loop(node)
+
+    def visit_Assign(self, node: ast.Assign):
+        self._visit_assignment(node, node.targets, node.value)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign):
+        self._visit_assignment(node, [node.target], node.value)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        self._visit_assignment(node, [node.target], node.value)
+
+    def visit_Expr(self, node: ast.Expr):
+        # We have no idea what a bare call might have marked (for example,
+        # ``docnote(config)(SomeClass)``), so everything is a candidate.
+        if not self._function_depth and _contains_call(node.value):
+            self.inspect_everything = True
+        self.generic_visit(node)
+
+    def _visit_loop(self, node: ast.For | ast.AsyncFor | ast.While):
+        self._loop_depth += 1
+        try:
+            self.generic_visit(node)
+        finally:
+            self._loop_depth -= 1
+
+    def _visit_assignment(
+            self,
+            node: ast.Assign | ast.AnnAssign | ast.AugAssign,
+            targets: list[ast.expr],
+            value: ast.expr | None):
+        if (
+            not self._function_depth
+            and value is not None
+            and _contains_call(value)
+        ):
+            # Within loops and comprehensions, the call might mark objects
+            # that aren't (or are no longer) bound to the target names.
+            if self._loop_depth or _contains_comprehension(value):
+                self.inspect_everything = True
+            elif self._toplevel_name is not None:
+                self.candidate_names.add(self._toplevel_name)
+            else:
+                self.candidate_names.update(
+                    child.id
+                    for target in targets
+                    for child in ast.walk(target)
+                    if isinstance(child, ast.Name))
+
+        self.generic_visit(node)
+
+    def _visit_def(
+            self,
+            node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef,
+            *,
+            is_function: bool):
+        if not all(map(_is_inert_decorator, node.decorator_list)):
+            if self._function_depth:
+                self.inspect_everything = True
+            else:
+                self.candidate_names.add(self._toplevel_name or node.name)
+
+        outer_toplevel_name = self._toplevel_name
+        if outer_toplevel_name is None:
+            self._toplevel_name = node.name
+        if is_function:
+            self._function_depth += 1
+        try:
+            self.generic_visit(node)
+        finally:
+            self._toplevel_name = outer_toplevel_name
+            if is_function:
+                self._function_depth -= 1
+
+
+def _contains_call(node: ast.expr) -> bool:
+    return any(isinstance(child, ast.Call) for child in ast.walk(node))
+
+
+def _contains_comprehension(node: ast.expr) -> bool:
+    return any(
+        isinstance(
+            child,
+            ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp)
+        for child in ast.walk(node))
+
+
+def _is_inert_decorator(decorator: ast.expr) -> bool:
+    if (
+        isinstance(decorator, ast.Attribute)
+        and decorator.attr in _INERT_DECORATOR_ATTRS
+    ):
+        return True
+
+    return _get_dotted_name(decorator) in _INERT_DECORATORS
+
+
+def _get_dotted_name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        parent_name = _get_dotted_name(node.value)
+        if parent_name is not None:
+            return f'{parent_name}.{node.attr}'
+    return None
+
+
+def _encode_special_reftypes(
+        markers: dict[Crossref, ReftypeMarker]
+        ) -> list[list[Any]]:
+    """Converts the markers for a single module into JSON-compatible
+    primitives. These are always found via getattr traversals from a
+    toplevel name, so that's all we need to store.
+    """
+    return [
+        [
+            crossref.toplevel_name,
+            [
+                cast(GetattrTraversal, traversal).name
+                for traversal in crossref.traversals],
+            marker.name]
+        for crossref, marker in markers.items()]
+
+
+def _decode_special_reftypes(
+        module_name: str,
+        encoded_markers: list[list[Any]]
+        ) -> dict[Crossref, ReftypeMarker]:
+    return {
+        Crossref(
+            module_name=module_name,
+            toplevel_name=toplevel_name,
+            traversals=tuple(
+                GetattrTraversal(attr_name) for attr_name in attr_names)):
+        ReftypeMarker[marker_name]
+        for toplevel_name, attr_names, marker_name in encoded_markers}
+
+
 def _find_special_reftypes_recursive(
         module_name: str,
         obj: object,
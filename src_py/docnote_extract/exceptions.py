@@ -17,3 +17,11 @@ class UnknownCrossrefTarget(LookupError):
     instance with a correct firstparty package, but where the actual
     target of the crossref is unknown.
     """
+
+
+class ExtractionWorkerError(Exception):
+    """Raised by ``gather`` if one of its workers fails (for example,
+    when using ``jobs`` or ``isolation``). If the worker was able to
+    report the failure, the exception args include the name of the
+    module it was working on (if any) and its formatted traceback.
+    """
@@ -29,25 +29,10 @@ def filter_module_summaries(
 
     Note that this operates in-place.
     """
-    if _forced_inclusion is None:
-        effective_config = configured_tree_node.effective_config
-
-        if (
-            effective_config.include_in_docs is False
-            or (
-                _conventionally_private(summary_tree_node.relname)
-                and not effective_config.include_in_docs)
-        ):
-            is_included = False
-            inclusion_to_force = False
-
-        else:
-            is_included = True
-            inclusion_to_force = None
-
-    else:
-        inclusion_to_force = _forced_inclusion
-        is_included = _forced_inclusion
+    is_included, inclusion_to_force = _get_module_inclusion(
+        summary_tree_node.relname,
+        configured_tree_node,
+        _forced_inclusion)
 
     if is_included:
         # Doing it this way to bypass the frozen-ness
@@ -65,6 +50,52 @@ def filter_module_summaries(
             _forced_inclusion=inclusion_to_force)
 
 
+def is_module_included(
+        configured_tree: ConfiguredModuleTreeNode,
+        module_name: str
+        ) -> bool:
+    """Determines the ``to_document`` value that
+    ``filter_module_summaries`` would assign to the passed module,
+    without needing the rest of the summary tree. The configured tree
+    must be the root node of the module's package.
+    """
+    configured_tree_node = configured_tree
+    is_included, inclusion_to_force = _get_module_inclusion(
+        configured_tree_node.relname, configured_tree_node, None)
+
+    _, *child_relnames = module_name.split('.')
+    for relname in child_relnames:
+        configured_tree_node = configured_tree_node / relname
+        is_included, inclusion_to_force = _get_module_inclusion(
+            relname, configured_tree_node, inclusion_to_force)
+
+    return is_included
+
+
+def _get_module_inclusion(
+        relname: str,
+        configured_tree_node: ConfiguredModuleTreeNode,
+        forced_inclusion: bool | None
+        ) -> tuple[bool, bool | None]:
+    """Returns a tuple of (is_included, inclusion_to_force) for a single
+    module tree node, where the inclusion to force is passed on to its
+    children.
+    """
+    if forced_inclusion is not None:
+        return forced_inclusion, forced_inclusion
+
+    effective_config = configured_tree_node.effective_config
+    if (
+        effective_config.include_in_docs is False
+        or (
+            _conventionally_private(relname)
+            and not effective_config.include_in_docs)
+    ):
+        return False, False
+
+    return True, None
+
+
 def filter_canonical_ownership(
         module_summary: ModuleSummary,
         *,
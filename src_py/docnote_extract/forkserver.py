@@ -0,0 +1,148 @@
+"""A long-lived fork server for ``gather``. The server imports any
+expensive packages (typically, ``nostub_packages``) exactly once, and
+then serves ``gather`` requests over a local unix socket, forking a
+fresh worker for every request. Each worker inherits the preloaded
+packages via copy-on-write, so repeated gathers (for example, local
+docs builds, or editor previews) skip their import time entirely.
+
+Note that preloaded packages only help if the requests also declare
+them as ``nostub_packages``; otherwise, they're stashed away for the
+duration of the extraction, just like any other prehook module.
+
+The server can be started from the command line, via
+``python -m docnote_extract forkserver <socket_path>``, or
+programmatically via ``serve``. Requests are made via
+``gather_via_forkserver``. The workers use the same messages as the
+other ``gather`` workers; see ``docnote_extract._parallelism``.
+
+**Anybody who can connect to the socket can exec arbitrary code as the
+server's user!** The socket is therefore only accessible to that user,
+and should only ever be created within a trusted directory.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+from collections.abc import Iterable
+from multiprocessing.connection import Client
+from multiprocessing.connection import Connection
+from multiprocessing.connection import Listener
+from typing import Annotated
+from typing import Any
+from typing import NoReturn
+
+from docnote import Note
+
+from docnote_extract._gathering import Docnotes
+from docnote_extract._isolation import _gather_and_report
+from docnote_extract._isolation import _load_worker_payloads
+from docnote_extract._parallelism import _collect_payloads
+from docnote_extract._parallelism import _MessageKind
+from docnote_extract._parallelism import can_fork
+from docnote_extract._serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def serve(
+        socket_path: str | os.PathLike[str],
+        *,
+        preload_packages: Annotated[
+                Iterable[str],
+                Note('''These are imported (normally, without any import
+                    hook) before the server starts accepting requests.''')
+            ] = ()
+        ) -> None:
+    """Runs the fork server, listening on ``socket_path`` until
+    interrupted (for example, by a ``KeyboardInterrupt``). The socket
+    file is removed when the server stops.
+
+    This requires ``os.fork``.
+    """
+    if not can_fork():
+        raise RuntimeError('The fork server requires ``os.fork``!')
+
+    for package_name in preload_packages:
+        logger.info('Preloading %s', package_name)
+        importlib.import_module(package_name)
+
+    # Setting the umask (instead of a chmod after the fact) makes sure that
+    # the socket is never accessible to anybody else, not even briefly.
+    prev_umask = os.umask(0o077)
+    try:
+        listener = Listener(os.fspath(socket_path), family='AF_UNIX')
+    finally:
+        os.umask(prev_umask)
+
+    with listener:
+        logger.info('Fork server listening on %s', socket_path)
+        while True:
+            conn = listener.accept()
+            try:
+                pid = os.fork()
+                if pid == 0:
+                    _run_request_worker(conn)
+            finally:
+                conn.close()
+
+            logger.info('Forked request worker %s', pid)
+            _reap_request_workers()
+
+
+def gather_via_forkserver(
+        socket_path: str | os.PathLike[str],
+        firstparty_pkg_names: Iterable[str],
+        **gather_kwargs: Any
+        ) -> Docnotes:
+    """Sends a ``gather`` request to the fork server listening on
+    ``socket_path``, returning the resulting ``Docnotes``. The
+    ``gather_kwargs`` are passed on to ``gather`` within the worker,
+    and must therefore be picklable.
+
+    Raises ``ExtractionWorkerError`` if the request fails within the
+    worker.
+    """
+    with Client(os.fspath(socket_path), family='AF_UNIX') as conn:
+        conn.send_bytes(dumps((tuple(firstparty_pkg_names), gather_kwargs)))
+        worker_pid = conn.recv()
+        payloads = _collect_payloads(
+            {conn: worker_pid}, _MessageKind.SUMMARIES)
+
+    return _load_worker_payloads(payloads)
+
+
+def _run_request_worker(conn: Connection) -> NoReturn:
+    """This is the entrypoint for the forked request workers. As with
+    the ``jobs`` workers, it always exits via ``os._exit``. Note that
+    we deliberately don't close the (inherited) listener: that would
+    remove the socket file out from under the server.
+    """
+    exit_code = 1
+    try:
+        conn.send(os.getpid())
+        _gather_and_report(conn, conn.recv_bytes())
+        exit_code = 0
+
+    except BaseException:
+        logger.exception('Fork server request worker failed')
+
+    finally:
+        conn.close()
+        os._exit(exit_code)
+
+
+def _reap_request_workers() -> None:
+    """Reaps any request workers that have already exited, without
+    blocking on any that are still running.
+    """
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+
+        if pid == 0:
+            return
+
+        logger.debug('Reaped request worker %s', pid)
@@ -0,0 +1,114 @@
+"""Import graph capture for ``gather(..., collect_import_graph=True)``.
+When enabled, ``Docnotes.import_graph`` will contain an ``ImportGraph``
+with every import that was executed while re-execing the firstparty
+modules for inspection, including the imports made by any nostub
+modules they (transitively) pulled in.
+
+As with ``docnote_extract.stats``, collection is activated via a
+context variable; when it isn't active, the recording helpers here are
+no-ops.
+"""
+from __future__ import annotations
+
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
+from typing import Any
+
+_ACTIVE_IMPORT_GRAPH: ContextVar[ImportGraph] = ContextVar(
+    '_ACTIVE_IMPORT_GRAPH')
+
+
+class ImportStrategy(Enum):
+    """How the import hook handled the imported module during
+    extraction.
+    """
+    # The module was replaced by a stub. This is always the case for
+    # thirdparty packages not declared as ``nostub_packages``, and for
+    # firstparty modules not declared as ``nostub_firstparty_modules``.
+    STUB = 'stub'
+    # The module was real, but wrapped in a tracking proxy.
+    TRACK = 'track'
+    # The import hook didn't touch the module at all (for example,
+    # stdlib modules).
+    UNHOOKED = 'unhooked'
+
+
+@dataclass(slots=True, frozen=True)
+class ImportEdge:
+    """A single, directed import edge. Note that ``importer`` is the
+    module whose code actually contained the import statement, which is
+    not necessarily the module under inspection: for example, it might
+    be a nostub package that the inspected module imported.
+    """
+    importer: str
+    imported: str
+    stub_strategy: ImportStrategy
+    # The firstparty module that was being extracted when the import
+    # happened.
+    inspected_module: str
+
+
+@dataclass(slots=True)
+class ImportGraph:
+    """The collected import edges for a single ``gather``. Use
+    ``as_dict`` to convert it into JSON-compatible primitives.
+
+    Modules loaded from the ``cache_dir`` aren't re-execed, so they
+    don't contribute any edges.
+    """
+    edges: set[ImportEdge] = field(default_factory=set)
+
+    def imports_of(self, module_name: str) -> frozenset[ImportEdge]:
+        """Returns all of the edges where ``module_name`` was the
+        importer.
+        """
+        return frozenset(
+            edge for edge in self.edges if edge.importer == module_name)
+
+    def importers_of(self, module_name: str) -> frozenset[str]:
+        """Returns the names of all of the modules that imported
+        ``module_name``.
+        """
+        return frozenset(
+            edge.importer for edge in self.edges
+            if edge.imported == module_name)
+
+    def merge(self, other: ImportGraph) -> None:
+        """Adds all of the edges from ``other`` into the current graph.
+        We use this to combine graphs from worker processes into the
+        ``gather`` graph.
+        """
+        self.edges.update(other.edges)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'edges': [
+                {
+                    'importer': edge.importer,
+                    'imported': edge.imported,
+                    'stub_strategy': edge.stub_strategy.value,
+                    'inspected_module': edge.inspected_module}
+                for edge in sorted(
+                    self.edges,
+                    key=lambda edge: (
+                        edge.inspected_module, edge.importer, edge.imported))
+            ]}
+
+
+@contextmanager
+def _activate_import_graph(
+        import_graph: ImportGraph
+        ) -> Generator[ImportGraph, None, None]:
+    ctx_token = _ACTIVE_IMPORT_GRAPH.set(import_graph)
+    try:
+        yield import_graph
+    finally:
+        _ACTIVE_IMPORT_GRAPH.reset(ctx_token)
+
+
+def _get_active_import_graph() -> ImportGraph | None:
+    return _ACTIVE_IMPORT_GRAPH.get(None)
@@ -0,0 +1,283 @@
+"""Memory accounting for ``gather(..., collect_memory=True)``. When
+enabled, ``Docnotes.memory`` will contain a ``MemoryReport`` with:
+++  a checkpoint at each extraction phase boundary, and after
+    summarization and filtering. Each checkpoint has the currently
+    traced bytes, the traced peak since the previous checkpoint, the
+    peak RSS of the process (where available), and the top allocation
+    sites
+++  the net traced bytes allocated within each ``GatherPhase``. Since
+    normalization, summarization, and filtering are interleaved on a
+    per-module basis, this is the only way to tell them apart
+++  the approximate bytes retained by the module stashes, the summary
+    trees, and the ``crossref_namespace`` mappings of their metadata
+
+This uses ``tracemalloc``, which is started (with a single frame per
+traceback) if it isn't already tracing; if you want deeper tracebacks,
+start it yourself before calling ``gather``. Either way, expect
+``gather`` to be substantially slower (and, ironically, to use more
+memory) while collecting.
+
+As with ``docnote_extract.stats``, collection is activated via a
+context variable; when it isn't active, the recording helpers here are
+no-ops.
+
+Note that ``tracemalloc`` is only imported once memory accounting is
+actually requested. Its C extension can't be loaded within
+subinterpreters, and this module is imported unconditionally, so
+importing it at the module level would break subinterpreter isolation
+entirely (even when memory accounting is disabled).
+"""
+from __future__ import annotations
+
+import gc
+import os
+import sys
+from collections.abc import Generator
+from collections.abc import Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from types import ModuleType
+from typing import TYPE_CHECKING
+from typing import Any
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if TYPE_CHECKING:
+    from docnote_extract.stats import GatherPhase
+
+_ACTIVE_MEMORY_REPORT: ContextVar[MemoryReport] = ContextVar(
+    '_ACTIVE_MEMORY_REPORT')
+# How many allocation sites to keep for each checkpoint
+_TOP_SITE_COUNT = 10
+
+
+@dataclass(slots=True, frozen=True)
+class AllocationSite:
+    """The traced memory allocated by a single source line, as of a
+    particular checkpoint.
+    """
+    filename: str
+    lineno: int
+    size_bytes: int
+    count: int
+
+
+@dataclass(slots=True, frozen=True)
+class MemoryCheckpoint:
+    label: str
+    # When using ``jobs``, the checkpoints from worker processes are
+    # included in the report; this tells them apart.
+    pid: int
+    traced_bytes: int
+    # Note: this is the peak since the previous checkpoint, not the
+    # overall peak.
+    traced_peak_bytes: int
+    # None if the platform doesn't support the ``resource`` module
+    peak_rss_bytes: int | None
+    top_sites: tuple[AllocationSite, ...]
+
+
+@dataclass(slots=True)
+class MemoryReport:
+    """The collected memory accounting for a single ``gather``. Use
+    ``format_report`` for a quick overview, or ``as_dict`` to convert it
+    into JSON-compatible primitives.
+    """
+    checkpoints: list[MemoryCheckpoint] = field(default_factory=list)
+    phase_net_bytes: dict[GatherPhase, int] = field(default_factory=dict)
+    # Keyed by the name of the structure (for example,
+    # ``'module_stash_stubbed'``). Note that these can overlap; for
+    # example, the summaries include their crossref namespaces.
+    retained_bytes: dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: MemoryReport) -> None:
+        """Adds all of the checkpoints and sizes from ``other`` into the
+        current report. We use this to combine reports from worker
+        processes into the ``gather`` report.
+        """
+        self.checkpoints.extend(other.checkpoints)
+        for phase, net_bytes in other.phase_net_bytes.items():
+            self.phase_net_bytes[phase] = (
+                self.phase_net_bytes.get(phase, 0) + net_bytes)
+        for name, size_bytes in other.retained_bytes.items():
+            self.retained_bytes[name] = (
+                self.retained_bytes.get(name, 0) + size_bytes)
+
+    def format_report(self) -> str:
+        """Formats the report as plaintext, suitable for logging or
+        printing.
+        """
+        lines = ['Checkpoints (MiB):']
+        for checkpoint in self.checkpoints:
+            peak_rss = (
+                '?' if checkpoint.peak_rss_bytes is None
+                else f'{_to_mib(checkpoint.peak_rss_bytes):.1f}')
+            lines.append(
+                f'  {checkpoint.label} (pid {checkpoint.pid}): '
+                + f'traced {_to_mib(checkpoint.traced_bytes):.1f}, '
+                + f'traced peak {_to_mib(checkpoint.traced_peak_bytes):.1f}, '
+                + f'peak RSS {peak_rss}')
+            lines.extend(
+                f'    {_to_mib(site.size_bytes):>8.2f} '
+                + f'{site.filename}:{site.lineno}'
+                for site in checkpoint.top_sites)
+
+        lines.append('Net traced bytes per phase (MiB):')
+        lines.extend(
+            f'  {phase.value}: {_to_mib(net_bytes):.1f}'
+            for phase, net_bytes in self.phase_net_bytes.items())
+        lines.append('Retained bytes (MiB):')
+        lines.extend(
+            f'  {name}: {_to_mib(size_bytes):.1f}'
+            for name, size_bytes in self.retained_bytes.items())
+        return '\n'.join(lines)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'checkpoints': [
+                {
+                    'label': checkpoint.label,
+                    'pid': checkpoint.pid,
+                    'traced_bytes': checkpoint.traced_bytes,
+                    'traced_peak_bytes': checkpoint.traced_peak_bytes,
+                    'peak_rss_bytes': checkpoint.peak_rss_bytes,
+                    'top_sites': [
+                        {
+                            'filename': site.filename,
+                            'lineno': site.lineno,
+                            'size_bytes': site.size_bytes,
+                            'count': site.count}
+                        for site in checkpoint.top_sites]}
+                for checkpoint in self.checkpoints],
+            'phase_net_bytes': {
+                phase.value: net_bytes
+                for phase, net_bytes in self.phase_net_bytes.items()},
+            'retained_bytes': dict(self.retained_bytes)}
+
+
+def _to_mib(size_bytes: int) -> float:
+    return size_bytes / (1024 * 1024)
+
+
+@contextmanager
+def _activate_memory_report(
+        report: MemoryReport
+        ) -> Generator[MemoryReport, None, None]:
+    # See note in the module docstring
+    import tracemalloc  # noqa: PLC0415
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    ctx_token = _ACTIVE_MEMORY_REPORT.set(report)
+    try:
+        yield report
+    finally:
+        _ACTIVE_MEMORY_REPORT.reset(ctx_token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _get_active_memory_report() -> MemoryReport | None:
+    return _ACTIVE_MEMORY_REPORT.get(None)
+
+
+def _get_traced_bytes() -> int:
+    """Only call this while a memory report is active."""
+    # See note in the module docstring
+    import tracemalloc  # noqa: PLC0415
+
+    current_bytes, _ = tracemalloc.get_traced_memory()
+    return current_bytes
+
+
+def _get_peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Yes, really: macOS reports this in bytes, but linux in kibibytes.
+    if sys.platform == 'darwin':
+        return max_rss
+    else:
+        return max_rss * 1024
+
+
+def _take_memory_checkpoint(label: str) -> None:
+    report = _ACTIVE_MEMORY_REPORT.get(None)
+    if report is None:
+        return
+
+    # See note in the module docstring
+    import tracemalloc  # noqa: PLC0415
+
+    traced_bytes, traced_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<unknown>')))
+    top_sites: list[AllocationSite] = []
+    for statistic in snapshot.statistics('lineno')[:_TOP_SITE_COUNT]:
+        frame = statistic.traceback[0]
+        top_sites.append(AllocationSite(
+            filename=frame.filename,
+            lineno=frame.lineno,
+            size_bytes=statistic.size,
+            count=statistic.count))
+
+    report.checkpoints.append(MemoryCheckpoint(
+        label=label,
+        pid=os.getpid(),
+        traced_bytes=traced_bytes,
+        traced_peak_bytes=traced_peak_bytes,
+        peak_rss_bytes=_get_peak_rss_bytes(),
+        top_sites=tuple(top_sites)))
+
+
+def _record_retained_bytes(
+        name: str,
+        roots: Iterable[object],
+        *,
+        boundary_modules: Iterable[ModuleType] = ()
+        ) -> None:
+    """Records the (approximate) total size of everything reachable
+    from the passed roots. To keep this from measuring the entire
+    interpreter, we don't follow references into modules, nor into the
+    namespaces of any module in ``sys.modules`` or ``boundary_modules``
+    (unless they're one of the roots), nor into builtin types.
+    """
+    report = _ACTIVE_MEMORY_REPORT.get(None)
+    if report is None:
+        return
+
+    roots = list(roots)
+    seen_ids = {
+        id(module.__dict__)
+        for module in (*sys.modules.values(), *boundary_modules)
+        if isinstance(module, ModuleType)}
+    seen_ids.difference_update(id(root) for root in roots)
+
+    size_bytes = 0
+    pending = roots
+    while pending:
+        obj = pending.pop()
+        obj_id = id(obj)
+        if (
+            obj_id in seen_ids
+            or isinstance(obj, ModuleType)
+            or (isinstance(obj, type) and obj.__module__ == 'builtins')
+        ):
+            continue
+
+        seen_ids.add(obj_id)
+        size_bytes += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+
+    report.retained_bytes[name] = (
+        report.retained_bytes.get(name, 0) + size_bytes)
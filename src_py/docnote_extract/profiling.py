@@ -0,0 +1,201 @@
+"""Summarization profiling for
+``gather(..., collect_summary_profile=True)``. When enabled,
+``Docnotes.summary_profile`` will contain a ``SummaryProfile`` with the
+time spent summarizing each individual crossref: modules, namespace
+members (classes, callables, variables, etc), and signatures.
+
+Every entry has both an inclusive time (including the time spent on
+its children -- for example, the methods of a class) and an exclusive
+time (excluding it). Exclusive times are generally the more useful
+ones for finding hotspots: a class with hundreds of overloads will have
+a large inclusive time, but so will the module that contains it. Use
+``SummaryProfile.format_report`` for a quick top-N overview.
+
+Note that modules loaded from the ``cache_dir`` aren't summarized, so
+they won't show up in the profile. As with ``docnote_extract.stats``,
+profiling is activated via a context variable; when it isn't active,
+the recording helper here is a no-op.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Literal
+
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import GetattrTraversal
+
+_ACTIVE_PROFILE: ContextVar[SummaryProfile] = ContextVar('_ACTIVE_PROFILE')
+
+
+@dataclass(slots=True)
+class ProfileEntry:
+    """The accumulated profile of a single crossref. Both times are
+    in seconds of wall time.
+    """
+    crossref: Crossref
+    # The summary class name (for example, ``'ClassSummary'``)
+    summary_kind: str
+    call_count: int = 0
+    inclusive_seconds: float = 0
+    exclusive_seconds: float = 0
+
+    def merge(self, other: ProfileEntry) -> None:
+        self.call_count += other.call_count
+        self.inclusive_seconds += other.inclusive_seconds
+        self.exclusive_seconds += other.exclusive_seconds
+
+
+@dataclass(slots=True)
+class _ProfileFrame:
+    start: float
+    child_seconds: float = 0
+
+
+@dataclass(slots=True)
+class SummaryProfile:
+    """The collected summarization profile for a single ``gather``."""
+    entries: dict[Crossref, ProfileEntry] = field(default_factory=dict)
+
+    # The currently-running summaries, innermost last
+    _stack: list[_ProfileFrame] = field(
+        default_factory=list, repr=False, compare=False)
+
+    def top(
+            self,
+            n: int = 20,
+            *,
+            by: Literal['exclusive', 'inclusive'] = 'exclusive'
+            ) -> list[ProfileEntry]:
+        """Returns the ``n`` most expensive entries, sorted by their
+        exclusive or inclusive time (descending).
+        """
+        if by == 'exclusive':
+            return sorted(
+                self.entries.values(),
+                key=lambda entry: entry.exclusive_seconds,
+                reverse=True)[:n]
+        else:
+            return sorted(
+                self.entries.values(),
+                key=lambda entry: entry.inclusive_seconds,
+                reverse=True)[:n]
+
+    def format_report(
+            self,
+            n: int = 20,
+            *,
+            by: Literal['exclusive', 'inclusive'] = 'exclusive'
+            ) -> str:
+        """Formats the ``n`` most expensive entries as a plaintext
+        table, suitable for logging or printing.
+        """
+        lines = [
+            f'{"exclusive":>10} {"inclusive":>10} {"calls":>6}  '
+            + f'{"kind":<16} crossref']
+        for entry in self.top(n, by=by):
+            lines.append(
+                f'{entry.exclusive_seconds:>10.4f} '
+                + f'{entry.inclusive_seconds:>10.4f} '
+                + f'{entry.call_count:>6}  '
+                + f'{entry.summary_kind:<16} '
+                + _describe_crossref(entry.crossref))
+
+        return '\n'.join(lines)
+
+    def merge(self, other: SummaryProfile) -> None:
+        """Adds all of the entries from ``other`` into the current
+        profile. We use this to combine profiles from worker processes
+        into the ``gather`` profile.
+        """
+        for crossref, other_entry in other.entries.items():
+            entry = self.entries.get(crossref)
+            if entry is None:
+                entry = self.entries[crossref] = ProfileEntry(
+                    crossref=crossref,
+                    summary_kind=other_entry.summary_kind)
+            entry.merge(other_entry)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'entries': [
+                {
+                    'crossref': _describe_crossref(entry.crossref),
+                    'summary_kind': entry.summary_kind,
+                    'call_count': entry.call_count,
+                    'inclusive_seconds': entry.inclusive_seconds,
+                    'exclusive_seconds': entry.exclusive_seconds}
+                for entry in self.top(len(self.entries))]}
+
+
+def _describe_crossref(crossref: Crossref) -> str:
+    """Converts the crossref into a (human-readable, but lossy)
+    string, for example ``'foo.bar:Baz.qux'``.
+    """
+    parts = [crossref.module_name or '<unknown>']
+    if crossref.toplevel_name is not None:
+        parts.append(f':{crossref.toplevel_name}')
+    for traversal in crossref.traversals:
+        if isinstance(traversal, GetattrTraversal):
+            parts.append(f'.{traversal.name}')
+        else:
+            parts.append(f'[{traversal!r}]')
+
+    return ''.join(parts)
+
+
+@contextmanager
+def _activate_profile(
+        profile: SummaryProfile
+        ) -> Generator[SummaryProfile, None, None]:
+    ctx_token = _ACTIVE_PROFILE.set(profile)
+    try:
+        yield profile
+    finally:
+        _ACTIVE_PROFILE.reset(ctx_token)
+
+
+def _get_active_profile() -> SummaryProfile | None:
+    return _ACTIVE_PROFILE.get(None)
+
+
+@contextmanager
+def _profile_summary(
+        crossref: Crossref | None,
+        summary_kind: str
+        ) -> Generator[None, None, None]:
+    """Adds the time spent within the ``with`` block to the profile of
+    the passed crossref. Blocks are expected to nest: the inclusive
+    time of any block is subtracted from the exclusive time of the
+    block containing it.
+
+    Summaries without a crossref can't be profiled on their own; their
+    time simply counts towards the exclusive time of their parent.
+    """
+    profile = _ACTIVE_PROFILE.get(None)
+    if profile is None or crossref is None:
+        yield
+        return
+
+    frame = _ProfileFrame(start=time.perf_counter())
+    profile._stack.append(frame)
+    try:
+        yield
+    finally:
+        inclusive_seconds = time.perf_counter() - frame.start
+        profile._stack.pop()
+        if profile._stack:
+            profile._stack[-1].child_seconds += inclusive_seconds
+
+        entry = profile.entries.get(crossref)
+        if entry is None:
+            entry = profile.entries[crossref] = ProfileEntry(
+                crossref=crossref, summary_kind=summary_kind)
+        entry.call_count += 1
+        entry.inclusive_seconds += inclusive_seconds
+        entry.exclusive_seconds += inclusive_seconds - frame.child_seconds
@@ -0,0 +1,218 @@
+"""Instrumentation for ``gather(..., collect_stats=True)``. When stats
+collection is enabled, ``Docnotes.stats`` will contain a
+``GatherStats`` instance describing where the time went, and how much
+work was done.
+
+Note that collection is activated via a context variable, so that we
+don't need to thread the stats object through every layer of the
+extraction machinery. When it isn't active, all of the recording
+helpers here are no-ops.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Generator
+from collections.abc import Hashable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
+from typing import Any
+
+from docnote_extract.memory import _get_active_memory_report
+from docnote_extract.memory import _get_traced_bytes
+
+_ACTIVE_STATS: ContextVar[GatherStats] = ContextVar('_ACTIVE_STATS')
+# The keys of the (interned) reftype classes already counted towards the
+# active stats; see ``_count_crossreffed_class``
+_COUNTED_CROSSREFFED_KEYS: ContextVar[set[Hashable]] = ContextVar(
+    '_COUNTED_CROSSREFFED_KEYS')
+
+
+class GatherPhase(Enum):
+    """The individual phases of a ``gather``, in (roughly) the order
+    they happen. Note that normalization, summarization, and filtering
+    happen on a per-module basis, interleaved with one another; their
+    timings are the totals across all modules.
+    """
+    STASH_PREHOOK = 'stash_prehook'
+    EXPLORATION = 'exploration'
+    PREPARATION = 'preparation'
+    EXTRACTION = 'extraction'
+    TEARDOWN = 'teardown'
+    CACHE = 'cache'
+    NORMALIZATION = 'normalization'
+    SUMMARIZATION = 'summarization'
+    FILTERING = 'filtering'
+
+
+@dataclass(slots=True)
+class PhaseTiming:
+    """Wall and CPU time, both in seconds. When using ``jobs``, any
+    work done within worker processes is summed across all of the
+    workers, so (by design!) these can exceed the total wall time of
+    the ``gather``.
+    """
+    wall_seconds: float = 0
+    cpu_seconds: float = 0
+
+    def add(self, other: PhaseTiming) -> None:
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+
+
+@dataclass(slots=True)
+class GatherStats:
+    """Collected stats for a single ``gather``. Use ``as_dict`` to
+    convert it into JSON-compatible primitives, for example to feed
+    build dashboards.
+    """
+    phase_timings: dict[GatherPhase, PhaseTiming] = field(
+        default_factory=dict)
+    # Note: these are wall times, keyed by module fullname
+    module_extraction_seconds: dict[str, float] = field(default_factory=dict)
+    module_summarization_seconds: dict[str, float] = field(
+        default_factory=dict)
+
+    stubbed_module_count: int = 0
+    tracked_module_count: int = 0
+    crossreffed_class_count: int = 0
+    cached_module_count: int = 0
+    # Modules extracted via ``ExtractionOptions(static_extraction=True)``
+    static_module_count: int = 0
+    # Keyed by the summary class name (for example, ``'ClassSummary'``);
+    # this includes all of the module summaries and their descendants.
+    summary_counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_timing(self) -> PhaseTiming:
+        total = PhaseTiming()
+        for timing in self.phase_timings.values():
+            total.add(timing)
+        return total
+
+    def merge(self, other: GatherStats) -> None:
+        """Adds all of the timings and counts from ``other`` into the
+        current stats. We use this to combine stats from worker
+        processes into the ``gather`` stats.
+        """
+        for phase, timing in other.phase_timings.items():
+            self.phase_timings.setdefault(phase, PhaseTiming()).add(timing)
+
+        self.module_extraction_seconds.update(other.module_extraction_seconds)
+        self.module_summarization_seconds.update(
+            other.module_summarization_seconds)
+        self.stubbed_module_count += other.stubbed_module_count
+        self.tracked_module_count += other.tracked_module_count
+        self.crossreffed_class_count += other.crossreffed_class_count
+        self.cached_module_count += other.cached_module_count
+        self.static_module_count += other.static_module_count
+        for kind, count in other.summary_counts.items():
+            self.summary_counts[kind] = (
+                self.summary_counts.get(kind, 0) + count)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'phase_timings': {
+                phase.value: {
+                    'wall_seconds': timing.wall_seconds,
+                    'cpu_seconds': timing.cpu_seconds}
+                for phase, timing in self.phase_timings.items()},
+            'module_extraction_seconds': dict(self.module_extraction_seconds),
+            'module_summarization_seconds': dict(
+                self.module_summarization_seconds),
+            'stubbed_module_count': self.stubbed_module_count,
+            'tracked_module_count': self.tracked_module_count,
+            'crossreffed_class_count': self.crossreffed_class_count,
+            'cached_module_count': self.cached_module_count,
+            'static_module_count': self.static_module_count,
+            'summary_counts': dict(self.summary_counts)}
+
+
+@contextmanager
+def _activate_stats(stats: GatherStats) -> Generator[GatherStats, None, None]:
+    ctx_token = _ACTIVE_STATS.set(stats)
+    counted_token = _COUNTED_CROSSREFFED_KEYS.set(set())
+    try:
+        yield stats
+    finally:
+        _COUNTED_CROSSREFFED_KEYS.reset(counted_token)
+        _ACTIVE_STATS.reset(ctx_token)
+
+
+def _get_active_stats() -> GatherStats | None:
+    return _ACTIVE_STATS.get(None)
+
+
+@contextmanager
+def _record_phase(
+        phase: GatherPhase,
+        module_name: str | None = None
+        ) -> Generator[None, None, None]:
+    """Adds the time spent within the ``with`` block to the timing of
+    the passed phase. If a module name is passed, the wall time is also
+    added to the module's extraction time (for the extraction phase) or
+    summarization time (for normalization, summarization, and
+    filtering). If memory accounting is active, the net traced bytes
+    allocated within the block are also added to the phase.
+    """
+    stats = _ACTIVE_STATS.get(None)
+    memory_report = _get_active_memory_report()
+    if stats is None and memory_report is None:
+        yield
+        return
+
+    traced_start = 0 if memory_report is None else _get_traced_bytes()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        if memory_report is not None:
+            memory_report.phase_net_bytes[phase] = (
+                memory_report.phase_net_bytes.get(phase, 0)
+                + _get_traced_bytes() - traced_start)
+
+        if stats is not None:
+            stats.phase_timings.setdefault(phase, PhaseTiming()).add(
+                PhaseTiming(
+                    wall_seconds=wall_seconds, cpu_seconds=cpu_seconds))
+
+            if module_name is not None:
+                if phase is GatherPhase.EXTRACTION:
+                    module_timings = stats.module_extraction_seconds
+                else:
+                    module_timings = stats.module_summarization_seconds
+                module_timings[module_name] = (
+                    module_timings.get(module_name, 0) + wall_seconds)
+
+
+def _count_crossreffed_class(cache_key: Hashable | None = None) -> None:
+    """Counts a reftype class requested while the stats are active.
+    Reftype classes are interned for the whole process, so whether or
+    not a request creates a new class depends upon any earlier gathers.
+    Instead, we count each distinct ``cache_key`` once per activation
+    of the stats, regardless of whether it was a cache hit. Reftypes
+    without a cache key (which can't be interned) are always counted.
+    """
+    stats = _ACTIVE_STATS.get(None)
+    if stats is None:
+        return
+
+    if cache_key is not None:
+        counted_keys = _COUNTED_CROSSREFFED_KEYS.get(None)
+        if counted_keys is not None:
+            if cache_key in counted_keys:
+                return
+            counted_keys.add(cache_key)
+
+    stats.crossreffed_class_count += 1
+
+
+def _count_static_module() -> None:
+    stats = _ACTIVE_STATS.get(None)
+    if stats is not None:
+        stats.static_module_count += 1
@@ -3,15 +3,22 @@ from __future__ import annotations
 import inspect
 import itertools
 import typing
+from collections.abc import Awaitable
 from collections.abc import Iterator
+from collections.abc import Mapping
 from collections.abc import Sequence
 from dataclasses import dataclass
 from dataclasses import field
 from enum import Enum
+from enum import IntFlag
+from enum import auto
 from typing import Annotated
 from typing import Any
 from typing import Protocol
+from typing import TypedDict
 from typing import TypeVar
+from typing import Unpack
+from weakref import WeakKeyDictionary
 
 from docnote import DocnoteGroup
 from docnote import MarkupLang
@@ -36,10 +43,94 @@ class Singleton(Enum):
     UNKNOWN = 'unknown'
 
 
-@dataclass(slots=True)
-class ObjClassification:
-    """
+class ObjKind(IntFlag):
+    """The individual bits of an ``ObjClassification``. Most of these
+    correspond directly to one of the ``inspect.is*`` predicates.
     """
+    REFTYPE = auto()
+    HAS_TRAVERSALS = auto()
+    MODULE = auto()
+    CLASS = auto()
+    METHOD = auto()
+    FUNCTION = auto()
+    GENERATOR_FUNCTION = auto()
+    GENERATOR = auto()
+    COROUTINE_FUNCTION = auto()
+    COROUTINE = auto()
+    AWAITABLE = auto()
+    ASYNC_GENERATOR_FUNCTION = auto()
+    ASYNC_GENERATOR = auto()
+    METHOD_WRAPPER = auto()
+    # Note: the primary place you're likely to encounter these in third-party
+    # code is as the type of a slot. So for example, any dataclass with
+    # slots=True will have this type on its attributes. As per stdlib docs,
+    # these are **never** a function, class, method, or builtin.
+    # ... but it's still True for int.__add__. Errrm??? Confusing AF.
+    METHOD_DESCRIPTOR = auto()
+    DATA_DESCRIPTOR = auto()
+    GETSET_DESCRIPTOR = auto()
+    MEMBER_DESCRIPTOR = auto()
+    CALLABLE = auto()
+    TYPEVAR = auto()
+
+
+_CALLABLE_KINDS = (
+    ObjKind.METHOD
+    | ObjKind.FUNCTION
+    | ObjKind.GENERATOR_FUNCTION
+    | ObjKind.COROUTINE_FUNCTION
+    | ObjKind.ASYNC_GENERATOR_FUNCTION
+    | ObjKind.METHOD_WRAPPER)
+_CALLABLE_DESCRIPTOR_KINDS = (
+    ObjKind.MEMBER_DESCRIPTOR | ObjKind.METHOD_DESCRIPTOR)
+_GENERATOR_KINDS = (
+    ObjKind.GENERATOR_FUNCTION
+    | ObjKind.GENERATOR
+    | ObjKind.ASYNC_GENERATOR_FUNCTION
+    | ObjKind.ASYNC_GENERATOR)
+_ASYNC_KINDS = (
+    ObjKind.COROUTINE_FUNCTION
+    | ObjKind.COROUTINE
+    | ObjKind.AWAITABLE
+    | ObjKind.ASYNC_GENERATOR_FUNCTION
+    | ObjKind.ASYNC_GENERATOR)
+# Maps the keyword arguments of the legacy (all-booleans) constructor to
+# their kinds
+_LEGACY_FLAG_KINDS: dict[str, ObjKind] = {
+    'is_reftype': ObjKind.REFTYPE,
+    'has_traversals': ObjKind.HAS_TRAVERSALS,
+    'is_module': ObjKind.MODULE,
+    'is_class': ObjKind.CLASS,
+    'is_method': ObjKind.METHOD,
+    'is_function': ObjKind.FUNCTION,
+    'is_generator_function': ObjKind.GENERATOR_FUNCTION,
+    'is_generator': ObjKind.GENERATOR,
+    'is_coroutine_function': ObjKind.COROUTINE_FUNCTION,
+    'is_coroutine': ObjKind.COROUTINE,
+    'is_awaitable': ObjKind.AWAITABLE,
+    'is_async_generator_function': ObjKind.ASYNC_GENERATOR_FUNCTION,
+    'is_async_generator': ObjKind.ASYNC_GENERATOR,
+    'is_method_wrapper': ObjKind.METHOD_WRAPPER,
+    'is_method_descriptor': ObjKind.METHOD_DESCRIPTOR,
+    'is_data_descriptor': ObjKind.DATA_DESCRIPTOR,
+    'is_getset_descriptor': ObjKind.GETSET_DESCRIPTOR,
+    'is_member_descriptor': ObjKind.MEMBER_DESCRIPTOR,
+    'is_callable': ObjKind.CALLABLE,
+    'is_typevar': ObjKind.TYPEVAR,}
+# Most of the classification depends only upon the type of the object, so
+# we cache that part of it. This is weak so that we don't keep any
+# dynamically-created classes alive.
+_KINDS_BY_TYPE: WeakKeyDictionary[type, ObjKind] = WeakKeyDictionary()
+
+
+def _kind_property(kind: ObjKind) -> property:
+    def getter(self: ObjClassification) -> bool:
+        return bool(self.kinds & kind)
+
+    return property(getter)
+
+
+class _LegacyClassificationFlags(TypedDict, total=False):
     is_reftype: bool
     has_traversals: bool | None
     is_module: bool
@@ -54,11 +145,6 @@ class ObjClassification:
     is_async_generator_function: bool
     is_async_generator: bool
     is_method_wrapper: bool
-    # Note: the primary place you're likely to encounter these in third-party
-    # code is as the type of a slot. So for example, any dataclass with
-    # slots=True will have this type on its attributes. As per stdlib docs,
-    # these are **never** a function, class, method, or builtin.
-    # ... but it's still True for int.__add__. Errrm??? Confusing AF.
     is_method_descriptor: bool
     is_data_descriptor: bool
     is_getset_descriptor: bool
@@ -66,83 +152,206 @@ class ObjClassification:
     is_callable: bool
     is_typevar: bool
 
+
+@dataclass(slots=True, init=False)
+class ObjClassification:
+    """Describes what kind of object something is, which we use to
+    decide which kind of summary to create for it. The ``is_*``
+    attributes are all views onto the ``kinds`` bitset.
+
+    For backwards compatibility, this can also still be constructed
+    from the individual ``is_*`` (and ``has_traversals``) booleans as
+    keyword arguments, which are combined with ``kinds``.
+    """
+    kinds: ObjKind
+
+    def __init__(
+            self,
+            kinds: ObjKind | None = None,
+            **legacy_flags: Unpack[_LegacyClassificationFlags]):
+        if kinds is None:
+            kinds = ObjKind(0)
+        for flag_name, flag_value in legacy_flags.items():
+            if flag_value:
+                kinds |= _LEGACY_FLAG_KINDS[flag_name]
+
+        self.kinds = kinds
+
+    is_reftype = _kind_property(ObjKind.REFTYPE)
+    is_module = _kind_property(ObjKind.MODULE)
+    is_class = _kind_property(ObjKind.CLASS)
+    is_method = _kind_property(ObjKind.METHOD)
+    is_function = _kind_property(ObjKind.FUNCTION)
+    is_generator_function = _kind_property(ObjKind.GENERATOR_FUNCTION)
+    is_generator = _kind_property(ObjKind.GENERATOR)
+    is_coroutine_function = _kind_property(ObjKind.COROUTINE_FUNCTION)
+    is_coroutine = _kind_property(ObjKind.COROUTINE)
+    is_awaitable = _kind_property(ObjKind.AWAITABLE)
+    is_async_generator_function = _kind_property(
+        ObjKind.ASYNC_GENERATOR_FUNCTION)
+    is_async_generator = _kind_property(ObjKind.ASYNC_GENERATOR)
+    is_method_wrapper = _kind_property(ObjKind.METHOD_WRAPPER)
+    is_method_descriptor = _kind_property(ObjKind.METHOD_DESCRIPTOR)
+    is_data_descriptor = _kind_property(ObjKind.DATA_DESCRIPTOR)
+    is_getset_descriptor = _kind_property(ObjKind.GETSET_DESCRIPTOR)
+    is_member_descriptor = _kind_property(ObjKind.MEMBER_DESCRIPTOR)
+    is_callable = _kind_property(ObjKind.CALLABLE)
+    is_typevar = _kind_property(ObjKind.TYPEVAR)
+
+    @property
+    def has_traversals(self) -> bool | None:
+        if self.kinds & ObjKind.REFTYPE:
+            return bool(self.kinds & ObjKind.HAS_TRAVERSALS)
+        return None
+
     @property
     def is_any_generator(self) -> bool:
-        return (
-            self.is_generator_function
-            or self.is_generator
-            or self.is_async_generator_function
-            or self.is_async_generator)
+        return bool(self.kinds & _GENERATOR_KINDS)
 
     @property
     def is_async(self) -> bool:
-        return (
-            self.is_coroutine_function
-            or self.is_coroutine
-            or self.is_awaitable
-            or self.is_async_generator_function
-            or self.is_async_generator)
+        return bool(self.kinds & _ASYNC_KINDS)
 
     @classmethod
     def from_obj(cls, obj: Any) -> ObjClassification:
-        if (crossreffed := is_crossreffed(obj)):
-            has_traversals = bool(obj._docnote_extract_metadata.traversals)
+        obj_type = type(obj)
+        # isinstance checks (and therefore most of the inspect predicates)
+        # respect ``__class__``, so objects that lie about theirs can't use
+        # the cached classification for their actual type.
+        if obj.__class__ is obj_type:
+            kinds = _KINDS_BY_TYPE.get(obj_type)
+            if kinds is None:
+                kinds = _KINDS_BY_TYPE[obj_type] = _classify_by_type(obj)
         else:
-            has_traversals = None
-
-        return cls(
-            is_reftype=crossreffed,
-            has_traversals=has_traversals,
-            is_module=inspect.ismodule(obj),
-            is_class=inspect.isclass(obj),
-            is_method=inspect.ismethod(obj),
-            is_function=inspect.isfunction(obj),
-            is_generator_function=inspect.isgeneratorfunction(obj),
-            is_generator=inspect.isgenerator(obj),
-            is_coroutine_function=inspect.iscoroutinefunction(obj),
-            is_coroutine=inspect.iscoroutine(obj),
-            is_awaitable=inspect.isawaitable(obj),
-            is_async_generator_function=inspect.isasyncgenfunction(obj),
-            is_async_generator=inspect.isasyncgen(obj),
-            is_method_wrapper=inspect.ismethodwrapper(obj),
-            is_method_descriptor=inspect.ismethoddescriptor(obj),
-            is_data_descriptor=inspect.isdatadescriptor(obj),
-            is_getset_descriptor=inspect.isgetsetdescriptor(obj),
-            is_member_descriptor=inspect.ismemberdescriptor(obj),
-            is_callable=callable(obj),
-            is_typevar=isinstance(obj, TypeVar))
+            kinds = _classify_by_type(obj)
+
+        # Reftypes can't be any of the per-object kinds below, and checking
+        # them anyways would just create more reftypes via the metaclass
+        # ``__getattr__``.
+        if is_crossreffed(obj):
+            kinds |= ObjKind.REFTYPE
+            if obj._docnote_extract_metadata.traversals:
+                kinds |= ObjKind.HAS_TRAVERSALS
+            return cls(kinds)
+
+        # These depend upon the code flags of the object (or whatever it
+        # wraps), so they can't be cached by type. However, they can only
+        # ever be true for callables.
+        if kinds & ObjKind.CALLABLE:
+            if inspect.isgeneratorfunction(obj):
+                kinds |= ObjKind.GENERATOR_FUNCTION
+            if inspect.iscoroutinefunction(obj):
+                kinds |= ObjKind.COROUTINE_FUNCTION
+            if inspect.isasyncgenfunction(obj):
+                kinds |= ObjKind.ASYNC_GENERATOR_FUNCTION
+
+        # Generator-based coroutines are awaitable based on their code flags
+        if kinds & ObjKind.GENERATOR and inspect.isawaitable(obj):
+            kinds |= ObjKind.AWAITABLE
+
+        return cls(kinds)
 
     def get_summary_class(self) -> type[SummaryBase]:  # noqa: PLR0911
         """Given the current classification, returns which summary
         type should be applied to the object, so that the caller can
         then create a summary instance for it.
         """
-        if self.is_reftype:
-            if self.has_traversals:
+        kinds = self.kinds
+        if kinds & ObjKind.REFTYPE:
+            if kinds & ObjKind.HAS_TRAVERSALS:
                 return VariableSummary
             else:
                 return CrossrefSummary
-        if self.is_class:
+        if kinds & ObjKind.CLASS:
             return ClassSummary
-        if self.is_module:
+        if kinds & ObjKind.MODULE:
             return ModuleSummary
         if (
-            self.is_method
-            or self.is_function
-            or self.is_generator_function
-            or self.is_coroutine_function
-            or self.is_async_generator_function
-            or self.is_method_wrapper
-            or (self.is_member_descriptor and self.is_callable)
-            or (self.is_method_descriptor and self.is_callable)
+            kinds & _CALLABLE_KINDS
+            or (
+                kinds & ObjKind.CALLABLE
+                and kinds & _CALLABLE_DESCRIPTOR_KINDS)
         ):
             return CallableSummary
-        if self.is_typevar:
+        if kinds & ObjKind.TYPEVAR:
             return TypeVarSummary
 
         return VariableSummary
 
 
+def _classify_by_type(obj: Any) -> ObjKind:
+    """Calculates all of the parts of the classification that depend
+    only upon the type of the object.
+    """
+    kinds = (
+        _classify_namespace_kinds(obj)
+        | _classify_function_kinds(obj)
+        | _classify_async_kinds(obj)
+        | _classify_descriptor_kinds(obj))
+    if callable(obj):
+        kinds |= ObjKind.CALLABLE
+    if isinstance(obj, TypeVar):
+        kinds |= ObjKind.TYPEVAR
+
+    return kinds
+
+
+def _classify_namespace_kinds(obj: Any) -> ObjKind:
+    kinds = ObjKind(0)
+    if inspect.ismodule(obj):
+        kinds |= ObjKind.MODULE
+    if inspect.isclass(obj):
+        kinds |= ObjKind.CLASS
+
+    return kinds
+
+
+def _classify_function_kinds(obj: Any) -> ObjKind:
+    kinds = ObjKind(0)
+    if inspect.ismethod(obj):
+        kinds |= ObjKind.METHOD
+    if inspect.isfunction(obj):
+        kinds |= ObjKind.FUNCTION
+    if inspect.ismethodwrapper(obj):
+        kinds |= ObjKind.METHOD_WRAPPER
+
+    return kinds
+
+
+def _classify_async_kinds(obj: Any) -> ObjKind:
+    """Note that this only covers generator and coroutine *objects*;
+    the ``*_FUNCTION`` kinds depend upon code flags, and are therefore
+    handled (uncached) by ``from_obj``.
+    """
+    kinds = ObjKind(0)
+    if inspect.isgenerator(obj):
+        kinds |= ObjKind.GENERATOR
+    if inspect.iscoroutine(obj):
+        kinds |= ObjKind.COROUTINE
+    # Note: this is the type-based part of ``inspect.isawaitable``; the
+    # generator-based part is handled by ``from_obj``.
+    if isinstance(obj, Awaitable):
+        kinds |= ObjKind.AWAITABLE
+    if inspect.isasyncgen(obj):
+        kinds |= ObjKind.ASYNC_GENERATOR
+
+    return kinds
+
+
+def _classify_descriptor_kinds(obj: Any) -> ObjKind:
+    kinds = ObjKind(0)
+    if inspect.ismethoddescriptor(obj):
+        kinds |= ObjKind.METHOD_DESCRIPTOR
+    if inspect.isdatadescriptor(obj):
+        kinds |= ObjKind.DATA_DESCRIPTOR
+    if inspect.isgetsetdescriptor(obj):
+        kinds |= ObjKind.GETSET_DESCRIPTOR
+    if inspect.ismemberdescriptor(obj):
+        kinds |= ObjKind.MEMBER_DESCRIPTOR
+
+    return kinds
+
+
 class CallableColor(Enum):
     ASYNC = 'async'
     SYNC = 'sync'
@@ -260,11 +469,19 @@ class SummaryMetadataProtocol(Protocol):
             imported firstparty names within a module's namespace).''')]
 
     crossref_namespace: Annotated[
-        dict[str, Crossref],
-        Note('''This contains a snapshot of any objects contained within
-            the locals and globals for the member that can be expressed as
-            ``Crossref`` instances. Objects within ``locals`` and ``globals``
-            that cannot be expressed as a ``Crossref`` will be omitted.
+        Mapping[str, Crossref],
+        Note('''This contains any objects contained within the locals and
+            globals for the member that can be expressed as ``Crossref``
+            instances. Objects within ``locals`` and ``globals`` that cannot
+            be expressed as a ``Crossref`` will be omitted.
+
+            Note that this is a read-only view, and not a copy: nested
+            namespaces (for example, a method within a class within a
+            module) are chained onto their parents' namespaces instead of
+            duplicating them, and the parents are shared between all of
+            their children. This also means that a nested namespace sees
+            every name in its parents -- including those defined after the
+            nested member itself, just like runtime name resolution.
 
             The primary intended use of this is for automatic linking of
             code-fenced blocks -- for example, if you reference ``Foo`` in
@@ -0,0 +1,187 @@
+"""Import hook telemetry for ``gather(..., collect_trace=True)``. When
+enabled, ``Docnotes.trace`` will contain an ``ExtractionTrace`` with
+structured events from the import hook: spec decisions, stub and
+tracking module creation, stash hits, and the exec durations of every
+firstparty module, plus the names looked up on stub modules and counts
+of attribute accesses on tracking modules.
+
+The trace can be exported in the Chrome Trace Event format (via
+``ExtractionTrace.write_chrome_trace``), which can then be opened in
+Perfetto (https://ui.perfetto.dev) or ``chrome://tracing``. Events from
+worker processes keep their own pids, so they show up as separate
+processes within the trace.
+
+As with ``docnote_extract.stats``, collection is activated via a
+context variable; when it isn't active, the recording helpers here
+are (very nearly) free.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+_ACTIVE_TRACE: ContextVar[ExtractionTrace] = ContextVar('_ACTIVE_TRACE')
+
+
+@dataclass(slots=True, frozen=True)
+class TraceEvent:
+    """A single trace event. Events without a duration are instant
+    events.
+    """
+    category: str
+    name: str
+    # Note: both of these are in microseconds, which is what the chrome
+    # trace format uses. The timestamp is from a monotonic clock, so it's
+    # only meaningful relative to other events.
+    timestamp_us: int
+    duration_us: int | None
+    pid: int
+    tid: int
+    args: dict[str, Any] = field(default_factory=dict)
+
+    def as_chrome_event(self) -> dict[str, Any]:
+        event: dict[str, Any] = {
+            'name': self.name,
+            'cat': self.category,
+            'ts': self.timestamp_us,
+            'pid': self.pid,
+            'tid': self.tid,
+            'args': self.args}
+        if self.duration_us is None:
+            event['ph'] = 'i'
+            # Thread-scoped instant event
+            event['s'] = 't'
+        else:
+            event['ph'] = 'X'
+            event['dur'] = self.duration_us
+
+        return event
+
+
+@dataclass(slots=True)
+class ExtractionTrace:
+    """The collected telemetry for a single ``gather``."""
+    events: list[TraceEvent] = field(default_factory=list)
+    # Keyed by module fullname. Stub modules cache their reftypes within
+    # the module dict during extraction, so repeated accesses never reach
+    # the stub ``__getattr__``; we therefore record the distinct names
+    # instead of counting accesses.
+    stubbed_names: dict[str, set[str]] = field(default_factory=dict)
+    tracking_getattr_counts: dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: ExtractionTrace) -> None:
+        """Adds all of the events, names, and counts from ``other``
+        into the current trace. We use this to combine traces from
+        worker processes into the ``gather`` trace.
+        """
+        self.events.extend(other.events)
+        for module_name, names in other.stubbed_names.items():
+            self.stubbed_names.setdefault(module_name, set()).update(names)
+        for module_name, count in other.tracking_getattr_counts.items():
+            self.tracking_getattr_counts[module_name] = (
+                self.tracking_getattr_counts.get(module_name, 0) + count)
+
+    def as_chrome_trace(self) -> dict[str, Any]:
+        """Converts the trace into the (JSON object flavor of the)
+        Chrome Trace Event format. The stubbed names and attribute
+        access counts don't have a timeline, so they're included as
+        metadata.
+        """
+        return {
+            'traceEvents': [
+                event.as_chrome_event() for event in sorted(
+                    self.events, key=lambda event: event.timestamp_us)],
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'stubbed_names': {
+                    module_name: sorted(names)
+                    for module_name, names in self.stubbed_names.items()},
+                'tracking_getattr_counts': dict(
+                    self.tracking_getattr_counts)}}
+
+    def write_chrome_trace(self, path: str | os.PathLike[str]) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.as_chrome_trace(), file)
+
+
+@contextmanager
+def _activate_trace(
+        trace: ExtractionTrace
+        ) -> Generator[ExtractionTrace, None, None]:
+    ctx_token = _ACTIVE_TRACE.set(trace)
+    try:
+        yield trace
+    finally:
+        _ACTIVE_TRACE.reset(ctx_token)
+
+
+def _get_active_trace() -> ExtractionTrace | None:
+    return _ACTIVE_TRACE.get(None)
+
+
+def _record_instant(category: str, name: str, **args: Any) -> None:
+    trace = _ACTIVE_TRACE.get(None)
+    if trace is not None:
+        trace.events.append(TraceEvent(
+            category=category,
+            name=name,
+            timestamp_us=time.perf_counter_ns() // 1000,
+            duration_us=None,
+            pid=os.getpid(),
+            tid=threading.get_native_id(),
+            args=args))
+
+
+@contextmanager
+def _trace_span(
+        category: str,
+        name: str,
+        **args: Any
+        ) -> Generator[None, None, None]:
+    """Records the ``with`` block as a single complete event. The
+    event is recorded even if the block raises (with the exception type
+    added to its args), since failed imports are usually exactly what
+    we're trying to diagnose.
+    """
+    trace = _ACTIVE_TRACE.get(None)
+    if trace is None:
+        yield
+        return
+
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException as exc:
+        args['exception'] = type(exc).__name__
+        raise
+    finally:
+        end_ns = time.perf_counter_ns()
+        trace.events.append(TraceEvent(
+            category=category,
+            name=name,
+            timestamp_us=start_ns // 1000,
+            duration_us=(end_ns - start_ns) // 1000,
+            pid=os.getpid(),
+            tid=threading.get_native_id(),
+            args=args))
+
+
+def _record_stubbed_name(module_name: str, name: str) -> None:
+    trace = _ACTIVE_TRACE.get(None)
+    if trace is not None:
+        trace.stubbed_names.setdefault(module_name, set()).add(name)
+
+
+def _count_tracking_getattr(module_name: str) -> None:
+    trace = _ACTIVE_TRACE.get(None)
+    if trace is not None:
+        trace.tracking_getattr_counts[module_name] = (
+            trace.tracking_getattr_counts.get(module_name, 0) + 1)
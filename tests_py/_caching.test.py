@@ -0,0 +1,148 @@
+from pathlib import Path
+
+from docnote_extract._caching import CachedModule
+from docnote_extract._caching import ExtractionCache
+from docnote_extract._caching import _iter_parent_names
+from docnote_extract._caching import _stable_repr
+from docnote_extract._caching import find_firstparty_imports
+
+_FIRSTPARTY_NAMES = frozenset({
+    'foo',
+    'foo.bar',
+    'foo.bar.baz',
+    'foo.oof',
+    'foo.oof.zab'})
+
+
+class TestFindFirstpartyImports:
+
+    def test_absolute(self):
+        """Absolute imports of firstparty modules must be included,
+        along with their parent packages, and thirdparty imports must
+        be excluded.
+        """
+        source = 'import foo.bar.baz\nimport os\nfrom typing import Any\n'
+        result = find_firstparty_imports(
+            source,
+            module_name='foo.oof',
+            package='foo',
+            firstparty_names=_FIRSTPARTY_NAMES)
+        assert result == {'foo', 'foo.bar', 'foo.bar.baz'}
+
+    def test_relative(self):
+        """Relative imports must be resolved against the module's
+        package, and ``from x import y`` must include ``x.y`` if it is
+        a firstparty module.
+        """
+        source = 'from ..oof import zab\nfrom . import baz\n'
+        result = find_firstparty_imports(
+            source,
+            module_name='foo.bar.qux',
+            package='foo.bar',
+            firstparty_names=_FIRSTPARTY_NAMES)
+        assert result == {
+            'foo', 'foo.bar', 'foo.bar.baz', 'foo.oof', 'foo.oof.zab'}
+
+    def test_nested(self):
+        """Imports within functions and ``if TYPE_CHECKING`` blocks
+        must also be included.
+        """
+        source = (
+            'if TYPE_CHECKING:\n    from foo.bar import baz\n'
+            + 'def func():\n    import foo.oof\n')
+        result = find_firstparty_imports(
+            source,
+            module_name='foo',
+            package='foo',
+            firstparty_names=_FIRSTPARTY_NAMES)
+        assert result == {'foo.bar', 'foo.bar.baz', 'foo.oof'}
+
+    def test_syntax_error(self):
+        """Unparseable source must result in an empty set instead of an
+        error.
+        """
+        result = find_firstparty_imports(
+            'def (',
+            module_name='foo',
+            package='foo',
+            firstparty_names=_FIRSTPARTY_NAMES)
+        assert result == frozenset()
+
+
+class TestIterParentNames:
+
+    def test_nested(self):
+        """Parent names must be yielded from nearest to furthest."""
+        assert list(_iter_parent_names('foo.bar.baz')) == ['foo.bar', 'foo']
+
+    def test_toplevel(self):
+        """Toplevel modules must not have any parents."""
+        assert list(_iter_parent_names('foo')) == []
+
+
+class TestExtractionCache:
+
+    def test_roundtrip(self, tmp_path: Path):
+        """Stored entries must be loadable with the same fingerprint,
+        but not with a different one.
+        """
+        cache = ExtractionCache.from_gather_options(tmp_path)
+        entry = CachedModule(config_payload=b'foo', summary_payload=b'bar')
+        cache.store('foo.bar', 'abc', entry)
+
+        assert cache.load('foo.bar', 'abc') == entry
+        assert cache.load('foo.bar', 'def') is None
+        assert cache.load('foo.baz', 'abc') is None
+
+    def test_stale_entries_removed(self, tmp_path: Path):
+        """Storing a new entry for a module must remove any stale
+        entries for it.
+        """
+        cache = ExtractionCache.from_gather_options(tmp_path)
+        entry = CachedModule(config_payload=b'foo', summary_payload=b'bar')
+        cache.store('foo.bar', 'abc', entry)
+        cache.store('foo.bar', 'def', entry)
+
+        assert cache.load('foo.bar', 'abc') is None
+        assert cache.load('foo.bar', 'def') == entry
+        assert len(list(tmp_path.rglob('*.pickle'))) == 1
+
+    def test_corrupt_entry(self, tmp_path: Path):
+        """Corrupt entries must be treated as cache misses."""
+        cache = ExtractionCache.from_gather_options(tmp_path)
+        entry = CachedModule(config_payload=b'foo', summary_payload=b'bar')
+        cache.store('foo.bar', 'abc', entry)
+        entry_path, = tmp_path.rglob('*.pickle')
+        entry_path.write_bytes(b'definitely not a pickle')
+
+        assert cache.load('foo.bar', 'abc') is None
+
+    def test_options_fingerprint(self, tmp_path: Path):
+        """The options fingerprint must depend upon the gather options,
+        but not on the iteration order of any sets within them.
+        """
+        fingerprint1 = ExtractionCache.from_gather_options(
+            tmp_path,
+            nostub_packages=frozenset({'foo', 'bar', 'baz'}),
+            ).options_fingerprint
+        fingerprint2 = ExtractionCache.from_gather_options(
+            tmp_path,
+            nostub_packages=frozenset({'baz', 'foo', 'bar'}),
+            ).options_fingerprint
+        fingerprint3 = ExtractionCache.from_gather_options(
+            tmp_path,
+            nostub_packages=frozenset({'foo'}),
+            ).options_fingerprint
+
+        assert fingerprint1 == fingerprint2
+        assert fingerprint1 != fingerprint3
+
+
+class TestStableRepr:
+
+    def test_callable(self):
+        """Callables must be represented by their qualified name,
+        without any memory addresses.
+        """
+        assert _stable_repr(TestStableRepr.test_callable) == (
+            f'{__name__}.TestStableRepr.test_callable')
@@ -0,0 +1,299 @@
+import ast
+import importlib.util
+import inspect
+import linecache
+import textwrap
+import typing
+import zipfile
+import zipimport
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import patch
+
+from docnote_extract._compilation import CodeCache
+from docnote_extract._compilation import complete_stub_overloads
+from docnote_extract._compilation import preprocess_module_ast
+
+_SOURCE = 'def func(foo: SomeUndefinedName) -> int:\n    return 1\n'
+
+
+def _load_module(tmp_path: Path, source: str = _SOURCE) -> ModuleType:
+    module_path = tmp_path / 'compilation_test_module.py'
+    module_path.write_text(source)
+    linecache.checkcache(str(module_path))
+    spec = importlib.util.spec_from_file_location(
+        'compilation_test_module', module_path)
+    assert spec is not None
+    return importlib.util.module_from_spec(spec)
+
+
+class TestCodeCache:
+
+    def test_memoized(self, tmp_path):
+        """Repeated calls for the same module must return the same
+        code object, which must have the real module filename.
+        """
+        module = _load_module(tmp_path)
+        code_cache = CodeCache()
+
+        code = code_cache.get_module_code(module)
+
+        assert code is code_cache.get_module_code(module)
+        assert code.co_filename == module.__file__
+
+    def test_empty_zip_module(self, tmp_path):
+        """Empty modules within zip archives (for example, an empty
+        ``__init__.py`` within a wheel) must compile, despite
+        ``inspect.getsource`` refusing them.
+        """
+        archive_path = tmp_path / 'compilation_test.zip'
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.writestr('compilation_test_module.py', '')
+        spec = zipimport.zipimporter(str(archive_path)).find_spec(
+            'compilation_test_module')
+        assert spec is not None
+        module = importlib.util.module_from_spec(spec)
+
+        code = CodeCache().get_module_code(module)
+
+        assert code.co_filename == module.__file__
+
+    def test_postponed_annotations(self, tmp_path):
+        """Code must be compiled with postponed evaluation of
+        annotations, even if the module doesn't request it.
+        """
+        module = _load_module(tmp_path)
+        code = CodeCache().get_module_code(module)
+
+        exec(code, module.__dict__)  # noqa: S102
+
+        assert module.func.__annotations__['foo'] == 'SomeUndefinedName'
+
+    def test_persisted(self, tmp_path):
+        """With a cache dir, code compiled by one cache instance must
+        be loaded (and not recompiled) by another.
+        """
+        module = _load_module(tmp_path)
+        cache_dir = tmp_path / 'cache'
+        CodeCache(cache_dir=cache_dir).get_module_code(module)
+
+        with patch(
+            'docnote_extract._compilation.compile', create=True
+        ) as compile_mock:
+            code = CodeCache(cache_dir=cache_dir).get_module_code(module)
+
+        compile_mock.assert_not_called()
+        assert code.co_filename == module.__file__
+
+    def test_corrupt_entry_ignored(self, tmp_path):
+        """Corrupt on-disk entries must be ignored (and the source
+        recompiled) instead of raising.
+        """
+        module = _load_module(tmp_path)
+        cache_dir = tmp_path / 'cache'
+        CodeCache(cache_dir=cache_dir).get_module_code(module)
+        for entry_path in cache_dir.rglob('*.marshal'):
+            entry_path.write_bytes(b'garbage')
+
+        code = CodeCache(cache_dir=cache_dir).get_module_code(module)
+
+        assert code.co_filename == module.__file__
+
+    def test_stale_entries_removed(self, tmp_path):
+        """Storing a new entry for a module must remove any old entries
+        for it.
+        """
+        cache_dir = tmp_path / 'cache'
+        CodeCache(cache_dir=cache_dir).get_module_code(
+            _load_module(tmp_path))
+        CodeCache(cache_dir=cache_dir).get_module_code(
+            _load_module(tmp_path, source='foo = 1\n'))
+
+        assert len(list(cache_dir.rglob('*.marshal'))) == 1
+
+    def test_preprocessed_variant_separate(self, tmp_path):
+        """Preprocessed and raw code for the same module must be cached
+        separately, both in memory and on disk.
+        """
+        module = _load_module(tmp_path)
+        cache_dir = tmp_path / 'cache'
+        code_cache = CodeCache(cache_dir=cache_dir)
+
+        raw_code = code_cache.get_module_code(module)
+        preprocessed_code = code_cache.get_module_code(
+            module, preprocess=True)
+
+        assert raw_code is not preprocessed_code
+        assert len(list(cache_dir.rglob('*.marshal'))) == 2
+
+
+def _preprocess_and_exec(source: str) -> dict:
+    tree = preprocess_module_ast(ast.parse(textwrap.dedent(source)))
+    namespace: dict = {}
+    exec(compile(tree, '<test>', 'exec'), namespace)  # noqa: S102
+    return namespace
+
+
+class TestPreprocessModuleAst:
+
+    def test_type_checking_folded(self):
+        """``TYPE_CHECKING`` guards (bare or as attributes, and in both
+        if statements and expressions) must be folded to ``True``.
+        """
+        namespace = _preprocess_and_exec('''
+            import typing
+            from typing import TYPE_CHECKING
+            if TYPE_CHECKING:
+                foo = 1
+            else:
+                foo = 2
+            bar = 1 if typing.TYPE_CHECKING else 2
+            baz = 2 if not TYPE_CHECKING else 1
+            ''')
+
+        assert namespace['foo'] == 1
+        assert namespace['bar'] == 1
+        assert namespace['baz'] == 1
+
+    def test_bodies_stripped(self):
+        """Function bodies must be stripped, preserving docstrings,
+        defaults, annotations, and generator-ness.
+        """
+        namespace = _preprocess_and_exec('''
+            def func(foo: int = 1) -> int:
+                """Docstring."""
+                return foo
+
+            def gen():
+                yield 1
+
+            async def agen():
+                yield 1
+
+            class Foo:
+                def method(self):
+                    return 1
+            ''')
+
+        assert namespace['func']() is None
+        assert namespace['func'].__doc__ == 'Docstring.'
+        assert namespace['func'].__defaults__ == (1,)
+        assert namespace['func'].__annotations__['foo'] is int
+        assert inspect.isgeneratorfunction(namespace['gen'])
+        assert inspect.isasyncgenfunction(namespace['agen'])
+        assert namespace['Foo']().method() is None
+
+    def test_import_time_bodies_kept(self):
+        """Functions referenced outside of function bodies, and dunder
+        methods, must keep their bodies (including any nested
+        functions).
+        """
+        namespace = _preprocess_and_exec('''
+            def deco(func):
+                def helper():
+                    return 1
+                func.marker = helper()
+                return func
+
+            @deco
+            def decorated():
+                return 2
+
+            class Foo:
+                def __init__(self):
+                    self.bar = 3
+
+            foo = Foo()
+            ''')
+
+        assert namespace['decorated'].marker == 1
+        assert namespace['decorated']() is None
+        assert namespace['foo'].bar == 3
+
+    def test_transitive_import_time_bodies_kept(self):
+        """Functions referenced within the kept bodies (for example,
+        a helper called by a decorator) must also keep their bodies,
+        transitively.
+        """
+        namespace = _preprocess_and_exec('''
+            def _mark(func):
+                func.marker = 1
+                return func
+
+            def _wrap(func):
+                return _mark(func)
+
+            def register(func):
+                return _wrap(func)
+
+            @register
+            def thing():
+                return 2
+
+            def unrelated():
+                return 3
+            ''')
+
+        assert namespace['thing'].marker == 1
+        assert namespace['thing']() is None
+        assert namespace['unrelated']() is None
+
+
+class TestCompleteStubOverloads:
+
+    def test_implementation_added(self):
+        """Runs of overloads without an implementation -- including
+        within classes and ``if`` statements -- must get one, which
+        must keep any non-overload decorators.
+        """
+        tree = complete_stub_overloads(ast.parse(textwrap.dedent('''
+            import sys
+            from typing import overload
+
+            @overload
+            def func(foo: int) -> int:
+                """Docstring."""
+            @overload
+            def func(foo: str) -> str: ...
+
+            class Foo:
+                @overload
+                @staticmethod
+                def method(foo: int) -> int: ...
+                @overload
+                @staticmethod
+                def method(foo: str) -> str: ...
+
+            if sys.version_info >= (3, 0):
+                @overload
+                def conditional(foo: int) -> int: ...
+                @overload
+                def conditional(foo: str) -> str: ...
+            ''')))
+        namespace: dict = {}
+        exec(compile(tree, '<test>', 'exec'), namespace)  # noqa: S102
+
+        assert namespace['func'].__doc__ == 'Docstring.'
+        assert len(typing.get_overloads(namespace['func'])) == 2
+        assert isinstance(
+            namespace['Foo'].__dict__['method'], staticmethod)
+        assert len(typing.get_overloads(namespace['Foo'].method)) == 2
+        assert len(typing.get_overloads(namespace['conditional'])) == 2
+
+    def test_implementation_kept(self):
+        """Runs of overloads that already have an implementation must
+        be left alone.
+        """
+        source = textwrap.dedent('''
+            from typing import overload
+
+            @overload
+            def func(foo: int) -> int: ...
+            @overload
+            def func(foo: str) -> str: ...
+            def func(foo):
+                return foo
+            ''')
+        tree = complete_stub_overloads(ast.parse(source))
+
+        assert ast.dump(tree) == ast.dump(ast.parse(source))
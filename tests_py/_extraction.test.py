@@ -273,6 +273,7 @@ class TestStubbedGetattr:
         retval = _stubbed_getattr(
             module_name='configatron',
             name='ConfigMeta',
+            module_dict={},
             special_reftype_markers=GLOBAL_REFTYPE_MARKERS)
         assert isinstance(retval, type)
         assert issubclass(retval, type)
@@ -288,6 +289,7 @@ class TestStubbedGetattr:
         retval = _stubbed_getattr(
             module_name='foo',
             name='Foo',
+            module_dict={},
             special_reftype_markers={
                 Crossref(module_name='foo', toplevel_name='Foo'):
                 ReftypeMarker.METACLASS})
@@ -305,6 +307,7 @@ class TestStubbedGetattr:
         retval = _stubbed_getattr(
             module_name='foo',
             name='Foo',
+            module_dict={},
             special_reftype_markers={})
         assert isinstance(retval, type)
         assert not issubclass(retval, type)
@@ -313,6 +316,39 @@ class TestStubbedGetattr:
         assert retval._docnote_extract_metadata == Crossref(
             module_name='foo', toplevel_name='Foo')
 
+    @set_phase(_ExtractionPhase.EXTRACTION)
+    def test_cached_during_extraction(self):
+        """During the extraction phase, the returned reftype must be
+        cached within the module dict, except for dunders.
+        """
+        module_dict = {}
+        retval = _stubbed_getattr(
+            module_name='foo',
+            name='Foo',
+            module_dict=module_dict,
+            special_reftype_markers={})
+        _stubbed_getattr(
+            module_name='foo',
+            name='__wrapped__',
+            module_dict=module_dict,
+            special_reftype_markers={})
+
+        assert module_dict == {'Foo': retval}
+
+    @set_phase(_ExtractionPhase.EXPLORATION)
+    def test_not_cached_during_exploration(self):
+        """Before the extraction phase, the special reftype markers
+        might still change, so the returned reftype must not be cached.
+        """
+        module_dict = {}
+        _stubbed_getattr(
+            module_name='foo',
+            name='Foo',
+            module_dict=module_dict,
+            special_reftype_markers={})
+
+        assert not module_dict
+
 
 def _check_for_hook() -> bool:
     instance_found = False
@@ -1,19 +1,43 @@
+import importlib.util
+import math
+import os
+import sys
+import zipfile
+import zipimport
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
 import pytest
 from docnote import ReftypeMarker
 
 from docnote_extract import Docnotes
+from docnote_extract import ExtractionOptions
 from docnote_extract import SummaryMetadata
 from docnote_extract import gather
+from docnote_extract import iter_gather
+from docnote_extract._extraction import _ExtractionFinderLoader
+from docnote_extract._gathering import _ITER_GATHER_BATCH_SIZE
+from docnote_extract._isolation import can_use_subinterpreters
+from docnote_extract._isolation import can_use_subprocesses
 from docnote_extract._module_tree import SummaryTreeNode
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import GetattrTraversal
+from docnote_extract.discovery import ScanDiscovery
+from docnote_extract.exceptions import ExtractionWorkerError
+from docnote_extract.import_graph import ImportEdge
+from docnote_extract.import_graph import ImportStrategy
 from docnote_extract.normalization import NormalizedConcreteType
 from docnote_extract.normalization import NormalizedLiteralType
 from docnote_extract.normalization import NormalizedUnionType
+from docnote_extract.stats import GatherPhase
 from docnote_extract.summaries import CallableSummary
 from docnote_extract.summaries import ClassSummary
+from docnote_extract.summaries import SummaryBase
 from docnote_extract.summaries import VariableSummary
 
+from docnote_extract_testutils.fixtures import purge_cached_testpkg_modules
+
 
 @pytest.fixture(scope='module')
 def testpkg_docs() -> Docnotes[SummaryMetadata]:
@@ -30,6 +54,43 @@ def testpkg_docs() -> Docnotes[SummaryMetadata]:
             ReftypeMarker.METACLASS})
 
 
+def _summary_shape(summary: SummaryBase) -> set[tuple[Any, ...]]:
+    """Values from the code itself (for example, parameter defaults)
+    won't compare equal across different gathers, since every gather
+    re-execs the modules. This instead recursively collects the crossref
+    and filtering results for the summary and all of its children, which
+    we can compare.
+    """
+    shape: set[tuple[Any, ...]] = {(
+        summary.crossref,
+        type(summary).__name__,
+        getattr(summary.metadata, 'to_document', None),
+        getattr(summary.metadata, 'disowned', None))}
+    for attr_name in ('members', 'signatures', 'params'):
+        for child in getattr(summary, attr_name, ()):
+            shape.update(_summary_shape(child))
+
+    return shape
+
+
+def _assert_matching_docs(
+        expected: Docnotes[SummaryMetadata],
+        actual: Docnotes[SummaryMetadata]):
+    (_, expected_root), = expected.summaries.items()
+    (_, actual_root), = actual.summaries.items()
+    expected_nodes = {
+        node.fullname: node for node in expected_root.flatten()}
+    actual_nodes = {node.fullname: node for node in actual_root.flatten()}
+    assert expected_nodes.keys() == actual_nodes.keys()
+
+    for module_name, expected_node in expected_nodes.items():
+        actual_node = actual_nodes[module_name]
+        assert actual_node.to_document == expected_node.to_document
+        assert (
+            _summary_shape(actual_node.module_summary)
+            == _summary_shape(expected_node.module_summary))
+
+
 class TestGatheringE2E:
 
     def test_expected_summaries(self, testpkg_docs: Docnotes[SummaryMetadata]):
@@ -142,3 +203,461 @@ class TestGatheringE2E:
             primary=Crossref(
                 module_name='finnr.currency', toplevel_name='CurrencySet'),
             params=())
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires os.fork')
+    def test_jobs_matches_serial(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with multiple forked workers must result in the
+        same module tree and summaries as serial gathering.
+        """
+        forked_docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            jobs=2)
+
+        _assert_matching_docs(testpkg_docs, forked_docs)
+
+    def test_cache_matches_uncached(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata],
+            tmp_path: Path):
+        """Gathering with a cache must result in the same module tree
+        and summaries as uncached gathering, both when populating the
+        cache and when loading from it.
+        """
+        gather_kwargs: dict[str, Any] = {
+            'special_reftype_markers': {
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            'cache_dir': tmp_path}
+
+        cold_docs = gather(['docnote_extract_testpkg'], **gather_kwargs)
+        assert any(tmp_path.rglob('*.pickle'))
+        warm_docs = gather(['docnote_extract_testpkg'], **gather_kwargs)
+
+        _assert_matching_docs(testpkg_docs, cold_docs)
+        _assert_matching_docs(testpkg_docs, warm_docs)
+
+    def test_preprocessed_source_matches(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with source preprocessing must result in the same
+        module tree and summaries as gathering without it.
+        """
+        preprocessed_docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            extraction_options=ExtractionOptions(preprocess_source=True))
+
+        _assert_matching_docs(testpkg_docs, preprocessed_docs)
+
+    def test_static_extraction_matches(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with static extraction must result in the same
+        module tree and summaries as gathering without it, and must
+        statically extract at least some (but not all) of the modules.
+        """
+        static_docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            extraction_options=ExtractionOptions(static_extraction=True),
+            collect_stats=True)
+
+        _assert_matching_docs(testpkg_docs, static_docs)
+        stats = static_docs.stats
+        assert stats is not None
+        assert 0 < stats.static_module_count < len(
+            stats.module_extraction_seconds)
+
+    @purge_cached_testpkg_modules
+    def test_wheel_matches(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata],
+            tmp_path: Path):
+        """Gathering from a wheel must result in the same module tree
+        and summaries as gathering from the installed package, must
+        actually read the sources from the wheel, and must remove the
+        wheel from sys.path afterwards.
+        """
+        testpkg_spec = importlib.util.find_spec('docnote_extract_testpkg')
+        assert testpkg_spec is not None
+        assert testpkg_spec.submodule_search_locations is not None
+        testpkg_dir = Path(testpkg_spec.submodule_search_locations[0])
+        wheel_path = tmp_path / 'docnote_extract_testpkg-0-py3-none-any.whl'
+        with zipfile.ZipFile(wheel_path, 'w') as wheel:
+            for source_path in testpkg_dir.rglob('*.py'):
+                wheel.write(
+                    source_path,
+                    source_path.relative_to(testpkg_dir.parent).as_posix())
+
+        with patch.object(
+            zipimport.zipimporter,
+            'get_source',
+            autospec=True,
+            side_effect=zipimport.zipimporter.get_source,
+        ) as get_source_spy:
+            wheel_docs = gather(
+                ['docnote_extract_testpkg'],
+                special_reftype_markers={
+                    Crossref(
+                        module_name='docnote_extract_testutils.for_handrolled',
+                        toplevel_name='ThirdpartyMetaclass'):
+                    ReftypeMarker.METACLASS},
+                extraction_options=ExtractionOptions(
+                    firstparty_wheels=[wheel_path],
+                    discovery=ScanDiscovery()))
+
+        _assert_matching_docs(testpkg_docs, wheel_docs)
+        get_source_spy.assert_called()
+        assert str(wheel_path.resolve()) not in sys.path
+        assert str(wheel_path.resolve()) not in sys.path_importer_cache
+
+    @pytest.mark.skipif(
+        not can_use_subinterpreters(), reason='Requires subinterpreters')
+    def test_subinterpreter_isolation_matches(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering within a subinterpreter must result in the same
+        module tree and summaries as gathering in the current
+        interpreter, without changing the current import system.
+        """
+        meta_path_before = list(sys.meta_path)
+        isolated_docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            isolation='subinterpreter')
+
+        assert sys.meta_path == meta_path_before
+        _assert_matching_docs(testpkg_docs, isolated_docs)
+
+    @pytest.mark.skipif(
+        not can_use_subinterpreters(), reason='Requires subinterpreters')
+    def test_subinterpreter_failure_raises(self):
+        """Failures within a subinterpreter must be raised as
+        ``ExtractionWorkerError``, including the worker traceback.
+        """
+        with pytest.raises(ExtractionWorkerError) as exc_info:
+            gather(
+                ['docnote_extract_nonexistent_pkg'],
+                isolation='subinterpreter')
+
+        assert 'Traceback' in exc_info.value.args[-1]
+
+    @pytest.mark.skipif(
+        not can_use_subprocesses(), reason='Requires a posix platform')
+    def test_subprocess_isolation_matches(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering within a subprocess must result in the same module
+        tree and summaries as gathering in the current process, without
+        changing the current import system.
+        """
+        meta_path_before = list(sys.meta_path)
+        isolated_docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            isolation='subprocess',
+            collect_stats=True)
+
+        assert sys.meta_path == meta_path_before
+        assert isolated_docs.stats is not None
+        _assert_matching_docs(testpkg_docs, isolated_docs)
+
+    def test_iter_gather_matches_gather(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Streaming gathering must yield exactly one summary per
+        module, with parents before children, and the same module-level
+        filtering and summary shapes as ``gather``. It must suspend the
+        extraction session once per batch, not once per module.
+        """
+        (_, gathered_root), = testpkg_docs.summaries.items()
+        gathered_nodes = {
+            node.fullname: node for node in gathered_root.flatten()}
+
+        seen_module_names: list[str] = []
+        with patch.object(
+            _ExtractionFinderLoader,
+            'suspended_session',
+            autospec=True,
+            side_effect=_ExtractionFinderLoader.suspended_session,
+        ) as suspend_spy:
+            streamed = list(iter_gather(
+                ['docnote_extract_testpkg'],
+                special_reftype_markers={
+                    Crossref(
+                        module_name='docnote_extract_testutils.for_handrolled',
+                        toplevel_name='ThirdpartyMetaclass'):
+                    ReftypeMarker.METACLASS}))
+
+        assert suspend_spy.call_count == math.ceil(
+            len(gathered_nodes) / _ITER_GATHER_BATCH_SIZE)
+        assert suspend_spy.call_count < len(gathered_nodes)
+        for module_name, module_summary in streamed:
+            parent_name, _, _ = module_name.rpartition('.')
+            assert not parent_name or parent_name in seen_module_names
+            seen_module_names.append(module_name)
+
+            gathered_node = gathered_nodes[module_name]
+            assert (
+                module_summary.metadata.to_document
+                == gathered_node.to_document)
+            assert (
+                _summary_shape(module_summary)
+                == _summary_shape(gathered_node.module_summary))
+
+        assert len(seen_module_names) == len(set(seen_module_names))
+        assert set(seen_module_names) == gathered_nodes.keys()
+
+    def test_collect_stats(self, testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with ``collect_stats=True`` must populate the
+        stats, covering every module and every summary. Gathering
+        without it must not.
+        """
+        assert testpkg_docs.stats is None
+        docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            collect_stats=True)
+
+        stats = docs.stats
+        assert stats is not None
+        (_, tree_root), = docs.summaries.items()
+        module_names = {node.fullname for node in tree_root.flatten()}
+        assert stats.module_extraction_seconds.keys() == module_names
+        assert stats.module_summarization_seconds.keys() == module_names
+        for phase in (
+            GatherPhase.STASH_PREHOOK,
+            GatherPhase.EXPLORATION,
+            GatherPhase.PREPARATION,
+            GatherPhase.EXTRACTION,
+            GatherPhase.TEARDOWN,
+            GatherPhase.NORMALIZATION,
+            GatherPhase.SUMMARIZATION,
+            GatherPhase.FILTERING,
+        ):
+            assert phase in stats.phase_timings
+
+        assert stats.stubbed_module_count > 0
+        assert stats.crossreffed_class_count > 0
+        assert stats.summary_counts['ModuleSummary'] == len(module_names)
+
+    def test_stats_independent_of_earlier_gathers(self):
+        """The crossreffed class count must be the same for repeated
+        gathers within the same process, even though the reftype
+        classes from the first gather are still alive (and therefore
+        reused) during the second one.
+        """
+        gather_kwargs: dict[str, Any] = {
+            'special_reftype_markers': {
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            'collect_stats': True}
+        first_docs = gather(['docnote_extract_testpkg'], **gather_kwargs)
+        second_docs = gather(['docnote_extract_testpkg'], **gather_kwargs)
+
+        assert first_docs.stats is not None
+        assert second_docs.stats is not None
+        assert first_docs.stats.crossreffed_class_count > 0
+        assert (
+            first_docs.stats.crossreffed_class_count
+            == second_docs.stats.crossreffed_class_count)
+
+    def test_collect_import_graph(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with ``collect_import_graph=True`` must record the
+        firstparty, thirdparty, and stdlib imports of the inspected
+        modules, along with how they were handled. Gathering without it
+        must not.
+        """
+        assert testpkg_docs.import_graph is None
+        docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            collect_import_graph=True)
+
+        import_graph = docs.import_graph
+        assert import_graph is not None
+        relativity = 'docnote_extract_testpkg._hand_rolled.relativity'
+        assert ImportEdge(
+            importer=relativity,
+            imported='docnote_extract_testpkg._hand_rolled.noteworthy',
+            stub_strategy=ImportStrategy.STUB,
+            inspected_module=relativity) in import_graph.edges
+
+        metaclass_importer = (
+            'docnote_extract_testpkg._hand_rolled.imports_3p_metaclass')
+        assert ImportEdge(
+            importer=metaclass_importer,
+            imported='docnote_extract_testutils.for_handrolled',
+            stub_strategy=ImportStrategy.STUB,
+            inspected_module=metaclass_importer) in import_graph.edges
+
+        noteworthy = 'docnote_extract_testpkg._hand_rolled.noteworthy'
+        assert ImportEdge(
+            importer=noteworthy,
+            imported='functools',
+            stub_strategy=ImportStrategy.UNHOOKED,
+            inspected_module=noteworthy) in import_graph.edges
+
+    def test_collect_trace(self, testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with ``collect_trace=True`` must record an
+        extraction span for every module, plus the import hook's spec
+        decisions and stub attribute accesses. Gathering without it
+        must not.
+        """
+        assert testpkg_docs.trace is None
+        docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            collect_trace=True)
+
+        trace = docs.trace
+        assert trace is not None
+        (_, tree_root), = docs.summaries.items()
+        module_names = {node.fullname for node in tree_root.flatten()}
+        assert {
+            event.args['module'] for event in trace.events
+            if event.name == 'extract_firstparty'
+        } == module_names
+        assert any(
+            event.name == 'find_spec'
+            and event.args['decision'] == 'stub'
+            for event in trace.events)
+        assert 'ThirdpartyMetaclass' in trace.stubbed_names[
+            'docnote_extract_testutils.for_handrolled']
+
+    def test_collect_summary_profile(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with ``collect_summary_profile=True`` must profile
+        every module, with consistent inclusive and exclusive times.
+        Gathering without it must not.
+        """
+        assert testpkg_docs.summary_profile is None
+        docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            collect_summary_profile=True)
+
+        summary_profile = docs.summary_profile
+        assert summary_profile is not None
+        (_, tree_root), = docs.summaries.items()
+        for node in tree_root.flatten():
+            module_crossref = node.module_summary.crossref
+            assert module_crossref is not None
+            module_entry = summary_profile.entries[module_crossref]
+            assert module_entry.summary_kind == 'ModuleSummary'
+            assert module_entry.call_count == 1
+
+        for entry in summary_profile.entries.values():
+            assert 0 <= entry.exclusive_seconds <= entry.inclusive_seconds
+        assert any(
+            entry.summary_kind == 'SignatureSummary'
+            for entry in summary_profile.top(len(summary_profile.entries)))
+
+    def test_collect_memory(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata]):
+        """Gathering with ``collect_memory=True`` must take a checkpoint
+        at every phase boundary, and measure the retained memory of the
+        stashes and summaries. Gathering without it must not.
+        """
+        assert testpkg_docs.memory is None
+        docs = gather(
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS},
+            collect_memory=True)
+
+        memory = docs.memory
+        assert memory is not None
+        labels = [checkpoint.label for checkpoint in memory.checkpoints]
+        assert labels[-2:] == ['summarization', 'filtering']
+        assert 'teardown' in labels
+        assert memory.retained_bytes['summaries'] > 0
+        assert memory.retained_bytes['module_stash_stubbed'] > 0
+        assert memory.retained_bytes['module_stash_nostub_raw'] > 0
+        # The testpkg doesn't have any nostub modules, so this stash is
+        # empty -- but it must still be measured.
+        assert memory.retained_bytes['module_stash_tracked'] == 0
+        assert GatherPhase.SUMMARIZATION in memory.phase_net_bytes
+
+    def test_scan_discovery(
+            self,
+            testpkg_docs: Docnotes[SummaryMetadata],
+            tmp_path: Path):
+        """Gathering with scan discovery must find the same modules as
+        the default discovery, minus any excluded ones. This must also
+        be true when the scan results come from the cache.
+        """
+        (_, expected_root), = testpkg_docs.summaries.items()
+        expected_names = {node.fullname for node in expected_root.flatten()}
+        excluded_pkg = 'docnote_extract_testpkg._hand_rolled.child2'
+
+        for _ in range(2):
+            docs = gather(
+                ['docnote_extract_testpkg'],
+                special_reftype_markers={
+                    Crossref(
+                        module_name='docnote_extract_testutils.for_handrolled',
+                        toplevel_name='ThirdpartyMetaclass'):
+                    ReftypeMarker.METACLASS},
+                extraction_options=ExtractionOptions(
+                    discovery=ScanDiscovery(
+                        exclude=frozenset({excluded_pkg}))),
+                cache_dir=tmp_path)
+
+            (_, tree_root), = docs.summaries.items()
+            assert {node.fullname for node in tree_root.flatten()} == {
+                name for name in expected_names
+                if name != excluded_pkg
+                and not name.startswith(f'{excluded_pkg}.')}
+
+        assert (tmp_path / 'discovery.json').exists()
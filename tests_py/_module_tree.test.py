@@ -75,6 +75,26 @@ class TestModuleTreeNode:
         assert (foo_root / 'bar' / 'baz').effective_config == DocnoteConfig(
             enforce_known_lang=True, markup_lang=MarkupLang.CLEANCOPY)
 
+    def test_from_explicit_configs(self):
+        """from_explicit_configs must construct a correct tree, merging
+        configs across levels the same way as from_extraction.
+        """
+        root_nodes = ConfiguredModuleTreeNode.from_explicit_configs({
+            'foo': DocnoteConfig(enforce_known_lang=False),
+            'foo.bar': None,
+            'foo.bar.baz': DocnoteConfig(markup_lang=MarkupLang.CLEANCOPY),
+            'oof': None})
+
+        assert set(root_nodes) == {'foo', 'oof'}
+        foo_root = root_nodes['foo']
+        assert root_nodes['oof'].effective_config == DocnoteConfig()
+        assert foo_root.effective_config == DocnoteConfig(
+            enforce_known_lang=False)
+        assert (foo_root / 'bar').effective_config == DocnoteConfig(
+            enforce_known_lang=False)
+        assert (foo_root / 'bar' / 'baz').effective_config == DocnoteConfig(
+            enforce_known_lang=False, markup_lang=MarkupLang.CLEANCOPY)
+
     def test_linearization(self):
         """Linearizing a tree from its extraction must include all of
         the nodes.
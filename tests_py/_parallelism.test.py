@@ -0,0 +1,64 @@
+import pytest
+
+from docnote_extract._parallelism import ForkedExtraction
+from docnote_extract._parallelism import _WorkerReports
+from docnote_extract._parallelism import partition_module_names
+from docnote_extract._serialization import dumps
+from docnote_extract.stats import GatherStats
+from docnote_extract.stats import _activate_stats
+
+
+class TestPartitionModuleNames:
+
+    def test_all_names_assigned_once(self):
+        """Every module name must be assigned to exactly one share.
+        """
+        module_names = {f'foo.bar{index}' for index in range(11)}
+        shares = partition_module_names(module_names, 3)
+
+        assert len(shares) == 3
+        assigned = [name for share in shares for name in share]
+        assert len(assigned) == len(module_names)
+        assert set(assigned) == module_names
+
+    def test_no_empty_shares(self):
+        """If there are more jobs than modules, the result must not
+        contain any empty shares.
+        """
+        shares = partition_module_names({'foo', 'foo.bar'}, 8)
+        assert len(shares) == 2
+        assert all(shares)
+
+    def test_deterministic(self):
+        """Partitioning must not depend upon the iteration order of the
+        passed names.
+        """
+        module_names = [f'foo.bar{index}' for index in range(7)]
+        assert (
+            partition_module_names(module_names, 2)
+            == partition_module_names(list(reversed(module_names)), 2))
+
+    def test_invalid_jobs(self):
+        """Jobs less than one must raise ValueError."""
+        with pytest.raises(ValueError):
+            partition_module_names({'foo'}, 0)
+
+
+class TestForkedExtraction:
+
+    def test_load_merges_reports(self):
+        """Worker reports must stay pickled until ``load``, which must
+        merge them into the active reports.
+        """
+        worker_reports = _WorkerReports(
+            stats=GatherStats(stubbed_module_count=2))
+        forked_extraction = ForkedExtraction(
+            config_payloads=(),
+            summary_payloads={},
+            report_payloads=(dumps(worker_reports), dumps(worker_reports)))
+
+        stats = GatherStats(stubbed_module_count=1)
+        with _activate_stats(stats):
+            assert forked_extraction.load() == ({}, {})
+
+        assert stats.stubbed_module_count == 5
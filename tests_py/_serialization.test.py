@@ -0,0 +1,61 @@
+from docnote_extract._serialization import dumps
+from docnote_extract._serialization import loads
+from docnote_extract.crossrefs import CallTraversal
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import CrossrefMixin
+from docnote_extract.crossrefs import is_crossreffed
+from docnote_extract.crossrefs import make_crossreffed
+from docnote_extract.crossrefs import make_metaclass_crossreffed
+
+
+class TestRoundtrip:
+
+    def test_plain_values(self):
+        """Values without any reftypes must roundtrip as normal
+        pickles.
+        """
+        value = {
+            'foo': Crossref(module_name='foo', toplevel_name='Bar'),
+            'bar': (1, 2.0, 'three')}
+        assert loads(dumps(value)) == value
+
+    def test_reftype(self):
+        """Reftypes must be recreated with the same metadata."""
+        reftype = make_crossreffed(module='foo', name='Bar')
+        reloaded = loads(dumps(reftype))
+
+        assert is_crossreffed(reloaded)
+        assert isinstance(reloaded, type)
+        assert issubclass(reloaded, CrossrefMixin)
+        assert (
+            reloaded._docnote_extract_metadata
+            == reftype._docnote_extract_metadata)
+
+    def test_nested_reftype(self):
+        """Reftypes nested within crossref traversals must also be
+        recreated.
+        """
+        arg_reftype = make_crossreffed(module='foo', name='Arg')
+        reftype = make_crossreffed(module='foo', name='Bar')(arg_reftype)
+        metadata = reftype._docnote_extract_metadata
+        reloaded = loads(dumps(metadata))
+
+        traversal, = reloaded.traversals
+        assert isinstance(traversal, CallTraversal)
+        reloaded_arg, = traversal.args
+        assert is_crossreffed(reloaded_arg)
+        assert (
+            reloaded_arg._docnote_extract_metadata
+            == arg_reftype._docnote_extract_metadata)
+
+    def test_metaclass_reftype(self):
+        """Metaclass reftypes must be recreated as metaclass reftypes.
+        """
+        reftype = make_metaclass_crossreffed(module='foo', name='Bar')
+        reloaded = loads(dumps(reftype))
+
+        assert issubclass(reloaded, type)
+        assert is_crossreffed(reloaded)
+        assert (
+            reloaded._docnote_extract_metadata
+            == reftype._docnote_extract_metadata)
@@ -0,0 +1,322 @@
+import ast
+import importlib.util
+import inspect
+import linecache
+import sys
+import textwrap
+import typing
+from functools import partial
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import patch
+
+from docnote import ReftypeMarker
+
+from docnote_extract._compilation import CodeCache
+from docnote_extract._static import StaticExtractionOptions
+from docnote_extract._static import exec_static
+from docnote_extract._static import find_impurity
+from docnote_extract._static import find_stub_file
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import has_crossreffed_base
+from docnote_extract.crossrefs import has_crossreffed_metaclass
+from docnote_extract.crossrefs import is_crossreffed
+
+_PURE_SOURCE = '''\
+"""A pure module."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
+from typing import TYPE_CHECKING
+from typing import TypeVar
+
+import thirdparty.sub
+from thirdparty import Meta
+from thirdparty import decorate
+
+from . import sibling
+from .sibling import Base
+
+if TYPE_CHECKING:
+    from thirdparty import OnlyForTyping
+
+T = TypeVar('T')
+DEFAULT_BASE = Base()
+SUB_VALUE = thirdparty.sub.value
+
+
+@dataclass(frozen=True)
+class Foo:
+    """A dataclass."""
+    bar: OnlyForTyping
+    baz: list[int] = field(default_factory=list)
+
+    @property
+    def qux(self) -> int:
+        """A property."""
+        raise RuntimeError('Function bodies must not be executed!')
+
+    @qux.setter
+    def qux(self, value: int) -> None:
+        raise RuntimeError('Function bodies must not be executed!')
+
+
+class Qux(metaclass=Meta):
+    """A class with a thirdparty metaclass."""
+
+
+class Quux(Base):
+    """A class with a firstparty base."""
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+@decorate(1)
+def decorated(): ...
+
+
+def func(foo: T, bar: Foo = DEFAULT_BASE) -> T:
+    """A function."""
+    raise RuntimeError('Function bodies must not be executed!')
+'''
+
+
+def _check(
+        source: str,
+        *,
+        nostub_firstparty_modules: frozenset[str] = frozenset(),
+        nostub_packages: frozenset[str] = frozenset()
+        ) -> str | None:
+    return find_impurity(
+        ast.parse(textwrap.dedent(source)),
+        module_name='pkg.mod',
+        package_name='pkg',
+        nostub_firstparty_modules=nostub_firstparty_modules,
+        nostub_packages=nostub_packages)
+
+
+def _load_module(tmp_path: Path, source: str) -> ModuleType:
+    module_path = tmp_path / 'mod.py'
+    module_path.write_text(source)
+    linecache.checkcache(str(module_path))
+    spec = importlib.util.spec_from_file_location('pkg.mod', module_path)
+    assert spec is not None
+    return importlib.util.module_from_spec(spec)
+
+
+def _exec_static(
+        raw_module: ModuleType,
+        stub_source: str | None = None
+        ) -> tuple[bool, ModuleType]:
+    extracted_module = ModuleType(raw_module.__name__)
+    extracted_module.__package__ = raw_module.__package__
+    extracted_module.__file__ = raw_module.__file__
+    if stub_source is None:
+        source = inspect.getsource(raw_module)
+        get_code = partial(
+            CodeCache().get_module_code, raw_module, preprocess=True)
+    else:
+        source = stub_source
+        get_code = partial(
+            CodeCache().get_stub_code,
+            raw_module.__name__,
+            stub_source,
+            'mod.pyi')
+
+    # During extraction, there's always some version of the module within
+    # sys.modules, and dataclasses rely upon that.
+    with patch.dict(sys.modules, {raw_module.__name__: raw_module}):
+        succeeded = exec_static(
+            extracted_module,
+            source,
+            get_code=get_code,
+            options=StaticExtractionOptions(
+                firstparty_module_names={'pkg', 'pkg.mod', 'pkg.sibling'},
+                nostub_firstparty_modules=frozenset(),
+                nostub_packages=frozenset(),
+                passthrough_packages={'docnote', 'docnote_extract'},
+                special_reftype_markers={
+                    Crossref(module_name='thirdparty', toplevel_name='Meta'):
+                        ReftypeMarker.METACLASS}))
+    return succeeded, extracted_module
+
+
+class TestFindImpurity:
+
+    def test_pure(self):
+        """Modules consisting purely of declarations, and calls to
+        reftypes, docnote, and declarative stdlib modules, must be
+        considered pure.
+        """
+        assert _check(_PURE_SOURCE) is None
+        assert _check('''\
+            import typing
+            from docnote import DocnoteConfig
+            from docnote import Note
+
+            DOCNOTE_CONFIG = DocnoteConfig(include_in_docs=False)
+            __all__ = ['Foo']
+            __all__ += ['Bar']
+            Foo: typing.Annotated[int, Note('foo')] = 1
+            Bar = typing.NewType('Bar', int)
+            type Baz = dict[str, Foo]
+            ''') is None
+
+    def test_impure_calls(self):
+        """Module-level calls to local functions or classes, to
+        decorators defined locally, or to non-declarative stdlib
+        modules, must all be considered impure.
+        """
+        assert _check('''\
+            def foo(): ...
+            BAR = foo()
+            ''') is not None
+        assert _check('''\
+            def decorate(func): ...
+
+            @decorate
+            def foo(): ...
+            ''') is not None
+        assert _check('''\
+            class Foo: ...
+            FOO = Foo()
+            ''') is not None
+        assert _check('''\
+            import os
+            FOO = os.getenv('FOO')
+            ''') is not None
+        assert _check('print("side effects!")') is not None
+
+    def test_impure_statements(self):
+        """Control flow other than ``if``, star imports, and classes
+        defining import-time dunders must all be considered impure.
+        """
+        assert _check('''\
+            for foo in range(3):
+                pass
+            ''') is not None
+        assert _check('from thirdparty import *') is not None
+        assert _check('''\
+            class Foo:
+                def __init_subclass__(cls, **kwargs): ...
+            ''') is not None
+
+    def test_nostub_imports(self):
+        """Imports from nostub packages or modules -- including
+        submodules imported from their parents, and relative imports --
+        must be considered impure.
+        """
+        assert _check(
+            'from thirdparty import foo',
+            nostub_packages=frozenset({'thirdparty'})) is not None
+        assert _check(
+            'from . import sibling',
+            nostub_firstparty_modules=frozenset({'pkg.sibling'})) is not None
+        assert _check(
+            'from .sibling import Foo',
+            nostub_firstparty_modules=frozenset({'pkg.sibling'})) is not None
+        assert _check(
+            'import pkg.sibling',
+            nostub_firstparty_modules=frozenset({'pkg.sibling'})) is not None
+
+
+class TestExecStatic:
+
+    def test_pure_module(self, tmp_path):
+        """Statically extracting a pure module must bind its imports
+        to reftypes (or stub modules, for submodules), without
+        executing any function bodies.
+        """
+        raw_module = _load_module(tmp_path, _PURE_SOURCE)
+        succeeded, extracted_module = _exec_static(raw_module)
+
+        assert succeeded
+        namespace = extracted_module.__dict__
+        assert namespace['__doc__'] == 'A pure module.'
+        assert isinstance(namespace['sibling'], ModuleType)
+        assert is_crossreffed(namespace['Base'])
+        assert namespace['Base']._docnote_extract_metadata == Crossref(
+            module_name='pkg.sibling', toplevel_name='Base')
+        assert is_crossreffed(namespace['OnlyForTyping'])
+        assert namespace['SUB_VALUE']._docnote_extract_metadata == Crossref(
+            module_name='thirdparty.sub', toplevel_name='value')
+        assert namespace['Foo'](bar=1).baz == []
+        assert has_crossreffed_metaclass(namespace['Qux'])
+        assert has_crossreffed_base(namespace['Quux'])
+        assert is_crossreffed(namespace['decorated'])
+        assert namespace['func'].__doc__ == 'A function.'
+        assert namespace['func'].__module__ == 'pkg.mod'
+        assert namespace['Color'].RED.value == 'red'
+
+    def test_impure_module(self, tmp_path):
+        """Impure modules must be rejected without touching the
+        extracted module.
+        """
+        raw_module = _load_module(tmp_path, 'import os\nos.getcwd()\n')
+        succeeded, extracted_module = _exec_static(raw_module)
+
+        assert not succeeded
+        assert not hasattr(extracted_module, 'os')
+
+    def test_failed_exec(self, tmp_path):
+        """Modules that pass the purity check, but fail to exec, must
+        be rejected, and the extracted module must be restored.
+        """
+        raw_module = _load_module(
+            tmp_path, 'FOO = 1\nfrom thirdparty import __version__\n')
+        succeeded, extracted_module = _exec_static(raw_module)
+
+        assert not succeeded
+        assert not hasattr(extracted_module, 'FOO')
+
+    def test_stub_source(self, tmp_path):
+        """Statically extracting a stub file must use the stub instead
+        of the module source, and overloads without implementations
+        must be retrievable via ``typing.get_overloads``.
+        """
+        raw_module = _load_module(tmp_path, 'raise ImportError()\n')
+        stub_source = textwrap.dedent('''\
+            from typing import overload
+            from thirdparty import Foo
+
+            @overload
+            def func(foo: int) -> int:
+                """A stubbed function."""
+            @overload
+            def func(foo: str) -> Foo: ...
+            ''')
+        succeeded, extracted_module = _exec_static(raw_module, stub_source)
+
+        assert succeeded
+        func = extracted_module.__dict__['func']
+        assert func.__doc__ == 'A stubbed function.'
+        assert len(typing.get_overloads(func)) == 2
+
+
+class TestFindStubFile:
+
+    def test_source_module(self, tmp_path):
+        """Stub files next to source modules must be found, but only if
+        they exist.
+        """
+        raw_module = _load_module(tmp_path, 'FOO = 1\n')
+        assert find_stub_file(raw_module) is None
+
+        stub_path = tmp_path / 'mod.pyi'
+        stub_path.write_text('FOO: int\n')
+        assert find_stub_file(raw_module) == stub_path
+
+    def test_extension_module(self, tmp_path):
+        """Stub files next to compiled extension modules must be found
+        despite the platform tags in the extension module filename.
+        """
+        raw_module = ModuleType('pkg.mod')
+        raw_module.__file__ = str(tmp_path / 'mod.cpython-313-darwin.so')
+        stub_path = tmp_path / 'mod.pyi'
+        stub_path.write_text('FOO: int\n')
+
+        assert find_stub_file(raw_module) == stub_path
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import pickle
+from collections.abc import MutableMapping
+
 from docnote_extract._extraction import _ExtractionFinderLoader
 from docnote_extract._module_tree import ConfiguredModuleTreeNode
 from docnote_extract._summarization import SummaryMetadata
+from docnote_extract._summarization import _CrossrefNamespaceView
 from docnote_extract._summarization import summarize_module
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import GetattrTraversal
@@ -24,6 +28,65 @@ from docnote_extract_testutils.fixtures import purge_cached_testpkg_modules
 
 class TestSummarization:
 
+    @mocked_extraction_discovery([
+        'docnote_extract_testpkg',
+        'docnote_extract_testpkg.taevcode',
+        'docnote_extract_testpkg.taevcode.finnr',
+        'docnote_extract_testpkg.taevcode.finnr.money',])
+    @purge_cached_testpkg_modules
+    def test_crossref_namespaces_chained(self):
+        """Nested crossref namespaces must share their parents'
+        namespaces instead of copying them, while still containing all
+        of the parents' names -- including ones defined after the nested
+        member. They must be exposed read-only, and must survive
+        pickling.
+        """
+        floader = _ExtractionFinderLoader(
+            frozenset({'docnote_extract_testpkg'}),
+            nostub_packages=frozenset({'pytest'}),)
+        extraction = floader.discover_and_extract()
+        module_trees = ConfiguredModuleTreeNode.from_extraction(extraction)
+        normalized_objs = normalize_module_dict(
+            extraction['docnote_extract_testpkg.taevcode.finnr.money'],
+            module_trees['docnote_extract_testpkg'])
+        summary = summarize_module(
+            extraction['docnote_extract_testpkg.taevcode.finnr.money'],
+            normalized_objs,
+            module_trees['docnote_extract_testpkg'])
+        money_summary = summary / GetattrTraversal('Money')
+        rtm_summary = money_summary / GetattrTraversal('round_to_major')
+
+        module_namespace = summary.metadata.crossref_namespace
+        class_namespace = money_summary.metadata.crossref_namespace
+        method_namespace = rtm_summary.metadata.crossref_namespace
+
+        assert isinstance(class_namespace, _CrossrefNamespaceView)
+        assert isinstance(method_namespace, _CrossrefNamespaceView)
+        assert isinstance(module_namespace, _CrossrefNamespaceView)
+        assert not isinstance(class_namespace, MutableMapping)
+        module_map = module_namespace._namespace.maps[0]
+        assert class_namespace._namespace.maps[-1] is module_map
+        assert method_namespace._namespace.maps[-1] is module_map
+        # The class namespace was created partway through the module, so
+        # this also covers names added to the module after it.
+        assert set(module_namespace) <= set(class_namespace)
+        assert set(class_namespace) <= set(method_namespace)
+
+        # Note: we're only roundtripping crossrefs we just created, so
+        # there's no untrusted data being unpickled here.
+        reloaded_module, reloaded_class = pickle.loads(  # noqa: S301
+            pickle.dumps((module_namespace, class_namespace)))
+        assert dict(reloaded_class) == dict(class_namespace)
+        assert (
+            reloaded_class._namespace.maps[-1]
+            is reloaded_module._namespace.maps[0])
+
+        assert class_namespace['Money'] == money_summary.crossref
+        assert class_namespace['round_to_major'] == rtm_summary.crossref
+        assert method_namespace['Money'] == money_summary.crossref
+        assert '__signature_impl__' in method_namespace
+        assert '__signature_impl__' not in class_namespace
+
     # Ideally we'd have better test specificity here (ie, only be testing the
     # summarization code), but it's **much** faster to just grab real values
     # from the testpkg than it is to write a bunch of fakes.
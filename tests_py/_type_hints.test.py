@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Annotated
+from typing import ClassVar
+from typing import get_type_hints
+from unittest.mock import patch
+
+from docnote_extract import _type_hints
+from docnote_extract._type_hints import get_type_hints_cached
+from docnote_extract._type_hints import type_hint_cache
+
+
+class _Base:
+    foo: int
+    bar: ClassVar[str]
+
+
+class _Middle(_Base):
+    foo: Annotated[int, 'Overrides the base']
+    baz: _Base
+
+
+class _Leaf(_Middle):
+    zab: list[_Middle]
+
+
+def _func(foo: _Base, bar: Annotated[int, 'bar']) -> _Leaf: ...
+
+
+class TestGetTypeHintsCached:
+
+    def test_matches_get_type_hints(self):
+        """Cached hints for classes (including inherited and overridden
+        annotations) and callables must match the uncached hints.
+        """
+        with type_hint_cache(globals()):
+            for obj in (_Leaf, _Base, _Middle, _Leaf, _func, int):
+                assert get_type_hints_cached(obj, globals()) == (
+                    get_type_hints(
+                        obj, globalns=globals(), include_extras=True))
+
+    def test_bases_resolved_once(self):
+        """Within a single cache context, each class in a hierarchy
+        must only have its own annotations resolved once.
+        """
+        with (
+            patch.object(
+                _type_hints,
+                'get_type_hints',
+                wraps=get_type_hints) as get_type_hints_spy,
+            type_hint_cache(globals()),
+        ):
+            get_type_hints_cached(_Middle, globals())
+            get_type_hints_cached(_Leaf, globals())
+            get_type_hints_cached(_Leaf, globals())
+
+        # _Base, _Middle, _Leaf, and object
+        assert get_type_hints_spy.call_count == 4
+
+    def test_returns_copies(self):
+        """Modifying the returned hints must not affect the cache."""
+        with type_hint_cache(globals()):
+            hints = get_type_hints_cached(_func, globals())
+            hints.clear()
+            assert get_type_hints_cached(_func, globals())
+
+    def test_different_globals_uncached(self):
+        """Calls with globals other than the ones the cache is bound to
+        must not use the cache.
+        """
+        with (
+            patch.object(
+                _type_hints,
+                'get_type_hints',
+                wraps=get_type_hints) as get_type_hints_spy,
+            type_hint_cache({}),
+        ):
+            get_type_hints_cached(_Leaf, globals())
+            get_type_hints_cached(_Leaf, globals())
+
+        assert get_type_hints_spy.call_count == 2
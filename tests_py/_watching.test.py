@@ -0,0 +1,109 @@
+import importlib
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+from docnote_extract._watching import _SourceWatcher
+
+_PKG_NAME = 'watching_test_pkg'
+
+
+@pytest.fixture
+def raw_modules(tmp_path: Path) -> Iterator[dict[str, ModuleType]]:
+    """Creates (and imports) a small package, where ``b`` imports from
+    ``a``, and ``c`` doesn't import anything.
+    """
+    pkg_dir = tmp_path / _PKG_NAME
+    pkg_dir.mkdir()
+    (pkg_dir / '__init__.py').write_text('')
+    (pkg_dir / 'a.py').write_text('foo = 1\n')
+    (pkg_dir / 'b.py').write_text('from .a import foo\n')
+    (pkg_dir / 'c.py').write_text('bar = 2\n')
+
+    sys.path.insert(0, str(tmp_path))
+    try:
+        yield {
+            module_name: importlib.import_module(module_name)
+            for module_name in (
+                _PKG_NAME,
+                f'{_PKG_NAME}.a',
+                f'{_PKG_NAME}.b',
+                f'{_PKG_NAME}.c')}
+
+    finally:
+        sys.path.remove(str(tmp_path))
+        for module_name in list(sys.modules):
+            if module_name.partition('.')[0] == _PKG_NAME:
+                del sys.modules[module_name]
+
+
+def _get_path(module: ModuleType) -> Path:
+    assert module.__file__ is not None
+    return Path(module.__file__)
+
+
+def _touch(path: Path):
+    """Bumps the mtime, regardless of filesystem timestamp resolution.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestSourceWatcher:
+
+    def test_unchanged(self, raw_modules: dict[str, ModuleType]):
+        """Polling without any changes must return an empty set."""
+        watcher = _SourceWatcher.from_raw_modules(raw_modules)
+        assert watcher.poll() == frozenset()
+
+    def test_dependents_included(self, raw_modules: dict[str, ModuleType]):
+        """Changing a module must return it, plus the modules that
+        import it. Changing a package must also return its children.
+        Changes must only be reported once.
+        """
+        watcher = _SourceWatcher.from_raw_modules(raw_modules)
+        _touch(_get_path(raw_modules[f'{_PKG_NAME}.a']))
+
+        assert watcher.poll() == {f'{_PKG_NAME}.a', f'{_PKG_NAME}.b'}
+        assert watcher.poll() == frozenset()
+
+        _touch(_get_path(raw_modules[_PKG_NAME]))
+        assert watcher.poll() == raw_modules.keys()
+
+    def test_rename_over_not_restarted(
+            self,
+            raw_modules: dict[str, ModuleType]):
+        """Saving a module by renaming a tempfile over it must be
+        treated as a normal change, and not a structural one.
+        """
+        watcher = _SourceWatcher.from_raw_modules(raw_modules)
+        module_path = _get_path(raw_modules[f'{_PKG_NAME}.c'])
+        temp_path = module_path.with_suffix('.py.tmp')
+        temp_path.write_text('bar = 3\n')
+        os.replace(temp_path, module_path)
+        _touch(module_path)
+        _touch(module_path.parent)
+
+        assert watcher.poll() == {f'{_PKG_NAME}.c'}
+
+    def test_new_module_restarts(self, raw_modules: dict[str, ModuleType]):
+        """Adding a module must require a restart."""
+        watcher = _SourceWatcher.from_raw_modules(raw_modules)
+        pkg_dir = _get_path(raw_modules[_PKG_NAME]).parent
+        (pkg_dir / 'd.py').write_text('')
+        _touch(pkg_dir)
+
+        assert watcher.poll() is None
+
+    def test_restart_modules(self, raw_modules: dict[str, ModuleType]):
+        """Changing one of the restart modules must require a restart.
+        """
+        watcher = _SourceWatcher.from_raw_modules(
+            raw_modules, restart_modules=frozenset({f'{_PKG_NAME}.c'}))
+        _touch(_get_path(raw_modules[f'{_PKG_NAME}.c']))
+
+        assert watcher.poll() is None
@@ -1,3 +1,7 @@
+import pickle
+
+import pytest
+
 from docnote_extract.crossrefs import CallTraversal
 from docnote_extract.crossrefs import Crossref
 from docnote_extract.crossrefs import CrossrefMetaclass
@@ -38,6 +42,14 @@ class TestMakeMetaclassCrossref:
         assert has_crossreffed_metaclass(TestClass)
         assert type(TestClass) is type
 
+    def test_interned(self):
+        """Metaclass reftypes for the same module and name must be the
+        same class.
+        """
+        retval1 = make_metaclass_crossreffed(module='foo', name='Bar')
+        retval2 = make_metaclass_crossreffed(module='foo', name='Bar')
+        assert retval1 is retval2
+
 
 class TestMakeCrossref:
 
@@ -86,6 +98,63 @@ class TestMakeCrossref:
         assert has_crossreffed_base(TestClass)
         assert type(TestClass) is type
 
+    def test_interned(self):
+        """Reftypes for equal crossrefs must be the same class, as long
+        as the first one is still alive.
+        """
+        retval1 = make_crossreffed(module='foo', name='Bar')
+        retval2 = make_crossreffed(module='foo', name='Bar')
+        retval3 = make_crossreffed(module='foo', name='Baz')
+        assert retval1 is retval2
+        assert retval1 is not retval3
+
+        assert retval1.zab is retval2.zab
+        assert retval1['zab'] is retval2['zab']
+        assert retval1(1, zab=2) is retval2(1, zab=2)
+        assert retval1(1, zab=2) is not retval2(1, zab=3)
+
+    def test_interned_type_strict(self):
+        """Reftypes for crossrefs that are equal but have traversal
+        values of different types (``True == 1``) must be separate
+        classes, each with its own exact metadata.
+        """
+        retval = make_crossreffed(module='foo', name='Bar')
+        by_int = retval(1)
+        by_bool = retval(True)
+
+        assert by_int is not by_bool
+        assert by_int is retval(1)
+        traversal = by_bool._docnote_extract_metadata.traversals[0]
+        assert isinstance(traversal, CallTraversal)
+        assert type(traversal.args[0]) is bool
+
+    def test_unhashable_not_interned(self):
+        """Reftypes with unhashable traversals must still be created
+        successfully, even though they can't be interned.
+        """
+        retval = make_crossreffed(module='foo', name='Bar')
+        traversed = retval[[1, 2]]
+        called = retval(zab=[1, 2])
+
+        assert is_crossreffed(traversed)
+        assert traversed._docnote_extract_metadata.traversals == (
+            GetitemTraversal([1, 2]),)
+        assert is_crossreffed(called)
+        assert called._docnote_extract_metadata.traversals == (
+            CallTraversal(args=(), kwargs={'zab': [1, 2]}),)
+
+
+class TestCallTraversal:
+
+    def test_hash(self):
+        """Call traversals with hashable args and kwargs must be
+        hashable, independently of kwarg order.
+        """
+        traversal1 = CallTraversal(args=(1,), kwargs={'foo': 1, 'bar': 2})
+        traversal2 = CallTraversal(args=(1,), kwargs={'bar': 2, 'foo': 1})
+        assert traversal1 == traversal2
+        assert hash(traversal1) == hash(traversal2)
+
 
 class TestCrossrefMetaclass:
 
@@ -210,3 +279,72 @@ class TestCrossref:
         assert result is not before
         assert result.traversals == (GetattrTraversal('baz'),)
         assert result.toplevel_name == 'bar'
+
+    def test_interned(self):
+        """Equal crossrefs must be the same instance, including after
+        traversal and pickling roundtrips.
+        """
+        crossref1 = Crossref(module_name='foo', toplevel_name='bar')
+        crossref2 = Crossref(
+            module_name='foo',
+            toplevel_name='bar',
+            traversals=())
+        child = crossref1 / GetattrTraversal('baz')
+
+        assert crossref1 is crossref2
+        assert hash(crossref1) == hash(('foo', 'bar', ()))
+        assert child is crossref2 / GetattrTraversal('baz')
+        assert child is Crossref(
+            module_name='foo',
+            toplevel_name='bar',
+            traversals=(GetattrTraversal('baz'),))
+        # Note: we're only roundtripping a crossref we just created, so
+        # there's no untrusted data being unpickled here.
+        assert pickle.loads(pickle.dumps(child)) is child  # noqa: S301
+
+    def test_interned_type_strict(self):
+        """Crossrefs whose traversal values are equal but of different
+        types (``True == 1 == 1.0``) must not be interned together,
+        whether created directly or by traversal.
+        """
+        parent = Crossref(module_name='foo', toplevel_name='bar')
+        by_int = parent / CallTraversal(args=(1,), kwargs={'a': (1,)})
+        by_bool = parent / CallTraversal(args=(True,), kwargs={'a': (1,)})
+        by_kwarg = parent / CallTraversal(args=(1,), kwargs={'a': (1.0,)})
+        by_key = parent / GetitemTraversal(1)
+        direct = Crossref(
+            module_name='foo',
+            toplevel_name='bar',
+            traversals=(GetitemTraversal(True),))
+
+        bool_traversal = by_bool.traversals[0]
+        kwarg_traversal = by_kwarg.traversals[0]
+        key_traversal = direct.traversals[0]
+        assert isinstance(bool_traversal, CallTraversal)
+        assert isinstance(kwarg_traversal, CallTraversal)
+        assert isinstance(key_traversal, GetitemTraversal)
+
+        assert by_int == by_bool == by_kwarg
+        assert by_int is not by_bool
+        assert by_int is not by_kwarg
+        assert type(bool_traversal.args[0]) is bool
+        assert type(kwarg_traversal.kwargs['a'][0]) is float
+        assert by_key == direct
+        assert by_key is not direct
+        assert type(key_traversal.key) is bool
+        assert by_int is parent / CallTraversal(args=(1,), kwargs={'a': (1,)})
+
+    def test_unhashable_not_interned(self):
+        """Crossrefs with unhashable traversals must still be
+        creatable and comparable, but must not be interned (and must
+        raise TypeError when hashed).
+        """
+        parent = Crossref(module_name='foo', toplevel_name='bar')
+
+        child1 = parent / CallTraversal(args=([],), kwargs={})
+        child2 = parent / CallTraversal(args=([],), kwargs={})
+
+        assert child1 == child2
+        assert child1 is not child2
+        with pytest.raises(TypeError):
+            hash(child1)
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import importlib
+import importlib.util
+import os
+import sys
+import zipfile
+from pathlib import Path
 from unittest.mock import patch
 
 from docnote import ReftypeMarker
 
+from docnote_extract.discovery import _prescan_special_reftype_candidates
 from docnote_extract.discovery import eager_import_submodules
 from docnote_extract.discovery import find_special_reftypes
+from docnote_extract.discovery import scan_firstparty_modules
 
 from docnote_extract_testpkg._hand_rolled import defines_1p_metaclass
 from docnote_extract_testpkg._hand_rolled import imports_3p_metaclass
@@ -89,6 +96,141 @@ class TestEagerImportSubmodules:
             'docnote_extract_testpkg._hand_rolled.uses_import_names',}
 
 
+def _make_source_tree(root: Path, relpaths: list[str]):
+    for relpath in relpaths:
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('')
+
+
+class TestScanFirstpartyModules:
+
+    def test_handrolled(self):
+        """Scanning the handrolled test submodule must find the same
+        modules as eager importing, without importing any of them.
+        """
+        with patch(
+            'docnote_extract.discovery.import_module',
+            autospec=True,
+        ) as import_module_mock:
+            retval = scan_firstparty_modules(
+                ['docnote_extract_testpkg._hand_rolled'])
+
+        import_module_mock.assert_not_called()
+        assert retval == {
+            'docnote_extract_testpkg._hand_rolled',
+            'docnote_extract_testpkg._hand_rolled.child1',
+            'docnote_extract_testpkg._hand_rolled.child1._private',
+            'docnote_extract_testpkg._hand_rolled.child2',
+            'docnote_extract_testpkg._hand_rolled.child2.nested_child',
+            'docnote_extract_testpkg._hand_rolled.child2.some_sibling',
+            'docnote_extract_testpkg._hand_rolled.defines_1p_metaclass',
+            'docnote_extract_testpkg._hand_rolled.has_typevars',
+            'docnote_extract_testpkg._hand_rolled.imports_3p_metaclass',
+            'docnote_extract_testpkg._hand_rolled.imports_1p_metaclass',
+            'docnote_extract_testpkg._hand_rolled.imports_from_parent',
+            'docnote_extract_testpkg._hand_rolled.subclasses_3p_class',
+            'docnote_extract_testpkg._hand_rolled.noteworthy',
+            'docnote_extract_testpkg._hand_rolled.relativity',
+            'docnote_extract_testpkg._hand_rolled.uses_import_names',}
+
+    def test_exclude_and_namespace(self, tmp_path: Path):
+        """Excluded packages must be skipped along with all of their
+        submodules. Namespace packages must only be included when
+        requested, and only if they contain modules.
+        """
+        _make_source_tree(tmp_path, [
+            'scanpkg/__init__.py',
+            'scanpkg/foo.py',
+            'scanpkg/tests/__init__.py',
+            'scanpkg/tests/test_foo.py',
+            'scanpkg/nspkg/bar.py',
+            'scanpkg/data/foo.txt',
+            'scanpkg/not-an-identifier/baz.py',])
+
+        with patch.object(sys, 'path', [str(tmp_path), *sys.path]):
+            without_namespaces = scan_firstparty_modules(
+                ['scanpkg'], exclude=['scanpkg.tests'])
+            with_namespaces = scan_firstparty_modules(
+                ['scanpkg'],
+                exclude=['scanpkg.tests'],
+                namespace_packages=True)
+
+        assert without_namespaces == {'scanpkg', 'scanpkg.foo'}
+        assert with_namespaces == {
+            'scanpkg', 'scanpkg.foo', 'scanpkg.nspkg', 'scanpkg.nspkg.bar'}
+
+    def test_cache(self, tmp_path: Path):
+        """Cached scans must be reused as long as none of the scanned
+        directories change, and must be invalidated when a module is
+        added.
+        """
+        source_root = tmp_path / 'src'
+        cache_path = tmp_path / 'cache' / 'discovery.json'
+        _make_source_tree(source_root, [
+            'scanpkg/__init__.py',
+            'scanpkg/child/__init__.py',])
+
+        with patch.object(sys, 'path', [str(source_root), *sys.path]):
+            first_scan = scan_firstparty_modules(
+                ['scanpkg'], cache_path=cache_path)
+            with patch(
+                'docnote_extract.discovery._scan_package_dirs',
+                autospec=True,
+            ) as scan_mock:
+                second_scan = scan_firstparty_modules(
+                    ['scanpkg'], cache_path=cache_path)
+
+            scan_mock.assert_not_called()
+            assert first_scan == second_scan == {'scanpkg', 'scanpkg.child'}
+
+            new_module_path = source_root / 'scanpkg' / 'child' / 'new.py'
+            new_module_path.write_text('')
+            # Make sure the change is visible, even on filesystems with
+            # coarse mtime resolution
+            child_dir = new_module_path.parent
+            child_mtime_ns = os.stat(child_dir).st_mtime_ns
+            os.utime(child_dir, ns=(child_mtime_ns, child_mtime_ns + 10**9))
+            third_scan = scan_firstparty_modules(
+                ['scanpkg'], cache_path=cache_path)
+
+        assert third_scan == {'scanpkg', 'scanpkg.child', 'scanpkg.child.new'}
+
+
+    def test_wheel(self, tmp_path: Path):
+        """Packages within zip archives (ie, wheels) must be scanned
+        from the archive contents -- including directories without
+        explicit archive entries -- and their cached scans must be
+        invalidated when the archive changes.
+        """
+        wheel_path = tmp_path / 'scanpkg-1.0-py3-none-any.whl'
+        cache_path = tmp_path / 'cache' / 'discovery.json'
+        with zipfile.ZipFile(wheel_path, 'w') as wheel:
+            wheel.writestr('scanpkg/__init__.py', '')
+            wheel.writestr('scanpkg/foo.py', '')
+            wheel.writestr('scanpkg/child/__init__.py', '')
+            wheel.writestr('scanpkg/child/bar.py', '')
+            wheel.writestr('scanpkg/data/foo.txt', '')
+            wheel.writestr('scanpkg-1.0.dist-info/METADATA', '')
+
+        with patch.object(sys, 'path', [str(wheel_path), *sys.path]):
+            first_scan = scan_firstparty_modules(
+                ['scanpkg'], cache_path=cache_path)
+
+            with zipfile.ZipFile(wheel_path, 'a') as wheel:
+                wheel.writestr('scanpkg/new.py', '')
+            # Make sure the change is visible, even on filesystems with
+            # coarse mtime resolution
+            wheel_mtime_ns = os.stat(wheel_path).st_mtime_ns
+            os.utime(wheel_path, ns=(wheel_mtime_ns, wheel_mtime_ns + 10**9))
+            second_scan = scan_firstparty_modules(
+                ['scanpkg'], cache_path=cache_path)
+
+        assert first_scan == {
+            'scanpkg', 'scanpkg.foo', 'scanpkg.child', 'scanpkg.child.bar'}
+        assert second_scan == first_scan | {'scanpkg.new'}
+
+
 class TestFindSpecialReftypes:
 
     @purge_cached_testpkg_modules
@@ -107,3 +249,119 @@ class TestFindSpecialReftypes:
         assert crossref.toplevel_name == 'Mcls1p'
         assert not crossref.traversals
         assert marker is ReftypeMarker.METACLASS
+
+    @purge_cached_testpkg_modules
+    def test_prescan_matches_exhaustive(self):
+        """Finding special reftypes with the prescan must return the same
+        results as the exhaustive inspection.
+        """
+        modules = [defines_1p_metaclass, imports_3p_metaclass, noteworthy]
+
+        assert find_special_reftypes(modules) == find_special_reftypes(
+            modules, prescan=False)
+
+    @purge_cached_testpkg_modules
+    def test_cache(self, tmp_path: Path):
+        """Cached special reftypes must be reused for unchanged modules,
+        without inspecting them again.
+        """
+        modules = [defines_1p_metaclass, imports_3p_metaclass, noteworthy]
+        cache_path = tmp_path / 'special_reftypes.json'
+
+        first_retval = find_special_reftypes(modules, cache_path=cache_path)
+        with patch(
+            'docnote_extract.discovery._find_module_special_reftypes',
+            autospec=True,
+        ) as find_mock:
+            second_retval = find_special_reftypes(
+                modules, cache_path=cache_path)
+
+        find_mock.assert_not_called()
+        assert len(first_retval) == 1
+        assert first_retval == second_retval
+
+    def test_call_form(self, tmp_path: Path):
+        """Special reftypes marked by calling ``docnote`` directly
+        (instead of as a decorator) must still be found when using the
+        prescan.
+        """
+        module_path = tmp_path / 'call_form_markers.py'
+        module_path.write_text('\n'.join([
+            'from docnote import DocnoteConfig',
+            'from docnote import ReftypeMarker',
+            'from docnote import docnote',
+            'class _Meta(type): ...',
+            'Meta = docnote(DocnoteConfig(',
+            '    mark_special_reftype=ReftypeMarker.METACLASS))(_Meta)',]))
+        spec = importlib.util.spec_from_file_location(
+            'call_form_markers', module_path)
+        assert spec is not None
+        assert spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        retval = find_special_reftypes([module])
+
+        assert retval == find_special_reftypes([module], prescan=False)
+        assert {crossref.toplevel_name for crossref in retval} == {
+            '_Meta', 'Meta'}
+        assert set(retval.values()) == {ReftypeMarker.METACLASS}
+
+
+class TestPrescanSpecialReftypeCandidates:
+
+    def test_decorated(self):
+        """Toplevel objects must be candidates if they, or anything
+        defined within them, have a non-inert decorator. Inert
+        decorators must be ignored.
+        """
+        source = '\n'.join([
+            'from dataclasses import dataclass',
+            '@docnote(CONFIG)',
+            'class Marked: ...',
+            'class Container:',
+            '    @some_decorator',
+            '    class Nested: ...',
+            '    @property',
+            '    def foo(self): ...',
+            '    @foo.setter',
+            '    def foo(self, value): ...',
+            '@dataclass',
+            'class Inert: ...',
+            'def undecorated(): ...',])
+
+        assert _prescan_special_reftype_candidates(source) == {
+            'Marked', 'Container'}
+
+    def test_call_assignments(self):
+        """Toplevel names assigned to from a call must be candidates,
+        as must toplevel classes with call assignments in their bodies.
+        Assignments without calls must be ignored.
+        """
+        source = '\n'.join([
+            'Meta = docnote(CONFIG)(_Meta)',
+            'annotated: type = make_class()',
+            'class Container:',
+            '    Nested = docnote(CONFIG)(_Nested)',
+            'alias = Meta',])
+
+        assert _prescan_special_reftype_candidates(source) == {
+            'Meta', 'annotated', 'Container'}
+
+    def test_inspect_everything(self):
+        """Decorated classes within function bodies, bare calls,
+        call assignments within loops, and unparseable sources must
+        require inspecting the whole module.
+        """
+        factory_source = '\n'.join([
+            'def factory():',
+            '    @docnote(CONFIG)',
+            '    class Marked: ...',
+            '    return Marked',])
+
+        assert _prescan_special_reftype_candidates(factory_source) is None
+        assert _prescan_special_reftype_candidates('class (') is None
+        assert _prescan_special_reftype_candidates(
+            'docnote(CONFIG)(_Meta)') is None
+        assert _prescan_special_reftype_candidates(
+            'for cls in classes:\n    marked = docnote(CONFIG)(cls)') is None
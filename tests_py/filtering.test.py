@@ -11,6 +11,7 @@ from docnote_extract.filtering import _is_dunder
 from docnote_extract.filtering import filter_canonical_ownership
 from docnote_extract.filtering import filter_module_summaries
 from docnote_extract.filtering import filter_private_summaries
+from docnote_extract.filtering import is_module_included
 from docnote_extract.summaries import ClassSummary
 from docnote_extract.summaries import ModuleSummary
 from docnote_extract.summaries import VariableSummary
@@ -460,6 +461,52 @@ class TestFilterModuleSummaries:
         assert not hasattr(foobar_metadata, 'to_document')
 
 
+class TestIsModuleIncluded:
+
+    def test_matches_tree_filtering(self):
+        """The inclusion of individual modules must match the result of
+        filtering the whole module tree, including private modules,
+        forced inclusion, and forced exclusion (and their children).
+        """
+        configured_root = ConfiguredModuleTreeNode(
+            'foo',
+            'foo',
+            {'_bar': ConfiguredModuleTreeNode(
+                'foo._bar',
+                '_bar',
+                {'baz': ConfiguredModuleTreeNode(
+                    'foo._bar.baz',
+                    'baz',
+                    effective_config=DocnoteConfig(),)},
+                effective_config=DocnoteConfig(),),
+            '_oof': ConfiguredModuleTreeNode(
+                'foo._oof',
+                '_oof',
+                {'rab': ConfiguredModuleTreeNode(
+                    'foo._oof.rab',
+                    'rab',
+                    effective_config=DocnoteConfig(),)},
+                effective_config=DocnoteConfig(include_in_docs=True),),
+            'zab': ConfiguredModuleTreeNode(
+                'foo.zab',
+                'zab',
+                {'__init__': ConfiguredModuleTreeNode(
+                    'foo.zab.__init__',
+                    '__init__',
+                    effective_config=DocnoteConfig(),)},
+                effective_config=DocnoteConfig(include_in_docs=False),)},
+            effective_config=DocnoteConfig(),)
+
+        assert is_module_included(configured_root, 'foo') is True
+        assert is_module_included(configured_root, 'foo._bar') is False
+        assert is_module_included(configured_root, 'foo._bar.baz') is False
+        assert is_module_included(configured_root, 'foo._oof') is True
+        assert is_module_included(configured_root, 'foo._oof.rab') is True
+        assert is_module_included(configured_root, 'foo.zab') is False
+        assert is_module_included(
+            configured_root, 'foo.zab.__init__') is False
+
+
 class TestFilterCanonicalOwnership:
 
     def test_inplace_and_recursive(self):
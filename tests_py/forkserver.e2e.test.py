@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from docnote import ReftypeMarker
+
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.exceptions import ExtractionWorkerError
+from docnote_extract.forkserver import gather_via_forkserver
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork'), reason='Requires os.fork')
+
+
+@pytest.fixture
+def forkserver_socket(tmp_path: Path) -> Iterator[Path]:
+    """Runs a fork server (via the CLI) for the duration of the test,
+    returning the path to its socket.
+    """
+    socket_path = tmp_path / 'forkserver.sock'
+    # The argv is entirely internal: our own interpreter and CLI, plus a
+    # temporary socket path.
+    process = subprocess.Popen(  # noqa: S603
+        [
+            sys.executable, '-m', 'docnote_extract', 'forkserver',
+            str(socket_path), '--preload', 'docnote_extract_testutils'],
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)})
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.exists():
+            assert process.poll() is None, 'Fork server exited early'
+            assert time.monotonic() < deadline, 'Fork server never started'
+            time.sleep(.05)
+
+        yield socket_path
+
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class TestForkserverE2E:
+
+    def test_gather(self, forkserver_socket: Path):
+        """Gathering via the fork server must return the summaries for
+        the requested packages.
+        """
+        docs = gather_via_forkserver(
+            forkserver_socket,
+            ['docnote_extract_testpkg'],
+            special_reftype_markers={
+                Crossref(
+                    module_name='docnote_extract_testutils.for_handrolled',
+                    toplevel_name='ThirdpartyMetaclass'):
+                ReftypeMarker.METACLASS})
+
+        (pkg_name, tree_root), = docs.summaries.items()
+        assert pkg_name == 'docnote_extract_testpkg'
+        assert tree_root.find('docnote_extract_testpkg.taevcode.finnr.money')
+
+    def test_failure_raises(self, forkserver_socket: Path):
+        """Failed requests must raise ``ExtractionWorkerError``, and
+        must not affect the server's ability to serve later requests.
+        """
+        with pytest.raises(ExtractionWorkerError):
+            gather_via_forkserver(
+                forkserver_socket, ['docnote_extract_nonexistent_pkg'])
+
+        with pytest.raises(ExtractionWorkerError):
+            gather_via_forkserver(
+                forkserver_socket, ['docnote_extract_nonexistent_pkg'])
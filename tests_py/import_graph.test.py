@@ -0,0 +1,105 @@
+import json
+
+from docnote_extract._extraction import _record_import_edges
+from docnote_extract.import_graph import ImportEdge
+from docnote_extract.import_graph import ImportGraph
+from docnote_extract.import_graph import ImportStrategy
+from docnote_extract.import_graph import _activate_import_graph
+from docnote_extract.import_graph import _get_active_import_graph
+
+
+def _exec_as(module_name: str, source: str, *, package: str | None = None):
+    exec(  # noqa: S102
+        source, {'__name__': module_name, '__package__': package})
+
+
+class TestRecordImportEdges:
+
+    def test_inactive(self):
+        """Without an active import graph, recording must be a no-op
+        that leaves ``__import__`` untouched.
+        """
+        real_import = __import__
+        assert _get_active_import_graph() is None
+        with _record_import_edges('foo'):
+            assert __import__ is real_import
+            _exec_as('foo', 'import json')
+
+    def test_active(self):
+        """With an active import graph, imports must be recorded with
+        the executing module as the importer, including any submodules
+        in the fromlist. ``__import__`` must be restored afterwards.
+        """
+        real_import = __import__
+        import_graph = ImportGraph()
+        with (
+            _activate_import_graph(import_graph),
+            _record_import_edges('foo'),
+        ):
+            _exec_as('foo', 'import json\nfrom email import message')
+            _exec_as('bar', 'from os import path')
+
+        assert __import__ is real_import
+        assert _get_active_import_graph() is None
+        # Note: this is a subset check, because (if they weren't already
+        # imported) the stdlib modules might record their own imports, too
+        assert import_graph.edges >= {
+            ImportEdge('foo', 'json', ImportStrategy.UNHOOKED, 'foo'),
+            ImportEdge('foo', 'email', ImportStrategy.UNHOOKED, 'foo'),
+            ImportEdge(
+                'foo', 'email.message', ImportStrategy.UNHOOKED, 'foo'),
+            ImportEdge('bar', 'os', ImportStrategy.UNHOOKED, 'foo'),
+            ImportEdge('bar', 'os.path', ImportStrategy.UNHOOKED, 'foo')}
+
+    def test_relative(self):
+        """Relative imports must be recorded using the absolute name of
+        the imported module.
+        """
+        import_graph = ImportGraph()
+        with (
+            _activate_import_graph(import_graph),
+            _record_import_edges('email.foo'),
+        ):
+            _exec_as('email.foo', 'from . import message', package='email')
+
+        assert ImportEdge(
+            'email.foo', 'email.message', ImportStrategy.UNHOOKED,
+            'email.foo') in import_graph.edges
+
+
+class TestImportGraph:
+
+    def test_lookups(self):
+        """Looking up imports and importers must only return the
+        matching edges.
+        """
+        edge1 = ImportEdge('foo', 'bar', ImportStrategy.STUB, 'foo')
+        edge2 = ImportEdge('foo', 'baz', ImportStrategy.TRACK, 'foo')
+        edge3 = ImportEdge('baz', 'bar', ImportStrategy.UNHOOKED, 'foo')
+        import_graph = ImportGraph({edge1, edge2, edge3})
+
+        assert import_graph.imports_of('foo') == {edge1, edge2}
+        assert import_graph.importers_of('bar') == {'foo', 'baz'}
+        assert import_graph.importers_of('foo') == frozenset()
+
+    def test_merge(self):
+        """Merging graphs must combine their edges."""
+        edge1 = ImportEdge('foo', 'bar', ImportStrategy.STUB, 'foo')
+        edge2 = ImportEdge('baz', 'bar', ImportStrategy.STUB, 'baz')
+        import_graph = ImportGraph({edge1})
+        import_graph.merge(ImportGraph({edge1, edge2}))
+
+        assert import_graph.edges == {edge1, edge2}
+
+    def test_as_dict(self):
+        """The dict version of the graph must be JSON-serializable."""
+        import_graph = ImportGraph({
+            ImportEdge('foo', 'bar', ImportStrategy.TRACK, 'foo')})
+
+        roundtripped = json.loads(json.dumps(import_graph.as_dict()))
+        assert roundtripped == {
+            'edges': [{
+                'importer': 'foo',
+                'imported': 'bar',
+                'stub_strategy': 'track',
+                'inspected_module': 'foo'}]}
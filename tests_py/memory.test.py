@@ -0,0 +1,100 @@
+import json
+import tracemalloc
+
+from docnote_extract.memory import MemoryCheckpoint
+from docnote_extract.memory import MemoryReport
+from docnote_extract.memory import _activate_memory_report
+from docnote_extract.memory import _get_active_memory_report
+from docnote_extract.memory import _record_retained_bytes
+from docnote_extract.memory import _take_memory_checkpoint
+from docnote_extract.stats import GatherPhase
+
+
+class TestRecording:
+
+    def test_inactive(self):
+        """Recording without an active report must be a no-op, and must
+        not start tracemalloc.
+        """
+        assert _get_active_memory_report() is None
+        _take_memory_checkpoint('foo')
+        _record_retained_bytes('foo', [object()])
+        assert not tracemalloc.is_tracing()
+
+    def test_checkpoint(self):
+        """Activating a report must trace allocations for the duration
+        of the activation, and checkpoints must include the traced
+        memory and its top allocation sites.
+        """
+        report = MemoryReport()
+        with _activate_memory_report(report):
+            assert tracemalloc.is_tracing()
+            allocated = [bytearray(1024) for _ in range(100)]
+            _take_memory_checkpoint('allocated')
+            del allocated
+
+        assert _get_active_memory_report() is None
+        assert not tracemalloc.is_tracing()
+        checkpoint, = report.checkpoints
+        assert checkpoint.label == 'allocated'
+        assert checkpoint.traced_bytes >= 100 * 1024
+        assert checkpoint.traced_peak_bytes >= checkpoint.traced_bytes
+        assert checkpoint.top_sites
+        assert not any(
+            site.filename == tracemalloc.__file__
+            for site in checkpoint.top_sites)
+
+    def test_retained_bytes(self):
+        """Retained bytes must include everything reachable from the
+        roots, but must not descend into modules.
+        """
+        report = MemoryReport()
+        payload = bytearray(10_000)
+        with _activate_memory_report(report):
+            _record_retained_bytes('small', [{'foo': json}])
+            _record_retained_bytes('large', [{'foo': [payload]}])
+
+        assert report.retained_bytes['small'] < 10_000
+        assert report.retained_bytes['large'] >= 10_000
+
+
+class TestMemoryReport:
+
+    def test_merge(self):
+        """Merging reports must combine the checkpoints, and sum the
+        per-phase and retained bytes.
+        """
+        checkpoint1 = MemoryCheckpoint('foo', 1, 1, 1, None, ())
+        checkpoint2 = MemoryCheckpoint('foo', 2, 2, 2, None, ())
+        report1 = MemoryReport(
+            checkpoints=[checkpoint1],
+            phase_net_bytes={GatherPhase.SUMMARIZATION: 1},
+            retained_bytes={'summaries': 1})
+        report2 = MemoryReport(
+            checkpoints=[checkpoint2],
+            phase_net_bytes={
+                GatherPhase.SUMMARIZATION: 2,
+                GatherPhase.FILTERING: 3},
+            retained_bytes={'summaries': 2})
+
+        report1.merge(report2)
+
+        assert report1.checkpoints == [checkpoint1, checkpoint2]
+        assert report1.phase_net_bytes == {
+            GatherPhase.SUMMARIZATION: 3,
+            GatherPhase.FILTERING: 3}
+        assert report1.retained_bytes == {'summaries': 3}
+
+    def test_report(self):
+        """The report must mention every checkpoint, and the dict
+        version must be JSON-serializable.
+        """
+        report = MemoryReport(
+            checkpoints=[MemoryCheckpoint('hooked', 1, 1, 1, None, ())],
+            phase_net_bytes={GatherPhase.SUMMARIZATION: 1},
+            retained_bytes={'summaries': 1})
+
+        assert 'hooked' in report.format_report()
+        roundtripped = json.loads(json.dumps(report.as_dict()))
+        assert roundtripped['phase_net_bytes'] == {
+            GatherPhase.SUMMARIZATION.value: 1}
@@ -0,0 +1,100 @@
+import json
+import time
+
+from docnote_extract.crossrefs import Crossref
+from docnote_extract.crossrefs import GetattrTraversal
+from docnote_extract.profiling import ProfileEntry
+from docnote_extract.profiling import SummaryProfile
+from docnote_extract.profiling import _activate_profile
+from docnote_extract.profiling import _get_active_profile
+from docnote_extract.profiling import _profile_summary
+
+_MODULE = Crossref(module_name='foo', toplevel_name=None)
+_CLASS = Crossref(module_name='foo', toplevel_name='Foo')
+_METHOD = _CLASS / GetattrTraversal('bar')
+
+
+class TestProfileSummary:
+
+    def test_inactive(self):
+        """Profiling without an active profile must be a no-op."""
+        assert _get_active_profile() is None
+        with _profile_summary(_MODULE, 'ModuleSummary'):
+            pass
+
+    def test_nested(self):
+        """Nested summaries must count towards the inclusive, but not
+        the exclusive, time of their parents. Summaries without a
+        crossref must count towards the exclusive time of their parent.
+        """
+        profile = SummaryProfile()
+        with _activate_profile(profile):
+            with _profile_summary(_CLASS, 'ClassSummary'):
+                with _profile_summary(None, 'VariableSummary'):
+                    time.sleep(.01)
+                with _profile_summary(_METHOD, 'CallableSummary'):
+                    time.sleep(.02)
+
+        assert _get_active_profile() is None
+        assert profile.entries.keys() == {_CLASS, _METHOD}
+        class_entry = profile.entries[_CLASS]
+        method_entry = profile.entries[_METHOD]
+        assert class_entry.call_count == method_entry.call_count == 1
+        assert class_entry.inclusive_seconds >= .03
+        assert .01 <= class_entry.exclusive_seconds < .02
+        assert method_entry.exclusive_seconds >= .02
+        assert class_entry.inclusive_seconds >= (
+            class_entry.exclusive_seconds + method_entry.inclusive_seconds)
+
+    def test_repeated(self):
+        """Repeated summaries of the same crossref (for example,
+        anonymous overloads) must accumulate into a single entry.
+        """
+        profile = SummaryProfile()
+        with _activate_profile(profile):
+            for _ in range(3):
+                with _profile_summary(_METHOD, 'SignatureSummary'):
+                    pass
+
+        assert profile.entries[_METHOD].call_count == 3
+
+
+class TestSummaryProfile:
+
+    def test_top(self):
+        """The top entries must be sorted by the requested time."""
+        profile = SummaryProfile({
+            _MODULE: ProfileEntry(_MODULE, 'ModuleSummary', 1, 3, 1),
+            _CLASS: ProfileEntry(_CLASS, 'ClassSummary', 1, 2, 2)})
+
+        assert [entry.crossref for entry in profile.top(1)] == [_CLASS]
+        assert [
+            entry.crossref for entry in profile.top(by='inclusive')
+        ] == [_MODULE, _CLASS]
+
+    def test_merge(self):
+        """Merging profiles must sum the entries for the same crossref.
+        """
+        profile1 = SummaryProfile({
+            _CLASS: ProfileEntry(_CLASS, 'ClassSummary', 1, 2, 1)})
+        profile2 = SummaryProfile({
+            _CLASS: ProfileEntry(_CLASS, 'ClassSummary', 2, 2, 2),
+            _METHOD: ProfileEntry(_METHOD, 'CallableSummary', 1, 1, 1)})
+
+        profile1.merge(profile2)
+
+        assert profile1.entries == {
+            _CLASS: ProfileEntry(_CLASS, 'ClassSummary', 3, 4, 3),
+            _METHOD: ProfileEntry(_METHOD, 'CallableSummary', 1, 1, 1)}
+
+    def test_report(self):
+        """The report and the dict version must describe the crossrefs
+        in a human-readable way, and the dict version must be
+        JSON-serializable.
+        """
+        profile = SummaryProfile({
+            _METHOD: ProfileEntry(_METHOD, 'CallableSummary', 1, 1, 1)})
+
+        assert 'foo:Foo.bar' in profile.format_report()
+        roundtripped = json.loads(json.dumps(profile.as_dict()))
+        assert roundtripped['entries'][0]['crossref'] == 'foo:Foo.bar'
@@ -0,0 +1,119 @@
+import json
+
+from docnote_extract.stats import GatherPhase
+from docnote_extract.stats import GatherStats
+from docnote_extract.stats import PhaseTiming
+from docnote_extract.stats import _activate_stats
+from docnote_extract.stats import _count_crossreffed_class
+from docnote_extract.stats import _get_active_stats
+from docnote_extract.stats import _record_phase
+
+
+class TestRecordPhase:
+
+    def test_inactive(self):
+        """Recording a phase without active stats must be a no-op."""
+        assert _get_active_stats() is None
+        with _record_phase(GatherPhase.EXTRACTION, 'foo'):
+            pass
+        _count_crossreffed_class()
+
+    def test_active(self):
+        """Recording a phase with active stats must add its timing to
+        the phase, and to the per-module timings for the correct kind
+        of phase.
+        """
+        stats = GatherStats()
+        with _activate_stats(stats):
+            with _record_phase(GatherPhase.EXTRACTION, 'foo'):
+                pass
+            with _record_phase(GatherPhase.NORMALIZATION, 'foo'):
+                pass
+            with _record_phase(GatherPhase.SUMMARIZATION, 'foo'):
+                pass
+            with _record_phase(GatherPhase.EXPLORATION):
+                pass
+            _count_crossreffed_class()
+
+        assert _get_active_stats() is None
+        assert set(stats.phase_timings) == {
+            GatherPhase.EXTRACTION,
+            GatherPhase.NORMALIZATION,
+            GatherPhase.SUMMARIZATION,
+            GatherPhase.EXPLORATION}
+        assert set(stats.module_extraction_seconds) == {'foo'}
+        assert set(stats.module_summarization_seconds) == {'foo'}
+        assert stats.crossreffed_class_count == 1
+
+    def test_crossreffed_keys_counted_once(self):
+        """Crossreffed classes with a cache key must be counted once
+        per activation of the stats, and those without one every time.
+        """
+        stats = GatherStats()
+        with _activate_stats(stats):
+            _count_crossreffed_class('foo')
+            _count_crossreffed_class('foo')
+            _count_crossreffed_class()
+            _count_crossreffed_class()
+        with _activate_stats(stats):
+            _count_crossreffed_class('foo')
+
+        assert stats.crossreffed_class_count == 4
+
+    def test_accumulates(self):
+        """Recording the same phase repeatedly must accumulate the
+        timings instead of replacing them.
+        """
+        stats = GatherStats()
+        with _activate_stats(stats):
+            for _ in range(3):
+                with _record_phase(GatherPhase.SUMMARIZATION, 'foo'):
+                    sum(range(10_000))
+
+        timing = stats.phase_timings[GatherPhase.SUMMARIZATION]
+        assert timing.wall_seconds > 0
+        assert stats.module_summarization_seconds['foo'] == (
+            timing.wall_seconds)
+
+
+class TestGatherStats:
+
+    def test_merge(self):
+        """Merging stats must sum timings and counts, and combine the
+        per-module timings.
+        """
+        stats1 = GatherStats(
+            phase_timings={GatherPhase.EXTRACTION: PhaseTiming(1, 2)},
+            module_extraction_seconds={'foo': 1},
+            crossreffed_class_count=3,
+            summary_counts={'ClassSummary': 1})
+        stats2 = GatherStats(
+            phase_timings={
+                GatherPhase.EXTRACTION: PhaseTiming(1, 1),
+                GatherPhase.FILTERING: PhaseTiming(1, 1)},
+            module_extraction_seconds={'bar': 1},
+            crossreffed_class_count=4,
+            summary_counts={'ClassSummary': 2, 'ModuleSummary': 1})
+
+        stats1.merge(stats2)
+
+        assert stats1.phase_timings == {
+            GatherPhase.EXTRACTION: PhaseTiming(2, 3),
+            GatherPhase.FILTERING: PhaseTiming(1, 1)}
+        assert stats1.module_extraction_seconds == {'foo': 1, 'bar': 1}
+        assert stats1.crossreffed_class_count == 7
+        assert stats1.summary_counts == {
+            'ClassSummary': 3, 'ModuleSummary': 1}
+        assert stats1.total_timing == PhaseTiming(3, 4)
+
+    def test_as_dict(self):
+        """The dict version of the stats must be JSON-serializable."""
+        stats = GatherStats(
+            phase_timings={GatherPhase.EXTRACTION: PhaseTiming(1, 2)},
+            module_extraction_seconds={'foo': 1},
+            summary_counts={'ClassSummary': 1})
+
+        roundtripped = json.loads(json.dumps(stats.as_dict()))
+        assert roundtripped['phase_timings'] == {
+            'extraction': {'wall_seconds': 1, 'cpu_seconds': 2}}
+        assert roundtripped['summary_counts'] == {'ClassSummary': 1}
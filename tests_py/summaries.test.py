@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import inspect
 from types import ModuleType
 from types import SimpleNamespace
 from typing import cast
@@ -13,6 +14,7 @@ from docnote_extract.summaries import ClassSummary
 from docnote_extract.summaries import CrossrefSummary
 from docnote_extract.summaries import ModuleSummary
 from docnote_extract.summaries import ObjClassification
+from docnote_extract.summaries import ObjKind
 from docnote_extract.summaries import SummaryBase
 from docnote_extract.summaries import VariableSummary
 
@@ -61,3 +63,74 @@ class TestObjClassification:
         """
         classification = ObjClassification.from_obj(src_obj)
         assert classification.get_summary_class() is expected_retval
+
+    @pytest.mark.parametrize(
+        'src_obj',
+        [
+            FakeClass,
+            fake_coro_gen,
+            fake_coro,
+            fake_module,
+            fake_func,
+            fake_gen,
+            object(),
+            FakeClass.__add__,
+            FakeClass().instancemethod,
+            FakeClass.__dict__['classmethod_'],
+            int.__add__,
+            (1).__add__,])
+    def test_matches_inspect(self, src_obj):
+        """The classification must match the corresponding inspect
+        predicates, even though most of it is cached by type.
+        """
+        classification = ObjClassification.from_obj(src_obj)
+
+        assert classification.is_reftype is False
+        assert classification.has_traversals is None
+        assert classification.is_class == inspect.isclass(src_obj)
+        assert classification.is_function == inspect.isfunction(src_obj)
+        assert classification.is_generator_function == (
+            inspect.isgeneratorfunction(src_obj))
+        assert classification.is_coroutine_function == (
+            inspect.iscoroutinefunction(src_obj))
+        assert classification.is_async_generator_function == (
+            inspect.isasyncgenfunction(src_obj))
+        assert classification.is_method_wrapper == (
+            inspect.ismethodwrapper(src_obj))
+        assert classification.is_method_descriptor == (
+            inspect.ismethoddescriptor(src_obj))
+        assert classification.is_callable == callable(src_obj)
+
+    def test_legacy_constructor(self):
+        """Constructing a classification from the individual booleans
+        must still work, and must be equivalent to using kinds.
+        """
+        classification = ObjClassification(
+            is_reftype=True,
+            has_traversals=None,
+            is_class=True,
+            is_callable=False)
+
+        assert classification == ObjClassification(
+            ObjKind.REFTYPE | ObjKind.CLASS)
+        assert classification.is_reftype
+        assert classification.is_class
+        assert not classification.is_callable
+        assert classification.has_traversals is False
+        assert classification.get_summary_class() is CrossrefSummary
+
+    def test_per_object_kinds_not_cached(self):
+        """Functions share a type, but whether or not they're
+        generators or coroutines depends on the function itself, so
+        that must not be cached.
+        """
+        func_classification = ObjClassification.from_obj(fake_func)
+        gen_classification = ObjClassification.from_obj(fake_gen)
+        coro_classification = ObjClassification.from_obj(fake_coro)
+
+        assert not func_classification.kinds & ObjKind.GENERATOR_FUNCTION
+        assert gen_classification.kinds & ObjKind.GENERATOR_FUNCTION
+        assert coro_classification.is_async
+        assert not gen_classification.is_async
+        assert func_classification.is_function
+        assert gen_classification.is_function
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from docnote_extract.telemetry import ExtractionTrace
+from docnote_extract.telemetry import TraceEvent
+from docnote_extract.telemetry import _activate_trace
+from docnote_extract.telemetry import _count_tracking_getattr
+from docnote_extract.telemetry import _get_active_trace
+from docnote_extract.telemetry import _record_instant
+from docnote_extract.telemetry import _record_stubbed_name
+from docnote_extract.telemetry import _trace_span
+
+
+class TestRecording:
+
+    def test_inactive(self):
+        """Recording without an active trace must be a no-op."""
+        assert _get_active_trace() is None
+        _record_instant('hook', 'find_spec', fullname='foo')
+        with _trace_span('hook', 'exec_tracked', fullname='foo'):
+            pass
+        _record_stubbed_name('foo', 'Bar')
+        _count_tracking_getattr('foo')
+
+    def test_active(self):
+        """Recording with an active trace must add instant and complete
+        events (with their args), record the distinct stubbed names,
+        and count tracking attribute accesses.
+        """
+        trace = ExtractionTrace()
+        with _activate_trace(trace):
+            _record_instant('hook', 'find_spec', fullname='foo')
+            with _trace_span('hook', 'exec_tracked', fullname='bar'):
+                pass
+            _record_stubbed_name('foo', 'Bar')
+            _record_stubbed_name('foo', 'Bar')
+            _record_stubbed_name('foo', 'Baz')
+            _count_tracking_getattr('bar')
+            _count_tracking_getattr('bar')
+
+        assert _get_active_trace() is None
+        instant, span = trace.events
+        assert instant.name == 'find_spec'
+        assert instant.duration_us is None
+        assert instant.args == {'fullname': 'foo'}
+        assert span.name == 'exec_tracked'
+        assert span.duration_us is not None
+        assert span.timestamp_us >= instant.timestamp_us
+        assert trace.stubbed_names == {'foo': {'Bar', 'Baz'}}
+        assert trace.tracking_getattr_counts == {'bar': 2}
+
+    def test_span_exception(self):
+        """Spans must still be recorded when their block raises, along
+        with the exception type.
+        """
+        trace = ExtractionTrace()
+        with (
+            _activate_trace(trace),
+            pytest.raises(ImportError),
+            _trace_span('extraction', 'extract_firstparty'),
+        ):
+            raise ImportError()
+
+        span, = trace.events
+        assert span.args == {'exception': 'ImportError'}
+
+
+class TestExtractionTrace:
+
+    def test_merge(self):
+        """Merging traces must combine the events and stubbed names,
+        and sum the counts.
+        """
+        event1 = TraceEvent('hook', 'foo', 1, None, 1, 1)
+        event2 = TraceEvent('hook', 'bar', 2, 3, 2, 2)
+        trace1 = ExtractionTrace(
+            events=[event1],
+            stubbed_names={'foo': {'Foo'}},
+            tracking_getattr_counts={'baz': 1})
+        trace2 = ExtractionTrace(
+            events=[event2],
+            stubbed_names={'foo': {'Foo', 'Bar'}, 'bar': {'Baz'}},
+            tracking_getattr_counts={'baz': 2})
+
+        trace1.merge(trace2)
+
+        assert trace1.events == [event1, event2]
+        assert trace1.stubbed_names == {
+            'foo': {'Foo', 'Bar'}, 'bar': {'Baz'}}
+        assert trace1.tracking_getattr_counts == {'baz': 3}
+
+    def test_write_chrome_trace(self, tmp_path: Path):
+        """The written trace must be valid Chrome Trace Event JSON, with
+        the events sorted by timestamp.
+        """
+        trace = ExtractionTrace(
+            events=[
+                TraceEvent('hook', 'later', 5, 2, 1, 1, {'fullname': 'foo'}),
+                TraceEvent('hook', 'earlier', 3, None, 1, 1)],
+            stubbed_names={'foo': {'Foo', 'Bar'}})
+        trace_path = tmp_path / 'trace.json'
+        trace.write_chrome_trace(trace_path)
+
+        written = json.loads(trace_path.read_text())
+        earlier, later = written['traceEvents']
+        assert earlier['name'] == 'earlier'
+        assert earlier['ph'] == 'i'
+        assert later['ph'] == 'X'
+        assert later['dur'] == 2
+        assert later['args'] == {'fullname': 'foo'}
+        assert written['otherData']['stubbed_names'] == {
+            'foo': ['Bar', 'Foo']}